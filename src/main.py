@@ -3,142 +3,426 @@ import os
 import time
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import multiprocessing
+from functools import partial
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from src.services.binance_client import get_realtime_price, get_historical_data, execute_trade
-from src.services.transaction_manager import get_last_transaction, load_transactions, save_transactions, add_transaction, get_average_price
-from src.services.portfolio_manager import PortfolioManager
-from src.services.transaction_logger import TransactionLogger
-from src.strategies.basic_strategy import trading_decision
+from services.portfolio_manager import PortfolioManager
+from services.transaction_logger import TransactionLogger
+from services.market_data import MarketDataHub
+from services.executor_runtime import ExecutorRuntime, compute_workers_for, io_workers_for
+from services.fetch_stage import FetchStage
+from services.order_slicer import volume_rate_from_candles
+from services.process_runtime import (PROCESS_WEIGHT_BUDGET, ExecutionSettings, ExecutionStack, OrderMirror, RemoteExecution,
+                                          RemoteRuntime, SharedMarketDataHub, run_execution_process, run_market_data_process)
+from services.shared_market_data import SharedMarketData
+from services.metrics import LatencyRecorder, start_metrics_server
+from services.order_history import OrderHistoryCache
+from services.reconciliation import FillReconciler
+from services.rate_limiter import RateLimiter, WEIGHT_ALL_ORDERS
+from services.scheduler import EvaluationTrigger, INTERVAL_SECONDS
+from services.state_store import StateStore
+from services.supervisor import WARM_STATE_FILE, Supervisor, WarmStateStore
+from services.symbol_state import SymbolState
+from services.valuation import ValuationService
+from strategies.basic_strategy import build_strategy_snapshot, compute_indicators
+from strategies.small_portfolio import decide_small_portfolio
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger()
 
+# Símbolos negociados no mesmo processo (ex.: TRADING_SYMBOLS=BTCUSDT,ETHUSDT)
+SYMBOLS = [symbol.strip().upper() for symbol in os.getenv('TRADING_SYMBOLS', 'BTCUSDT').split(',') if symbol.strip()]
+MAX_CONCURRENT_DECISIONS = int(os.getenv('MAX_CONCURRENT_DECISIONS', '4'))
+IO_WORKERS = int(os.getenv('IO_WORKERS', '0'))  # Threads de I/O (0: dimensionado pelo número de símbolos)
+COMPUTE_WORKERS = int(os.getenv('COMPUTE_WORKERS', '-1'))  # Processos de cálculo (-1: automático; 0: cálculo no pool de I/O)
+CYCLE_INTERVAL = 10  # Segundos de espera antes de tentar novamente após uma falha
+CANDLE_INTERVAL = '30m'  # Intervalo dos candles usados pela estratégia
+TRIGGER_MOVE_BPS = float(os.getenv('TRIGGER_MOVE_BPS', '20'))  # Variação que dispara uma reavaliação
+HEARTBEAT_SECONDS = float(os.getenv('HEARTBEAT_SECONDS', '300'))  # Reavaliação periódica sem eventos
+PRICE_POLL_INTERVAL = float(os.getenv('PRICE_POLL_INTERVAL', '2'))  # Polling de preços em lote
+METRICS_PORT = int(os.getenv('METRICS_PORT', '8765'))  # Porta do endpoint local de métricas (0 desativa)
+EXCEL_EXPORT_INTERVAL = float(os.getenv('EXCEL_EXPORT_INTERVAL', '300'))  # Regeneração periódica do Excel
+RECONCILE_INTERVAL = float(os.getenv('RECONCILE_INTERVAL', '300'))  # Comparação com os saldos da corretora
+ORDER_HISTORY_TTL = float(os.getenv('ORDER_HISTORY_TTL', '60'))  # Validade do resumo de ordens da corretora
+SLIPPAGE_TOLERANCE = float(os.getenv('SLIPPAGE_TOLERANCE', '0.005'))  # Desvio máximo entre decisão e mercado no envio
+ORDER_MODE = os.getenv('ORDER_MODE', 'market').lower()  # 'market' (taker) ou 'maker' (LIMIT_MAKER com complemento a mercado)
+MAKER_DEADLINE = float(os.getenv('MAKER_DEADLINE', '60'))  # Tempo máximo como maker antes de enviar a mercado
+MAKER_REPRICE_INTERVAL = float(os.getenv('MAKER_REPRICE_INTERVAL', '2'))  # Verificação/reposicionamento da ordem aberta
+PRICE_DEADLINE = float(os.getenv('PRICE_DEADLINE', '5'))  # Prazo (s) da consulta de preço no tick
+HISTORICAL_DEADLINE = float(os.getenv('HISTORICAL_DEADLINE', '15'))  # Prazo (s) da consulta de candles no tick
+ORDER_HISTORY_DEADLINE = float(os.getenv('ORDER_HISTORY_DEADLINE', '10'))  # Prazo (s) da atualização do histórico de ordens
+USER_STREAM = os.getenv('USER_STREAM', '0') == '1'  # Eventos de execução pelo user data stream (além da consulta)
+DEPTH_STREAM = os.getenv('DEPTH_STREAM', '0') == '1'  # Book local por snapshot + stream de diferenças (em vez da consulta de bid/ask)
+EXECUTION_ALGO = os.getenv('EXECUTION_ALGO', 'none').lower()  # Fatiamento da ordem: 'none', 'twap', 'pov' ou 'iceberg'
+SLICE_DURATION = float(os.getenv('SLICE_DURATION', '300'))  # Horizonte do fatiamento
+SLICE_COUNT = int(os.getenv('SLICE_COUNT', '5'))  # Ordens-filhas no TWAP
+PARTICIPATION_RATE = float(os.getenv('PARTICIPATION_RATE', '0.1'))  # Fração do volume do mercado no modo 'pov'
+SLICE_MIN_NOTIONAL = float(os.getenv('SLICE_MIN_NOTIONAL', '0'))  # Ordens menores vão direto, sem fatiamento
+
+WARM_START = os.getenv('WARM_START', '1') == '1'  # Restaura o estado em memória do último snapshot na partida
+WARM_STATE_INTERVAL = float(os.getenv('WARM_STATE_INTERVAL', '30'))  # Intervalo entre snapshots do estado em memória
+WARM_STATE_MAX_AGE = float(os.getenv('WARM_STATE_MAX_AGE', '600'))  # Snapshots mais antigos são ignorados
+RESTART_DELAY = float(os.getenv('RESTART_DELAY', '0.5'))  # Espera inicial antes de reiniciar a sessão após uma falha
+
+# 'single': tudo em um processo; 'multi': dados de mercado, estratégia e execução em processos separados
+PROCESS_MODE = os.getenv('PROCESS_MODE', 'single').lower()
+EXECUTION_WARM_STATE_FILE = os.path.join(os.path.dirname(WARM_STATE_FILE), 'warm_state_execution.pickle')
+
+MAX_DRAWDOWN = float(os.getenv('MAX_DRAWDOWN', '0')) or None  # Queda máxima do patrimônio que pausa as operações (0 desativa)
+
 # Instancia o gerenciador de portfólio e o logger de transações
-portfolio_manager = PortfolioManager()
+portfolio_manager = PortfolioManager(max_drawdown=MAX_DRAWDOWN)
 transaction_logger = TransactionLogger(initial_balance=portfolio_manager.initial_balance)
 
-# Carrega as transações salvas
-transactions = load_transactions()
+# Aplica as execuções reais ao portfólio e corrige desvios em relação aos saldos da corretora
+reconciler = FillReconciler(portfolio_manager)
 
+# Latência por etapa do ciclo (tick-to-trade)
+latency = LatencyRecorder()
 
-save_transactions(transactions)  # Garante que o arquivo JSON é criado ao iniciar
+async def safe_execute_trade(decision, execution):
+    """
+    Executa a ordem da decisão pelo roteador de ordens. As novas tentativas ficam no ExecutionEngine,
+    que reenvia com o mesmo clientOrderId somente após confirmar que a ordem não chegou à corretora.
+    """
+    return await execution.submit(decision)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(ConnectionError))
-async def safe_get_realtime_price(asset, executor):
-    """Obtém o preço atual do ativo de forma segura, com tentativas automáticas em caso de falha."""
-    return await asyncio.get_event_loop().run_in_executor(executor, get_realtime_price, asset)
+def save_portfolio_snapshot(store):
+    """Grava o estado atual do portfólio no StateStore."""
+    store.save_portfolio_snapshot(portfolio_manager.cash_balance, portfolio_manager.profit_loss_cumulative, portfolio_manager.assets)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(ConnectionError))
-async def safe_get_historical_data(asset, executor):
-    """Obtém os dados históricos do ativo de forma segura, com tentativas automáticas em caso de falha."""
-    return await asyncio.get_event_loop().run_in_executor(executor, get_historical_data, asset)
+def apply_order_update(states, triggers, market_data, valuation, order_history, tracked, fill, previous_status):
+    """
+    Listener do OrderTracker: aplica cada incremento de execução ao portfólio (com comissões), ao
+    histórico do símbolo e ao ledger, uma única vez por execução.
+    """
+    state = states.get(tracked.symbol)
+    if state is None or fill is None:
+        return
+    with latency.span('ledger_write'):
+        # Custo médio antes da execução: a venda que zera a posição remove o ativo do portfólio
+        average_cost = portfolio_manager.assets.get(state.base_asset, {}).get('average_cost')
+        reconciler.apply_fill(fill, state.base_asset, market_data.prices)
+        if not fill.quantity:
+            # Só comissões de uma execução cuja quantidade já foi aplicada (ex.: evento após a consulta)
+            save_portfolio_snapshot(state.store)
+            return
+        decision = tracked.decision or {'asset': tracked.symbol, 'type': tracked.side, 'reason': 'Execução informada pela corretora'}
+        executed = dict(decision, quantity=fill.quantity, price=fill.average_price)
+        state.record_trade('buys' if tracked.side == 'buy' else 'sells', executed['price'], executed['quantity'])
+        transaction_logger.record_transaction(executed, portfolio_manager, valuation.asset_prices(), average_cost=average_cost)
+        save_portfolio_snapshot(state.store)
+    logger.info(f"[{tracked.symbol}] Transação registrada no histórico ({tracked.status}).")
+    order_history.invalidate(tracked.symbol)  # Contagens consecutivas e médias mudaram
+    triggers[tracked.symbol].on_fill()
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(ConnectionError))
-async def safe_execute_trade(asset, quantity, side, executor):
-    """Executa a ordem de trade de forma segura, com tentativas automáticas em caso de falha."""
-    return await asyncio.get_event_loop().run_in_executor(executor, execute_trade, asset, quantity, side)
+async def prefetch_order_history(order_history, asset, rate_limiter, executor):
+    """Atualiza o resumo do histórico de ordens do símbolo se o cache tiver expirado."""
+    if order_history.is_stale(asset):
+        await rate_limiter.acquire(WEIGHT_ALL_ORDERS)
+        await asyncio.get_running_loop().run_in_executor(executor, order_history.get, asset)
 
-async def realtime_trading_bot():
-    asset = 'BTCUSDT'
-    executor = ThreadPoolExecutor(max_workers=3)
+async def trade_symbol(state, trigger, market_data, valuation, order_history, execution, order_tracker, rate_limiter, decision_slots, runtime,
+                       fetch_stage, start_delay=0.0):
+    """
+    Loop de negociação de um único símbolo, executado como uma task no event loop compartilhado.
+    Cada avaliação é disparada pelo 'trigger' (fechamento de candle, variação de preço, fill ou heartbeat).
+    """
+    asset = state.symbol
+    loop = asyncio.get_running_loop()
 
+    # Distribui os ciclos dos símbolos ao longo do intervalo para não concentrar as requisições
+    await asyncio.sleep(start_delay)
 
-    try:
-        while True:
-            # Exibir saldo atual de BTC e USD
-            btc_balance = portfolio_manager.get_balance('BTC')
-            usdt_balance = portfolio_manager.get_cash_balance()
-            logger.info(f"Saldo atual: {btc_balance:.6f} BTC, ${usdt_balance:.2f} USDT")
+    while True:
+        tick_start = time.perf_counter()
 
-            # Obter o preço atual do ativo
-            try:
-                price = await safe_get_realtime_price(asset, executor)
-                if price is None:
-                    logger.warning(f"Não foi possível obter o preço atual para {asset}. Tentando novamente...")
-                    await asyncio.sleep(5)
-                    continue
-                logger.info(f"Preço atual de {asset}: ${price:.2f}")
-            except Exception as e:
-                logger.error(f"Erro ao obter preço em tempo real após várias tentativas: {e}")
-                await asyncio.sleep(10)
-                continue
+        # Exibir saldo atual do ativo e de USDT
+        asset_balance = portfolio_manager.get_balance(state.base_asset)
+        usdt_balance = portfolio_manager.get_cash_balance()
+        logger.info(f"[{asset}] Saldo atual: {asset_balance:.6f} {state.base_asset}, ${usdt_balance:.2f} USDT")
 
-            # Analisar dados históricos
-            try:
-                logger.info(f"Analisando dados históricos para {asset}...")
-                df = await safe_get_historical_data(asset, executor)
-                if df is None or df.empty:
-                    logger.warning("Dados históricos não disponíveis ou DataFrame vazio. Tentando novamente em breve...")
-                    await asyncio.sleep(10)
-                    continue
-            except Exception as e:
-                logger.error(f"Erro ao obter dados históricos após várias tentativas: {e}")
-                await asyncio.sleep(10)
+        # Coleta do tick: preço (cache em lote), candles e histórico de ordens em paralelo, cada um com seu prazo
+        fetched = await fetch_stage.run({
+            'price': partial(market_data.get_price, asset),
+            'historical': partial(market_data.get_historical_data, asset, CANDLE_INTERVAL),
+            'order_history': partial(prefetch_order_history, order_history, asset, rate_limiter, runtime.io)
+        })
+        price = fetched.get('price')
+        df = fetched.get('historical')
+        if df is None and fetched.failed('historical'):
+            # Candles do mesmo intervalo obtidos antes (ou restaurados do snapshot) ainda servem para decidir
+            df = market_data.cached_candles(asset, INTERVAL_SECONDS[CANDLE_INTERVAL])
+        if price is None:
+            logger.warning(f"Não foi possível obter o preço atual para {asset}. Tentando novamente...")
+            await asyncio.sleep(5)
+            continue
+        if df is None or df.empty:
+            logger.warning(f"[{asset}] Dados históricos não disponíveis ou DataFrame vazio. Tentando novamente em breve...")
+            await asyncio.sleep(CYCLE_INTERVAL)
+            continue
+        logger.info(f"Preço atual de {asset}: ${price:.2f}")
+        nav = valuation.value()
+        logger.info(f"[{asset}] Valor do portfólio a mercado: ${nav.nav:.2f} (exposição {nav.exposure:.1%}, PnL não realizado ${nav.unrealized_pnl:.2f})")
+        set_volume_rate = getattr(execution, 'set_volume_rate', None)  # Somente o fatiamento usa o volume do mercado
+        if set_volume_rate is not None:
+            set_volume_rate(asset, volume_rate_from_candles(df, INTERVAL_SECONDS[CANDLE_INTERVAL]))
+
+        # Obter decisão de negociação
+        try:
+            # Toda a I/O fica no runner: coleta o snapshot, decide de forma pura e aplica o delta.
+            # Os indicadores (pandas) rodam no pool de processos e a montagem do snapshot no pool de I/O;
+            # a decisão é pura e leva microssegundos, então fica no event loop
+            with latency.span('indicators'):
+                indicators = await runtime.compute(compute_indicators, df[['close', 'volume']])
+            # 'can_trade' mede a montagem do RiskContext (ordens da corretora em cache e contadores)
+            async with decision_slots:
+                if order_history.is_stale(asset):  # A coleta do tick falhou ou estourou o prazo
+                    await rate_limiter.acquire(WEIGHT_ALL_ORDERS)
+                with latency.span('can_trade'):
+                    snapshot = await loop.run_in_executor(runtime.io, partial(
+                        build_strategy_snapshot, asset, price, portfolio_manager, df, state.history,
+                        last_buy=state.last_buy, last_sell=state.last_sell, block_counts=state.block_counts(),
+                        order_history=order_history, indicators=indicators
+                    ))
+            with latency.span('trading_decision'):
+                decision, delta = decide_small_portfolio(snapshot)
+            with latency.span('state_write'):
+                state.apply_delta(delta)
+            trigger.mark_evaluated(price)
+            if not isinstance(decision, dict):
+                logger.error(f"[{asset}] A decisão retornada não é um dicionário. Valor recebido: {decision}")
+                await asyncio.sleep(CYCLE_INTERVAL)
                 continue
+        except Exception as e:
+            logger.error(f"[{asset}] Erro ao calcular decisão de negociação: {e}")
+            await asyncio.sleep(CYCLE_INTERVAL)
+            continue
 
-            # Obter decisão de negociação
+        # Executar a negociação com base na decisão
+        if decision.get('type') in ['buy', 'sell']:
+            logger.info(f"Decisão: {decision['type'].upper()} {decision['quantity']} {asset} a ${decision['price']:.2f}")
             try:
-                decision = trading_decision(asset, price, portfolio_manager, df)
-                if not isinstance(decision, dict):
-                    logger.error(f"A decisão retornada não é um dicionário. Valor recebido: {decision}")
-                    await asyncio.sleep(10)
-                    continue
+                with latency.span('execute_trade'):
+                    result = await safe_execute_trade(decision, execution)
+                if result:
+                    # As execuções chegam ao portfólio e ao ledger pelos listeners do OrderTracker
+                    tracked = order_tracker.track(result, decision)
+                    if tracked.is_open:
+                        logger.info(f"[{asset}] Ordem {tracked.client_order_id} aberta ({tracked.status}); acompanhamento em segundo plano.")
+                    elif not tracked.executed:
+                        logger.warning(f"[{asset}] Ordem encerrada sem quantidade executada ({tracked.status}).")
+                else:
+                    logger.error(f"[{asset}] Erro ao executar a transação na Binance após várias tentativas.")
             except Exception as e:
-                logger.error(f"Erro ao calcular decisão de negociação: {e}")
-                await asyncio.sleep(10)
-                continue
+                logger.error(f"[{asset}] Erro ao executar ordem após várias tentativas: {e}")
+        else:
+            logger.info(f"[{asset}] Nenhuma transação realizada (hold).")
+        latency.record('tick', (time.perf_counter() - tick_start) * 1000)
 
-            # Executar a negociação com base na decisão
-            if decision.get('type') in ['buy', 'sell']:
-                logger.info(f"Decisão: {decision['type'].upper()} {decision['quantity']} {asset} a ${decision['price']:.2f}")
-                try:
-                    result = await safe_execute_trade(decision['asset'], decision['quantity'], decision['type'].upper(), executor)
-                    if result:
-                        # Registrar transação nas listas de 5 últimos
-                        add_transaction(transactions, 'buys' if decision['type'] == 'buy' else 'sells', decision['price'])
-
-                        # Atualizar portfólio e salvar transações
-                        portfolio_manager.update_balance(
-                            asset=decision['asset'],
-                            quantity=decision['quantity'],
-                            price=decision['price'],
-                            transaction_type=decision['type']
-                        )
-                        save_transactions(transactions)  # Salva as transações atualizadas
-                        transaction_logger.record_transaction(decision, portfolio_manager, {"price": decision['price']})
-                        logger.info("Transação registrada no histórico.")
-                    else:
-                        logger.error("Erro ao executar a transação na Binance após várias tentativas.")
-                except Exception as e:
-                    logger.error(f"Erro ao executar ordem após várias tentativas: {e}")
-            else:
-                logger.info("Nenhuma transação realizada (hold).")
+        # Aguarda o próximo evento relevante em vez de um intervalo fixo
+        logger.info(f"[{asset}] Aguardando o próximo gatilho de avaliação...\n")
+        reason = await trigger.wait()
+        logger.info(f"[{asset}] Avaliação disparada por: {reason}")
 
-            # Pausa entre os ciclos de verificação
-            logger.info("Aguardando o próximo ciclo de verificação...\n")
-            await asyncio.sleep(10)
+def execution_settings():
+    """Configuração do envio de ordens a partir das variáveis de ambiente."""
+    return ExecutionSettings(
+        slippage_tolerance=SLIPPAGE_TOLERANCE, order_mode=ORDER_MODE, maker_deadline=MAKER_DEADLINE,
+        maker_reprice_interval=MAKER_REPRICE_INTERVAL, execution_algo=EXECUTION_ALGO,
+        slicer_options={'duration': SLICE_DURATION, 'slices': SLICE_COUNT, 'participation_rate': PARTICIPATION_RATE,
+                        'min_notional': SLICE_MIN_NOTIONAL},
+        user_stream=USER_STREAM, depth_stream=DEPTH_STREAM, candle_seconds=INTERVAL_SECONDS[CANDLE_INTERVAL],
+        price_ttl=PRICE_POLL_INTERVAL, warm_state_file=EXECUTION_WARM_STATE_FILE if WARM_START else None,
+        warm_state_max_age=WARM_STATE_MAX_AGE, warm_state_interval=WARM_STATE_INTERVAL
+    )
+
+async def realtime_trading_bot(symbols=None, remote=None):
+    """
+    Loop principal de negociação. Com 'remote' (RemoteRuntime, modo multiprocesso) os dados de mercado
+    vêm da memória compartilhada e as ordens são enviadas e acompanhadas pelo processo de execução.
+    """
+    symbols = symbols or SYMBOLS
+    # I/O bloqueante em threads e cálculo em processos; os processos são criados já aqui, antes de
+    # qualquer thread existir neste processo
+    runtime = ExecutorRuntime(IO_WORKERS or io_workers_for(symbols),
+                              compute_workers_for(symbols) if COMPUTE_WORKERS < 0 else COMPUTE_WORKERS)
+    runtime.start()
+    transaction_logger.export_executor = runtime  # O Excel é gerado nos processos criados acima
+    executor = runtime.io
+    loop = asyncio.get_running_loop()
+
+    # Infraestrutura compartilhada: limite de peso, dados de mercado e vagas de decisão
+    if remote is None:
+        rate_limiter = RateLimiter()
+        market_data = MarketDataHub(executor, rate_limiter, price_ttl=PRICE_POLL_INTERVAL)
+        stack = ExecutionStack(market_data, executor, rate_limiter, execution_settings())
+        order_router, order_tracker = stack.router, stack.tracker
+    else:
+        rate_limiter = RateLimiter(max_weight=PROCESS_WEIGHT_BUDGET)  # Histórico de ordens e reconciliação
+        market_data = SharedMarketDataHub(remote.shared, price_ttl=PRICE_POLL_INTERVAL)
+        stack = None
+        order_tracker = OrderMirror()
+        order_router = RemoteExecution(remote, order_tracker)
+        order_router.start(loop)
+    decision_slots = asyncio.Semaphore(MAX_CONCURRENT_DECISIONS)
+    valuation = ValuationService(portfolio_manager, market_data)
+    order_history = OrderHistoryCache(ttl=ORDER_HISTORY_TTL)
+    fetch_stage = FetchStage({'price': PRICE_DEADLINE, 'historical': HISTORICAL_DEADLINE, 'order_history': ORDER_HISTORY_DEADLINE},
+                             latency=latency)
+
+    store = StateStore()
+    states = [SymbolState(symbol, store=store) for symbol in symbols]
+    triggers = {}
+    for state in states:
+        trigger = EvaluationTrigger(
+            state.symbol, candle_seconds=INTERVAL_SECONDS[CANDLE_INTERVAL],
+            move_threshold_bps=TRIGGER_MOVE_BPS, heartbeat_seconds=HEARTBEAT_SECONDS
+        )
+        market_data.subscribe(state.symbol, trigger.on_price)
+        triggers[state.symbol] = trigger
+    order_tracker.add_listener(partial(apply_order_update, {state.symbol: state for state in states}, triggers,
+                                       market_data, valuation, order_history))
+
+    # Partida a quente: caches, contextos de envio, ordens abertas e custo das posições do último snapshot
+    # (no modo multiprocesso, contextos e ordens abertas ficam no snapshot do processo de execução)
+    warm_state = WarmStateStore(max_age=WARM_STATE_MAX_AGE)
+    warm_components = {'market_data': market_data, 'order_history': order_history, 'portfolio': portfolio_manager}
+    if stack is not None:
+        warm_components.update(execution=stack.execution, orders=stack.tracker)
+    if WARM_START:
+        warm_state.restore(warm_components)
+
+    if stack is not None:
+        stack.start_streams(symbols, loop)
+        await stack.warm_up(symbols)
+
+    async def session():
+        """Tasks de uma sessão de negociação; os componentes acima sobrevivem aos reinícios do Supervisor."""
+        tasks = [asyncio.create_task(market_data.watch_prices(PRICE_POLL_INTERVAL), name="watch-prices")]
+        tasks.append(asyncio.create_task(runtime.watch_loop_lag(), name="loop-lag"))
+        tasks += [asyncio.create_task(state.journal.run_maintenance(), name=f"journal-{state.symbol}") for state in states]
+        tasks += [asyncio.create_task(state.block_counters.run_flusher(), name=f"counters-{state.symbol}") for state in states]
+        tasks.append(asyncio.create_task(transaction_logger.run_excel_exporter(EXCEL_EXPORT_INTERVAL), name="excel-export"))
+        if stack is not None:
+            tasks += stack.create_tasks()
+        tasks.append(asyncio.create_task(reconciler.run(executor, rate_limiter, RECONCILE_INTERVAL), name="reconciliation"))
+        tasks.append(asyncio.create_task(warm_state.run(warm_components, executor, WARM_STATE_INTERVAL), name="warm-state"))
+        tasks += [
+            asyncio.create_task(
+                trade_symbol(state, triggers[state.symbol], market_data, valuation, order_history, order_router, order_tracker, rate_limiter, decision_slots, runtime,
+                             fetch_stage, start_delay=i * CYCLE_INTERVAL / len(states)),
+                name=f"trade-{state.symbol}"
+            )
+            for i, state in enumerate(states)
+        ]
+        logger.info(f"Iniciando negociação para {len(states)} símbolo(s): {', '.join(symbols)}")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    supervisor = Supervisor(session, restart_delay=RESTART_DELAY)
+    metrics_server = None
+    process_watch = None
+    try:
+        if METRICS_PORT:
+            providers = {
+                'latency': latency.summary,
+                'reconciliation': reconciler.summary,
+                'valuation': valuation.summary,
+                'order_history': order_history.summary,
+                'fetch': fetch_stage.summary,
+                'executors': runtime.summary,
+                'orders': order_tracker.summary,
+                'supervisor': supervisor.summary,
+                'warm_state': warm_state.summary,
+                'risk': lambda: portfolio_manager.risk_snapshot.to_dict(),
+                'trades': lambda: {state.symbol: state.history.summary() for state in states}
+            }
+            if stack is not None:
+                providers.update(stack.metrics())
+            else:
+                providers['processes'] = order_router.summary
+            metrics_server = await start_metrics_server(providers, port=METRICS_PORT)
+        if remote is not None:
+            # Sem os processos de dados de mercado e de execução o bot não pode seguir operando
+            process_watch = asyncio.create_task(order_router.watch_processes(asyncio.current_task().cancel), name="process-watch")
+        await supervisor.run()
 
     except asyncio.CancelledError:
         logger.info("Cancelamento detectado. Finalizando o bot com segurança...")
     except KeyboardInterrupt:
         logger.info("Interrupção do usuário detectada. Finalizando o bot...")
-    except Exception as e:
-        logger.critical(f"Erro inesperado no bot: {e}. Tentando reiniciar o bot em 30 segundos...")
-        await asyncio.sleep(30)
-        await realtime_trading_bot()
     finally:
+        if process_watch is not None:
+            process_watch.cancel()
+        try:
+            warm_state.save(warm_components)
+        except Exception as e:
+            logger.error(f"Erro ao gravar o snapshot de estado no encerramento: {e}")
+        for state in states:
+            state.close()
+        save_portfolio_snapshot(store)
+        store.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if stack is not None:
+            stack.stop_streams()
+        latency.dump()
         transaction_logger.export_to_excel()
         logger.info("Histórico salvo no Excel.")
-        executor.shutdown(wait=True)
-        logger.info("ThreadPoolExecutor encerrado.")
+        runtime.shutdown(wait=True)
+        logger.info("Pools de I/O e de cálculo encerrados.")
+
+def run_multiprocess(symbols=None):
+    """
+    Modo multiprocesso: dados de mercado, estratégia e execução em processos separados. O processo de
+    dados de mercado escreve preços e candles na memória compartilhada; a estratégia (este processo,
+    com portfólio, ledger e Excel) lê de lá e envia as decisões por uma fila ao processo de execução,
+    que devolve as ordens e suas mudanças de estado por outra fila. Um flush lento do Excel ou um
+    cálculo pesado da estratégia não atrasa mais o envio e o acompanhamento das ordens.
+    """
+    symbols = symbols or SYMBOLS
+    # fork: os filhos herdam os módulos já carregados sem executar de novo a inicialização deste módulo
+    # (portfólio, ledger); os processos são criados antes de qualquer event loop ou thread existir
+    context = multiprocessing.get_context('fork')
+    shared = SharedMarketData(symbols)
+    decisions, results = context.SimpleQueue(), context.SimpleQueue()
+    stop = context.Event()
+    processes = {
+        'market-data': context.Process(target=run_market_data_process, name='market-data',
+                                       args=(shared, symbols, CANDLE_INTERVAL, PRICE_POLL_INTERVAL, stop)),
+        'execution': context.Process(target=run_execution_process, name='execution',
+                                     args=(shared, symbols, decisions, results, execution_settings(), stop))
+    }
+    for process in processes.values():
+        process.start()
+    try:
+        asyncio.run(realtime_trading_bot(symbols, remote=RemoteRuntime(shared, decisions, results, processes)))
+    finally:
+        stop.set()
+        decisions.put(None)  # Libera a thread que lê as decisões no processo de execução
+        for name, process in processes.items():
+            process.join(timeout=30)
+            if process.is_alive():
+                logger.warning(f"Processo '{name}' não encerrou a tempo; finalizando.")
+                process.terminate()
+                process.join()
+        shared.close()
+        shared.unlink()
+        logger.info("Processos de dados de mercado e de execução encerrados.")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(realtime_trading_bot())
+        if PROCESS_MODE == 'multi':
+            run_multiprocess()
+        else:
+            asyncio.run(realtime_trading_bot())
     except KeyboardInterrupt:
         logger.info("Bot finalizado pelo usuário.")
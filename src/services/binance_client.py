@@ -3,11 +3,17 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import os
 from binance.client import Client
+from binance import ThreadedWebsocketManager
+from binance.exceptions import BinanceAPIException
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from decimal import Decimal, ROUND_DOWN
+from functools import lru_cache
 import logging
+import threading
+
+from services.fixed_point import SymbolPrecision
+from services.order_submission import OrderStatusUnknown
 
 # Carregar variáveis do .env
 load_dotenv()
@@ -25,8 +31,55 @@ session = requests.Session()
 retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
 session.mount("https://", HTTPAdapter(max_retries=retries))
 
+
+class _LazyClient:
+    """
+    Cliente da Binance criado no primeiro uso. O construtor do Client faz um ping na API; criado na
+    importação, qualquer módulo que importe este (inclusive nos testes) dependeria da rede.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_client', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    object.__setattr__(self, '_client', self._factory())
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+
 # Inicializa o cliente da Binance com timeout e configuração de retry
-client = Client(API_KEY, API_SECRET, testnet=True)
+client = _LazyClient(lambda: Client(API_KEY, API_SECRET, testnet=True))
+
+# Erros da API em que a ordem pode ter sido aceita mesmo sem resposta (-1006 e -1007: "execution status unknown")
+STATUS_UNKNOWN_CODES = (-1006, -1007)
+ORDER_NOT_FOUND_CODE = -2013  # "Order does not exist"
+DEPTH_SNAPSHOT_LIMIT = 1000  # Níveis por lado no snapshot do book local
+
+
+def is_status_unknown(error):
+    """Indica se a falha de um envio deixa o resultado em aberto (timeout, queda de conexão ou erro 5xx)."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, BinanceAPIException):
+        return error.code in STATUS_UNKNOWN_CODES or error.status_code >= 500
+    return False
+
+def reset_session():
+    """
+    Abre uma nova sessão HTTP para o cliente. Obrigatório no início de um processo criado por fork:
+    as conexões keep-alive herdadas do processo pai não podem ser usadas pelos dois processos.
+    """
+    client.session = client._init_session()
 
 def get_realtime_price(symbol):
     """Obtém o preço atual em tempo real do símbolo especificado."""
@@ -40,6 +93,49 @@ def get_realtime_price(symbol):
         logger.error(f"Erro ao obter preço em tempo real para {symbol}: {e}")
         return None
 
+def get_all_prices():
+    """Obtém, em uma única chamada, o preço atual de todos os símbolos da corretora."""
+    try:
+        tickers = client.get_symbol_ticker()
+        if not isinstance(tickers, list):
+            logger.error(f"Estrutura inesperada ao obter preços em lote: {type(tickers)}")
+            return {}
+        return {ticker['symbol']: float(ticker['price']) for ticker in tickers if 'symbol' in ticker and 'price' in ticker}
+    except Exception as e:
+        logger.error(f"Erro ao obter preços em lote: {e}")
+        return {}
+
+def get_book_tickers():
+    """
+    Obtém, em uma única chamada, o melhor bid/ask de todos os símbolos com as quantidades visíveis
+    (símbolo -> (bid, ask, quantidade no bid, quantidade no ask)).
+    """
+    try:
+        tickers = client.get_orderbook_tickers()
+        if not isinstance(tickers, list):
+            logger.error(f"Estrutura inesperada ao obter book tickers: {type(tickers)}")
+            return {}
+        return {
+            ticker['symbol']: (float(ticker['bidPrice']), float(ticker['askPrice']),
+                               float(ticker.get('bidQty', 0.0)), float(ticker.get('askQty', 0.0)))
+            for ticker in tickers if 'symbol' in ticker and 'bidPrice' in ticker and 'askPrice' in ticker
+        }
+    except Exception as e:
+        logger.error(f"Erro ao obter book tickers: {e}")
+        return {}
+
+def get_depth_snapshot(symbol, limit=DEPTH_SNAPSHOT_LIMIT):
+    """Obtém o snapshot de profundidade do símbolo ({'lastUpdateId', 'bids', 'asks'}) para o book local."""
+    try:
+        depth = client.get_order_book(symbol=symbol, limit=limit)
+        if not isinstance(depth, dict) or 'lastUpdateId' not in depth:
+            logger.error(f"Estrutura inesperada ao obter profundidade de {symbol}: {type(depth)}")
+            return None
+        return depth
+    except Exception as e:
+        logger.error(f"Erro ao obter profundidade de {symbol}: {e}")
+        return None
+
 def get_historical_data(symbol, interval='30m', max_limit=1000):
     """
     Obtém até o máximo de dados históricos disponíveis para o 'symbol' e 'interval' especificados.
@@ -177,35 +273,37 @@ def get_lot_size(symbol):
         logger.error(f"Erro ao obter LOT_SIZE para {symbol}: {e}")
         return None, None
 
-def adjust_quantity(quantity, symbol):
-    """Ajusta a quantidade com base nos limites de quantidade (LOT_SIZE) do ativo."""
-    min_qty, step_size = get_lot_size(symbol)
-    if min_qty is None or step_size is None:
+@lru_cache(maxsize=None)
+def get_symbol_precision(symbol):
+    """Obtém (uma única vez por símbolo) as precisões de quantidade e preço dos filtros da corretora."""
+    exchange_info = client.get_symbol_info(symbol)
+    if not isinstance(exchange_info, dict) or 'filters' not in exchange_info:
         raise ValueError(f"Não foi possível obter LOT_SIZE para {symbol}")
+    return SymbolPrecision.from_symbol_info(exchange_info)
 
-    quantity_decimal = Decimal(quantity).quantize(Decimal(str(step_size)), rounding=ROUND_DOWN)
-    adjusted_quantity = max(min_qty, float(quantity_decimal))
-    
-    return adjusted_quantity
+def adjust_quantity(quantity, symbol):
+    """Ajusta a quantidade com base nos limites de quantidade (LOT_SIZE) do ativo (aritmética exata em ponto fixo)."""
+    return float(get_symbol_precision(symbol).adjust_quantity(quantity))
 
 
-def execute_trade(asset, quantity, side, slippage_tolerance=0.005):  # ajustado para 0.5%
+def execute_trade(asset, quantity, side, slippage_tolerance=0.005, decision_price=None):  # ajustado para 0.5%
     try:
-        quantity = adjust_quantity(quantity, asset)
+        quantity = get_symbol_precision(asset).format_quantity(quantity)
         current_price = get_realtime_price(asset)
 
         if current_price is None:
             raise ValueError(f"Preço atual não disponível para {asset}")
 
-        # Ajuste de preço com base na tolerância de slippage
+        # Slippage em relação ao preço da decisão (sem preço de decisão não há referência para comparar)
+        reference_price = decision_price or current_price
         if side.lower() == 'buy':
-            max_acceptable_price = current_price * (1 + slippage_tolerance)
+            max_acceptable_price = reference_price * (1 + slippage_tolerance)
             if current_price > max_acceptable_price:
                 logger.warning(f"Preço muito alto para compra. Evitando compra.")
                 return None
 
         elif side.lower() == 'sell':
-            min_acceptable_price = current_price * (1 - slippage_tolerance)
+            min_acceptable_price = reference_price * (1 - slippage_tolerance)
             if current_price < min_acceptable_price:
                 logger.warning(f"Preço muito baixo para venda. Evitando venda.")
                 return None
@@ -229,6 +327,142 @@ def execute_trade(asset, quantity, side, slippage_tolerance=0.005):  # ajustado
         return None
 
 
+def submit_market_order(symbol, side, quantity, client_order_id=None):
+    """
+    Envia uma ordem a mercado com a quantidade já formatada (texto exato do LOT_SIZE). Única chamada de
+    rede do envio: filtros e preço de referência vêm do contexto pré-carregado do ExecutionEngine.
+    Retorna None se a ordem foi rejeitada e levanta OrderStatusUnknown se o envio ficou sem resposta.
+    """
+    try:
+        params = {'symbol': symbol, 'side': side.upper(), 'type': 'MARKET', 'quantity': quantity, 'newOrderRespType': 'FULL'}
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
+        order = client.create_order(**params)
+        if not isinstance(order, dict):
+            logger.error(f"Ordem não é do tipo esperado: {type(order)}")
+            return None
+        logger.info(f"Ordem {side} executada com sucesso: {order}")
+        return order
+    except Exception as e:
+        if is_status_unknown(e):
+            raise OrderStatusUnknown(f"{symbol} {side} {quantity}: {e}") from e
+        logger.error(f"Erro ao executar ordem {side} para {symbol}: {e}")
+        return None
+
+
+def find_order(symbol, client_order_id):
+    """
+    Consulta uma ordem pelo clientOrderId. Retorna None se a corretora informar que ela não existe e
+    levanta OrderStatusUnknown se a consulta não for conclusiva.
+    """
+    try:
+        order = client.get_order(symbol=symbol, origClientOrderId=client_order_id)
+    except BinanceAPIException as e:
+        if e.code == ORDER_NOT_FOUND_CODE:
+            return None
+        raise OrderStatusUnknown(f"{symbol} {client_order_id}: {e}") from e
+    except Exception as e:
+        raise OrderStatusUnknown(f"{symbol} {client_order_id}: {e}") from e
+    if not isinstance(order, dict):
+        raise OrderStatusUnknown(f"{symbol} {client_order_id}: resposta inesperada {type(order)}")
+    return order
+
+
+def find_order_in_history(symbol, client_order_id, start_time):
+    """
+    Procura a ordem pelo clientOrderId no histórico (allOrders) a partir de 'start_time' (ms). Confirma
+    a ausência informada por find_order: uma ordem já executada e encerrada também aparece aqui.
+    Retorna None se ela não estiver no histórico e levanta OrderStatusUnknown se a consulta falhar.
+    """
+    try:
+        orders = client.get_all_orders(symbol=symbol, startTime=int(start_time))
+    except Exception as e:
+        raise OrderStatusUnknown(f"{symbol} {client_order_id}: {e}") from e
+    if not isinstance(orders, list):
+        raise OrderStatusUnknown(f"{symbol} {client_order_id}: resposta inesperada {type(orders)}")
+    return next((order for order in orders if order.get('clientOrderId') == client_order_id), None)
+
+
+def submit_limit_maker_order(symbol, side, quantity, price, client_order_id=None):
+    """
+    Envia uma ordem LIMIT_MAKER (post-only): a corretora a rejeita se fosse executar imediatamente
+    como taker. Retorna None em caso de rejeição e levanta OrderStatusUnknown se o envio ficou sem
+    resposta (a ordem pode estar no book).
+    """
+    try:
+        params = {'symbol': symbol, 'side': side.upper(), 'type': 'LIMIT_MAKER', 'quantity': quantity, 'price': price}
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
+        order = client.create_order(**params)
+        if not isinstance(order, dict):
+            logger.error(f"Ordem não é do tipo esperado: {type(order)}")
+            return None
+        return order
+    except Exception as e:
+        if is_status_unknown(e):
+            raise OrderStatusUnknown(f"{symbol} LIMIT_MAKER {side} {quantity} a {price}: {e}") from e
+        logger.warning(f"Ordem LIMIT_MAKER {side} para {symbol} a {price} não aceita: {e}")
+        return None
+
+
+def get_order_status(symbol, order_id):
+    """Consulta o estado atual de uma ordem (status, executedQty, cummulativeQuoteQty)."""
+    try:
+        order = client.get_order(symbol=symbol, orderId=order_id)
+        return order if isinstance(order, dict) else None
+    except Exception as e:
+        logger.error(f"Erro ao consultar a ordem {order_id} de {symbol}: {e}")
+        return None
+
+
+def cancel_order(symbol, order_id):
+    """Cancela uma ordem aberta. A resposta traz a quantidade executada até o cancelamento; None em caso de erro."""
+    try:
+        order = client.cancel_order(symbol=symbol, orderId=order_id)
+        return order if isinstance(order, dict) else None
+    except Exception as e:
+        logger.warning(f"Erro ao cancelar a ordem {order_id} de {symbol}: {e}")
+        return None
+
+
+def get_order_trades(symbol, order_id):
+    """Execuções (trades) de uma ordem, no formato de 'fills' da resposta FULL (preço, quantidade e comissão)."""
+    try:
+        trades = client.get_my_trades(symbol=symbol, orderId=order_id)
+        if not isinstance(trades, list):
+            return []
+        return [
+            {'price': trade['price'], 'qty': trade['qty'], 'commission': trade['commission'],
+             'commissionAsset': trade['commissionAsset'], 'tradeId': trade['id']}
+            for trade in trades
+        ]
+    except Exception as e:
+        logger.error(f"Erro ao obter as execuções da ordem {order_id} de {symbol}: {e}")
+        return []
+
+
+def start_user_stream(callback):
+    """
+    Inicia o user data stream da conta e repassa cada mensagem (ex.: 'executionReport') ao callback,
+    chamado na thread do websocket. Retorna o gerenciador, que deve ser encerrado com stop().
+    """
+    manager = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET, testnet=True)
+    manager.start()
+    manager.start_user_socket(callback=callback)
+    return manager
+
+
+def start_depth_stream(symbols, callback):
+    """
+    Inicia o stream de diferenças de profundidade (100 ms) dos símbolos em uma única conexão multiplex e
+    repassa cada mensagem ao callback, chamado na thread do websocket. Retorna o gerenciador.
+    """
+    manager = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET, testnet=True)
+    manager.start()
+    manager.start_multiplex_socket(callback=callback, streams=[f"{symbol.lower()}@depth@100ms" for symbol in symbols])
+    return manager
+
+
 def get_consecutive_trades(symbol, trade_type):
     """
     Recupera o número de transações consecutivas do tipo especificado (buy ou sell)
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import threading
+import logging
+
+from services.transaction_manager import BLOCK_COUNTS_FILE, load_block_counts, save_block_counts
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+FLUSH_INTERVAL = 5.0  # Intervalo (s) da gravação write-behind
+
+
+class BlockCounters:
+    """
+    Dono único dos contadores de bloqueio consecutivo de um símbolo.
+
+    O arquivo é lido uma única vez; leituras e escritas passam a ser operações em memória, e as
+    alterações são gravadas em write-behind (a cada 'flush_interval' ou no encerramento) com escrita
+    atômica, de modo que o arquivo nunca fica inconsistente.
+    """
+
+    def __init__(self, path=BLOCK_COUNTS_FILE, flush_interval=FLUSH_INTERVAL, store=None, symbol=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.store = store  # StateStore opcional que também recebe os contadores (e os restaura sem o arquivo)
+        self.symbol = symbol
+        restore = store is not None and not os.path.exists(path)
+        self.consecutive_sell_blocks, self.consecutive_buy_blocks = load_block_counts(path)
+        self.dirty = False
+        self._lock = threading.Lock()
+        if restore:
+            # Arquivo ausente (ex.: diretório de estado recriado): parte da cópia gravada no StateStore
+            counts = store.get_counters(symbol)
+            self.set(counts.get('consecutive_sell_blocks', 0), counts.get('consecutive_buy_blocks', 0))
+
+    def get(self):
+        """Retorna (consecutive_sell_blocks, consecutive_buy_blocks)."""
+        return self.consecutive_sell_blocks, self.consecutive_buy_blocks
+
+    def set(self, consecutive_sell_blocks, consecutive_buy_blocks):
+        """Atualiza os contadores em memória; a gravação fica para o próximo flush."""
+        with self._lock:
+            if (consecutive_sell_blocks, consecutive_buy_blocks) != self.get():
+                self.consecutive_sell_blocks = consecutive_sell_blocks
+                self.consecutive_buy_blocks = consecutive_buy_blocks
+                self.dirty = True
+
+    def flush(self):
+        """Grava os contadores se houver alterações pendentes."""
+        with self._lock:
+            if not self.dirty:
+                return
+            consecutive_sell_blocks, consecutive_buy_blocks = self.get()
+            self.dirty = False
+        try:
+            save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks, path=self.path)
+            if self.store is not None:
+                self.store.set_counters(self.symbol, consecutive_sell_blocks=consecutive_sell_blocks,
+                                        consecutive_buy_blocks=consecutive_buy_blocks)
+        except Exception:
+            self.dirty = True  # Tenta novamente no próximo flush
+            raise
+
+    async def run_flusher(self):
+        """Task de background que grava os contadores periodicamente."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erro ao gravar contadores de bloqueio em '{self.path}': {e}")
@@ -0,0 +1,266 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+
+from services.binance_client import find_order, find_order_in_history, get_book_tickers, get_symbol_precision, submit_market_order
+from services.order_submission import HISTORY_LOOKBACK, SUBMIT_ATTEMPTS, SUBMIT_RETRY_DELAY, new_client_order_id, submit_idempotent, unknown_order
+from services.rate_limiter import WEIGHT_ALL_ORDERS, WEIGHT_BOOK_TICKER_ALL, WEIGHT_EXCHANGE_INFO, WEIGHT_ORDER, WEIGHT_ORDER_STATUS
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+SLIPPAGE_TOLERANCE = 0.005  # Desvio adverso máximo (0,5%) entre o preço da decisão e o preço de referência
+MAX_BOOK_AGE = 5.0  # Idade máxima (s) do bid/ask para ser usado como referência
+BOOK_REFRESH_INTERVAL = 2.0  # Intervalo (s) da atualização em lote do bid/ask
+SLIPPAGE_SAMPLES = 500  # Execuções recentes mantidas na métrica de slippage realizado
+
+
+def adverse_slippage(side, decision_price, price):
+    """Desvio adverso (fração) de 'price' em relação ao preço da decisão: positivo quando desfavorável."""
+    if side == 'buy':
+        return price / decision_price - 1.0
+    return 1.0 - price / decision_price
+
+
+@dataclass
+class OrderContext:
+    """
+    Estado pré-carregado para enviar ordens de um símbolo: filtros e quantizador (SymbolPrecision)
+    e o último preço de mercado / melhor bid-ask conhecidos.
+    """
+    symbol: str
+    precision: object  # SymbolPrecision
+    last_price: float = 0.0
+    bid: float = 0.0
+    ask: float = 0.0
+    bid_quantity: float = 0.0  # quantidade visível no melhor bid
+    ask_quantity: float = 0.0  # quantidade visível no melhor ask
+    book_updated_at: float = 0.0  # time.monotonic() da última atualização do bid/ask
+
+    def on_price(self, price):
+        self.last_price = price
+
+    def on_book(self, bid, ask, bid_quantity=0.0, ask_quantity=0.0, now=None):
+        self.bid, self.ask = bid, ask
+        self.bid_quantity, self.ask_quantity = bid_quantity, ask_quantity
+        self.book_updated_at = time.monotonic() if now is None else now
+
+    def on_order_book(self, book):
+        """Atualiza o bid/ask a partir do book local (OrderBookHub) a cada alteração aplicada."""
+        bid, ask = book.best_bid(), book.best_ask()
+        if bid and ask:
+            self.on_book(bid[0], ask[0], bid[1], ask[1], now=book.updated_at)
+
+    def reference_price(self, side, max_book_age=MAX_BOOK_AGE, now=None):
+        """Preço que a ordem a mercado deve pagar: ask na compra, bid na venda (último preço se o book estiver velho)."""
+        now = time.monotonic() if now is None else now
+        if self.book_updated_at and now - self.book_updated_at <= max_book_age:
+            book_price = self.ask if side == 'buy' else self.bid
+            if book_price > 0:
+                return book_price
+        return self.last_price or None
+
+
+class ExecutionEngine:
+    """
+    Envio de ordens com contexto quente por símbolo.
+
+    Filtros e quantizador são carregados uma vez no 'warm_up'; o bid/ask é mantido por uma task de
+    atualização em lote (ou pelo book local, se houver um OrderBookHub) e o último preço chega pelo
+    MarketDataHub. Assim, enviar uma ordem custa uma única chamada de rede, precedida de uma
+    verificação local de slippage contra o preço da decisão.
+    Toda ordem leva um clientOrderId próprio, e um envio sem resposta é confirmado por consulta e pelo
+    histórico de ordens antes de qualquer reenvio (ver submit_idempotent).
+    """
+
+    def __init__(self, market_data, executor, rate_limiter, slippage_tolerance=SLIPPAGE_TOLERANCE, max_book_age=MAX_BOOK_AGE,
+                 submit_attempts=SUBMIT_ATTEMPTS, retry_delay=SUBMIT_RETRY_DELAY, order_books=None):
+        self.market_data = market_data
+        self.executor = executor
+        self.rate_limiter = rate_limiter
+        self.slippage_tolerance = slippage_tolerance
+        self.max_book_age = max_book_age
+        self.submit_attempts = submit_attempts
+        self.retry_delay = retry_delay
+        self.order_books = order_books  # OrderBookHub opcional: bid/ask por stream e preço médio pela profundidade
+        self.contexts = {}
+        self.submitted = 0
+        self.failed = 0
+        self.retried = 0  # envios que precisaram de consulta ou reenvio
+        self.recovered = 0  # ordens encontradas pela consulta após envio sem resposta (duplicatas evitadas)
+        self.unresolved = 0  # ordens deixadas para o OrderTracker confirmar
+        self.rejected = {'slippage': 0, 'no_price': 0, 'min_notional': 0}
+        self.realized_slippage = {}  # símbolo -> deque de desvios (fração) do preço médio executado
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def warm_up(self, symbols):
+        """Carrega filtros e bid/ask de todos os símbolos antes da primeira ordem."""
+        for symbol in symbols:
+            await self.context(symbol)
+        await self.refresh_book()
+
+    async def context(self, symbol):
+        """Retorna o OrderContext do símbolo, criando-o (filtros da corretora) na primeira vez."""
+        context = self.contexts.get(symbol)
+        if context is None:
+            await self.rate_limiter.acquire(WEIGHT_EXCHANGE_INFO)
+            precision = await self._run(get_symbol_precision, symbol)
+            if symbol not in self.contexts:  # Outra task pode ter criado o contexto durante a consulta
+                self._add_context(symbol, precision)
+            context = self.contexts[symbol]
+        return context
+
+    def _add_context(self, symbol, precision):
+        context = OrderContext(symbol, precision, last_price=self.market_data.prices.get(symbol, 0.0))
+        self.contexts[symbol] = context
+        self.market_data.subscribe(symbol, context.on_price)
+        if self.order_books is not None:
+            self.order_books.subscribe(symbol, context.on_order_book)
+
+    def export_state(self):
+        return {'precisions': {symbol: context.precision for symbol, context in self.contexts.items()}}
+
+    def restore_state(self, state):
+        """Recria os contextos do snapshot sem consultar os filtros da corretora (o bid/ask vem na próxima atualização)."""
+        for symbol, precision in state['precisions'].items():
+            if symbol not in self.contexts:
+                self._add_context(symbol, precision)
+
+    async def refresh_book(self):
+        """Atualiza o bid/ask de todos os símbolos com uma única chamada em lote."""
+        if not self.contexts:
+            return
+        await self.rate_limiter.acquire(WEIGHT_BOOK_TICKER_ALL)
+        books = await self._run(get_book_tickers)
+        now = time.monotonic()
+        for symbol, context in self.contexts.items():
+            if symbol in books:
+                context.on_book(*books[symbol], now=now)
+
+    async def watch_book(self, interval=BOOK_REFRESH_INTERVAL):
+        """Task de background que mantém o bid/ask dos contextos atualizado."""
+        while True:
+            try:
+                await self.refresh_book()
+            except Exception as e:
+                logger.error(f"Erro ao atualizar bid/ask: {e}")
+            await asyncio.sleep(interval)
+
+    def check(self, context, side, quantity, decision_price):
+        """
+        Validação local da ordem (sem rede). Retorna (texto da quantidade, preço de referência) ou
+        (None, motivo da recusa). Com o book local sincronizado, a referência é o preço médio de
+        execução da quantidade inteira pela profundidade, e não apenas o melhor bid/ask.
+        """
+        adjusted = context.precision.adjust_quantity(quantity)
+        reference_price = context.reference_price(side, self.max_book_age)
+        book = self.order_books.get(context.symbol) if self.order_books is not None else None
+        if book is not None and time.monotonic() - book.updated_at <= self.max_book_age:
+            reference_price = book.fill_price(side, float(adjusted)) or reference_price
+        if not reference_price or not decision_price:
+            return None, 'no_price'
+
+        slippage = adverse_slippage(side, decision_price, reference_price)
+        if slippage > self.slippage_tolerance:
+            logger.warning(f"[{context.symbol}] Slippage de {slippage:.3%} entre a decisão ({decision_price:.2f}) e o "
+                           f"mercado ({reference_price:.2f}) acima da tolerância de {self.slippage_tolerance:.2%}. Ordem {side} cancelada.")
+            return None, 'slippage'
+
+        if context.precision.min_notional and float(adjusted) * reference_price < context.precision.min_notional:
+            logger.warning(f"[{context.symbol}] Ordem {side} de {adjusted} abaixo do valor mínimo ({context.precision.min_notional}).")
+            return None, 'min_notional'
+        return str(adjusted), reference_price
+
+    async def submit(self, decision):
+        """
+        Envia a ordem a mercado da decisão ({'asset', 'quantity', 'price', 'type'} e, opcionalmente,
+        'client_order_id'); None se recusada ou falhar.
+        """
+        symbol = decision['asset']
+        side = decision['type']
+        context = await self.context(symbol)
+
+        quantity, reference = self.check(context, side, decision['quantity'], decision['price'])
+        if quantity is None:
+            self.rejected[reference] += 1
+            return None
+
+        order = await self.submit_order(symbol, side, quantity, decision.get('client_order_id'))
+        if order is not None:
+            self.record_fill_slippage(symbol, side, decision['price'], order)
+        return order
+
+    async def submit_order(self, symbol, side, quantity, client_order_id=None):
+        """
+        Envia uma ordem a mercado de forma idempotente. Se não for possível confirmar o envio, retorna
+        uma resposta local com status 'UNKNOWN' para o OrderTracker resolver pelo clientOrderId.
+        """
+        client_order_id = client_order_id or new_client_order_id()
+        result = await self.send_idempotent(symbol, partial(submit_market_order, symbol, side.upper(), quantity), client_order_id)
+        if not result.resolved:
+            self.unresolved += 1
+            return unknown_order(symbol, side, quantity, client_order_id)
+        if result.order is None:
+            self.failed += 1
+            return None
+        self.submitted += 1
+        return result.order
+
+    async def send_idempotent(self, symbol, send, client_order_id):
+        """
+        Envia uma ordem com 'send(client_order_id)' (chamada bloqueante) sem risco de duplicá-la (ver
+        submit_idempotent) e retorna o SubmitResult. Envio, consulta e histórico passam pelo RateLimiter
+        a cada tentativa.
+        """
+        start_time = (time.time() - HISTORY_LOOKBACK) * 1000
+
+        async def submit(client_order_id):
+            await self.rate_limiter.acquire(WEIGHT_ORDER)
+            return await self._run(send, client_order_id)
+
+        async def lookup(client_order_id):
+            await self.rate_limiter.acquire(WEIGHT_ORDER_STATUS)
+            return await self._run(find_order, symbol, client_order_id)
+
+        async def history(client_order_id):
+            await self.rate_limiter.acquire(WEIGHT_ALL_ORDERS)
+            return await self._run(find_order_in_history, symbol, client_order_id, start_time)
+
+        result = await submit_idempotent(submit, lookup, history, client_order_id, self.submit_attempts, self.retry_delay)
+        self.retried += result.retried
+        self.recovered += result.recovered
+        return result
+
+    def record_fill_slippage(self, symbol, side, decision_price, order):
+        executed = float(order.get('executedQty') or 0.0)
+        quote = float(order.get('cummulativeQuoteQty') or 0.0)
+        if executed <= 0 or not quote:
+            return
+        samples = self.realized_slippage.setdefault(symbol, deque(maxlen=SLIPPAGE_SAMPLES))
+        samples.append(adverse_slippage(side, decision_price, quote / executed))
+
+    def summary(self):
+        return {
+            'submitted': self.submitted,
+            'failed': self.failed,
+            'rejected': dict(self.rejected),
+            'retried': self.retried,
+            'recovered': self.recovered,
+            'unresolved': self.unresolved,
+            'slippage_tolerance': self.slippage_tolerance,
+            'realized_slippage': {
+                symbol: {'fills': len(samples), 'mean': sum(samples) / len(samples), 'max': max(samples)}
+                for symbol, samples in self.realized_slippage.items() if samples
+            },
+            'contexts': {
+                symbol: {'last_price': context.last_price, 'bid': context.bid, 'ask': context.ask,
+                         'book_age': time.monotonic() - context.book_updated_at if context.book_updated_at else None}
+                for symbol, context in self.contexts.items()
+            }
+        }
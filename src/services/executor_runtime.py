@@ -0,0 +1,229 @@
+import asyncio
+import os
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+IO_WORKERS_PER_SYMBOL = 4  # Preço, candles e histórico de ordens do tick + montagem do snapshot
+SHARED_IO_WORKERS = 4  # Tasks compartilhadas: book, ordens abertas, reconciliação, snapshots de estado
+MAX_IO_WORKERS = 32
+POOL_SAMPLES = 500  # Tarefas recentes mantidas nas métricas de cada pool
+LOOP_LAG_INTERVAL = 0.5  # Intervalo (s) entre as medições de atraso do event loop
+
+
+def io_workers_for(symbols):
+    """Threads de I/O: as chamadas de rede passam quase todo o tempo esperando, então o limite é a concorrência útil."""
+    return min(MAX_IO_WORKERS, IO_WORKERS_PER_SYMBOL * len(symbols) + SHARED_IO_WORKERS)
+
+
+def compute_workers_for(symbols):
+    """Processos de cálculo: no máximo um por símbolo, deixando um núcleo para o event loop."""
+    return max(1, min(len(symbols), (os.cpu_count() or 2) - 1))
+
+
+def _percentile(samples, q):
+    return float(np.percentile(np.fromiter(samples, dtype=float, count=len(samples)), q)) if samples else 0.0
+
+
+class PoolStats:
+    """Profundidade da fila, espera até o início e duração das tarefas de um pool."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.in_flight = 0  # Enviadas e ainda não concluídas (em execução + na fila)
+        self.max_queued = 0
+        self.wait_ms = deque(maxlen=POOL_SAMPLES)
+        self.run_ms = deque(maxlen=POOL_SAMPLES)
+        self._lock = threading.Lock()  # Atualizado pelas threads do pool e pelo event loop
+
+    @property
+    def queued(self):
+        return max(0, self.in_flight - self.workers)
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+    def on_done(self, wait_ms, run_ms, failed=False):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.errors += failed
+            if wait_ms is not None:
+                self.wait_ms.append(wait_ms)
+                self.run_ms.append(run_ms)
+
+    def summary(self):
+        with self._lock:
+            wait, run = list(self.wait_ms), list(self.run_ms)
+            return {
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'submitted': self.submitted,
+                'errors': self.errors,
+                'wait_p50_ms': round(_percentile(wait, 50), 3),
+                'wait_p95_ms': round(_percentile(wait, 95), 3),
+                'run_p50_ms': round(_percentile(run, 50), 3),
+                'run_p95_ms': round(_percentile(run, 95), 3)
+            }
+
+
+class InstrumentedThreadPool(ThreadPoolExecutor):
+    """ThreadPoolExecutor que mede a fila e os tempos de todas as tarefas, inclusive as de run_in_executor."""
+
+    def __init__(self, max_workers, thread_name_prefix='io'):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.stats = PoolStats(max_workers)
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted_at = time.perf_counter()
+
+        def call():
+            started_at = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.stats.on_done((started_at - submitted_at) * 1000, (time.perf_counter() - started_at) * 1000, failed)
+
+        self.stats.on_submit()
+        try:
+            return super().submit(call)
+        except Exception:
+            self.stats.on_done(None, None, failed=True)
+            raise
+
+
+def _timed_call(fn, args, kwargs):
+    """Executada no processo de cálculo: retorna o resultado com os instantes de início e fim."""
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return result, started_at, time.time()
+
+
+class InstrumentedProcessPool(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor que mede a fila e os tempos das tarefas. A espera é medida entre o envio e o
+    início no processo de cálculo (time.time(), o mesmo relógio nos dois processos).
+    """
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.stats = PoolStats(max_workers)
+
+    def start(self):
+        """
+        Cria os processos de cálculo imediatamente. Chamado na partida, antes de existir qualquer thread
+        no processo: com fork, todos os processos do pool são criados no primeiro envio.
+        """
+        self.submit(os.getpid).result()
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted_at = time.time()
+        self.stats.on_submit()
+        try:
+            inner = super().submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            self.stats.on_done(None, None, failed=True)
+            raise
+        outer = Future()
+
+        def transfer(future):
+            try:
+                result, started_at, finished_at = future.result()
+            except BaseException as e:
+                self.stats.on_done(None, None, failed=True)
+                if not outer.cancelled():
+                    outer.set_exception(e)
+                return
+            self.stats.on_done((started_at - submitted_at) * 1000, (finished_at - started_at) * 1000)
+            if not outer.cancelled():
+                outer.set_result(result)
+
+        inner.add_done_callback(transfer)
+        return outer
+
+
+class ExecutorRuntime:
+    """
+    Separa o trabalho que não pode rodar no event loop em dois pools: 'io', de threads, para chamadas
+    de rede e arquivos (passam o tempo esperando e liberam o GIL), e 'compute', de processos, para o
+    cálculo com pandas (indicadores), que em uma thread disputaria o GIL com o event loop. Se o pool
+    de processos quebrar (um processo de cálculo morreu), o cálculo passa a rodar no pool de I/O.
+    """
+
+    def __init__(self, io_workers, compute_workers):
+        self.io = InstrumentedThreadPool(io_workers)
+        self.compute_pool = InstrumentedProcessPool(compute_workers) if compute_workers else None
+        self.compute_fallbacks = 0
+        self.loop_lag_ms = deque(maxlen=POOL_SAMPLES)
+
+    def start(self):
+        if self.compute_pool is not None:
+            self.compute_pool.start()
+
+    async def compute(self, func, *args):
+        """Executa a função pura 'func' no pool de processos (argumentos e resultado precisam ser serializáveis)."""
+        loop = asyncio.get_running_loop()
+        if self.compute_pool is not None:
+            try:
+                return await loop.run_in_executor(self.compute_pool, func, *args)
+            except BrokenProcessPool as e:
+                logger.error(f"Pool de processos de cálculo indisponível: {e}. O cálculo segue no pool de I/O.")
+                self.compute_pool = None
+        self.compute_fallbacks += 1
+        return await loop.run_in_executor(self.io, func, *args)
+
+    def submit(self, func, *args):
+        """
+        Versão síncrona de compute(): envia 'func' ao pool de processos (ou ao de I/O, sem ele) e retorna
+        o Future. Permite usar o runtime como executor de quem não roda no event loop (ex.: exportação do Excel).
+        """
+        if self.compute_pool is not None:
+            try:
+                return self.compute_pool.submit(func, *args)
+            except BrokenProcessPool as e:
+                logger.error(f"Pool de processos de cálculo indisponível: {e}. O cálculo segue no pool de I/O.")
+                self.compute_pool = None
+        self.compute_fallbacks += 1
+        return self.io.submit(func, *args)
+
+    async def watch_loop_lag(self, interval=LOOP_LAG_INTERVAL):
+        """Mede quanto o event loop atrasa para acordar (cálculo ou I/O bloqueando o loop aparecem aqui)."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag_ms.append(max(0.0, (time.perf_counter() - start - interval) * 1000))
+
+    def shutdown(self, wait=True):
+        self.io.shutdown(wait=wait)
+        if self.compute_pool is not None:
+            self.compute_pool.shutdown(wait=wait)
+
+    def summary(self):
+        lag = list(self.loop_lag_ms)
+        return {
+            'io': self.io.stats.summary(),
+            'compute': self.compute_pool.stats.summary() if self.compute_pool is not None else None,
+            'compute_fallbacks': self.compute_fallbacks,
+            'loop_lag_p95_ms': round(_percentile(lag, 95), 3),
+            'loop_lag_max_ms': round(max(lag), 3) if lag else 0.0
+        }
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+FETCH_DEADLINE = 10.0  # Prazo (s) padrão de cada requisição do tick
+STAGE_SAMPLES = 500  # Ticks recentes mantidos nas métricas
+
+
+@dataclass
+class FetchResult:
+    """Resultado da etapa de coleta de um tick: valores obtidos e falhas por requisição."""
+    values: dict = field(default_factory=dict)  # nome -> valor
+    errors: dict = field(default_factory=dict)  # nome -> 'timeout' ou mensagem do erro
+    durations: dict = field(default_factory=dict)  # nome -> duração (ms)
+    elapsed_ms: float = 0.0
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def failed(self, *names):
+        """Indica se alguma das requisições indicadas falhou."""
+        return any(name in self.errors for name in names)
+
+
+class FetchStage:
+    """
+    Etapa de coleta do tick: as requisições independentes (preço, candles, histórico de ordens...) são
+    disparadas ao mesmo tempo, cada uma com o seu prazo, e a etapa leva o tempo da mais lenta em vez
+    da soma de todas. A falha ou o estouro de prazo de uma requisição não cancela as demais; quem
+    chama decide, pelo FetchResult, se o tick pode seguir com o que chegou.
+    """
+
+    def __init__(self, deadlines=None, default_deadline=FETCH_DEADLINE, latency=None):
+        self.deadlines = dict(deadlines or {})  # nome -> prazo (s)
+        self.default_deadline = default_deadline
+        self.latency = latency  # LatencyRecorder opcional: registra '<nome>_fetch' e 'fetch_stage'
+        self.calls = {}
+        self.timeouts = {}
+        self.errors = {}
+        self.saved_ms = deque(maxlen=STAGE_SAMPLES)  # soma das durações - duração da etapa
+
+    async def _timed(self, name, factory, durations):
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(factory(), self.deadlines.get(name, self.default_deadline))
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            durations[name] = duration
+            if self.latency is not None:
+                self.latency.record(f"{name}_fetch", duration)
+
+    async def run(self, requests):
+        """
+        Executa as requisições ({nome: função sem argumentos que retorna um awaitable}) em paralelo e
+        retorna um FetchResult com os valores obtidos e as falhas.
+        """
+        result = FetchResult()
+        start = time.perf_counter()
+        names = list(requests)
+        outcomes = await asyncio.gather(*(self._timed(name, requests[name], result.durations) for name in names), return_exceptions=True)
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+
+        for name, outcome in zip(names, outcomes):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if isinstance(outcome, asyncio.TimeoutError):
+                self.timeouts[name] = self.timeouts.get(name, 0) + 1
+                result.errors[name] = 'timeout'
+            elif isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                self.errors[name] = self.errors.get(name, 0) + 1
+                result.errors[name] = str(outcome) or type(outcome).__name__
+            else:
+                result.values[name] = outcome
+        for name, reason in result.errors.items():
+            logger.warning(f"Requisição '{name}' do tick falhou: {reason}")
+
+        self.saved_ms.append(sum(result.durations.values()) - result.elapsed_ms)
+        if self.latency is not None:
+            self.latency.record('fetch_stage', result.elapsed_ms)
+        return result
+
+    def summary(self):
+        saved = list(self.saved_ms)
+        return {
+            'calls': dict(self.calls),
+            'timeouts': dict(self.timeouts),
+            'errors': dict(self.errors),
+            'mean_saved_ms': sum(saved) / len(saved) if saved else 0.0
+        }
@@ -0,0 +1,335 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_DECIMALS = 8  # Precisão máxima de quantidades e valores na Binance
+
+ROUND_DOWN = 'down'  # Trunca em direção a zero (quantidades enviadas à corretora)
+ROUND_FLOOR = 'floor'  # Arredonda para baixo (em direção a -infinito)
+ROUND_HALF_EVEN = 'half_even'  # Arredondamento bancário (custos e resultados contábeis)
+
+_POWERS = [10 ** i for i in range(19)]
+_FAST_LIMIT = 2 ** 52  # Abaixo disso o float escalado ainda distingue unidades inteiras
+_TOLERANCE = 1e-6  # Distância (em unidades) tratada como ruído de float ao converter
+
+
+def _divide(numerator, denominator, rounding):
+    """Divisão inteira com o modo de arredondamento informado (denominador positivo)."""
+    quotient, remainder = divmod(numerator, denominator)
+    if rounding == ROUND_FLOOR or not remainder:
+        return quotient
+    if rounding == ROUND_DOWN:
+        return quotient + 1 if numerator < 0 else quotient
+    # ROUND_HALF_EVEN
+    double = 2 * remainder
+    if double > denominator or (double == denominator and quotient % 2):
+        return quotient + 1
+    return quotient
+
+
+def _parse(text, decimals, rounding):
+    """Converte um texto decimal ('0.00123', '1e-05', '-12.5') em unidades inteiras, sem float."""
+    text = text.strip().lower()
+    exponent = 0
+    if 'e' in text:
+        text, exp_text = text.split('e')
+        exponent = int(exp_text)
+    negative = text.startswith('-')
+    integer_part, _, fraction_part = text.lstrip('+-').partition('.')
+    digits = int((integer_part or '0') + fraction_part)
+    digits = -digits if negative else digits
+    shift = decimals + exponent - len(fraction_part)
+    if shift >= 0:
+        return digits * 10 ** shift
+    return _divide(digits, 10 ** -shift, rounding)
+
+
+def decimals_from_step(step):
+    """Quantidade de casas decimais de um passo da corretora (ex.: '0.00001000' -> 5)."""
+    text = str(step).rstrip('0')
+    if 'e' in text.lower():
+        return max(0, -int(text.lower().split('e')[1]))
+    return len(text.partition('.')[2])
+
+
+def _exact(value):
+    """Fixed com todas as casas de um int, float (pelo repr) ou texto, sem arredondamento."""
+    if isinstance(value, int):
+        return Fixed(value, 0)
+    text = value.strip().lower() if isinstance(value, str) else repr(float(value))
+    mantissa, _, exponent = text.partition('e')
+    decimals = max(0, len(mantissa.partition('.')[2]) - int(exponent or 0))
+    return Fixed(_parse(text, decimals, ROUND_HALF_EVEN), decimals)
+
+
+class Fixed:
+    """
+    Valor decimal exato em ponto fixo: 'units' inteiros na escala 10**-decimals.
+
+    Somas e subtrações são exatas; multiplicações e divisões arredondam explicitamente para a escala
+    do resultado. Muito mais rápido que Decimal e sem o acúmulo de erro de float.
+    """
+
+    __slots__ = ('units', 'decimals')
+
+    def __init__(self, units, decimals=DEFAULT_DECIMALS):
+        self.units = units if units.__class__ is int else int(units)
+        self.decimals = decimals
+
+    @classmethod
+    def from_str(cls, text, decimals=DEFAULT_DECIMALS, rounding=ROUND_HALF_EVEN):
+        return cls(_parse(text, decimals, rounding), decimals)
+
+    @classmethod
+    def from_float(cls, value, decimals=DEFAULT_DECIMALS, rounding=ROUND_HALF_EVEN):
+        """Converte pelo menor texto que representa o float (repr), evitando 0.1 -> 0.1000000000000000055."""
+        scaled = value * _POWERS[decimals]
+        if -_FAST_LIMIT < scaled < _FAST_LIMIT:
+            # Caminho rápido: o float escalado decide o arredondamento sem ambiguidade
+            nearest = round(scaled)
+            distance = abs(scaled - nearest)
+            if distance < _TOLERANCE:
+                return cls(nearest, decimals)  # Valor já representável na escala
+            if rounding == ROUND_DOWN:
+                return cls(int(scaled), decimals)
+            if rounding == ROUND_FLOOR:
+                return cls(math.floor(scaled), decimals)
+            if abs(distance - 0.5) > _TOLERANCE:
+                return cls(nearest, decimals)
+        return cls(_parse(repr(float(value)), decimals, rounding), decimals)
+
+    @classmethod
+    def of(cls, value, decimals=DEFAULT_DECIMALS, rounding=ROUND_HALF_EVEN):
+        """Converte Fixed, int, float ou texto para a escala informada."""
+        if isinstance(value, Fixed):
+            return value.rescale(decimals, rounding)
+        if isinstance(value, int):
+            return cls(value * _POWERS[decimals], decimals)
+        if isinstance(value, str):
+            return cls.from_str(value, decimals, rounding)
+        return cls.from_float(value, decimals, rounding)
+
+    def rescale(self, decimals, rounding=ROUND_HALF_EVEN):
+        if decimals == self.decimals:
+            return self
+        if decimals > self.decimals:
+            return Fixed(self.units * _POWERS[decimals - self.decimals], decimals)
+        return Fixed(_divide(self.units, _POWERS[self.decimals - decimals], rounding), decimals)
+
+    def floor_to(self, step):
+        """Maior múltiplo de 'step' (Fixed na mesma escala) que não ultrapassa o valor (em módulo)."""
+        step_units = step.rescale(self.decimals).units
+        return Fixed(_divide(self.units, step_units, ROUND_DOWN) * step_units, self.decimals)
+
+    def _coerce(self, other):
+        if other.__class__ is Fixed:
+            if other.decimals == self.decimals:
+                return other
+            return other.rescale(self.decimals)
+        return Fixed.of(other, self.decimals)
+
+    def __add__(self, other):
+        return Fixed(self.units + self._coerce(other).units, self.decimals)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Fixed(self.units - self._coerce(other).units, self.decimals)
+
+    def __rsub__(self, other):
+        return Fixed(self._coerce(other).units - self.units, self.decimals)
+
+    def __neg__(self):
+        return Fixed(-self.units, self.decimals)
+
+    def __abs__(self):
+        return Fixed(abs(self.units), self.decimals)
+
+    def mul(self, other, decimals=None, rounding=ROUND_HALF_EVEN):
+        """Produto arredondado para 'decimals' casas (padrão: escala deste valor)."""
+        decimals = self.decimals if decimals is None else decimals
+        if other.__class__ is int:
+            return Fixed(self.units * other, self.decimals).rescale(decimals, rounding)
+        if other.__class__ is not Fixed:
+            other = Fixed.of(other, self.decimals)
+        scale = self.decimals + other.decimals - decimals
+        product = self.units * other.units
+        if scale > 0:
+            if rounding == ROUND_HALF_EVEN and product >= 0:
+                # Caminho rápido do arredondamento bancário para produtos não negativos
+                denominator = _POWERS[scale]
+                quotient, remainder = divmod(product, denominator)
+                if 2 * remainder > denominator or (2 * remainder == denominator and quotient & 1):
+                    quotient += 1
+                return Fixed(quotient, decimals)
+            return Fixed(_divide(product, _POWERS[scale], rounding), decimals)
+        return Fixed(product * _POWERS[-scale], decimals)
+
+    def __mul__(self, other):
+        return self.mul(other)
+
+    __rmul__ = __mul__
+
+    def div(self, other, decimals=None, rounding=ROUND_HALF_EVEN):
+        """Quociente arredondado para 'decimals' casas (padrão: escala deste valor)."""
+        decimals = self.decimals if decimals is None else decimals
+        other = other if isinstance(other, Fixed) else Fixed.of(other, self.decimals)
+        if not other.units:
+            raise ZeroDivisionError("Divisão de Fixed por zero")
+        numerator, denominator = self.units, other.units
+        shift = decimals + other.decimals - self.decimals
+        if shift >= 0:
+            numerator *= 10 ** shift
+        else:
+            denominator *= 10 ** -shift
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        return Fixed(_divide(numerator, denominator, rounding), decimals)
+
+    def __truediv__(self, other):
+        return self.div(other)
+
+    def _key(self, other):
+        """Unidades dos dois lados na maior das escalas, sem arredondar nenhum deles (comparações exatas)."""
+        other = other if isinstance(other, Fixed) else _exact(other)
+        shift = other.decimals - self.decimals
+        if shift >= 0:
+            return self.units * 10 ** shift, other.units
+        return self.units, other.units * 10 ** -shift
+
+    def __eq__(self, other):
+        if not isinstance(other, (Fixed, int, float, str)):
+            return NotImplemented
+        left, right = self._key(other)
+        return left == right
+
+    def __lt__(self, other):
+        left, right = self._key(other)
+        return left < right
+
+    def __le__(self, other):
+        left, right = self._key(other)
+        return left <= right
+
+    def __gt__(self, other):
+        left, right = self._key(other)
+        return left > right
+
+    def __ge__(self, other):
+        left, right = self._key(other)
+        return left >= right
+
+    def __hash__(self):
+        units, decimals = self.units, self.decimals
+        while decimals and units % 10 == 0:
+            units //= 10
+            decimals -= 1
+        return hash((units, decimals))
+
+    def __bool__(self):
+        return bool(self.units)
+
+    def __float__(self):
+        return self.units / _POWERS[self.decimals]
+
+    def __str__(self):
+        """Texto exato com todas as casas da escala, sem notação científica."""
+        if not self.decimals:
+            return str(self.units)
+        sign = '-' if self.units < 0 else ''
+        integer, fraction = divmod(abs(self.units), _POWERS[self.decimals])
+        return f"{sign}{integer}.{fraction:0{self.decimals}d}"
+
+    def __repr__(self):
+        return f"Fixed('{self}')"
+
+
+# ---- Operações vetorizadas (numpy int64) ----
+
+def to_units(values, decimals=DEFAULT_DECIMALS, rounding=ROUND_HALF_EVEN):
+    """
+    Converte um array de floats em unidades inteiras (int64). Valores a menos de 1e-6 unidade de um
+    inteiro são tratados como esse inteiro (ex.: 0.3 * 1e8 = 29999999.999999996 -> 30000000).
+    """
+    scaled = np.asarray(values, dtype=float) * _POWERS[decimals]
+    nearest = np.rint(scaled)
+    if rounding == ROUND_HALF_EVEN:
+        return nearest.astype(np.int64)
+    exact = np.abs(scaled - nearest) < 1e-6
+    if rounding == ROUND_FLOOR:
+        return np.where(exact, nearest, np.floor(scaled)).astype(np.int64)
+    return np.where(exact, nearest, np.trunc(scaled)).astype(np.int64)
+
+
+def from_units(units, decimals=DEFAULT_DECIMALS):
+    """Converte unidades inteiras de volta para float (apenas para exibição e cálculos aproximados)."""
+    return np.asarray(units, dtype=np.int64) / _POWERS[decimals]
+
+
+def floor_to_step(units, step_units):
+    """Trunca cada quantidade (unidades int64, não negativas) para um múltiplo do passo."""
+    units = np.asarray(units, dtype=np.int64)
+    return units - units % step_units
+
+
+@dataclass(frozen=True)
+class SymbolPrecision:
+    """Precisões de um símbolo obtidas dos filtros da corretora (LOT_SIZE, PRICE_FILTER e NOTIONAL)."""
+    symbol: str
+    quantity_decimals: int
+    price_decimals: int
+    step: Fixed
+    min_quantity: Fixed
+    tick: Fixed
+    min_notional: float = 0.0  # Valor mínimo da ordem (NOTIONAL / MIN_NOTIONAL), na moeda de cotação
+
+    @classmethod
+    def from_symbol_info(cls, symbol_info):
+        """Constrói a partir de client.get_symbol_info(symbol)."""
+        filters = {filt['filterType']: filt for filt in symbol_info.get('filters', [])}
+        lot_size = filters.get('LOT_SIZE', {})
+        price_filter = filters.get('PRICE_FILTER', {})
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+        step_text = lot_size.get('stepSize', '0.00000001')
+        tick_text = price_filter.get('tickSize', '0.00000001')
+        quantity_decimals = decimals_from_step(step_text)
+        price_decimals = decimals_from_step(tick_text)
+        return cls(
+            symbol=symbol_info.get('symbol'),
+            quantity_decimals=quantity_decimals,
+            price_decimals=price_decimals,
+            step=Fixed.from_str(step_text, quantity_decimals),
+            min_quantity=Fixed.from_str(lot_size.get('minQty', '0'), quantity_decimals),
+            tick=Fixed.from_str(tick_text, price_decimals),
+            min_notional=float(notional.get('minNotional', 0.0))
+        )
+
+    def quantity(self, value):
+        """Quantidade truncada para o passo do LOT_SIZE."""
+        units = Fixed.of(value, self.quantity_decimals, ROUND_DOWN).units
+        step_units = self.step.units
+        if step_units > 1:
+            units -= units % step_units if units >= 0 else -(-units % step_units)
+        return Fixed(units, self.quantity_decimals)
+
+    def adjust_quantity(self, value):
+        """Quantidade válida para ordem: truncada para o passo e nunca abaixo do mínimo (regra de adjust_quantity)."""
+        quantity = self.quantity(value)
+        return quantity if quantity.units >= self.min_quantity.units else self.min_quantity
+
+    def format_quantity(self, value):
+        """Texto exato da quantidade ajustada, pronto para enviar à corretora."""
+        return str(self.adjust_quantity(value))
+
+    def price(self, value, rounding=ROUND_HALF_EVEN):
+        """Preço arredondado para o tickSize do PRICE_FILTER."""
+        price = Fixed.of(value, self.price_decimals, rounding)
+        if not self.tick:
+            return price
+        return Fixed(_divide(price.units, self.tick.units, rounding) * self.tick.units, self.price_decimals)
+
+    def quantity_units(self, values):
+        """Versão vetorizada de quantity(): array de floats -> unidades int64 múltiplas do passo."""
+        units = to_units(values, self.quantity_decimals, ROUND_DOWN)
+        return floor_to_step(units, self.step.units) if self.step else units
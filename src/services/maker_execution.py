@@ -0,0 +1,279 @@
+import asyncio
+import time
+import uuid
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+
+from services.binance_client import cancel_order, get_order_status, get_order_trades, submit_limit_maker_order
+from services.execution import adverse_slippage
+from services.fixed_point import Fixed
+from services.order_submission import UNKNOWN_STATUS
+from services.rate_limiter import WEIGHT_MY_TRADES, WEIGHT_ORDER, WEIGHT_ORDER_STATUS
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+REPRICE_INTERVAL = 2.0  # Intervalo (s) entre as verificações da ordem aberta
+MAKER_DEADLINE = 60.0  # Tempo máximo (s) como maker antes de enviar o restante a mercado
+REPORT_SAMPLES = 500  # Ordens recentes mantidas nas métricas
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED')
+CHILD_ORDER_PREFIX = 'mk-'  # clientOrderId das ordens LIMIT_MAKER filhas
+
+
+@dataclass
+class RestingOrder:
+    """Ordem LIMIT_MAKER aberta na corretora."""
+    symbol: str
+    side: str
+    order_id: int  # None enquanto o envio não for confirmado pela corretora
+    client_order_id: str
+    quantity: Fixed
+    price: float
+    placed_at: float
+
+
+@dataclass
+class MakerReport:
+    """Resultado de uma decisão executada em modo maker (possivelmente com complemento a mercado)."""
+    symbol: str
+    side: str
+    decision_price: float
+    reference_price: float  # ask (compra) ou bid (venda) no envio: o que a ordem a mercado pagaria
+    requested: Fixed
+    maker_quantity: Fixed
+    maker_quote: float = 0.0
+    taker_quantity: Fixed = None
+    taker_quote: float = 0.0
+    orders: int = 0
+    reprices: int = 0
+    rejections: int = 0
+    unresolved: bool = False  # Envio de uma ordem filha sem confirmação: o modo maker para sem complemento a mercado
+    fills: list = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def executed(self):
+        return self.maker_quantity + self.taker_quantity
+
+    @property
+    def quote(self):
+        return self.maker_quote + self.taker_quote
+
+    def average_price(self):
+        executed = float(self.executed)
+        return self.quote / executed if executed else 0.0
+
+    def to_order(self, order_id):
+        """Resposta no formato de uma ordem FULL, para o FillReconciler e o restante do runner."""
+        executed = self.executed
+        return {
+            'symbol': self.symbol,
+            'side': self.side.upper(),
+            'orderId': order_id,
+            'clientOrderId': order_id,
+            'origQty': str(self.requested),
+            'status': 'FILLED' if executed == self.requested else 'CANCELED',  # Encerrada; o restante não será executado
+            'executedQty': str(executed),
+            'cummulativeQuoteQty': repr(self.quote),
+            'fills': self.fills
+        }
+
+
+class MakerExecution:
+    """
+    Execução em modo maker: cada decisão vira uma ordem LIMIT_MAKER (post-only) no melhor bid/ask ou
+    um tick para dentro do spread. A ordem aberta é verificada a cada 'reprice_interval'; se o book se
+    afastar ela é cancelada e recolocada no novo melhor preço, e ao fim de 'deadline' o restante é
+    enviado a mercado. O contexto por símbolo (filtros e bid/ask) vem do ExecutionEngine.
+    """
+
+    def __init__(self, engine, reprice_interval=REPRICE_INTERVAL, deadline=MAKER_DEADLINE):
+        self.engine = engine
+        self.reprice_interval = reprice_interval
+        self.deadline = deadline
+        self.resting = {}  # clientOrderId -> RestingOrder
+        self.reports = deque(maxlen=REPORT_SAMPLES)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.engine.executor, func, *args)
+
+    def maker_price(self, context, side):
+        """Preço post-only: um tick para dentro do spread quando há espaço, senão no melhor bid/ask."""
+        bid, ask = context.bid, context.ask
+        if bid <= 0 or ask <= 0:
+            return None
+        tick = float(context.precision.tick)
+        if side == 'buy':
+            price = bid + tick if ask - bid > tick else bid
+        else:
+            price = ask - tick if ask - bid > tick else ask
+        return context.precision.price(price)
+
+    def _is_behind(self, context, order):
+        """Indica se a ordem aberta deixou de estar no melhor preço do seu lado."""
+        if order.side == 'buy':
+            return context.bid > order.price
+        return 0 < context.ask < order.price
+
+    async def _place(self, context, side, quantity, report):
+        price = self.maker_price(context, side)
+        if price is None:
+            return None
+        client_order_id = f"{CHILD_ORDER_PREFIX}{uuid.uuid4().hex[:24]}"
+        # Envio sem resposta é resolvido pelo clientOrderId antes de qualquer nova ordem (ver submit_idempotent)
+        result = await self.engine.send_idempotent(
+            context.symbol, partial(submit_limit_maker_order, context.symbol, side.upper(), str(quantity), str(price)), client_order_id
+        )
+        if not result.resolved:
+            # A ordem pode estar no book: outra ordem filha ou o complemento a mercado poderiam duplicar a posição
+            logger.error(f"[{context.symbol}] Ordem maker {client_order_id} sem confirmação da corretora; modo maker interrompido.")
+            report.unresolved = True
+            self.resting[client_order_id] = RestingOrder(context.symbol, side, None, client_order_id, quantity, float(price), time.monotonic())
+            return None
+        order = result.order
+        if order is None:
+            report.rejections += 1  # O preço cruzaria o book (seria taker); tenta de novo no próximo ciclo
+            return None
+        report.orders += 1
+        resting = RestingOrder(context.symbol, side, order['orderId'], client_order_id, quantity, float(price), time.monotonic())
+        self.resting[client_order_id] = resting
+        return resting
+
+    async def _finish(self, context, resting, status, report):
+        """Contabiliza a parte executada de uma ordem encerrada (preenchida ou cancelada)."""
+        self.resting.pop(resting.client_order_id, None)
+        executed = Fixed.from_str(status.get('executedQty', '0'), context.precision.quantity_decimals)
+        if not executed.units:
+            return executed
+        report.maker_quantity += executed
+        report.maker_quote += float(status.get('cummulativeQuoteQty') or 0.0)
+        await self.engine.rate_limiter.acquire(WEIGHT_MY_TRADES)
+        report.fills.extend(await self._run(get_order_trades, context.symbol, resting.order_id))
+        return executed
+
+    async def _cancel(self, context, resting, report):
+        await self.engine.rate_limiter.acquire(WEIGHT_ORDER)
+        status = await self._run(cancel_order, context.symbol, resting.order_id)
+        if status is None:
+            # A ordem pode ter sido executada entre a verificação e o cancelamento
+            await self.engine.rate_limiter.acquire(WEIGHT_ORDER_STATUS)
+            status = await self._run(get_order_status, context.symbol, resting.order_id)
+        if status is None or status.get('status') not in FINAL_STATUSES:
+            logger.error(f"[{context.symbol}] Não foi possível confirmar o cancelamento da ordem {resting.order_id}.")
+            return None
+        return await self._finish(context, resting, status, report)
+
+    async def submit(self, decision):
+        """Executa a decisão como maker (com complemento a mercado após o prazo); mesma interface do ExecutionEngine."""
+        engine = self.engine
+        symbol = decision['asset']
+        side = decision['type']
+        context = await engine.context(symbol)
+
+        quantity_text, reference = engine.check(context, side, decision['quantity'], decision['price'])
+        if quantity_text is None:
+            engine.rejected[reference] += 1
+            return None
+
+        decimals = context.precision.quantity_decimals
+        requested = Fixed.from_str(quantity_text, decimals)
+        report = MakerReport(symbol, side, decision['price'], reference, requested,
+                             maker_quantity=Fixed(0, decimals), taker_quantity=Fixed(0, decimals), started_at=time.time())
+        remaining = requested
+        deadline = time.monotonic() + self.deadline
+        resting = None
+
+        while remaining.units and time.monotonic() < deadline:
+            if resting is None:
+                resting = await self._place(context, side, remaining, report)
+                if report.unresolved:
+                    break
+            await asyncio.sleep(self.reprice_interval)
+            if resting is None:
+                continue
+
+            await engine.rate_limiter.acquire(WEIGHT_ORDER_STATUS)
+            status = await self._run(get_order_status, symbol, resting.order_id)
+            if status is None:
+                continue
+            if status.get('status') in FINAL_STATUSES:
+                remaining -= await self._finish(context, resting, status, report)
+                resting = None
+            elif self._is_behind(context, resting):
+                executed = await self._cancel(context, resting, report)
+                if executed is None:
+                    break
+                remaining -= executed
+                report.reprices += 1
+                resting = None
+
+        if resting is not None:
+            executed = await self._cancel(context, resting, report)
+            if executed is None:
+                # Estado desconhecido: não envia complemento a mercado para não duplicar a posição
+                return self._complete(report)
+            remaining -= executed
+
+        if remaining.units and not report.unresolved:
+            await self._fallback(context, side, remaining, report)
+        return self._complete(report)
+
+    async def _fallback(self, context, side, remaining, report):
+        """Envia o restante a mercado após o prazo do modo maker (respeitando o valor mínimo da ordem)."""
+        reference = context.reference_price(side, self.engine.max_book_age)
+        min_notional = context.precision.min_notional
+        remaining = context.precision.quantity(remaining)
+        if not remaining.units or remaining < context.precision.min_quantity or (min_notional and reference and float(remaining) * reference < min_notional):
+            logger.info(f"[{context.symbol}] Restante {remaining} abaixo do mínimo negociável; não enviado a mercado.")
+            return
+        logger.info(f"[{context.symbol}] Prazo do modo maker esgotado; enviando {remaining} a mercado.")
+        order = await self.engine.submit_order(context.symbol, side, str(remaining))
+        if order is None:
+            return
+        if order['status'] == UNKNOWN_STATUS:
+            # Sem confirmação: só eventos do user data stream podem registrar essa execução
+            logger.error(f"[{context.symbol}] Complemento a mercado {order['clientOrderId']} sem confirmação da corretora.")
+            return
+        report.taker_quantity += Fixed.from_str(order.get('executedQty', '0'), context.precision.quantity_decimals)
+        report.taker_quote += float(order.get('cummulativeQuoteQty') or 0.0)
+        report.fills.extend(order.get('fills') or [])
+
+    def _complete(self, report):
+        report.finished_at = time.time()
+        self.reports.append(report)
+        if not report.taker_quantity.units:
+            self.engine.submitted += 1  # O complemento a mercado já foi contado pelo ExecutionEngine
+        if report.executed.units:
+            self.engine.record_fill_slippage(report.symbol, report.side, report.decision_price,
+                                            {'executedQty': str(report.executed), 'cummulativeQuoteQty': report.quote})
+        logger.info(f"[{report.symbol}] Execução maker concluída: {report.maker_quantity} como maker, {report.taker_quantity} a mercado, "
+                    f"preço médio {report.average_price():.8f} ({report.reprices} reposicionamentos).")
+        return report.to_order(f"maker-{uuid.uuid4().hex[:16]}")
+
+    def summary(self):
+        """Taxa de preenchimento como maker e custo de execução comparado ao preço que a ordem a mercado pagaria."""
+        reports = list(self.reports)
+        requested = sum(float(report.requested) for report in reports)
+        maker = sum(float(report.maker_quantity) for report in reports)
+        taker = sum(float(report.taker_quantity) for report in reports)
+        improvements = [
+            -adverse_slippage(report.side, report.reference_price, report.average_price())
+            for report in reports if report.executed.units
+        ]
+        durations = [report.finished_at - report.started_at for report in reports]
+        return {
+            'orders': len(reports),
+            'resting': len(self.resting),
+            'maker_fill_rate': maker / requested if requested else 0.0,
+            'taker_fallback_rate': taker / requested if requested else 0.0,
+            'unfilled_rate': 1.0 - (maker + taker) / requested if requested else 0.0,
+            'fully_maker': sum(1 for report in reports if report.maker_quantity == report.requested),
+            'reprices': sum(report.reprices for report in reports),
+            'post_only_rejections': sum(report.rejections for report in reports),
+            'mean_price_improvement_bps': 1e4 * sum(improvements) / len(improvements) if improvements else 0.0,
+            'mean_duration_s': sum(durations) / len(durations) if durations else 0.0
+        }
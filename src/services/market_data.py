@@ -0,0 +1,97 @@
+import asyncio
+import time
+import logging
+
+from services.binance_client import get_all_prices, get_historical_data
+from services.rate_limiter import WEIGHT_KLINES, WEIGHT_TICKER_ALL
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+
+class MarketDataHub:
+    """
+    Fonte de dados de mercado compartilhada entre os símbolos de um mesmo processo.
+
+    Os preços de todos os símbolos são obtidos em uma única chamada em lote e reaproveitados
+    enquanto estiverem dentro do 'price_ttl'; chamadas simultâneas compartilham a mesma requisição.
+    """
+
+    def __init__(self, executor, rate_limiter, price_ttl=1.0):
+        self.executor = executor
+        self.rate_limiter = rate_limiter
+        self.price_ttl = price_ttl
+        self.prices = {}
+        self.prices_updated_at = 0.0
+        self.subscribers = {}
+        self.candles = {}  # símbolo -> (time.time() da consulta, DataFrame): último lote de candles obtido
+        self._refresh_task = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _fetch_prices(self):
+        await self.rate_limiter.acquire(WEIGHT_TICKER_ALL)
+        prices = await self._run(get_all_prices)
+        if prices:
+            self.prices = prices
+            self.prices_updated_at = time.monotonic()
+        return self.prices
+
+    async def refresh_prices(self):
+        """Atualiza o cache de preços; requisições concorrentes aguardam a mesma chamada em andamento."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._fetch_prices())
+        return await asyncio.shield(self._refresh_task)
+
+    async def get_price(self, symbol):
+        """Retorna o preço atual do símbolo, usando o cache em lote quando ainda estiver válido."""
+        if time.monotonic() - self.prices_updated_at > self.price_ttl:
+            await self.refresh_prices()
+        return self.prices.get(symbol)
+
+    def subscribe(self, symbol, callback):
+        """Registra uma função chamada a cada novo preço do símbolo."""
+        self.subscribers.setdefault(symbol, []).append(callback)
+
+    def publish_prices(self, prices):
+        """Distribui os preços recebidos (polling em lote ou stream) aos inscritos de cada símbolo."""
+        for symbol, callbacks in self.subscribers.items():
+            price = prices.get(symbol)
+            if price is None:
+                continue
+            for callback in callbacks:
+                callback(price)
+
+    async def watch_prices(self, poll_interval=2.0):
+        """Consulta os preços em lote periodicamente e notifica os inscritos; uma única task por processo."""
+        while True:
+            try:
+                self.publish_prices(await self.refresh_prices())
+            except Exception as e:
+                logger.error(f"Erro ao observar preços em lote: {e}")
+            await asyncio.sleep(poll_interval)
+
+    async def get_historical_data(self, symbol, interval='30m', max_limit=1000):
+        """Obtém os candles históricos do símbolo respeitando o limite de peso compartilhado."""
+        await self.rate_limiter.acquire(WEIGHT_KLINES)
+        df = await self._run(get_historical_data, symbol, interval, max_limit)
+        if df is not None and not df.empty:
+            self.candles[symbol] = (time.time(), df)
+        return df
+
+    def cached_candles(self, symbol, max_age):
+        """Últimos candles obtidos do símbolo, se tiverem no máximo 'max_age' segundos."""
+        fetched_at, df = self.candles.get(symbol, (0.0, None))
+        return df if time.time() - fetched_at <= max_age else None
+
+    def export_state(self):
+        return {'prices': dict(self.prices), 'candles': dict(self.candles)}
+
+    def restore_state(self, state):
+        """Restaura preços (marcados como vencidos, para a primeira leitura atualizar) e candles do snapshot."""
+        for symbol, price in state['prices'].items():
+            self.prices.setdefault(symbol, price)
+        for symbol, candles in state['candles'].items():
+            self.candles.setdefault(symbol, candles)
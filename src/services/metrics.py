@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+METRICS_FILE = 'latency_metrics.json'
+DEFAULT_WINDOW = 2048  # Quantidade de amostras mantidas por etapa (janela móvel)
+
+
+class LatencyRecorder:
+    """Mede a duração de cada etapa do ciclo e mantém histogramas móveis (p50/p95/p99) por etapa."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.samples = {}  # etapa -> deque com as últimas durações (ms)
+        self.counts = {}  # etapa -> total de medições desde o início
+
+    @contextmanager
+    def span(self, stage):
+        """Mede o bloco 'with' (síncrono ou contendo await) e registra a duração na etapa."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def record(self, stage, duration_ms):
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+            self.counts[stage] = 0
+        self.samples[stage].append(duration_ms)
+        self.counts[stage] += 1
+
+    def summary(self):
+        """Retorna as estatísticas de latência (ms) de cada etapa na janela atual."""
+        result = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=float, count=len(samples))
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[stage] = {
+                'count': self.counts[stage],
+                'window': len(values),
+                'mean_ms': round(float(values.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(values.max()), 3)
+            }
+        return result
+
+    def dump(self, path=METRICS_FILE):
+        """Grava o resumo atual em arquivo JSON (usado no encerramento do bot)."""
+        with open(path, 'w') as file:
+            json.dump({'generated_at': time.time(), 'stages': self.summary()}, file, indent=2)
+        logger.info(f"Métricas de latência salvas em '{path}'.")
+
+
+async def start_metrics_server(providers, host='127.0.0.1', port=8765):
+    """
+    Inicia um endpoint HTTP local que responde qualquer GET com o JSON de todos os 'providers'
+    (dicionário nome -> função sem argumentos que retorna um dicionário).
+    """
+    async def handle(reader, writer):
+        try:
+            # Consome a requisição até a linha em branco que encerra os cabeçalhos
+            while (await reader.readline()).strip():
+                pass
+            body = json.dumps({name: provider() for name, provider in providers.items()}, default=str).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"Erro ao responder requisição de métricas: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Endpoint de métricas disponível em http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,284 @@
+import asyncio
+import time
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import accumulate
+
+from services.rate_limiter import WEIGHT_DEPTH_SNAPSHOT
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+MAX_BUFFERED_EVENTS = 1000  # Eventos de diferença guardados enquanto o snapshot não chega
+RESYNC_INTERVAL = 5.0  # Intervalo (s) mínimo entre pedidos de snapshot do mesmo símbolo
+IMBALANCE_LEVELS = 10  # Níveis de cada lado considerados no desequilíbrio do book
+
+
+class BookSide:
+    """
+    Um lado do book com os níveis ordenados do melhor para o pior preço.
+
+    As chaves são os preços (negativos no lado de compra), mantidas em ordem crescente com bisect; o
+    melhor nível é sempre a primeira chave. As somas acumuladas de quantidade e de valor são refeitas
+    uma única vez após cada lote de alterações, na primeira consulta, e lidas por busca binária.
+    """
+
+    def __init__(self, descending):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = []
+        self.quantities = {}  # chave -> quantidade
+        self._cumulative = None  # (quantidades acumuladas, valores acumulados)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.quantities.clear()
+        self._cumulative = None
+
+    def set(self, price, quantity):
+        """Define a quantidade de um nível; quantidade zero remove o nível."""
+        key = self.sign * price
+        if quantity <= 0:
+            if self.quantities.pop(key, None) is not None:
+                del self.keys[bisect_left(self.keys, key)]
+        else:
+            if key not in self.quantities:
+                insort(self.keys, key)
+            self.quantities[key] = quantity
+        self._cumulative = None
+
+    def best(self):
+        """Melhor nível (preço, quantidade), ou None se o lado estiver vazio."""
+        if not self.keys:
+            return None
+        key = self.keys[0]
+        return self.sign * key, self.quantities[key]
+
+    def levels(self, count):
+        return [(self.sign * key, self.quantities[key]) for key in self.keys[:count]]
+
+    def _prefix(self):
+        if self._cumulative is None:
+            quantities = [self.quantities[key] for key in self.keys]
+            self._cumulative = (
+                list(accumulate(quantities)),
+                list(accumulate(self.sign * key * quantity for key, quantity in zip(self.keys, quantities)))
+            )
+        return self._cumulative
+
+    def depth(self, price):
+        """Quantidade acumulada dos níveis com preço igual ou melhor que 'price'."""
+        index = bisect_right(self.keys, self.sign * price)
+        return self._prefix()[0][index - 1] if index else 0.0
+
+    def fill_price(self, quantity):
+        """Preço médio para consumir 'quantity' a partir do melhor nível; None se o book não tiver profundidade."""
+        if quantity <= 0:
+            return None
+        cumulative_quantity, cumulative_quote = self._prefix()
+        index = bisect_left(cumulative_quantity, quantity)
+        if index == len(cumulative_quantity):
+            return None
+        filled = cumulative_quantity[index - 1] if index else 0.0
+        quote = cumulative_quote[index - 1] if index else 0.0
+        return (quote + (quantity - filled) * self.sign * self.keys[index]) / quantity
+
+
+class OrderBook:
+    """
+    Book local de um símbolo, mantido a partir de um snapshot de profundidade e do stream de diferenças
+    ('depthUpdate'), seguindo o procedimento da Binance: eventos anteriores ao snapshot são guardados,
+    os já contidos nele (u <= lastUpdateId) são descartados, o primeiro aplicado precisa cobrir
+    lastUpdateId + 1 e cada evento seguinte precisa começar em u + 1 do anterior. Uma quebra de
+    sequência descarta o book até um novo snapshot.
+    """
+
+    def __init__(self, symbol, max_buffered_events=MAX_BUFFERED_EVENTS):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = None
+        self.synced = False
+        self.awaiting_first_event = True  # o primeiro evento após o snapshot só precisa cobrir lastUpdateId + 1
+        self.buffer = deque(maxlen=max_buffered_events)
+        self.updated_at = 0.0  # time.monotonic() da última alteração aplicada
+        self.updates = 0
+        self.snapshots = 0
+        self.gaps = 0
+
+    @property
+    def needs_snapshot(self):
+        return self.last_update_id is None
+
+    def _reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+        self.awaiting_first_event = True
+
+    def load_snapshot(self, snapshot):
+        """Carrega um snapshot ({'lastUpdateId', 'bids', 'asks'}) e reaplica os eventos guardados."""
+        self._reset()
+        for price, quantity in snapshot['bids']:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in snapshot['asks']:
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = snapshot['lastUpdateId']
+        self.synced = True
+        self.snapshots += 1
+        self.updated_at = time.monotonic()
+        buffered = list(self.buffer)
+        self.buffer.clear()
+        for event in buffered:
+            self._apply(event)
+        return self.synced
+
+    def apply_diff(self, event):
+        """Aplica um evento 'depthUpdate' (ou o guarda até o snapshot); retorna True se o book foi alterado."""
+        return self._apply(event)
+
+    def _apply(self, event):
+        first, last = event['U'], event['u']
+        if self.needs_snapshot:
+            self.buffer.append(event)
+            return False
+        if last <= self.last_update_id:
+            return False  # Já contido no snapshot
+        expected = self.last_update_id + 1
+        if first > expected or (not self.awaiting_first_event and first != expected):
+            self.gaps += 1
+            logger.warning(f"[{self.symbol}] Quebra de sequência no book (esperado {expected}, recebido {first}-{last}); "
+                           f"aguardando novo snapshot.")
+            self._reset()
+            self.buffer.append(event)
+            return False
+        for price, quantity in event['b']:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in event['a']:
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = last
+        self.awaiting_first_event = False
+        self.updated_at = time.monotonic()
+        self.updates += 1
+        return True
+
+    def _side(self, side):
+        """Lado consumido por uma ordem: a compra consome o ask, a venda consome o bid."""
+        return self.asks if side == 'buy' else self.bids
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def spread(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        return ask[0] - bid[0] if bid and ask else None
+
+    def mid_price(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        return (bid[0] + ask[0]) / 2 if bid and ask else None
+
+    def cumulative_depth(self, side, price):
+        """Quantidade que uma ordem 'buy'/'sell' executaria até o preço limite 'price'."""
+        return self._side(side).depth(price)
+
+    def fill_price(self, side, quantity):
+        """Preço médio de uma ordem a mercado 'buy'/'sell' de 'quantity' (None se faltar profundidade)."""
+        return self._side(side).fill_price(quantity)
+
+    def imbalance(self, levels=IMBALANCE_LEVELS):
+        """Desequilíbrio entre compra e venda nos primeiros níveis, de -1 (só venda) a 1 (só compra)."""
+        bids = sum(quantity for _, quantity in self.bids.levels(levels))
+        asks = sum(quantity for _, quantity in self.asks.levels(levels))
+        return (bids - asks) / (bids + asks) if bids + asks else 0.0
+
+
+class OrderBookHub:
+    """
+    Books locais de todos os símbolos do processo. Recebe os eventos do stream de diferenças (no event
+    loop), pede um snapshot sempre que um book precisa ser sincronizado e avisa os inscritos a cada
+    alteração aplicada.
+    """
+
+    def __init__(self, fetch_snapshot, executor, rate_limiter, resync_interval=RESYNC_INTERVAL):
+        self.fetch_snapshot = fetch_snapshot
+        self.executor = executor
+        self.rate_limiter = rate_limiter
+        self.resync_interval = resync_interval
+        self.books = {}
+        self.subscribers = {}
+        self.events = 0
+        self._snapshot_tasks = {}
+        self._snapshot_requested_at = {}
+
+    def get(self, symbol):
+        """Book do símbolo, somente se estiver sincronizado."""
+        book = self.books.get(symbol)
+        return book if book is not None and book.synced else None
+
+    def subscribe(self, symbol, callback):
+        """Registra callback(book) chamado a cada alteração aplicada ao book do símbolo."""
+        self.subscribers.setdefault(symbol, []).append(callback)
+        self.books.setdefault(symbol, OrderBook(symbol))
+
+    def _notify(self, book):
+        for callback in self.subscribers.get(book.symbol, ()):
+            callback(book)
+
+    def on_depth_event(self, message):
+        """Processa uma mensagem do stream de profundidade (direta ou no formato multiplex)."""
+        event = message.get('data', message)
+        if event.get('e') != 'depthUpdate':
+            if event.get('e') == 'error':
+                logger.error(f"Erro no stream de profundidade: {event}")
+            return
+        self.events += 1
+        book = self.books.setdefault(event['s'], OrderBook(event['s']))
+        if book.apply_diff(event):
+            self._notify(book)
+        if book.needs_snapshot:
+            self._request_snapshot(book)
+
+    def _request_snapshot(self, book):
+        task = self._snapshot_tasks.get(book.symbol)
+        if task is not None and not task.done():
+            return
+        now = time.monotonic()
+        if now - self._snapshot_requested_at.get(book.symbol, float('-inf')) < self.resync_interval:
+            return
+        self._snapshot_requested_at[book.symbol] = now
+        self._snapshot_tasks[book.symbol] = asyncio.ensure_future(self._load_snapshot(book))
+
+    async def _load_snapshot(self, book):
+        try:
+            await self.rate_limiter.acquire(WEIGHT_DEPTH_SNAPSHOT)
+            snapshot = await asyncio.get_running_loop().run_in_executor(self.executor, self.fetch_snapshot, book.symbol)
+        except Exception as e:
+            logger.error(f"[{book.symbol}] Erro ao obter snapshot de profundidade: {e}")
+            return
+        if snapshot is None:
+            return  # O próximo evento pede outro snapshot
+        if book.load_snapshot(snapshot):
+            logger.info(f"[{book.symbol}] Book local sincronizado (lastUpdateId {book.last_update_id}, "
+                        f"{len(book.bids)} bids / {len(book.asks)} asks).")
+            self._notify(book)
+
+    def summary(self):
+        now = time.monotonic()
+        books = {}
+        for symbol, book in self.books.items():
+            bid, ask = book.best_bid(), book.best_ask()
+            books[symbol] = {
+                'synced': book.synced, 'bid': bid[0] if bid else None, 'ask': ask[0] if ask else None,
+                'levels': (len(book.bids), len(book.asks)), 'imbalance': book.imbalance(),
+                'updates': book.updates, 'snapshots': book.snapshots, 'gaps': book.gaps,
+                'age': now - book.updated_at if book.updated_at else None
+            }
+        return {'events': self.events, 'books': books}
@@ -0,0 +1,82 @@
+import threading
+import time
+import logging
+
+from services.binance_client import client
+from strategies.risk_context import OrderStats, summarize_orders
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+ORDER_HISTORY_TTL = 60.0  # Validade (s) do resumo de ordens; fills próprios invalidam antes disso
+ORDER_HISTORY_LIMIT = 100  # Ordens consultadas por símbolo
+
+
+def fetch_all_orders(symbol, limit=ORDER_HISTORY_LIMIT):
+    return client.get_all_orders(symbol=symbol, limit=limit)
+
+
+class OrderHistoryCache:
+    """
+    Cache por símbolo do resumo do histórico de ordens (OrderStats).
+
+    Substitui as quatro consultas get_all_orders por avaliação (duas em get_consecutive_trades e duas
+    em calculate_average_price) por uma única consulta, reaproveitada até expirar o 'ttl' ou até uma
+    execução própria invalidar o símbolo.
+    """
+
+    def __init__(self, fetch_orders=fetch_all_orders, ttl=ORDER_HISTORY_TTL):
+        self.fetch_orders = fetch_orders
+        self.ttl = ttl
+        self.entries = {}  # símbolo -> OrderStats
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def is_stale(self, symbol, now=None):
+        """Indica se a próxima leitura do símbolo fará uma consulta à corretora."""
+        now = time.time() if now is None else now
+        stats = self.entries.get(symbol)
+        return stats is None or now - stats.fetched_at >= self.ttl
+
+    def get(self, symbol):
+        """Retorna o OrderStats do símbolo, consultando a corretora apenas se o cache expirou."""
+        with self._lock:
+            if not self.is_stale(symbol):
+                self.hits += 1
+                return self.entries[symbol]
+            self.misses += 1
+            try:
+                stats = summarize_orders(self.fetch_orders(symbol))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Erro ao consultar o histórico de ordens de {symbol}: {e}")
+                # Mantém o último resumo conhecido; sem ele, nenhuma restrição de histórico
+                return self.entries.get(symbol, OrderStats())
+            self.entries[symbol] = stats
+            return stats
+
+    def invalidate(self, symbol):
+        """Descarta o resumo do símbolo (chamado após uma execução própria)."""
+        with self._lock:
+            self.entries.pop(symbol, None)
+
+    def export_state(self):
+        with self._lock:
+            return {'entries': dict(self.entries)}
+
+    def restore_state(self, state):
+        """Restaura os resumos do snapshot; cada um continua valendo só até o fim do seu 'ttl'."""
+        with self._lock:
+            for symbol, stats in state['entries'].items():
+                self.entries.setdefault(symbol, stats)
+
+    def summary(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'symbols': {symbol: stats.fetched_at for symbol, stats in self.entries.items()}
+        }
@@ -0,0 +1,260 @@
+import asyncio
+import math
+import time
+import uuid
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+
+from services.fixed_point import Fixed
+from services.order_submission import UNKNOWN_STATUS
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+ALGORITHMS = ('twap', 'pov', 'iceberg')
+SLICE_DURATION = 300.0  # Horizonte (s) de execução da ordem-mãe
+SLICE_COUNT = 5  # Quantidade de ordens-filhas no TWAP
+PARTICIPATION_RATE = 0.1  # Fração do volume negociado pelo mercado no modo 'pov'
+ICEBERG_FRACTION = 0.5  # Fração da quantidade visível no melhor nível usada por ordem-filha no modo 'iceberg'
+MIN_CHILD_INTERVAL = 5.0  # Intervalo (s) mínimo entre ordens-filhas ('pov' e 'iceberg')
+SLICE_MIN_NOTIONAL = 0.0  # Ordens abaixo deste valor (moeda de cotação) vão direto, sem fatiamento
+CHILD_ORDER_PREFIX = 'sl-'  # clientOrderId das ordens-filhas (acompanhadas pelo próprio slicer)
+REPORT_SAMPLES = 500
+
+
+def volume_rate_from_candles(df, candle_seconds, window=10):
+    """Volume médio negociado por segundo nos últimos candles fechados (o último candle ainda está em formação)."""
+    if df is None or len(df) < 2 or 'volume' not in df:
+        return 0.0
+    closed = df['volume'].iloc[-(window + 1):-1]
+    return float(closed.mean()) / candle_seconds if len(closed) else 0.0
+
+
+def min_child_units(precision, price):
+    """Menor quantidade-filha válida (unidades): respeita minQty, o passo do LOT_SIZE e o valor mínimo da ordem."""
+    step = max(precision.step.units, 1)
+    minimum = max(precision.min_quantity.units, step)
+    if precision.min_notional and price:
+        notional_units = math.ceil(precision.min_notional / price * 10 ** precision.quantity_decimals)
+        minimum = max(minimum, -(-notional_units // step) * step)
+    return minimum
+
+
+def clip_child(units, remaining, step, minimum):
+    """
+    Ajusta uma quantidade-filha (unidades) ao LOT_SIZE: múltipla do passo, nunca abaixo do mínimo e sem
+    deixar um resto impossível de negociar (nesse caso a filha leva todo o restante).
+    """
+    units = min(max(units - units % step, minimum), remaining)
+    if remaining - units < minimum:
+        units = remaining
+    return units
+
+
+def twap_schedule(total_units, slices, step, minimum):
+    """Divide 'total_units' em até 'slices' partes iguais múltiplas do passo (a última recebe o resto)."""
+    slices = max(1, min(slices, total_units // minimum if minimum else slices))
+    base = total_units // slices
+    schedule = []
+    remaining = total_units
+    for _ in range(slices - 1):
+        child = clip_child(base, remaining, step, minimum)
+        schedule.append(child)
+        remaining -= child
+        if not remaining:
+            break
+    if remaining:
+        schedule.append(remaining)
+    return schedule
+
+
+@dataclass
+class SliceReport:
+    """Execução de uma ordem-mãe fatiada e o custo de implementação (implementation shortfall)."""
+    symbol: str
+    side: str
+    algorithm: str
+    arrival_price: float  # preço da decisão
+    arrival_reference: float  # ask (compra) / bid (venda) na chegada: custo de uma ordem a mercado única
+    requested: Fixed
+    executed: Fixed
+    quote: float = 0.0
+    children: int = 0
+    failed_children: int = 0
+    fills: list = field(default_factory=list)
+    final_price: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def average_price(self):
+        executed = float(self.executed)
+        return self.quote / executed if executed else 0.0
+
+    def _signed(self, price):
+        direction = 1.0 if self.side == 'buy' else -1.0
+        return direction * (price - self.arrival_price) / self.arrival_price if self.arrival_price else 0.0
+
+    @property
+    def shortfall_bps(self):
+        """Custo da parte executada em relação ao preço de chegada (positivo = pior que a chegada)."""
+        return 1e4 * self._signed(self.average_price) if self.executed.units else 0.0
+
+    @property
+    def opportunity_cost_bps(self):
+        """Custo da parte não executada, avaliada pelo movimento do preço até o fim da execução."""
+        requested = float(self.requested)
+        unfilled = requested - float(self.executed)
+        if not requested or unfilled <= 0 or not self.final_price:
+            return 0.0
+        return 1e4 * self._signed(self.final_price) * unfilled / requested
+
+    @property
+    def immediate_cost_bps(self):
+        """Custo estimado de executar tudo de uma vez a mercado na chegada (cruzando o spread)."""
+        return 1e4 * self._signed(self.arrival_reference) if self.arrival_reference else 0.0
+
+    def to_order(self, client_order_id, status):
+        return {
+            'symbol': self.symbol,
+            'side': self.side.upper(),
+            'orderId': None,  # Ordem-mãe local: não há o que consultar na corretora
+            'clientOrderId': client_order_id,
+            'origQty': str(self.requested),
+            'status': status,
+            'executedQty': str(self.executed),
+            'cummulativeQuoteQty': repr(self.quote),
+            'fills': list(self.fills)
+        }
+
+
+class OrderSlicer:
+    """
+    Divide a ordem da decisão em ordens-filhas ao longo do tempo, agendadas no event loop:
+
+    - 'twap': partes iguais em intervalos regulares dentro de 'duration';
+    - 'pov': cada filha é 'participation_rate' do volume que o mercado negocia no intervalo;
+    - 'iceberg': cada filha é uma fração da quantidade visível no melhor nível do lado oposto.
+
+    As filhas seguem o LOT_SIZE e o valor mínimo da ordem, e o que restar ao fim de 'duration' é
+    enviado de uma vez. As filhas passam pelo roteador (ExecutionEngine ou MakerExecution), com a
+    mesma proteção de slippage contra o preço da decisão. O progresso é publicado no OrderTracker a
+    cada filha, e o relatório final traz o implementation shortfall em relação ao preço de chegada.
+    """
+
+    def __init__(self, router, engine, tracker=None, algorithm='twap', duration=SLICE_DURATION, slices=SLICE_COUNT,
+                 participation_rate=PARTICIPATION_RATE, iceberg_fraction=ICEBERG_FRACTION,
+                 min_interval=MIN_CHILD_INTERVAL, min_notional=SLICE_MIN_NOTIONAL):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo de fatiamento desconhecido: {algorithm}")
+        self.router = router
+        self.engine = engine
+        self.tracker = tracker
+        self.algorithm = algorithm
+        self.duration = duration
+        self.slices = slices
+        self.participation_rate = participation_rate
+        self.iceberg_fraction = iceberg_fraction
+        self.min_interval = min_interval
+        self.min_notional = min_notional
+        self.volume_rates = {}  # símbolo -> volume negociado pelo mercado por segundo (estimativa)
+        self.reports = deque(maxlen=REPORT_SAMPLES)
+
+    def set_volume_rate(self, symbol, volume_per_second):
+        """Atualiza a estimativa de volume do mercado usada pelo modo 'pov'."""
+        self.volume_rates[symbol] = volume_per_second
+
+    def _next_child(self, context, side, remaining, step, minimum, slices_left, interval):
+        if self.algorithm == 'twap':
+            target = remaining // max(slices_left, 1)
+        elif self.algorithm == 'pov':
+            volume = self.volume_rates.get(context.symbol, 0.0) * interval * self.participation_rate
+            target = int(volume * 10 ** context.precision.quantity_decimals)
+        else:
+            visible = context.ask_quantity if side == 'buy' else context.bid_quantity
+            target = int(visible * self.iceberg_fraction * 10 ** context.precision.quantity_decimals)
+        return clip_child(target, remaining, step, minimum)
+
+    async def submit(self, decision):
+        """Executa a decisão fatiada; mesma interface (e formato de resposta) do ExecutionEngine."""
+        symbol = decision['asset']
+        side = decision['type']
+        arrival_price = decision['price']
+        context = await self.engine.context(symbol)
+        precision = context.precision
+        requested = precision.quantity(decision['quantity'])
+        if self.min_notional and float(requested) * arrival_price < self.min_notional:
+            return await self.router.submit(decision)
+
+        parent_id = f"{CHILD_ORDER_PREFIX}{uuid.uuid4().hex[:20]}"
+        report = SliceReport(symbol, side, self.algorithm, arrival_price,
+                             context.reference_price(side, self.engine.max_book_age) or arrival_price,
+                             requested, Fixed(0, precision.quantity_decimals), started_at=time.time())
+        step = max(precision.step.units, 1)
+        minimum = min_child_units(precision, arrival_price)
+        remaining = requested.units
+        if self.algorithm == 'twap':
+            slices_left = len(twap_schedule(remaining, self.slices, step, minimum))
+            interval = self.duration / slices_left
+        else:
+            slices_left = 0
+            interval = self.min_interval
+        deadline = time.monotonic() + self.duration
+        logger.info(f"[{symbol}] Fatiando {side} de {requested} ({self.algorithm}) em até {self.duration:.0f}s.")
+        self._publish(parent_id, report, 'NEW', decision)
+
+        while remaining > 0:
+            last = time.monotonic() + interval >= deadline
+            child = remaining if last else self._next_child(context, side, remaining, step, minimum, slices_left, interval)
+            child_decision = dict(decision, quantity=float(Fixed(child, precision.quantity_decimals)),
+                                  client_order_id=f"{parent_id}-{report.children}")
+            order = await self.router.submit(child_decision)
+            report.children += 1
+            slices_left -= 1
+            if order and order.get('status') == UNKNOWN_STATUS:
+                # Filha sem confirmação (acompanhada pelo OrderTracker): continuar poderia executar além do pedido
+                logger.error(f"[{symbol}] Ordem-filha {child_decision['client_order_id']} sem confirmação; fatiamento interrompido.")
+                report.failed_children += 1
+                break
+            executed = Fixed.from_str(order.get('executedQty', '0'), precision.quantity_decimals) if order else None
+            if executed is None or not executed.units:
+                report.failed_children += 1
+            else:
+                report.executed += executed
+                report.quote += float(order.get('cummulativeQuoteQty') or 0.0)
+                report.fills.extend(order.get('fills') or [])
+                remaining -= executed.units
+                self._publish(parent_id, report, 'PARTIALLY_FILLED', decision)
+            if last or remaining < minimum:
+                break
+            await asyncio.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+
+        report.final_price = context.reference_price(side, self.engine.max_book_age) or context.last_price
+        report.finished_at = time.time()
+        self.reports.append(report)
+        logger.info(f"[{symbol}] Fatiamento concluído: {report.executed}/{report.requested} em {report.children} filhas, "
+                    f"shortfall {report.shortfall_bps:.1f} bps (ordem única estimada em {report.immediate_cost_bps:.1f} bps).")
+        return report.to_order(parent_id, 'FILLED' if report.executed == report.requested else 'CANCELED')
+
+    def _publish(self, parent_id, report, status, decision):
+        """Publica o progresso acumulado da ordem-mãe no OrderTracker (portfólio e ledger atualizados por filha)."""
+        if self.tracker is not None:
+            self.tracker.track(report.to_order(parent_id, status), decision)
+
+    def summary(self):
+        reports = list(self.reports)
+        executed = [report for report in reports if report.executed.units]
+        mean = lambda values: sum(values) / len(values) if values else 0.0
+        return {
+            'algorithm': self.algorithm,
+            'parents': len(reports),
+            'children': sum(report.children for report in reports),
+            'failed_children': sum(report.failed_children for report in reports),
+            'fill_rate': mean([float(report.executed) / float(report.requested) for report in reports if report.requested.units]),
+            'mean_shortfall_bps': mean([report.shortfall_bps for report in executed]),
+            'mean_opportunity_cost_bps': mean([report.opportunity_cost_bps for report in reports]),
+            'mean_immediate_cost_bps': mean([report.immediate_cost_bps for report in executed]),
+            'mean_savings_bps': mean([report.immediate_cost_bps - report.shortfall_bps for report in executed])
+        }
@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+import logging
+from dataclasses import dataclass
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+SUBMIT_ATTEMPTS = 3  # Envios no máximo por ordem (sempre com o mesmo clientOrderId)
+SUBMIT_RETRY_DELAY = 0.25  # Espera (s) antes de consultar o resultado de um envio com status desconhecido
+HISTORY_LOOKBACK = 60.0  # Margem (s) antes do primeiro envio ao procurar a ordem no histórico (diferença de relógio)
+CLIENT_ORDER_PREFIX = 'ex-'  # clientOrderId gerado para as ordens a mercado do ExecutionEngine
+UNKNOWN_STATUS = 'UNKNOWN'  # Status local: a corretora pode ou não ter aceitado a ordem
+
+
+class OrderStatusUnknown(ConnectionError):
+    """O envio (ou a consulta) falhou sem resposta conclusiva: a ordem pode ter sido aceita pela corretora."""
+
+
+def new_client_order_id(prefix=CLIENT_ORDER_PREFIX):
+    """Gera um clientOrderId único (a Binance aceita até 36 caracteres)."""
+    return f"{prefix}{uuid.uuid4().hex[:24]}"
+
+
+@dataclass
+class SubmitResult:
+    """Resultado de um envio idempotente."""
+    client_order_id: str
+    order: dict = None  # resposta da corretora (envio ou consulta); None se rejeitada ou desconhecida
+    submits: int = 0
+    lookups: int = 0
+    recovered: bool = False  # a ordem foi encontrada pela consulta após um envio sem resposta
+    resolved: bool = True  # False: não foi possível saber se a ordem chegou à corretora
+
+    @property
+    def retried(self):
+        return self.submits > 1 or self.lookups > 0
+
+
+async def submit_idempotent(submit, lookup, history, client_order_id, attempts=SUBMIT_ATTEMPTS, retry_delay=SUBMIT_RETRY_DELAY, sleep=asyncio.sleep):
+    """
+    Envia uma ordem sem risco de duplicá-la.
+
+    'submit(client_order_id)' envia a ordem e retorna a resposta (ou None se a corretora a rejeitou);
+    'lookup(client_order_id)' retorna a ordem existente ou None se ela não existe; 'history(client_order_id)'
+    procura a ordem no histórico recente. Os três são coroutines (cada um passa pelo RateLimiter) e
+    levantam OrderStatusUnknown quando não há resposta conclusiva. Após um envio sem resposta, a ordem
+    só é reenviada (com o mesmo clientOrderId) depois que a consulta e o histórico confirmarem que ela
+    não chegou à corretora: a Binance só recusa um clientOrderId repetido enquanto a ordem está aberta,
+    então reenviar uma ordem já executada e encerrada criaria outra. Se a ordem for encontrada, a
+    resposta dela é usada e nada é reenviado.
+    """
+    result = SubmitResult(client_order_id)
+    pending = False  # o último envio terminou sem resposta
+    for _ in range(attempts):
+        if pending:
+            order = await _lookup(lookup, history, result, retry_delay, sleep)
+            if order is not None or not result.resolved:
+                return result
+        try:
+            result.submits += 1
+            result.order = await submit(client_order_id)
+            return result
+        except OrderStatusUnknown as e:
+            logger.warning(f"Envio da ordem {client_order_id} sem resposta conclusiva ({e}); consultando antes de reenviar.")
+            pending = True
+    if await _lookup(lookup, history, result, retry_delay, sleep) is None:
+        # O último envio ainda pode ser processado: fica para o OrderTracker confirmar pelo clientOrderId
+        logger.error(f"Ordem {client_order_id} sem confirmação após {result.submits} envios.")
+        result.resolved = False
+    return result
+
+
+async def _lookup(lookup, history, result, retry_delay, sleep):
+    """
+    Consulta a ordem pelo clientOrderId e, se a corretora informar que ela não existe, confirma no
+    histórico recente; marca o resultado como recuperado ou como não resolvido.
+    """
+    await sleep(retry_delay)
+    try:
+        result.lookups += 1
+        order = await lookup(result.client_order_id)
+        if order is None:
+            result.lookups += 1
+            order = await history(result.client_order_id)
+    except OrderStatusUnknown as e:
+        # Sem como saber se a ordem existe: reenviar poderia duplicá-la
+        logger.error(f"Não foi possível confirmar a ordem {result.client_order_id}: {e}")
+        result.resolved = False
+        return None
+    if order is not None:
+        logger.info(f"Ordem {result.client_order_id} encontrada na corretora após envio sem resposta; não será reenviada.")
+        result.order = order
+        result.recovered = True
+    return order
+
+
+def unknown_order(symbol, side, quantity, client_order_id):
+    """Resposta local de uma ordem com status desconhecido, para o OrderTracker confirmar pela consulta."""
+    return {
+        'symbol': symbol,
+        'side': side.upper(),
+        'orderId': None,
+        'clientOrderId': client_order_id,
+        'origQty': str(quantity),
+        'status': UNKNOWN_STATUS,
+        'executedQty': '0',
+        'cummulativeQuoteQty': '0',
+        'fills': []
+    }
@@ -0,0 +1,316 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from services.binance_client import find_order, get_order_status, get_order_trades
+from services.order_submission import UNKNOWN_STATUS, OrderStatusUnknown
+from services.rate_limiter import WEIGHT_MY_TRADES, WEIGHT_ORDER_STATUS
+from services.reconciliation import OrderFill
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+MIN_POLL_INTERVAL = 0.5  # Intervalo (s) inicial de consulta de uma ordem aberta
+MAX_POLL_INTERVAL = 15.0  # Intervalo (s) máximo; dobra a cada consulta sem alteração
+CLOSED_HISTORY = 500  # Ordens encerradas mantidas para consulta e métricas
+QUANTITY_TOLERANCE = 1e-12  # Diferença de quantidade ignorada ao comparar executedQty com os trades conhecidos
+UNKNOWN_ORDER_GRACE = 60.0  # Tempo (s) após o qual uma ordem com status desconhecido e não encontrada é dada como não enviada
+
+
+@dataclass
+class TrackedOrder:
+    """Estado conhecido de uma ordem, atualizado por eventos de execução ou por consulta."""
+    client_order_id: str
+    symbol: str
+    side: str  # 'buy' ou 'sell'
+    order_id: object = None
+    status: str = 'NEW'
+    quantity: float = 0.0  # origQty
+    executed: float = 0.0  # executedQty acumulado
+    quote: float = 0.0  # cummulativeQuoteQty acumulado
+    decision: dict = None
+    trade_ids: set = field(default_factory=set)
+    traded: float = 0.0  # Quantidade das execuções (trades) cujas comissões já foram aplicadas
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    poll_interval: float = MIN_POLL_INTERVAL
+    next_poll_at: float = 0.0  # time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.status not in FINAL_STATUSES
+
+    @property
+    def average_price(self):
+        return self.quote / self.executed if self.executed else 0.0
+
+
+def _commissions(fills, known_trade_ids):
+    """
+    Soma as comissões das execuções ainda não contabilizadas (por tradeId) e retorna (comissões, novos
+    ids, quantidade dessas execuções).
+    """
+    commissions = {}
+    trade_ids = []
+    traded = 0.0
+    for fill in fills:
+        trade_id = fill.get('tradeId')
+        if trade_id is not None and trade_id in known_trade_ids:
+            continue
+        if trade_id is not None:
+            trade_ids.append(trade_id)
+        traded += float(fill.get('qty') or 0.0)
+        commission = float(fill.get('commission', 0.0))
+        if commission:
+            asset = fill.get('commissionAsset')
+            commissions[asset] = commissions.get(asset, 0.0) + commission
+    return commissions, trade_ids, traded
+
+
+class OrderTracker:
+    """
+    Acompanha o ciclo de vida de todas as ordens enviadas em um mapa em memória por clientOrderId.
+
+    O estado é atualizado pela resposta do envio, por eventos 'executionReport' do user data stream e
+    por consultas com backoff adaptativo enquanto a ordem estiver aberta. Cada mudança de estado é
+    repassada aos 'listeners' como (ordem, incremento de execução ou None, status anterior); os
+    incrementos são calculados a partir das quantidades acumuladas, então eventos repetidos ou fora de
+    ordem nunca aplicam a mesma execução duas vezes. As comissões são contadas por tradeId: quando a
+    quantidade já chegou por outra via (ex.: consulta antes do evento), o incremento repassado traz
+    quantidade zero e só as comissões.
+    """
+
+    def __init__(self, min_poll_interval=MIN_POLL_INTERVAL, max_poll_interval=MAX_POLL_INTERVAL, ignored_prefixes=()):
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.ignored_prefixes = tuple(ignored_prefixes)  # Ordens acompanhadas por outro componente (ex.: filhas do modo maker)
+        self.open_orders = {}  # clientOrderId -> TrackedOrder
+        self.closed_orders = OrderedDict()  # clientOrderId -> TrackedOrder (últimas CLOSED_HISTORY)
+        self.listeners = []
+        self.events = 0
+        self.polls = 0
+        self.trade_fetches = 0
+        self.status_counts = {}
+        self._wakeup = asyncio.Event()
+
+    def add_listener(self, callback):
+        """Registra callback(ordem, fill, status_anterior) chamado a cada mudança de estado."""
+        self.listeners.append(callback)
+
+    def _get_or_create(self, client_order_id, symbol, side, order_id=None, quantity=0.0, decision=None):
+        tracked = self.open_orders.get(client_order_id) or self.closed_orders.get(client_order_id)
+        if tracked is None:
+            now = time.time()
+            tracked = TrackedOrder(client_order_id, symbol, side, order_id=order_id, quantity=quantity, decision=decision,
+                                   created_at=now, updated_at=now, poll_interval=self.min_poll_interval,
+                                   next_poll_at=time.monotonic() + self.min_poll_interval)
+            self.open_orders[client_order_id] = tracked
+        if order_id is not None:
+            tracked.order_id = order_id
+        if decision is not None:
+            tracked.decision = decision
+        if quantity:
+            tracked.quantity = quantity
+        return tracked
+
+    def _apply(self, tracked, status, executed, quote, commissions=None, trade_ids=(), traded=0.0):
+        """Aplica um novo estado acumulado e notifica os listeners se algo mudou."""
+        previous_status = tracked.status
+        fill = None
+        delta = max(executed - tracked.executed, 0.0)
+        if delta > 0 or commissions:
+            fill = OrderFill(
+                symbol=tracked.symbol, side=tracked.side, quantity=delta, quote_quantity=quote - tracked.quote if delta else 0.0,
+                commissions=commissions or {}, trade_ids=tuple(trade_ids), order_id=tracked.order_id
+            )
+        if delta > 0:
+            tracked.executed = executed
+            tracked.quote = quote
+        tracked.trade_ids.update(trade_ids)
+        tracked.traded += traded
+        # Um evento atrasado não faz a ordem voltar de um estado final
+        if status and (tracked.is_open or status in FINAL_STATUSES):
+            tracked.status = status
+
+        changed = fill is not None or tracked.status != previous_status
+        if changed:
+            tracked.updated_at = time.time()
+            tracked.poll_interval = self.min_poll_interval
+        if tracked.status != previous_status:
+            self.status_counts[tracked.status] = self.status_counts.get(tracked.status, 0) + 1
+        if not tracked.is_open and self.open_orders.pop(tracked.client_order_id, None) is not None:
+            self.closed_orders[tracked.client_order_id] = tracked
+            if len(self.closed_orders) > CLOSED_HISTORY:
+                self.closed_orders.popitem(last=False)
+        if changed:
+            self._notify(tracked, fill, previous_status)
+        return changed
+
+    def _notify(self, tracked, fill, previous_status):
+        if tracked.status != previous_status:
+            log = logger.warning if tracked.status in ('REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH') else logger.info
+            log(f"[{tracked.symbol}] Ordem {tracked.client_order_id}: {previous_status} -> {tracked.status} "
+                f"(executado {tracked.executed}/{tracked.quantity})")
+        for callback in self.listeners:
+            try:
+                callback(tracked, fill, previous_status)
+            except Exception as e:
+                logger.error(f"Erro ao notificar mudança da ordem {tracked.client_order_id}: {e}")
+
+    def track(self, order, decision=None):
+        """
+        Registra a resposta do envio de uma ordem e aplica o que ela já informa (execuções e status).
+        Ordens que continuam abertas passam a ser acompanhadas por eventos ou por consulta.
+        """
+        client_order_id = order.get('clientOrderId') or str(order.get('orderId'))
+        side = order.get('side', (decision or {}).get('type', '')).lower()
+        tracked = self._get_or_create(client_order_id, order.get('symbol') or (decision or {}).get('asset'), side,
+                                      order_id=order.get('orderId'), quantity=float(order.get('origQty') or 0.0), decision=decision)
+        self.apply_order_status(tracked, order)
+        if tracked.is_open:
+            self._wakeup.set()
+        return tracked
+
+    def apply_order_status(self, tracked, order):
+        """Atualiza a ordem a partir de uma resposta REST (envio, consulta ou cancelamento)."""
+        commissions, trade_ids, traded = _commissions(order.get('fills') or [], tracked.trade_ids)
+        executed = float(order['executedQty']) if 'executedQty' in order else tracked.executed
+        quote = float(order.get('cummulativeQuoteQty') or 0.0) if 'cummulativeQuoteQty' in order else tracked.quote
+        return self._apply(tracked, order.get('status'), executed, quote, commissions, trade_ids, traded)
+
+    def on_execution_report(self, event):
+        """Processa um evento 'executionReport' do user data stream da Binance."""
+        if event.get('e') != 'executionReport':
+            return False
+        self.events += 1
+        # Cancelamentos trazem o id original em 'C'; os demais eventos em 'c'
+        client_order_id = event.get('C') or event.get('c')
+        if self.ignored_prefixes and client_order_id.startswith(self.ignored_prefixes):
+            return False
+        tracked = self._get_or_create(client_order_id, event.get('s'), event.get('S', '').lower(),
+                                      order_id=event.get('i'), quantity=float(event.get('q') or 0.0))
+        commissions, trade_ids, traded = {}, (), 0.0
+        trade_id = event.get('t', -1)
+        if trade_id not in (-1, None) and trade_id not in tracked.trade_ids:
+            trade_ids = (trade_id,)
+            traded = float(event.get('l') or 0.0)
+            commission = float(event.get('n') or 0.0)
+            if commission:
+                commissions = {event.get('N'): commission}
+        return self._apply(tracked, event.get('X'), float(event.get('z') or 0.0), float(event.get('Z') or 0.0),
+                           commissions, trade_ids, traded)
+
+    def get(self, client_order_id):
+        return self.open_orders.get(client_order_id) or self.closed_orders.get(client_order_id)
+
+    def _resolve_unknown(self, tracked, order):
+        """Aplica a consulta por clientOrderId de uma ordem cujo envio ficou sem resposta."""
+        if order is not None:
+            tracked.order_id = order.get('orderId', tracked.order_id)
+            return self.apply_order_status(tracked, order)
+        if time.time() - tracked.created_at < UNKNOWN_ORDER_GRACE:
+            return False
+        logger.warning(f"[{tracked.symbol}] Ordem {tracked.client_order_id} não encontrada na corretora; considerada não enviada.")
+        return self._apply(tracked, 'REJECTED', tracked.executed, tracked.quote)
+
+    def needs_trades(self, tracked, order):
+        """
+        Indica se a resposta de uma consulta (sem 'fills') informa execuções cujas comissões ainda não
+        foram aplicadas, ou seja, se é preciso buscar os trades da ordem.
+        """
+        if order is None or order.get('fills'):
+            return False
+        return float(order.get('executedQty') or 0.0) > tracked.traded + QUANTITY_TOLERANCE
+
+    async def _with_trades(self, tracked, order, loop, executor, rate_limiter):
+        """Completa a resposta da consulta com os trades da ordem (myTrades) quando há execuções novas."""
+        if not self.needs_trades(tracked, order):
+            return order
+        await rate_limiter.acquire(WEIGHT_MY_TRADES)
+        self.trade_fetches += 1
+        try:
+            fills = await loop.run_in_executor(executor, get_order_trades, tracked.symbol, order.get('orderId', tracked.order_id))
+        except Exception as e:
+            # A quantidade é aplicada mesmo assim; as comissões entram na próxima consulta ou evento
+            logger.error(f"Erro ao buscar os trades da ordem {tracked.client_order_id}: {e}")
+            return order
+        return dict(order, fills=fills)
+
+    def export_state(self):
+        return {'open_orders': list(self.open_orders.values())}
+
+    def restore_state(self, state):
+        """Volta a acompanhar as ordens que estavam abertas no snapshot (consultadas logo em seguida)."""
+        now = time.monotonic()
+        for tracked in state['open_orders']:
+            if self.get(tracked.client_order_id) is None:
+                tracked.poll_interval = self.min_poll_interval
+                tracked.next_poll_at = now  # time.monotonic() não vale entre processos
+                self.open_orders[tracked.client_order_id] = tracked
+        self._wakeup.set()
+
+    async def run(self, executor, rate_limiter):
+        """
+        Task de background que consulta as ordens abertas quando vencem, com backoff adaptativo: o
+        intervalo dobra a cada consulta sem mudança (até 'max_poll_interval') e volta ao mínimo a cada
+        alteração, seja ela vinda da consulta ou de um evento.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            now = time.monotonic()
+            due = [tracked for tracked in self.open_orders.values() if tracked.next_poll_at <= now]
+            for tracked in due:
+                unknown = tracked.status == UNKNOWN_STATUS
+                if tracked.order_id is None and not unknown:
+                    # Sem orderId (envio em andamento ou ordem-mãe local): atualizada por eventos ou por track()
+                    tracked.next_poll_at = now + self.max_poll_interval
+                    continue
+                try:
+                    await rate_limiter.acquire(WEIGHT_ORDER_STATUS)
+                    if unknown:
+                        order = await loop.run_in_executor(executor, find_order, tracked.symbol, tracked.client_order_id)
+                        self.polls += 1
+                        order = await self._with_trades(tracked, order, loop, executor, rate_limiter)
+                        changed = self._resolve_unknown(tracked, order)
+                    else:
+                        order = await loop.run_in_executor(executor, get_order_status, tracked.symbol, tracked.order_id)
+                        self.polls += 1
+                        order = await self._with_trades(tracked, order, loop, executor, rate_limiter)
+                        changed = order is not None and self.apply_order_status(tracked, order)
+                except OrderStatusUnknown as e:
+                    logger.warning(f"Ordem {tracked.client_order_id} ainda sem confirmação: {e}")
+                    changed = False
+                except Exception as e:
+                    logger.error(f"Erro ao consultar a ordem {tracked.client_order_id}: {e}")
+                    changed = False
+                if not changed:
+                    tracked.poll_interval = min(tracked.poll_interval * 2, self.max_poll_interval)
+                tracked.next_poll_at = time.monotonic() + tracked.poll_interval
+
+            self._wakeup.clear()
+            if self.open_orders:
+                timeout = max(0.0, min(tracked.next_poll_at for tracked in self.open_orders.values()) - time.monotonic())
+            else:
+                timeout = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self):
+        return {
+            'open': {
+                client_order_id: {'symbol': tracked.symbol, 'side': tracked.side, 'status': tracked.status,
+                                  'executed': tracked.executed, 'quantity': tracked.quantity, 'poll_interval': tracked.poll_interval}
+                for client_order_id, tracked in self.open_orders.items()
+            },
+            'closed': len(self.closed_orders),
+            'status_counts': self.status_counts,
+            'events': self.events,
+            'polls': self.polls,
+            'trade_fetches': self.trade_fetches
+        }
@@ -1,24 +1,45 @@
-from src.services.binance_client import get_account_balance
+from services.binance_client import get_account_balance
+from services.fixed_point import Fixed
+from services.risk_metrics import RiskMetrics
+
+QUANTITY_DECIMALS = 8  # Escala das quantidades (precisão máxima da Binance)
+QUOTE_DECIMALS = 8  # Escala dos valores em moeda de cotação (USDT)
+
+
+def _quantity(value):
+    return Fixed.of(value, QUANTITY_DECIMALS)
+
+
+def _money(value):
+    return Fixed.of(value, QUOTE_DECIMALS)
+
 
 class PortfolioManager:
-    def __init__(self, stop_loss=0.08, take_profit=0.2, investor_profile='moderado', reserve_cash=100, min_asset_quantity=0.001):
+    """
+    Saldo de caixa e posições do bot. A contabilidade é feita em ponto fixo (Fixed): quantidades,
+    custo total de cada posição, caixa e resultado realizado são inteiros exatos, e 'assets' expõe
+    apenas a visão em float ({'quantity', 'average_cost'}) usada pelo restante do código.
+    """
+
+    def __init__(self, stop_loss=0.08, take_profit=0.2, investor_profile='moderado', reserve_cash=100, min_asset_quantity=0.001, max_drawdown=None):
         # Inicializa o balance_df com os dados de saldo da Binance
         self.balance_df = get_account_balance()
         
         # Configurações iniciais de saldo de caixa e ativos
         usdt_balance = self.balance_df[self.balance_df['asset'] == 'USDT']['free'].values
-        self.initial_balance = usdt_balance[0] if len(usdt_balance) > 0 else 0.0
+        self.initial_balance = float(usdt_balance[0]) if len(usdt_balance) > 0 else 0.0
         self.cash_balance = self.initial_balance
         self.reserve_cash = reserve_cash  # Quantia mínima de segurança para saldo de caixa
         self.min_asset_quantity = min_asset_quantity  # Quantidade mínima de segurança para saldo de ativos
 
         # Inicializa os ativos com as quantidades e custos médios
         self.assets = {}
+        self.positions = {}  # ativo -> {'quantity': Fixed, 'cost': Fixed} (custo total da posição)
         for _, row in self.balance_df.iterrows():
             asset = row['asset']
             free_quantity = row['free']
             if free_quantity > 0 and asset != 'USDT':  # Exclui USDT do saldo de ativos
-                self.assets[asset] = {'quantity': free_quantity, 'average_cost': 0}
+                self._set_position(asset, _quantity(float(free_quantity)), _money(0))
 
         # Parâmetros de controle
         self.stop_loss = stop_loss
@@ -26,6 +47,67 @@ class PortfolioManager:
         self.investor_profile = investor_profile
         self.profit_loss_cumulative = 0  # Controle de ganhos/perdas acumuladas
         self.previous_close_price = {}  # Armazena os preços de fechamento anteriores por ativo
+        self.max_drawdown = max_drawdown  # Queda máxima do patrimônio (fração) que pausa as operações; None desativa
+
+        # Métricas de risco atualizadas a cada execução e avaliação a mercado
+        self.risk_metrics = RiskMetrics(initial_equity=self.initial_balance)
+
+    @property
+    def risk_snapshot(self):
+        """Último RiskSnapshot publicado (patrimônio, drawdown, exposição, PnL, volatilidade e giro)."""
+        return self.risk_metrics.snapshot
+
+    def mark_to_market(self, valuation):
+        """Atualiza as métricas de risco com uma avaliação a mercado (PortfolioValuation)."""
+        return self.risk_metrics.on_valuation(valuation.nav, valuation.exposure, self.profit_loss_cumulative, valuation.unrealized_pnl)
+
+    @property
+    def cash_balance(self):
+        return float(self._cash)
+
+    @cash_balance.setter
+    def cash_balance(self, value):
+        self._cash = _money(value)
+
+    @property
+    def profit_loss_cumulative(self):
+        return float(self._realized)
+
+    @profit_loss_cumulative.setter
+    def profit_loss_cumulative(self, value):
+        self._realized = _money(value)
+
+    def _set_position(self, asset, quantity, cost, drop_dust=False):
+        """Atualiza a posição exata e a visão em float. Posições zeradas (ou, após uma venda, abaixo do
+        mínimo de segurança) são removidas."""
+        if quantity.units <= 0 or (drop_dust and float(quantity) <= self.min_asset_quantity):
+            self.positions.pop(asset, None)
+            self.assets.pop(asset, None)
+            return
+        self.positions[asset] = {'quantity': quantity, 'cost': cost}
+        self.assets[asset] = {'quantity': float(quantity), 'average_cost': float(cost.div(quantity))}
+
+    def export_state(self):
+        return {
+            'positions': dict(self.positions),
+            'realized': self._realized,
+            'previous_close_price': dict(self.previous_close_price),
+            'risk_metrics': self.risk_metrics
+        }
+
+    def restore_state(self, state):
+        """
+        Restaura o custo das posições, o resultado realizado e as métricas de risco do snapshot. As
+        quantidades e o caixa continuam os da corretora: o custo só é aproveitado quando a quantidade
+        da posição não mudou desde o snapshot.
+        """
+        for asset, position in state['positions'].items():
+            current = self.positions.get(asset)
+            if current is not None and current['quantity'] == position['quantity']:
+                self._set_position(asset, current['quantity'], position['cost'])
+        self._realized = state['realized']
+        self.previous_close_price.update(state['previous_close_price'])
+        self.risk_metrics = state['risk_metrics']
 
     def get_investment_percentage(self):
         """Define o percentual de investimento com base no perfil do investidor e na volatilidade do mercado."""
@@ -49,26 +131,93 @@ class PortfolioManager:
 
     def update_balance(self, asset, quantity, price, transaction_type):
         """Atualiza o saldo e controla ganhos/perdas com base no tipo de transação."""
-        cost = quantity * price
-        if transaction_type == 'buy' and self.cash_balance >= cost:
-            self.cash_balance -= cost
-            if asset not in self.assets:
-                self.assets[asset] = {'quantity': 0, 'average_cost': 0}
-            total_quantity = self.assets[asset]['quantity'] + quantity
-            self.assets[asset]['average_cost'] = ((self.assets[asset]['quantity'] * self.assets[asset]['average_cost']) + cost) / total_quantity
-            self.assets[asset]['quantity'] = total_quantity
-            
-        elif transaction_type == 'sell' and asset in self.assets and self.assets[asset]['quantity'] >= quantity:
-            self.cash_balance += cost
-            self.assets[asset]['quantity'] -= quantity
-            profit_loss = (price - self.assets[asset]['average_cost']) * quantity
-            self.profit_loss_cumulative += profit_loss
-
-            if self.assets[asset]['quantity'] <= self.min_asset_quantity:
-                del self.assets[asset]
+        quantity = _quantity(quantity)
+        cost = quantity.mul(_money(price), QUOTE_DECIMALS)
+        position = self.positions.get(asset)
+        if transaction_type == 'buy' and self._cash >= cost:
+            self._cash -= cost
+            self.risk_metrics.on_fill(float(cost))
+            if position is None:
+                self._set_position(asset, quantity, cost)
+            else:
+                self._set_position(asset, position['quantity'] + quantity, position['cost'] + cost)
+
+        elif transaction_type == 'sell' and position is not None and position['quantity'] >= quantity:
+            released = self._release_cost(position, quantity)
+            self._cash += cost
+            self.risk_metrics.on_fill(float(cost))
+            self._realized += cost - released
+            self._set_position(asset, position['quantity'] - quantity, position['cost'] - released, drop_dust=True)
+
+        self.update_investor_profile()
+
+    @staticmethod
+    def _release_cost(position, quantity):
+        """Parcela do custo total correspondente a 'quantity' (todo o custo quando a posição é zerada)."""
+        if quantity >= position['quantity']:
+            return position['cost']
+        return position['cost'].mul(quantity, QUOTE_DECIMALS + QUANTITY_DECIMALS).div(position['quantity'], QUOTE_DECIMALS)
+
+    def apply_fill(self, asset, side, quantity, quote_quantity, commissions=None, quote_asset='USDT', prices=None):
+        """
+        Aplica uma execução real: quantidade executada, valor executado (cummulativeQuoteQty) e comissões
+        por ativo. Comissões em outro ativo (ex.: BNB) são debitadas desse ativo e entram no custo pelo
+        preço informado em 'prices' (símbolo -> preço), quando disponível.
+        """
+        quantity = _quantity(quantity)
+        quote_quantity = _money(quote_quantity)
+        commissions = commissions or {}
+        commission_quote = _money(commissions.get(quote_asset, 0.0))
+        commission_base = _quantity(commissions.get(asset, 0.0))
+        other_commissions_value = _money(0)
+        for commission_asset, commission in commissions.items():
+            if commission_asset in (asset, quote_asset):
+                continue
+            commission = _quantity(commission)
+            held = self.positions.get(commission_asset)
+            if held is not None:
+                remaining = max(held['quantity'] - commission, _quantity(0))
+                self._set_position(commission_asset, remaining, held['cost'] - self._release_cost(held, min(commission, held['quantity'])))
+            other_commissions_value += commission.mul(_money((prices or {}).get(f"{commission_asset}{quote_asset}", 0.0)), QUOTE_DECIMALS)
+
+        position = self.positions.get(asset, {'quantity': _quantity(0), 'cost': _money(0)})
+        if quantity:
+            self.risk_metrics.on_fill(float(quote_quantity))
+        if side == 'buy':
+            self._cash -= quote_quantity + commission_quote
+            cost = quote_quantity + commission_quote + other_commissions_value
+            self._set_position(asset, position['quantity'] + quantity - commission_base, position['cost'] + cost)
+
+        elif side == 'sell':
+            self._cash += quote_quantity - commission_quote
+            debited = quantity + commission_base
+            sold = min(debited, position['quantity'])
+            released = self._release_cost(position, sold) if position['quantity'] else _money(0)
+            # Só a parte vendida com custo conhecido gera resultado: o que excede a posição acompanhada
+            # (ativo não acompanhado ou saldo maior que o local) não tem custo para abater do valor recebido
+            proceeds = quote_quantity - commission_quote - other_commissions_value
+            if sold < debited:
+                proceeds = proceeds.mul(sold, QUOTE_DECIMALS + QUANTITY_DECIMALS).div(debited, QUOTE_DECIMALS) if sold else _money(0)
+            self._realized += proceeds - released
+            if asset in self.positions:
+                self._set_position(asset, position['quantity'] - sold, position['cost'] - released, drop_dust=True)
 
         self.update_investor_profile()
 
+    def correct_balance(self, asset, quantity, quote_asset='USDT'):
+        """Substitui o saldo local pelo saldo informado pela corretora (mantém o custo médio)."""
+        if asset == quote_asset:
+            self.cash_balance = quantity
+            return
+        quantity = _quantity(quantity)
+        if float(quantity) <= self.min_asset_quantity:
+            self.positions.pop(asset, None)
+            self.assets.pop(asset, None)
+            return
+        position = self.positions.get(asset)
+        cost = _money(0) if position is None else position['cost'].div(position['quantity'], QUOTE_DECIMALS + QUANTITY_DECIMALS).mul(quantity, QUOTE_DECIMALS)
+        self._set_position(asset, quantity, cost)
+
     def check_stop_loss_take_profit(self):
         """Verifica se o lucro ou perda acumulados atingiram o stop loss ou take profit."""
         if self.profit_loss_cumulative <= -self.initial_balance * self.stop_loss:
@@ -77,6 +226,9 @@ class PortfolioManager:
         elif self.profit_loss_cumulative >= self.initial_balance * self.take_profit:
             print("Take profit atingido. Pausando operações.")
             return 'take_profit'
+        elif self.max_drawdown is not None and self.risk_snapshot.drawdown >= self.max_drawdown:
+            print(f"Drawdown máximo atingido ({self.risk_snapshot.drawdown:.2%}). Pausando operações.")
+            return 'max_drawdown'
         return 'continue'
 
     def update_investor_profile(self):
@@ -0,0 +1,450 @@
+import asyncio
+import signal
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from services.binance_client import get_depth_snapshot, reset_session, start_depth_stream, start_user_stream
+from services.execution import SLIPPAGE_TOLERANCE, ExecutionEngine
+from services.maker_execution import CHILD_ORDER_PREFIX as MAKER_ORDER_PREFIX, MAKER_DEADLINE, REPRICE_INTERVAL, MakerExecution
+from services.market_data import MarketDataHub
+from services.order_book import OrderBookHub
+from services.order_slicer import CHILD_ORDER_PREFIX as SLICE_ORDER_PREFIX, OrderSlicer, volume_rate_from_candles
+from services.order_tracker import CLOSED_HISTORY, OrderTracker, TrackedOrder
+from services.rate_limiter import DEFAULT_MAX_WEIGHT, RateLimiter
+from services.scheduler import INTERVAL_SECONDS
+from services.supervisor import WarmStateStore
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+PROCESS_WEIGHT_BUDGET = DEFAULT_MAX_WEIGHT // 3  # Peso por minuto de cada processo (os três dividem o limite do mesmo IP)
+CANDLE_REFRESH_INTERVAL = 10.0  # Intervalo (s) entre atualizações incrementais dos candles no processo de dados de mercado
+METRICS_INTERVAL = 5.0  # Intervalo (s) entre os envios de métricas do processo de execução
+PROCESS_CHECK_INTERVAL = 1.0  # Intervalo (s) entre as verificações de que os processos filhos seguem vivos
+
+
+@dataclass
+class ExecutionSettings:
+    """Configuração do envio de ordens, compartilhada pelos modos de processo único e multiprocesso."""
+    slippage_tolerance: float = SLIPPAGE_TOLERANCE
+    order_mode: str = 'market'  # 'market' ou 'maker'
+    maker_deadline: float = MAKER_DEADLINE
+    maker_reprice_interval: float = REPRICE_INTERVAL
+    execution_algo: str = 'none'  # 'none', 'twap', 'pov' ou 'iceberg'
+    slicer_options: dict = field(default_factory=dict)  # duration, slices, participation_rate, min_notional
+    user_stream: bool = False
+    depth_stream: bool = False
+    candle_seconds: float = INTERVAL_SECONDS['30m']
+    price_ttl: float = 1.0
+    warm_state_file: str = None  # Snapshot próprio do processo de execução (None desativa)
+    warm_state_max_age: float = 600.0
+    warm_state_interval: float = 30.0
+
+
+class SharedMarketDataHub(MarketDataHub):
+    """
+    MarketDataHub de leitura para os processos de estratégia e de execução: preços e candles vêm da
+    memória compartilhada escrita pelo processo de dados de mercado, sem requisições à corretora.
+    """
+
+    def __init__(self, shared, price_ttl=1.0):
+        super().__init__(executor=None, rate_limiter=None, price_ttl=price_ttl)
+        self.shared = shared
+
+    async def _fetch_prices(self):
+        prices = self.shared.read_prices()
+        if prices:
+            self.prices = prices
+            self.prices_updated_at = time.monotonic()
+        return self.prices
+
+    async def get_historical_data(self, symbol, interval='30m', max_limit=1000):
+        """Candles do ring buffer (o intervalo é o configurado no processo de dados de mercado)."""
+        df = self.shared.read_candles(symbol)
+        if df is not None:
+            if max_limit:
+                df = df.iloc[-max_limit:].reset_index(drop=True)
+            self.candles[symbol] = (time.time(), df)
+        return df
+
+
+class ExecutionStack:
+    """
+    Componentes de envio e acompanhamento de ordens: ExecutionEngine, roteador (mercado, maker e
+    fatiamento), OrderTracker, book local e streams da corretora. No modo de processo único vivem no
+    processo principal; no modo multiprocesso, no processo de execução.
+    """
+
+    def __init__(self, market_data, executor, rate_limiter, settings):
+        self.settings = settings
+        self.executor = executor
+        self.rate_limiter = rate_limiter
+        self.order_books = OrderBookHub(get_depth_snapshot, executor, rate_limiter) if settings.depth_stream else None
+        self.execution = ExecutionEngine(market_data, executor, rate_limiter, slippage_tolerance=settings.slippage_tolerance,
+                                         order_books=self.order_books)
+        self.maker = MakerExecution(self.execution, reprice_interval=settings.maker_reprice_interval, deadline=settings.maker_deadline)
+        self.router = self.maker if settings.order_mode == 'maker' else self.execution
+        self.tracker = OrderTracker(ignored_prefixes=(MAKER_ORDER_PREFIX, SLICE_ORDER_PREFIX))
+        self.slicer = None
+        if settings.execution_algo != 'none':
+            self.slicer = OrderSlicer(self.router, self.execution, tracker=self.tracker, algorithm=settings.execution_algo,
+                                      **settings.slicer_options)
+            self.router = self.slicer
+        self.user_stream = None
+        self.depth_stream = None
+
+    def start_streams(self, symbols, loop):
+        """Inicia o user data stream e o stream de profundidade, se configurados; falhas mantêm as consultas."""
+        if self.settings.user_stream:
+            try:
+                self.user_stream = start_user_stream(
+                    lambda message: loop.call_soon_threadsafe(self.tracker.on_execution_report, message)
+                )
+            except Exception as e:
+                logger.error(f"Erro ao iniciar o user data stream: {e}. Seguindo apenas com consultas.")
+        if self.order_books is not None:
+            try:
+                # Os eventos recebidos antes do snapshot ficam guardados no book de cada símbolo
+                self.depth_stream = start_depth_stream(
+                    symbols, lambda message: loop.call_soon_threadsafe(self.order_books.on_depth_event, message)
+                )
+            except Exception as e:
+                logger.error(f"Erro ao iniciar o stream de profundidade: {e}. Seguindo com a consulta de bid/ask.")
+                self.order_books = self.execution.order_books = None
+
+    async def warm_up(self, symbols):
+        """Filtros e bid/ask carregados antes da primeira ordem (o envio passa a ser uma única chamada)."""
+        try:
+            await self.execution.warm_up(symbols)
+        except Exception as e:
+            logger.error(f"Erro ao pré-carregar o contexto de ordens: {e}. Os contextos serão criados no primeiro envio.")
+
+    def create_tasks(self):
+        """Tasks de background do envio: consulta de bid/ask (sem book local) e acompanhamento das ordens."""
+        tasks = []
+        if self.order_books is None:
+            tasks.append(asyncio.create_task(self.execution.watch_book(), name="order-book"))
+        tasks.append(asyncio.create_task(self.tracker.run(self.executor, self.rate_limiter), name="order-tracker"))
+        return tasks
+
+    def stop_streams(self):
+        if self.user_stream is not None:
+            self.user_stream.stop()
+        if self.depth_stream is not None:
+            self.depth_stream.stop()
+
+    def metrics(self):
+        return {
+            'execution': self.execution.summary,
+            'maker': self.maker.summary,
+            'orders': self.tracker.summary,
+            'order_book': self.order_books.summary if self.order_books is not None else dict,
+            'slicer': self.slicer.summary if self.slicer is not None else dict
+        }
+
+
+# ---- Processo de dados de mercado ----
+
+def _ignore_interrupt():
+    # O Ctrl+C chega a todo o grupo de processos; o encerramento dos filhos é coordenado pelo processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+async def _ingest_market_data(shared, symbols, interval, price_interval, candle_refresh, stop):
+    executor = ThreadPoolExecutor(max_workers=max(2, len(symbols)))
+    market_data = MarketDataHub(executor, RateLimiter(max_weight=PROCESS_WEIGHT_BUDGET), price_ttl=0.0)
+    candle_seconds = INTERVAL_SECONDS[interval]
+    written_at = {}  # símbolo -> time.time() da última gravação de candles
+    next_candles = 0.0
+
+    async def refresh_candles(symbol):
+        # Carga completa na primeira vez; depois, só os candles que podem ter mudado desde a última gravação
+        elapsed = time.time() - written_at[symbol] if symbol in written_at else None
+        limit = shared.capacity if elapsed is None else min(shared.capacity, int(elapsed // candle_seconds) + 2)
+        df = await market_data.get_historical_data(symbol, interval, limit)
+        if df is not None and not df.empty:
+            shared.write_candles(symbol, df)
+            written_at[symbol] = time.time()
+
+    try:
+        while not stop.is_set():
+            try:
+                shared.publish_prices(await market_data.refresh_prices())
+            except Exception as e:
+                logger.error(f"Erro ao publicar preços na memória compartilhada: {e}")
+            if time.monotonic() >= next_candles:
+                outcomes = await asyncio.gather(*(refresh_candles(symbol) for symbol in symbols), return_exceptions=True)
+                for symbol, outcome in zip(symbols, outcomes):
+                    if isinstance(outcome, Exception):
+                        logger.error(f"[{symbol}] Erro ao publicar candles na memória compartilhada: {outcome}")
+                next_candles = time.monotonic() + candle_refresh
+            await asyncio.sleep(price_interval)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def run_market_data_process(shared, symbols, interval, price_interval, stop, candle_refresh=CANDLE_REFRESH_INTERVAL):
+    """
+    Ponto de entrada do processo de dados de mercado: único escritor da memória compartilhada, com
+    preços em lote a cada 'price_interval' e candles a cada 'candle_refresh' segundos.
+    """
+    _ignore_interrupt()
+    reset_session()
+    logger.info(f"Processo de dados de mercado iniciado para {', '.join(symbols)}.")
+    asyncio.run(_ingest_market_data(shared, symbols, interval, price_interval, candle_refresh, stop))
+    logger.info("Processo de dados de mercado encerrado.")
+
+
+# ---- Processo de execução ----
+
+def _pump_decisions(decisions, loop, handler, in_flight):
+    """
+    Thread que lê as decisões da fila e agenda o envio de cada uma no event loop do processo. As tasks
+    ficam em 'in_flight' até terminar: o event loop guarda só referências fracas, e uma task sem outra
+    referência pode ser coletada no meio do envio.
+    """
+    def start(request):
+        task = loop.create_task(handler(*request))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    while True:
+        message = decisions.get()
+        if message is None:
+            return
+        loop.call_soon_threadsafe(start, message)
+
+
+async def _report_metrics(stack, results, interval=METRICS_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            results.put(('metrics', {name: provider() for name, provider in stack.metrics().items()}))
+        except Exception as e:
+            logger.error(f"Erro ao enviar as métricas do processo de execução: {e}")
+
+
+async def _serve_execution(shared, symbols, decisions, results, settings, stop):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(3, 2 * len(symbols)))
+    market_data = SharedMarketDataHub(shared, price_ttl=settings.price_ttl)
+    stack = ExecutionStack(market_data, executor, RateLimiter(max_weight=PROCESS_WEIGHT_BUDGET), settings)
+    # Cada mudança de ordem segue para o processo de estratégia, que aplica as execuções ao portfólio
+    stack.tracker.add_listener(lambda tracked, fill, previous_status: results.put(('order', tracked, fill, previous_status)))
+
+    warm_state = warm_components = None
+    if settings.warm_state_file:
+        warm_state = WarmStateStore(settings.warm_state_file, max_age=settings.warm_state_max_age)
+        warm_components = {'execution': stack.execution, 'orders': stack.tracker}
+        warm_state.restore(warm_components)
+
+    async def submit(request_id, decision):
+        asset = decision.get('asset')
+        if stack.slicer is not None:
+            stack.slicer.set_volume_rate(asset, volume_rate_from_candles(shared.read_candles(asset), settings.candle_seconds))
+        order = None
+        try:
+            order = await stack.router.submit(decision)
+            if order:
+                stack.tracker.track(order, decision)
+        except Exception as e:
+            logger.error(f"[{asset}] Erro ao executar a ordem no processo de execução: {e}")
+        results.put(('submitted', request_id, order))
+
+    stack.start_streams(symbols, loop)
+    await stack.warm_up(symbols)
+    tasks = stack.create_tasks()
+    tasks.append(asyncio.create_task(_report_metrics(stack, results), name="execution-metrics"))
+    if warm_state is not None:
+        tasks.append(asyncio.create_task(warm_state.run(warm_components, executor, settings.warm_state_interval), name="warm-state"))
+    in_flight = set()  # Envios em andamento
+    threading.Thread(target=_pump_decisions, args=(decisions, loop, submit, in_flight), name="decision-pump", daemon=True).start()
+    try:
+        await loop.run_in_executor(None, stop.wait)
+    finally:
+        # Envios em andamento terminam antes de parar os streams: cancelados, deixariam ordens sem resposta
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if warm_state is not None:
+            warm_state.save(warm_components)
+        stack.stop_streams()
+        executor.shutdown(wait=True)
+
+
+def run_execution_process(shared, symbols, decisions, results, settings, stop):
+    """
+    Ponto de entrada do processo de execução: recebe as decisões pela fila 'decisions', envia as ordens
+    com os preços da memória compartilhada e devolve pela fila 'results' a ordem de cada decisão, as
+    mudanças de estado das ordens e as métricas.
+    """
+    _ignore_interrupt()
+    reset_session()
+    logger.info(f"Processo de execução iniciado para {', '.join(symbols)}.")
+    try:
+        asyncio.run(_serve_execution(shared, symbols, decisions, results, settings, stop))
+    finally:
+        results.put(None)  # Libera a thread de leitura do processo de estratégia
+        logger.info("Processo de execução encerrado.")
+
+
+# ---- Processo de estratégia ----
+
+@dataclass
+class RemoteRuntime:
+    """Ligações do processo de estratégia com os demais: memória compartilhada, filas e processos filhos."""
+    shared: object  # SharedMarketData
+    decisions: object  # fila de decisões (estratégia -> execução)
+    results: object  # fila de ordens, mudanças de estado e métricas (execução -> estratégia)
+    processes: dict  # nome -> multiprocessing.Process
+
+
+class OrderMirror:
+    """
+    Cópia, no processo de estratégia, das ordens acompanhadas pelo OrderTracker do processo de execução.
+    Oferece a mesma interface usada pelo loop de negociação (add_listener, track, summary); os
+    listeners recebem as mudanças na mesma ordem em que o OrderTracker as produziu.
+    """
+
+    def __init__(self):
+        self.orders = OrderedDict()  # clientOrderId -> TrackedOrder (últimas CLOSED_HISTORY)
+        self.listeners = []
+        self.updates = 0
+
+    def add_listener(self, callback):
+        """Registra callback(ordem, fill, status_anterior) chamado a cada mudança de estado."""
+        self.listeners.append(callback)
+
+    def on_update(self, tracked, fill, previous_status):
+        self.updates += 1
+        self.orders[tracked.client_order_id] = tracked
+        self.orders.move_to_end(tracked.client_order_id)
+        if len(self.orders) > CLOSED_HISTORY:
+            self.orders.popitem(last=False)
+        for callback in self.listeners:
+            try:
+                callback(tracked, fill, previous_status)
+            except Exception as e:
+                logger.error(f"Erro ao notificar mudança da ordem {tracked.client_order_id}: {e}")
+
+    def track(self, order, decision=None):
+        """Ordem espelhada correspondente à resposta do envio (o acompanhamento fica no processo de execução)."""
+        client_order_id = order.get('clientOrderId') or str(order.get('orderId'))
+        tracked = self.orders.get(client_order_id)
+        if tracked is None:
+            # Ordem sem mudança de estado desde o envio (ex.: aberta sem execução)
+            tracked = TrackedOrder(client_order_id, order.get('symbol') or (decision or {}).get('asset'),
+                                   order.get('side', (decision or {}).get('type', '')).lower(), order_id=order.get('orderId'),
+                                   status=order.get('status', 'NEW'), quantity=float(order.get('origQty') or 0.0),
+                                   executed=float(order.get('executedQty') or 0.0), decision=decision, created_at=time.time())
+        return tracked
+
+    def summary(self):
+        return {
+            'orders': len(self.orders),
+            'open': sum(1 for tracked in self.orders.values() if tracked.is_open),
+            'updates': self.updates
+        }
+
+
+class RemoteExecution:
+    """
+    Roteador de ordens do processo de estratégia: cada decisão segue pela fila para o processo de
+    execução e 'submit' aguarda a ordem resultante, como os roteadores locais. Uma thread lê a fila de
+    resultados e entrega as mensagens no event loop.
+    """
+
+    def __init__(self, runtime, mirror):
+        self.runtime = runtime
+        self.mirror = mirror
+        self.pending = {}  # id da requisição -> Future
+        self.next_request = 0
+        self.submitted = 0
+        self.failed = 0
+        self.metrics = {}  # Último resumo recebido do processo de execução
+        self.metrics_at = 0.0
+        self.closed = False
+
+    async def submit(self, decision):
+        if self.closed:
+            logger.error(f"[{decision.get('asset')}] Processo de execução indisponível; ordem não enviada.")
+            return None
+        self.next_request += 1
+        request_id = self.next_request
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.runtime.decisions.put((request_id, decision))
+        try:
+            order = await future
+        finally:
+            self.pending.pop(request_id, None)
+        if order:
+            self.submitted += 1
+        else:
+            self.failed += 1
+        return order
+
+    def dispatch(self, message):
+        kind = message[0]
+        if kind == 'order':
+            self.mirror.on_update(*message[1:])
+        elif kind == 'submitted':
+            future = self.pending.get(message[1])
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == 'metrics':
+            self.metrics = message[1]
+            self.metrics_at = time.time()
+
+    def close(self):
+        """Fila de resultados encerrada: as decisões pendentes ficam sem ordem."""
+        self.closed = True
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result(None)
+
+    def start(self, loop):
+        """Inicia a thread que lê a fila de resultados."""
+        def read():
+            while True:
+                try:
+                    message = self.runtime.results.get()
+                except (EOFError, OSError):
+                    message = None
+                try:
+                    if message is None:
+                        loop.call_soon_threadsafe(self.close)
+                    else:
+                        loop.call_soon_threadsafe(self.dispatch, message)
+                except RuntimeError:
+                    pass  # Event loop já encerrado: segue drenando a fila para o processo de execução não travar no envio
+                if message is None:
+                    return
+
+        threading.Thread(target=read, name="execution-results", daemon=True).start()
+
+    async def watch_processes(self, on_exit, interval=PROCESS_CHECK_INTERVAL):
+        """Chama 'on_exit' se um processo filho terminar; sem ele o processo de estratégia não deve seguir operando."""
+        while True:
+            for name, process in self.runtime.processes.items():
+                if not process.is_alive():
+                    logger.critical(f"Processo '{name}' encerrado inesperadamente (código {process.exitcode}). Finalizando o bot.")
+                    on_exit()
+                    return
+            await asyncio.sleep(interval)
+
+    def summary(self):
+        return {
+            'submitted': self.submitted,
+            'failed': self.failed,
+            'pending': len(self.pending),
+            'metrics_age': time.time() - self.metrics_at if self.metrics_at else None,
+            'process': self.metrics,
+            'market_data': self.runtime.shared.summary()
+        }
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+# Limite padrão de peso de requisições da Binance (REQUEST_WEIGHT por minuto)
+DEFAULT_MAX_WEIGHT = 1200
+DEFAULT_PERIOD = 60.0
+
+# Pesos aproximados das chamadas usadas pelo bot
+WEIGHT_TICKER_ALL = 4
+WEIGHT_BOOK_TICKER_ALL = 4
+WEIGHT_EXCHANGE_INFO = 20
+WEIGHT_KLINES = 5
+WEIGHT_ALL_ORDERS = 20
+WEIGHT_ORDER = 1
+WEIGHT_ORDER_STATUS = 4
+WEIGHT_MY_TRADES = 20
+WEIGHT_ACCOUNT = 20
+WEIGHT_DEPTH_SNAPSHOT = 50  # GET /api/v3/depth com limit=1000
+
+
+class RateLimiter:
+    """
+    Token bucket assíncrono compartilhado por todos os símbolos do processo.
+
+    As requisições aguardam em ordem de chegada (asyncio.Lock é FIFO), o que garante que
+    nenhum símbolo monopolize o limite de peso da corretora.
+    """
+
+    def __init__(self, max_weight=DEFAULT_MAX_WEIGHT, period=DEFAULT_PERIOD):
+        self.capacity = max_weight
+        self.tokens = float(max_weight)
+        self.refill_rate = max_weight / period
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    async def acquire(self, weight=1):
+        """Aguarda até haver peso disponível e o consome."""
+        weight = min(weight, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < weight:
+                await asyncio.sleep((weight - self.tokens) / self.refill_rate)
+                self._refill()
+            self.tokens -= weight
+
+    @property
+    def available(self):
+        """Peso disponível no momento (apenas informativo)."""
+        self._refill()
+        return self.tokens
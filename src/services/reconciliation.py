@@ -0,0 +1,189 @@
+import asyncio
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict
+
+from services.binance_client import get_account_balance
+from services.rate_limiter import WEIGHT_ACCOUNT
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+QUOTE_ASSET = 'USDT'
+RECONCILE_INTERVAL = 300  # Intervalo (s) entre as comparações com os saldos da corretora
+DRIFT_TOLERANCE = 1e-8  # Diferença de quantidade ignorada na comparação (poeira de arredondamento)
+CASH_DRIFT_TOLERANCE = 0.01  # Diferença de caixa (USDT) ignorada na comparação
+
+
+@dataclass
+class OrderFill:
+    """Execução real de uma ordem, agregada a partir da resposta da corretora."""
+    symbol: str
+    side: str  # 'buy' ou 'sell'
+    quantity: float  # executedQty
+    quote_quantity: float  # cummulativeQuoteQty
+    commissions: Dict[str, float] = field(default_factory=dict)  # ativo -> comissão paga
+    trade_ids: tuple = ()
+    order_id: str = None
+
+    @property
+    def average_price(self):
+        return self.quote_quantity / self.quantity if self.quantity else 0.0
+
+
+def parse_order_fills(order):
+    """
+    Converte a resposta de uma ordem (execute_trade) em um OrderFill usando 'fills', 'executedQty'
+    e 'cummulativeQuoteQty'. Retorna None se a resposta não informar a execução.
+    """
+    if not isinstance(order, dict) or 'executedQty' not in order:
+        return None
+    fills = order.get('fills') or []
+    quantity = float(order['executedQty'])
+    quote_quantity = float(order.get('cummulativeQuoteQty') or 0.0)
+    if not quote_quantity and fills:
+        quote_quantity = sum(float(fill['price']) * float(fill['qty']) for fill in fills)
+
+    commissions = {}
+    for fill in fills:
+        commission = float(fill.get('commission', 0.0))
+        if commission:
+            asset = fill.get('commissionAsset')
+            commissions[asset] = commissions.get(asset, 0.0) + commission
+
+    return OrderFill(
+        symbol=order.get('symbol'),
+        side=order.get('side', '').lower(),
+        quantity=quantity,
+        quote_quantity=quote_quantity,
+        commissions=commissions,
+        trade_ids=tuple(fill['tradeId'] for fill in fills if 'tradeId' in fill),
+        order_id=str(order['orderId']) if 'orderId' in order else None
+    )
+
+
+class FillReconciler:
+    """
+    Mantém o PortfolioManager alinhado com as execuções reais.
+
+    Cada ordem executada é aplicada incrementalmente pelo que realmente aconteceu (quantidade e valor
+    executados, comissões), uma única vez por ordem. Periodicamente os saldos do portfólio são
+    comparados com os da corretora e qualquer desvio é corrigido. Cada execução aplicada recebe um
+    número de sequência; a consulta dos saldos guarda a sequência do momento em que foi feita e os
+    ativos alterados por execuções posteriores ficam para a próxima comparação, já que o saldo
+    consultado ainda não as reflete.
+    """
+
+    def __init__(self, portfolio_manager, quote_asset=QUOTE_ASSET, drift_tolerance=DRIFT_TOLERANCE, cash_drift_tolerance=CASH_DRIFT_TOLERANCE):
+        self.portfolio_manager = portfolio_manager
+        self.quote_asset = quote_asset
+        self.drift_tolerance = drift_tolerance
+        self.cash_drift_tolerance = cash_drift_tolerance
+        self.applied_orders = set()
+        self.fills_applied = 0
+        self.fill_sequence = 0  # Incrementado a cada execução aplicada
+        self.asset_sequences = {}  # ativo -> fill_sequence da última execução que alterou o saldo
+        self.skipped = 0
+        self.commissions_paid = {}
+        self.corrections = 0
+        self.last_reconciled_at = None
+        self.last_drift = {}
+
+    def apply_order(self, order, base_asset, prices=None):
+        """
+        Aplica a execução real da ordem ao portfólio e retorna o OrderFill correspondente (None se a
+        resposta não traz dados de execução). Ordens sem quantidade executada ou já aplicadas não
+        alteram o portfólio.
+        """
+        fill = parse_order_fills(order)
+        if fill is None or fill.quantity <= 0:
+            return fill
+        if fill.order_id is not None:
+            if fill.order_id in self.applied_orders:
+                return fill
+            self.applied_orders.add(fill.order_id)
+        return self.apply_fill(fill, base_asset, prices)
+
+    def apply_fill(self, fill, base_asset, prices=None):
+        """Aplica ao portfólio uma execução já individualizada (ex.: incremento de fill vindo do OrderTracker)."""
+        self.portfolio_manager.apply_fill(
+            base_asset, fill.side, fill.quantity, fill.quote_quantity, fill.commissions,
+            quote_asset=self.quote_asset, prices=prices
+        )
+        self.fills_applied += 1
+        self.fill_sequence += 1
+        for asset in (base_asset, self.quote_asset, *fill.commissions):
+            self.asset_sequences[asset] = self.fill_sequence
+        for asset, commission in fill.commissions.items():
+            self.commissions_paid[asset] = self.commissions_paid.get(asset, 0.0) + commission
+        logger.info(f"Execução aplicada ao portfólio: {fill.side} {fill.quantity} {base_asset} a preço médio "
+                    f"{fill.average_price:.8f} (comissões: {fill.commissions or 'nenhuma'})")
+        return fill
+
+    def reconcile(self, balance_df, sequence=None):
+        """
+        Compara o portfólio com os saldos da corretora (DataFrame de get_account_balance) e corrige os
+        desvios. 'sequence' é o fill_sequence de quando os saldos foram consultados: ativos com
+        execuções aplicadas depois disso não são comparados. Retorna o dicionário ativo -> (valor local,
+        valor na corretora) das correções.
+        """
+        exchange = {row['asset']: float(row['free']) + float(row['locked']) for _, row in balance_df.iterrows()}
+        portfolio = self.portfolio_manager
+        drift = {}
+        changed = set()
+        if sequence is not None:
+            changed = {asset for asset, applied_at in self.asset_sequences.items() if applied_at > sequence}
+
+        exchange_cash = exchange.get(self.quote_asset, 0.0)
+        if abs(portfolio.cash_balance - exchange_cash) > self.cash_drift_tolerance:
+            drift[self.quote_asset] = (portfolio.cash_balance, exchange_cash)
+
+        for asset in set(portfolio.assets) | (set(exchange) - {self.quote_asset}):
+            local = portfolio.get_balance(asset)
+            remote = exchange.get(asset, 0.0)
+            if asset not in portfolio.assets and remote <= portfolio.min_asset_quantity:
+                continue  # Poeira que o portfólio não acompanha
+            if abs(local - remote) > self.drift_tolerance:
+                drift[asset] = (local, remote)
+
+        for asset in changed & set(drift):
+            local, remote = drift.pop(asset)
+            self.skipped += 1
+            logger.info(f"Saldo de {asset} alterado por uma execução durante a consulta "
+                        f"(portfólio={local}, corretora={remote}); comparado na próxima reconciliação.")
+
+        for asset, (local, remote) in drift.items():
+            logger.warning(f"Desvio de saldo em {asset}: portfólio={local}, corretora={remote}. Corrigindo.")
+            portfolio.correct_balance(asset, remote, quote_asset=self.quote_asset)
+
+        self.corrections += len(drift)
+        self.last_drift = drift
+        self.last_reconciled_at = time.time()
+        return drift
+
+    async def run(self, executor, rate_limiter, interval=RECONCILE_INTERVAL):
+        """Task de background que compara o portfólio com os saldos da corretora a cada 'interval'."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await rate_limiter.acquire(WEIGHT_ACCOUNT)
+                sequence = self.fill_sequence  # Execuções aplicadas a partir daqui podem não estar nos saldos
+                balance_df = await loop.run_in_executor(executor, get_account_balance)
+                if balance_df is None or balance_df.empty:
+                    continue  # Falha na consulta: não corrige com base em saldos vazios
+                self.reconcile(balance_df, sequence)
+            except Exception as e:
+                logger.error(f"Erro na reconciliação com os saldos da corretora: {e}")
+
+    def summary(self):
+        return {
+            'fills_applied': self.fills_applied,
+            'commissions_paid': self.commissions_paid,
+            'corrections': self.corrections,
+            'skipped': self.skipped,
+            'last_reconciled_at': self.last_reconciled_at,
+            'last_drift': {asset: {'portfolio': local, 'exchange': remote} for asset, (local, remote) in self.last_drift.items()}
+        }
@@ -0,0 +1,101 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+
+EQUITY_CURVE_SIZE = 10000  # Pontos mantidos da curva de patrimônio
+VOLATILITY_WINDOW = 500  # Retornos usados na volatilidade móvel
+
+
+@dataclass(frozen=True)
+class RiskSnapshot:
+    """Métricas de risco do portfólio em um instante (imutável; pode ser lido de qualquer lugar)."""
+    time: float = 0.0
+    equity: float = 0.0
+    peak_equity: float = 0.0
+    drawdown: float = 0.0  # queda atual em relação ao pico (fração)
+    max_drawdown: float = 0.0  # maior queda desde o início (fração)
+    exposure: float = 0.0  # fração do patrimônio em posições
+    realized_pnl: float = 0.0
+    unrealized_pnl: float = 0.0
+    volatility: float = 0.0  # desvio padrão dos retornos entre avaliações na janela móvel
+    turnover: float = 0.0  # valor negociado acumulado (moeda de cotação)
+    turnover_ratio: float = 0.0  # valor negociado / patrimônio atual
+    fills: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class RiskMetrics:
+    """
+    Métricas de risco mantidas incrementalmente: cada avaliação a mercado e cada execução atualizam
+    os acumuladores em O(1) (pico, drawdown máximo, somas da janela de volatilidade, giro), e o
+    resultado é publicado como um RiskSnapshot pronto para leitura.
+    """
+
+    def __init__(self, initial_equity=0.0, curve_size=EQUITY_CURVE_SIZE, volatility_window=VOLATILITY_WINDOW):
+        self.equity_curve = deque(maxlen=curve_size)  # (time, equity)
+        self.returns = deque(maxlen=volatility_window)
+        self._returns_sum = 0.0
+        self._returns_sum_sq = 0.0
+        self.peak_equity = float(initial_equity)
+        self.max_drawdown = 0.0
+        self.turnover = 0.0
+        self.fills = 0
+        self.snapshot = RiskSnapshot(equity=float(initial_equity), peak_equity=float(initial_equity))
+
+    def _add_return(self, value):
+        if len(self.returns) == self.returns.maxlen:
+            evicted = self.returns[0]
+            self._returns_sum -= evicted
+            self._returns_sum_sq -= evicted * evicted
+        self.returns.append(value)
+        self._returns_sum += value
+        self._returns_sum_sq += value * value
+
+    @property
+    def volatility(self):
+        count = len(self.returns)
+        if count < 2:
+            return 0.0
+        mean = self._returns_sum / count
+        variance = (self._returns_sum_sq - count * mean * mean) / (count - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    def on_fill(self, notional):
+        """Registra o valor negociado de uma execução (giro)."""
+        self.turnover += abs(notional)
+        self.fills += 1
+        self.snapshot = self._publish(self.snapshot.time, self.snapshot.equity, self.snapshot.exposure,
+                                      self.snapshot.realized_pnl, self.snapshot.unrealized_pnl)
+
+    def on_valuation(self, equity, exposure, realized_pnl, unrealized_pnl, timestamp=None):
+        """Atualiza curva de patrimônio, drawdown e volatilidade com uma nova avaliação a mercado."""
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.equity_curve:
+            previous = self.equity_curve[-1][1]
+            if previous > 0:
+                self._add_return(equity / previous - 1.0)
+        self.equity_curve.append((timestamp, equity))
+        self.peak_equity = max(self.peak_equity, equity)
+        self.snapshot = self._publish(timestamp, equity, exposure, realized_pnl, unrealized_pnl)
+        return self.snapshot
+
+    def _publish(self, timestamp, equity, exposure, realized_pnl, unrealized_pnl):
+        drawdown = (self.peak_equity - equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+        self.max_drawdown = max(self.max_drawdown, drawdown)
+        return RiskSnapshot(
+            time=timestamp,
+            equity=equity,
+            peak_equity=self.peak_equity,
+            drawdown=drawdown,
+            max_drawdown=self.max_drawdown,
+            exposure=exposure,
+            realized_pnl=realized_pnl,
+            unrealized_pnl=unrealized_pnl,
+            volatility=self.volatility,
+            turnover=self.turnover,
+            turnover_ratio=self.turnover / equity if equity > 0 else 0.0,
+            fills=self.fills
+        )
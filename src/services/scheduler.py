@@ -0,0 +1,83 @@
+import asyncio
+import time
+import logging
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+DEFAULT_CANDLE_SECONDS = 30 * 60  # Intervalo dos candles usados pela estratégia ('30m')
+DEFAULT_MOVE_THRESHOLD_BPS = 20.0  # Variação de preço (em bps) que dispara uma nova avaliação
+DEFAULT_HEARTBEAT_SECONDS = 300.0  # Avaliação mínima periódica mesmo com mercado parado
+DEFAULT_MIN_INTERVAL_SECONDS = 1.0  # Espaçamento mínimo entre avaliações consecutivas
+
+INTERVAL_SECONDS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200, '4h': 14400, '1d': 86400}
+
+
+class EvaluationTrigger:
+    """
+    Decide quando a estratégia de um símbolo deve ser reavaliada.
+
+    Uma avaliação é disparada pelo fechamento de um candle, por uma variação de preço acima de
+    'move_threshold_bps' desde a última avaliação, por uma execução (fill) ou, na falta de eventos,
+    pelo heartbeat.
+    """
+
+    def __init__(self, symbol, candle_seconds=DEFAULT_CANDLE_SECONDS, move_threshold_bps=DEFAULT_MOVE_THRESHOLD_BPS,
+                 heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS, min_interval_seconds=DEFAULT_MIN_INTERVAL_SECONDS, clock=time.time):
+        self.symbol = symbol
+        self.candle_seconds = candle_seconds
+        self.move_threshold_bps = move_threshold_bps
+        self.heartbeat_seconds = heartbeat_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.clock = clock
+
+        self.reference_price = None  # Preço no momento da última avaliação
+        self.last_evaluation = 0.0
+        self.reason = None
+        self._event = asyncio.Event()
+
+    def _fire(self, reason):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def on_price(self, price):
+        """Recebe um novo preço e dispara a avaliação se a variação ultrapassar o limite."""
+        if price is None or not self.reference_price:
+            return
+        move_bps = abs(price / self.reference_price - 1) * 10_000
+        if move_bps >= self.move_threshold_bps:
+            self._fire('price_move')
+
+    def on_fill(self):
+        """Sinaliza uma execução de ordem; a estratégia é reavaliada com o portfólio atualizado."""
+        self._fire('fill')
+
+    def mark_evaluated(self, price):
+        """Registra que uma avaliação acabou de acontecer ao preço informado."""
+        self.reference_price = price
+        self.last_evaluation = self.clock()
+        self.reason = None
+        self._event.clear()
+
+    def next_candle_close(self, now):
+        return (int(now // self.candle_seconds) + 1) * self.candle_seconds
+
+    async def wait(self):
+        """Aguarda o próximo gatilho de avaliação e retorna o motivo."""
+        # Evita avaliações em rajada quando vários eventos chegam em sequência
+        elapsed = self.clock() - self.last_evaluation
+        if elapsed < self.min_interval_seconds:
+            await asyncio.sleep(self.min_interval_seconds - elapsed)
+
+        now = self.clock()
+        candle_close = self.next_candle_close(self.last_evaluation or now)
+        heartbeat_at = (self.last_evaluation or now) + self.heartbeat_seconds
+        timeout = max(0.0, min(candle_close, heartbeat_at) - now)
+
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+            return self.reason
+        except asyncio.TimeoutError:
+            return 'candle_close' if self.clock() >= candle_close else 'heartbeat'
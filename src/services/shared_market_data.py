@@ -0,0 +1,162 @@
+import time
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+CANDLE_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+CANDLE_CAPACITY = 1000  # Candles mantidos por símbolo (o mesmo limite da consulta de klines)
+HEADER_FIELDS = 3  # sequência (seqlock), quantidade de candles, próxima posição de escrita
+PRICE_FIELDS = 2  # último preço, time.time() da publicação
+
+
+class SharedMarketData:
+    """
+    Ring buffer de candles e último preço por símbolo em memória compartilhada entre processos.
+
+    Há um único escritor (o processo de dados de mercado) e qualquer número de leitores. Cada símbolo
+    tem um seqlock: o escritor torna a sequência ímpar, escreve e a torna par de novo; o leitor copia
+    os dados e repete a leitura se a sequência estava ímpar ou mudou no meio da cópia. Assim a leitura
+    nunca bloqueia o escritor e nunca devolve um candle escrito pela metade.
+    """
+
+    def __init__(self, symbols, capacity=CANDLE_CAPACITY, name=None, create=True):
+        self.symbols = list(symbols)
+        self.capacity = capacity
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        count = len(self.symbols)
+        header_size = count * HEADER_FIELDS * 8
+        price_size = count * PRICE_FIELDS * 8
+        candle_size = count * capacity * len(CANDLE_FIELDS) * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=header_size + price_size + candle_size)
+        self.headers = np.ndarray((count, HEADER_FIELDS), dtype=np.int64, buffer=self.shm.buf)
+        self.prices = np.ndarray((count, PRICE_FIELDS), dtype=np.float64, buffer=self.shm.buf, offset=header_size)
+        self.candles = np.ndarray((count, capacity, len(CANDLE_FIELDS)), dtype=np.float64, buffer=self.shm.buf,
+                                  offset=header_size + price_size)
+        if create:
+            self.headers.fill(0)
+            self.prices.fill(0.0)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---- Escrita (processo de dados de mercado) ----
+
+    def _begin(self, i):
+        self.headers[i, 0] += 1
+
+    def _end(self, i):
+        self.headers[i, 0] += 1
+
+    def publish_prices(self, prices, now=None):
+        """Publica o último preço dos símbolos conhecidos."""
+        now = time.time() if now is None else now
+        for symbol, price in prices.items():
+            i = self.index.get(symbol)
+            if i is None:
+                continue
+            self._begin(i)
+            self.prices[i, 0] = price
+            self.prices[i, 1] = now
+            self._end(i)
+
+    def write_candles(self, symbol, df):
+        """
+        Acrescenta ao ring os candles de 'df' mais novos que o último guardado; o candle com o mesmo
+        horário de abertura do último (ainda em formação) é sobrescrito. Retorna quantos foram gravados.
+        """
+        i = self.index[symbol]
+        values = df[list(CANDLE_FIELDS)].to_numpy(dtype=np.float64)
+        ring = self.candles[i]
+        count, head = int(self.headers[i, 1]), int(self.headers[i, 2])
+        last_open = ring[(head - 1) % self.capacity, 0] if count else -np.inf
+        values = values[values[:, 0] >= last_open][-self.capacity:]
+        if not len(values):
+            return 0
+        self._begin(i)
+        for row in values:
+            if count and row[0] == ring[(head - 1) % self.capacity, 0]:
+                ring[(head - 1) % self.capacity] = row
+                continue
+            ring[head] = row
+            head = (head + 1) % self.capacity
+            count = min(count + 1, self.capacity)
+        self.headers[i, 1] = count
+        self.headers[i, 2] = head
+        self._end(i)
+        return len(values)
+
+    # ---- Leitura (demais processos) ----
+
+    def _read(self, i, copy):
+        while True:
+            sequence = self.headers[i, 0]
+            if sequence % 2:
+                time.sleep(0)  # Escrita em andamento: cede a vez e tenta de novo
+                continue
+            result = copy()
+            if self.headers[i, 0] == sequence:
+                return result
+
+    def sequence(self, symbol):
+        """Sequência do símbolo: muda a cada escrita (permite detectar dados novos sem copiar nada)."""
+        return int(self.headers[self.index[symbol], 0])
+
+    def read_price(self, symbol):
+        """(preço, time.time() da publicação) do símbolo; preço 0.0 se ainda não houver publicação."""
+        i = self.index[symbol]
+        price, published_at = self._read(i, lambda: (float(self.prices[i, 0]), float(self.prices[i, 1])))
+        return price, published_at
+
+    def read_prices(self):
+        prices = {}
+        for symbol in self.symbols:
+            price, _ = self.read_price(symbol)
+            if price:
+                prices[symbol] = price
+        return prices
+
+    def read_candles(self, symbol):
+        """Candles do símbolo em ordem cronológica (DataFrame no formato de get_historical_data) ou None."""
+        i = self.index[symbol]
+
+        def copy():
+            count, head = int(self.headers[i, 1]), int(self.headers[i, 2])
+            ring = self.candles[i]
+            if count < self.capacity:
+                return ring[:count].copy()
+            return np.concatenate((ring[head:], ring[:head]))
+
+        rows = self._read(i, copy)
+        if not len(rows):
+            return None
+        df = pd.DataFrame(rows, columns=list(CANDLE_FIELDS))
+        df['timestamp'] = df['timestamp'].astype(np.int64)
+        return df
+
+    def summary(self):
+        now = time.time()
+        result = {}
+        for symbol, i in self.index.items():
+            _, published_at = self.read_price(symbol)
+            result[symbol] = {
+                'price_age': now - published_at if published_at else None,
+                'candles': int(self.headers[i, 1]),
+                'writes': int(self.headers[i, 0]) // 2
+            }
+        return result
+
+    def close(self):
+        # As views numpy precisam ser liberadas antes de fechar o mapeamento
+        self.headers = self.prices = self.candles = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+import logging
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+STATE_DB_FILE = 'bot_state.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    time REAL NOT NULL,
+    price REAL NOT NULL,
+    quantity REAL NOT NULL DEFAULT 0,
+    quote_quantity REAL NOT NULL DEFAULT 0,
+    commission REAL NOT NULL DEFAULT 0,
+    order_id TEXT
+);
+-- Índice de cobertura: consultas por (symbol, side, janela de tempo) não precisam ler a tabela
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_side_time ON trades (symbol, side, time, price, quantity);
+
+CREATE TABLE IF NOT EXISTS counters (
+    symbol TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, name)
+);
+
+CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    cash_balance REAL NOT NULL,
+    profit_loss_cumulative REAL NOT NULL,
+    assets TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_portfolio_snapshots_time ON portfolio_snapshots (time);
+"""
+
+# Comandos fixos: o sqlite3 mantém cache dos statements preparados pelo texto do SQL
+INSERT_TRADE = "INSERT INTO trades (symbol, side, time, price, quantity, quote_quantity, commission, order_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+UPSERT_COUNTER = "INSERT INTO counters (symbol, name, value, updated_at) VALUES (?, ?, ?, ?) ON CONFLICT(symbol, name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at"
+SELECT_COUNTERS = "SELECT name, value FROM counters WHERE symbol = ?"
+INSERT_PORTFOLIO = "INSERT INTO portfolio_snapshots (time, cash_balance, profit_loss_cumulative, assets) VALUES (?, ?, ?, ?)"
+SELECT_LAST_PORTFOLIO = "SELECT time, cash_balance, profit_loss_cumulative, assets FROM portfolio_snapshots ORDER BY time DESC LIMIT 1"
+SELECT_AVERAGE_PRICE = "SELECT AVG(price), COUNT(*) FROM trades WHERE symbol = ? AND side = ? AND time >= ?"
+SELECT_VWAP = "SELECT SUM(price * quantity) / SUM(quantity) FROM trades WHERE symbol = ? AND side = ? AND time >= ? AND quantity > 0"
+SELECT_TRADES = "SELECT time, price, quantity FROM trades WHERE symbol = ? AND side = ? ORDER BY time"
+SELECT_RECENT_TRADES = "SELECT time, price, quantity FROM trades WHERE symbol = ? AND side = ? ORDER BY time DESC LIMIT ?"
+
+
+class StateStore:
+    """
+    Armazenamento embutido (SQLite em modo WAL) do histórico completo de transações, dos contadores
+    e dos snapshots de portfólio.
+
+    As escritas são acumuladas e gravadas em lote em uma única transação ('commit_every' escritas ou
+    chamada explícita a flush); as consultas usam o índice (symbol, side, time).
+    """
+
+    def __init__(self, path=STATE_DB_FILE, commit_every=32):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending_trades = []
+        self._pending_counters = []
+        self._lock = threading.Lock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    # ---- Escrita em lote ----
+
+    def record_trade(self, symbol, side, price, quantity=0.0, timestamp=None, quote_quantity=None, commission=0.0, order_id=None):
+        """Enfileira uma transação ('buy' ou 'sell'); gravada no próximo flush."""
+        timestamp = time.time() if timestamp is None else timestamp
+        quote_quantity = price * quantity if quote_quantity is None else quote_quantity
+        with self._lock:
+            self._pending_trades.append((symbol, side, timestamp, price, quantity, quote_quantity, commission, order_id))
+            should_flush = len(self._pending_trades) + len(self._pending_counters) >= self.commit_every
+        if should_flush:
+            self.flush()
+
+    def set_counters(self, symbol, timestamp=None, **counters):
+        """Enfileira a atualização de contadores do símbolo (ex.: consecutive_sell_blocks=3)."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._pending_counters.extend((symbol, name, int(value), timestamp) for name, value in counters.items())
+
+    def flush(self):
+        """Grava todas as escritas pendentes em uma única transação."""
+        with self._lock:
+            trades, self._pending_trades = self._pending_trades, []
+            counters, self._pending_counters = self._pending_counters, []
+            if not trades and not counters:
+                return
+            with self.connection:
+                if trades:
+                    self.connection.executemany(INSERT_TRADE, trades)
+                if counters:
+                    self.connection.executemany(UPSERT_COUNTER, counters)
+
+    def save_portfolio_snapshot(self, cash_balance, profit_loss_cumulative, assets, timestamp=None):
+        """Grava um snapshot do portfólio junto com as escritas pendentes."""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.flush()
+        with self._lock, self.connection:
+            self.connection.execute(INSERT_PORTFOLIO, (timestamp, cash_balance, profit_loss_cumulative, json.dumps(assets)))
+
+    # ---- Consultas ----
+
+    def get_counters(self, symbol):
+        self.flush()
+        with self._lock:
+            return dict(self.connection.execute(SELECT_COUNTERS, (symbol,)).fetchall())
+
+    def get_last_portfolio_snapshot(self):
+        with self._lock:
+            row = self.connection.execute(SELECT_LAST_PORTFOLIO).fetchone()
+        if row is None:
+            return None
+        return {'time': row[0], 'cash_balance': row[1], 'profit_loss_cumulative': row[2], 'assets': json.loads(row[3])}
+
+    def average_price(self, symbol, side, since_seconds, now=None):
+        """Preço médio das transações do lado nas últimas 'since_seconds' (ex.: 4 horas = 14400)."""
+        now = time.time() if now is None else now
+        self.flush()
+        with self._lock:
+            average, count = self.connection.execute(SELECT_AVERAGE_PRICE, (symbol, side, now - since_seconds)).fetchone()
+        return average if count else None
+
+    def vwap(self, symbol, side, since_seconds, now=None):
+        """Preço médio ponderado por quantidade das transações do lado na janela informada."""
+        now = time.time() if now is None else now
+        self.flush()
+        with self._lock:
+            return self.connection.execute(SELECT_VWAP, (symbol, side, now - since_seconds)).fetchone()[0]
+
+    def trades(self, symbol, side):
+        """Todas as transações do lado, em ordem cronológica (usado para carregar o TradeHistory)."""
+        self.flush()
+        with self._lock:
+            return self.connection.execute(SELECT_TRADES, (symbol, side)).fetchall()
+
+    def recent_trades(self, symbol, side, limit=10):
+        """Últimas 'limit' transações do lado, da mais recente para a mais antiga."""
+        self.flush()
+        with self._lock:
+            return self.connection.execute(SELECT_RECENT_TRADES, (symbol, side, limit)).fetchall()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.connection.close()
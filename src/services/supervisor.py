@@ -0,0 +1,161 @@
+import asyncio
+import os
+import pickle
+import time
+import logging
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+WARM_STATE_FILE = os.path.join('state', 'warm_state.pickle')
+SNAPSHOT_INTERVAL = 30.0  # Intervalo (s) entre snapshots do estado em memória
+WARM_STATE_MAX_AGE = 600.0  # Snapshots mais antigos que isso (s) são ignorados na partida
+RESTART_DELAY = 0.5  # Espera (s) antes do primeiro reinício; dobra a cada falha seguida
+MAX_RESTART_DELAY = 30.0
+STABLE_RUN = 300.0  # Sessão que dura mais que isso (s) zera a sequência de falhas
+
+
+class WarmStateStore:
+    """
+    Snapshot periódico do estado em memória dos componentes (preços e candles, histórico de ordens,
+    contexto de envio, ordens abertas, portfólio) para uma partida a quente após a queda do processo.
+
+    Cada componente expõe export_state() e restore_state(state). A exportação roda no event loop (o
+    estado não muda no meio dela) e a gravação, atômica (arquivo temporário + os.replace), roda no
+    executor.
+    """
+
+    def __init__(self, path=WARM_STATE_FILE, max_age=WARM_STATE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.saves = 0
+        self.errors = 0
+        self.saved_at = 0.0
+        self.save_ms = 0.0
+        self.restored = {}  # componente -> idade (s) do estado restaurado
+
+    def export(self, components):
+        return pickle.dumps({
+            'time': time.time(),
+            'state': {name: component.export_state() for name, component in components.items()}
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def write(self, payload):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(payload)
+        os.replace(temporary, self.path)
+
+    def save(self, components):
+        """Grava o snapshot de forma síncrona (usado no encerramento)."""
+        start = time.perf_counter()
+        self.write(self.export(components))
+        self._saved(start)
+
+    def _saved(self, start):
+        self.saves += 1
+        self.saved_at = time.time()
+        self.save_ms = (time.perf_counter() - start) * 1000
+
+    def load(self):
+        """Lê o último snapshot; {} se não existir, estiver corrompido ou for antigo demais."""
+        try:
+            with open(self.path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Snapshot de estado ilegível em '{self.path}': {e}. Partida a frio.")
+            return {}
+        age = time.time() - snapshot.get('time', 0.0)
+        if age > self.max_age:
+            logger.info(f"Snapshot de estado com {age:.0f}s ignorado (máximo {self.max_age:.0f}s). Partida a frio.")
+            return {}
+        return {name: (state, age) for name, state in snapshot.get('state', {}).items()}
+
+    def restore(self, components):
+        """Restaura em cada componente o estado do último snapshot válido."""
+        start = time.perf_counter()
+        for name, (state, age) in self.load().items():
+            component = components.get(name)
+            if component is None:
+                continue
+            try:
+                component.restore_state(state)
+                self.restored[name] = age
+            except Exception as e:
+                logger.error(f"Erro ao restaurar o estado de '{name}': {e}")
+        if self.restored:
+            logger.info(f"Estado restaurado do snapshot em {(time.perf_counter() - start) * 1000:.1f} ms: {', '.join(self.restored)}.")
+        return self.restored
+
+    async def run(self, components, executor, interval=SNAPSHOT_INTERVAL):
+        """Task de background que grava o snapshot a cada 'interval' segundos."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            start = time.perf_counter()
+            try:
+                payload = self.export(components)
+                await loop.run_in_executor(executor, self.write, payload)
+                self._saved(start)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Erro ao gravar o snapshot de estado: {e}")
+
+    def summary(self):
+        return {
+            'saves': self.saves,
+            'errors': self.errors,
+            'age': time.time() - self.saved_at if self.saved_at else None,
+            'save_ms': self.save_ms,
+            'restored': dict(self.restored)
+        }
+
+
+class Supervisor:
+    """
+    Reinicia a sessão de negociação em um loop (sem recursão) quando ela termina com uma exceção.
+
+    A sessão é criada por 'session_factory' a cada início e só contém as tasks; os componentes com
+    estado (books, caches, contextos, ordens abertas, portfólio) vivem fora dela e são reaproveitados,
+    então o reinício leva milissegundos. A espera entre reinícios começa em 'restart_delay' e dobra a
+    cada falha seguida, até 'max_restart_delay'.
+    """
+
+    def __init__(self, session_factory, restart_delay=RESTART_DELAY, max_restart_delay=MAX_RESTART_DELAY, stable_run=STABLE_RUN):
+        self.session_factory = session_factory
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_run = stable_run
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+
+    async def run(self):
+        while True:
+            started_at = time.monotonic()
+            try:
+                await self.session_factory()
+                return
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if time.monotonic() - started_at >= self.stable_run:
+                    self.consecutive_failures = 0
+                delay = min(self.restart_delay * 2 ** self.consecutive_failures, self.max_restart_delay)
+                self.consecutive_failures += 1
+                self.restarts += 1
+                logger.critical(f"Erro inesperado no bot: {e}. Reiniciando a sessão em {delay:.1f}s "
+                                f"(reinício {self.restarts}, estado em memória preservado).", exc_info=e)
+            await asyncio.sleep(delay)
+
+    def summary(self):
+        return {
+            'restarts': self.restarts,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,88 @@
+import os
+import shutil
+from datetime import datetime
+
+from services.block_counters import BlockCounters
+from services.transaction_journal import TransactionJournal
+from services.transaction_manager import BLOCK_COUNTS_FILE, TRANSACTION_FILE
+
+STATE_DIR = 'state'
+LEGACY_SYMBOL = 'BTCUSDT'  # Símbolo cujo estado ficava nos arquivos globais da raiz
+
+
+class SymbolState:
+    """
+    Namespace de estado persistido de um símbolo: histórico de transações e contadores de bloqueio
+    ficam em 'state/<SYMBOL>/', permitindo vários símbolos no mesmo processo sem conflito de arquivos.
+    """
+
+    def __init__(self, symbol, state_dir=STATE_DIR, store=None):
+        self.symbol = symbol
+        self.store = store  # StateStore compartilhado com o histórico completo (opcional)
+        self.base_asset = symbol.replace('USDT', '')
+        self.directory = os.path.join(state_dir, symbol)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.transaction_file = os.path.join(self.directory, TRANSACTION_FILE)
+        self.block_counts_file = os.path.join(self.directory, BLOCK_COUNTS_FILE)
+        if symbol == LEGACY_SYMBOL:
+            self._migrate_legacy_files()
+
+        # Histórico em journal append-only: cada alteração é uma linha anexada, não uma reescrita do JSON
+        self.journal = TransactionJournal(self.transaction_file)
+        self.history = self.journal.history
+        if store is not None:
+            self._load_full_history()
+        # Últimos preços conhecidos no início da sessão (usados pela condição de "broke cold")
+        self.last_buy = self.history.side('buys').last_price
+        self.last_sell = self.history.side('sells').last_price
+
+        # Contadores de bloqueio em memória, gravados em write-behind
+        self.block_counters = BlockCounters(self.block_counts_file, store=store, symbol=symbol)
+
+    def _migrate_legacy_files(self):
+        """Copia os arquivos globais antigos para o namespace do símbolo na primeira execução."""
+        for legacy_file, target_file in ((TRANSACTION_FILE, self.transaction_file), (BLOCK_COUNTS_FILE, self.block_counts_file)):
+            if os.path.exists(legacy_file) and not os.path.exists(target_file):
+                shutil.copy(legacy_file, target_file)
+
+    def _load_full_history(self):
+        """Carrega o histórico completo de transações executadas do StateStore."""
+        for transaction_type, side in (('buys', 'buy'), ('sells', 'sell')):
+            history = self.history.side(transaction_type)
+            for timestamp, price, quantity in self.store.trades(self.symbol, side):
+                history.record(price, timestamp, quantity)
+
+    @property
+    def transactions(self):
+        """Memória curta de transações no formato do transaction_history.json."""
+        return self.journal.transactions
+
+    def block_counts(self):
+        """Retorna (consecutive_sell_blocks, consecutive_buy_blocks) do símbolo."""
+        return self.block_counters.get()
+
+    def apply_delta(self, delta):
+        """Aplica o StateDelta devolvido pela estratégia ao estado do símbolo."""
+        for transaction_type in delta.reset_sides:
+            self.journal.reset(transaction_type, delta.time)
+        if delta.record is not None:
+            self.journal.add(*delta.record)
+        if delta.block_counts is not None:
+            self.block_counters.set(*delta.block_counts)
+
+    def record_trade(self, transaction_type, price, quantity=0.0):
+        """
+        Registra uma execução ('buys' ou 'sells') no histórico completo do símbolo. A memória curta da
+        estratégia (journal) já recebeu a transação na decisão, pelo StateDelta; gravá-la de novo aqui
+        contaria a mesma operação duas vezes (ou uma vez por execução parcial).
+        """
+        timestamp = datetime.now().timestamp()
+        self.history.side(transaction_type).record(price, timestamp, quantity)
+        if self.store is not None:
+            self.store.record_trade(self.symbol, 'buy' if transaction_type == 'buys' else 'sell', price, quantity, timestamp)
+
+    def close(self):
+        """Grava os contadores e compacta o journal do símbolo (chamado no encerramento)."""
+        self.block_counters.flush()
+        self.journal.close()
@@ -0,0 +1,175 @@
+import bisect
+import time
+from collections import deque
+
+MEMORY_SIZE = 6  # Entradas da memória curta da estratégia (mesmo limite do transaction_history.json)
+WINDOW_SECONDS = 4 * 60 * 60  # Janela de tempo padrão das médias móveis (4 horas)
+SIDES = ('buys', 'sells')
+
+
+class SideHistory:
+    """
+    Histórico de um lado (compras ou vendas) com agregados mantidos incrementalmente.
+
+    - Memória curta da estratégia: ring buffer de 'memory_size' preços com soma corrente. Reproduz as
+      regras de add_transaction/limpeza (entrada inicial com preço zerado substituída pela primeira
+      transação), mas sem pop(0) nem recálculo da média.
+    - Histórico completo: arrays append-only com somas prefixadas de preço, quantidade e valor
+      negociado; médias das últimas N transações e VWAP saem de duas subtrações (O(1)).
+    - Janela de tempo (ex.: últimas 4 horas): ponteiro que só avança sobre o histórico ordenado,
+      O(1) amortizado por consulta.
+    """
+
+    def __init__(self, memory_size=MEMORY_SIZE, window_seconds=WINDOW_SECONDS):
+        self.memory = deque(maxlen=memory_size)  # (price, time)
+        self.memory_sum = 0.0
+
+        self.times = []
+        self.prices = []
+        self.quantities = []
+        self._price_sums = [0.0]
+        self._quantity_sums = [0.0]
+        self._notional_sums = [0.0]
+
+        self.window_seconds = window_seconds
+        self._window_start = 0
+        self._window_cutoff = float('-inf')
+
+    # ---- Memória curta da estratégia ----
+
+    def add(self, price, timestamp):
+        """Registra um preço na memória curta (mesmas regras de append_transaction)."""
+        if self.memory and self.memory[0][0] == 0:
+            # Substitui a entrada inicial com preço zerado
+            self.memory_sum += price - self.memory[0][0]
+            self.memory[0] = (price, timestamp)
+            return
+        if len(self.memory) == self.memory.maxlen:
+            self.memory_sum -= self.memory[0][0]
+        self.memory.append((price, timestamp))
+        self.memory_sum += price
+
+    def reset(self, timestamp):
+        """Limpa a memória curta, deixando apenas a entrada inicial com preço zerado. O histórico completo é mantido."""
+        self.memory.clear()
+        self.memory.append((0.0, timestamp))
+        self.memory_sum = 0.0
+
+    def load_memory(self, entries):
+        """Carrega a memória curta a partir da lista [{"price", "time"}] do transaction_history.json."""
+        self.memory.clear()
+        self.memory_sum = 0.0
+        for entry in entries[-self.memory.maxlen:]:
+            self.memory.append((entry['price'], entry['time']))
+            self.memory_sum += entry['price']
+
+    def memory_entries(self):
+        return [{"price": price, "time": timestamp} for price, timestamp in self.memory]
+
+    @property
+    def memory_average(self):
+        """Média da memória curta (equivalente a get_average_price); None se estiver vazia."""
+        return self.memory_sum / len(self.memory) if self.memory else None
+
+    @property
+    def last_price(self):
+        return self.memory[-1][0] if self.memory else 0
+
+    @property
+    def last_time(self):
+        return self.memory[-1][1] if self.memory else 0
+
+    # ---- Histórico completo ----
+
+    def record(self, price, timestamp, quantity=0.0):
+        """Anexa uma transação executada ao histórico completo."""
+        self.times.append(timestamp)
+        self.prices.append(price)
+        self.quantities.append(quantity)
+        self._price_sums.append(self._price_sums[-1] + price)
+        self._quantity_sums.append(self._quantity_sums[-1] + quantity)
+        self._notional_sums.append(self._notional_sums[-1] + price * quantity)
+
+    @property
+    def count(self):
+        return len(self.prices)
+
+    def _average(self, start, end):
+        return (self._price_sums[end] - self._price_sums[start]) / (end - start) if end > start else None
+
+    def _vwap(self, start, end):
+        quantity = self._quantity_sums[end] - self._quantity_sums[start]
+        return (self._notional_sums[end] - self._notional_sums[start]) / quantity if quantity > 0 else None
+
+    def average(self):
+        return self._average(0, self.count)
+
+    def vwap(self):
+        return self._vwap(0, self.count)
+
+    def last_n_average(self, n):
+        """Média de preço das últimas 'n' transações."""
+        return self._average(max(0, self.count - n), self.count)
+
+    def last_n_vwap(self, n):
+        return self._vwap(max(0, self.count - n), self.count)
+
+    def _window_bounds(self, now):
+        cutoff = now - self.window_seconds
+        if cutoff < self._window_cutoff:
+            # Consulta com horário anterior ao da última: busca binária sem mover o ponteiro
+            return bisect.bisect_left(self.times, cutoff), self.count
+        self._window_cutoff = cutoff
+        while self._window_start < self.count and self.times[self._window_start] < cutoff:
+            self._window_start += 1
+        return self._window_start, self.count
+
+    def window_count(self, now=None):
+        start, end = self._window_bounds(time.time() if now is None else now)
+        return end - start
+
+    def window_average(self, now=None):
+        """Média de preço das transações nas últimas 'window_seconds'."""
+        return self._average(*self._window_bounds(time.time() if now is None else now))
+
+    def window_vwap(self, now=None):
+        return self._vwap(*self._window_bounds(time.time() if now is None else now))
+
+    def average_since(self, timestamp):
+        """Média de preço desde um horário arbitrário (busca binária, O(log n))."""
+        return self._average(bisect.bisect_left(self.times, timestamp), self.count)
+
+    def summary(self, now=None):
+        now = time.time() if now is None else now
+        return {
+            'count': self.count,
+            'average': self.average(),
+            'vwap': self.vwap(),
+            'window_count': self.window_count(now),
+            'window_average': self.window_average(now),
+            'window_vwap': self.window_vwap(now),
+            'memory_average': self.memory_average
+        }
+
+
+class TradeHistory:
+    """Histórico de compras e vendas de um símbolo (um SideHistory por lado)."""
+
+    def __init__(self, memory_size=MEMORY_SIZE, window_seconds=WINDOW_SECONDS):
+        self.sides = {side: SideHistory(memory_size, window_seconds) for side in SIDES}
+
+    def side(self, transaction_type):
+        return self.sides[transaction_type]
+
+    def load_dict(self, transactions):
+        """Carrega a memória curta a partir do formato do transaction_history.json."""
+        for side, history in self.sides.items():
+            history.load_memory(transactions.get(side, []))
+
+    def to_dict(self):
+        """Memória curta no formato do transaction_history.json."""
+        return {side: history.memory_entries() for side, history in self.sides.items()}
+
+    def summary(self, now=None):
+        now = time.time() if now is None else now
+        return {side: history.summary(now) for side, history in self.sides.items()}
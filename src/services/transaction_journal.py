@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+from services.trade_history import TradeHistory
+from services.transaction_manager import TRANSACTION_FILE, write_json_atomic
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+FSYNC_EVERY = 16  # Entradas acumuladas antes de forçar fsync
+FSYNC_INTERVAL = 1.0  # Tempo máximo (s) que uma entrada fica sem fsync
+COMPACT_EVERY = 500  # Entradas no journal que disparam a compactação em background
+MAINTENANCE_INTERVAL = 1.0  # Intervalo (s) da task de manutenção (fsync pendente e compactação)
+
+
+def _initial_transactions(now=None):
+    now = datetime.now().timestamp() if now is None else now
+    return {"buys": [{"price": 0.0, "time": now}], "sells": [{"price": 0.0, "time": now}]}
+
+
+class TransactionJournal:
+    """
+    Histórico de transações persistido como snapshot (transaction_history.json) mais um journal
+    append-only em JSON lines.
+
+    Cada alteração vira uma linha anexada ao journal (O(1)), com fsync em lote. A compactação grava
+    um novo snapshot em background; as entradas têm número de sequência, então a recuperação após
+    uma falha (snapshot + replay do journal) nunca aplica uma entrada duas vezes.
+
+    O estado em memória é um TradeHistory (ring buffer com médias incrementais); o snapshot mantém
+    o formato do transaction_history.json.
+    """
+
+    def __init__(self, snapshot_path=TRANSACTION_FILE, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL, compact_every=COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + '.journal'
+        self.compacting_path = self.journal_path + '.compacting'
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self.seq = 0
+        self.pending_sync = 0
+        self.entries_since_compaction = 0
+        self._last_sync = time.monotonic()
+        self._compaction_lock = threading.Lock()
+        self._compaction_seq = 0  # Sequência do snapshot da compactação mais recente iniciada
+        self._snapshot_seq = 0  # Sequência do último snapshot gravado
+
+        self.history = self._recover()
+        self._file = open(self.journal_path, 'a')
+
+    # ---- Recuperação ----
+
+    def _recover(self):
+        """Carrega o snapshot e reaplica as entradas do journal posteriores a ele."""
+        transactions = None
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as file:
+                    transactions = json.load(file)
+            except (ValueError, OSError) as e:
+                logger.error(f"Snapshot de transações '{self.snapshot_path}' ilegível: {e}. Reconstruindo a partir do journal.")
+
+        if not isinstance(transactions, dict):
+            transactions = _initial_transactions()
+            write_json_atomic(self.snapshot_path, transactions)
+        self.seq = self._snapshot_seq = int(transactions.pop('seq', 0))
+        history = TradeHistory()
+        history.load_dict(transactions)
+
+        replayed = 0
+        for path in (self.compacting_path, self.journal_path):
+            replayed += self._replay(path, history)
+        if replayed:
+            logger.info(f"{replayed} entradas do journal reaplicadas sobre o snapshot de transações.")
+
+        self.entries_since_compaction = replayed
+        return history
+
+    def _replay(self, path, history):
+        if not os.path.exists(path):
+            return 0
+        replayed = 0
+        valid_bytes = 0
+        with open(path, 'rb') as file:
+            for raw_line in file:
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    # Linha truncada por uma queda durante a escrita: descarta o restante
+                    logger.warning(f"Entrada truncada descartada no journal '{path}'.")
+                    break
+                valid_bytes += len(raw_line)
+                if entry['seq'] > self.seq:
+                    self._apply(history, entry)
+                    self.seq = entry['seq']
+                    replayed += 1
+        if valid_bytes < os.path.getsize(path):
+            with open(path, 'r+b') as file:
+                file.truncate(valid_bytes)
+        return replayed
+
+    @staticmethod
+    def _apply(history, entry):
+        if entry['op'] == 'add':
+            history.side(entry['side']).add(entry['price'], entry['time'])
+        elif entry['op'] == 'reset':
+            history.side(entry['side']).reset(entry['time'])
+
+    @property
+    def transactions(self):
+        """Memória curta no formato do transaction_history.json."""
+        return self.history.to_dict()
+
+    # ---- Escrita ----
+
+    def _append(self, entry):
+        self.seq += 1
+        entry['seq'] = self.seq
+        self._apply(self.history, entry)
+        self._file.write(json.dumps(entry) + '\n')
+        self.pending_sync += 1
+        self.entries_since_compaction += 1
+        if self.pending_sync >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def add(self, transaction_type, price, timestamp=None):
+        """Registra uma transação ('buys' ou 'sells') com as mesmas regras de add_transaction."""
+        timestamp = datetime.now().timestamp() if timestamp is None else timestamp
+        self._append({'op': 'add', 'side': transaction_type, 'price': price, 'time': timestamp})
+
+    def reset(self, transaction_type, timestamp=None):
+        """Limpa a memória de um lado, deixando apenas a transação inicial com preço zerado."""
+        timestamp = datetime.now().timestamp() if timestamp is None else timestamp
+        self._append({'op': 'reset', 'side': transaction_type, 'time': timestamp})
+
+    def sync(self):
+        """Garante que as entradas pendentes estejam no disco (flush + fsync)."""
+        if self.pending_sync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending_sync = 0
+        self._last_sync = time.monotonic()
+
+    # ---- Compactação ----
+
+    def _start_compaction(self):
+        """Congela o estado atual e rotaciona o journal; novas entradas vão para um journal vazio."""
+        self.sync()
+        self._file.close()
+        if os.path.exists(self.compacting_path):
+            # Compactação anterior não concluída: suas entradas continuam no arquivo antigo
+            with open(self.compacting_path, 'a') as target, open(self.journal_path, 'r') as source:
+                target.write(source.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.compacting_path)
+        self._file = open(self.journal_path, 'a')
+        self.entries_since_compaction = 0
+
+        snapshot = self.history.to_dict()
+        snapshot['seq'] = self._compaction_seq = self.seq
+        return snapshot
+
+    def _finish_compaction(self, snapshot):
+        with self._compaction_lock:
+            # Uma compactação mais nova pode ter terminado antes (ex.: no encerramento)
+            if snapshot['seq'] > self._snapshot_seq:
+                write_json_atomic(self.snapshot_path, snapshot)
+                self._snapshot_seq = snapshot['seq']
+            # O journal antigo só é descartado quando o snapshot gravado cobre todas as suas entradas
+            if self._snapshot_seq >= self._compaction_seq and os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+
+    def compact(self):
+        """Compacta de forma síncrona (usado no encerramento)."""
+        self._finish_compaction(self._start_compaction())
+
+    async def run_maintenance(self, interval=MAINTENANCE_INTERVAL):
+        """Task de background: faz fsync das entradas pendentes e compacta o journal quando necessário."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sync()
+                if self.entries_since_compaction >= self.compact_every:
+                    snapshot = self._start_compaction()
+                    await loop.run_in_executor(None, self._finish_compaction, snapshot)
+            except Exception as e:
+                logger.error(f"Erro na manutenção do journal '{self.journal_path}': {e}")
+
+    def close(self):
+        """Sincroniza, compacta e fecha o journal."""
+        try:
+            self.compact()
+        finally:
+            self._file.close()
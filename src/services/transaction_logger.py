@@ -1,43 +1,172 @@
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
+import asyncio
+import csv
+from concurrent.futures import Future
 from datetime import datetime
 import os
 import logging
 
+from services.valuation import value_portfolio
+
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger()
 
+# Colunas do Excel exportado (formato histórico do relatório)
+COLUMNS = [
+    'date_time', 'asset', 'transaction_type', 'quantity', 'price_per_asset',
+    'transaction_total', 'reason', 'profit_loss', 'total_balance', 'asset_balance',
+    'investment_usd', 'returned_to_cash_usd', 'cumulative_profit_loss',
+    'usdt_balance', 'roi_percentage', 'cumulative_profit_loss_percentage',
+    'market_value', 'decision_quality', 'performance', 'drawdown_percentage', 'max_drawdown_percentage'
+]
+
+# Registro tipado do ledger: valores numéricos brutos, formatados apenas na exportação
+LEDGER_DTYPE = np.dtype([
+    ('time', 'f8'), ('asset', 'U16'), ('transaction_type', 'U8'), ('quantity', 'f8'), ('price', 'f8'),
+    ('profit_loss', 'f8'), ('total_balance', 'f8'), ('asset_balance', 'f8'), ('investment', 'f8'),
+    ('returned_to_cash', 'f8'), ('cumulative_profit_loss', 'f8'), ('usdt_balance', 'f8'),
+    ('roi_percentage', 'f8'), ('cumulative_profit_loss_percentage', 'f8'), ('market_value', 'f8'),
+    ('reason', 'U128'), ('drawdown', 'f8'), ('max_drawdown', 'f8')
+])
+LEDGER_FIELDS = list(LEDGER_DTYPE.names)
+
+# Colunas do Excel (formato antigo) -> campos do ledger
+LEGACY_FIELDS = {
+    'asset': 'asset', 'transaction_type': 'transaction_type', 'quantity': 'quantity',
+    'price_per_asset': 'price', 'profit_loss': 'profit_loss', 'total_balance': 'total_balance',
+    'asset_balance': 'asset_balance', 'investment_usd': 'investment', 'returned_to_cash_usd': 'returned_to_cash',
+    'cumulative_profit_loss': 'cumulative_profit_loss', 'usdt_balance': 'usdt_balance',
+    'roi_percentage': 'roi_percentage', 'cumulative_profit_loss_percentage': 'cumulative_profit_loss_percentage',
+    'market_value': 'market_value', 'reason': 'reason'
+}
+
+
+def _fmt(values, decimals):
+    return values.map(f"{{:.{decimals}f}}".format)
+
+
+def format_ledger(ledger):
+    """Converte os registros brutos do ledger nas colunas formatadas do relatório."""
+    profit_loss = ledger['profit_loss']
+    report = pd.DataFrame({
+        'date_time': pd.to_datetime(ledger['time'].map(datetime.fromtimestamp)),
+        'asset': ledger['asset'],
+        'transaction_type': ledger['transaction_type'],
+        'quantity': _fmt(ledger['quantity'], 8),
+        'price_per_asset': _fmt(ledger['price'], 2),
+        'transaction_total': _fmt(ledger['quantity'] * ledger['price'], 2),
+        'reason': ledger['reason'],
+        'profit_loss': _fmt(profit_loss, 2),
+        'total_balance': _fmt(ledger['total_balance'], 2),
+        'asset_balance': _fmt(ledger['asset_balance'], 8),
+        'investment_usd': _fmt(ledger['investment'], 2),
+        'returned_to_cash_usd': _fmt(ledger['returned_to_cash'], 2),
+        'cumulative_profit_loss': _fmt(ledger['cumulative_profit_loss'], 2),
+        'usdt_balance': _fmt(ledger['usdt_balance'], 2),
+        'roi_percentage': _fmt(ledger['roi_percentage'], 2),
+        'cumulative_profit_loss_percentage': _fmt(ledger['cumulative_profit_loss_percentage'], 2),
+        'market_value': _fmt(ledger['market_value'], 2),
+        'decision_quality': np.where(profit_loss > 0, "Good", np.where(profit_loss < 0, "Bad", "Neutral")),
+        'performance': np.where(profit_loss > 0, "Profit of ", "Loss of ") + _fmt(profit_loss, 2),
+        'drawdown_percentage': _fmt(ledger['drawdown'] * 100, 2),
+        'max_drawdown_percentage': _fmt(ledger['max_drawdown'] * 100, 2)
+    })
+    return report[COLUMNS]
+
+
+def legacy_to_ledger(df):
+    """Converte linhas no formato antigo (strings pré-formatadas do Excel) em registros do ledger."""
+    ledger = pd.DataFrame({field: df[column] for column, field in LEGACY_FIELDS.items() if column in df})
+    ledger['time'] = pd.to_datetime(df['date_time']).map(lambda value: value.timestamp())
+    for field in LEDGER_FIELDS:
+        if field not in ledger:
+            ledger[field] = '' if LEDGER_DTYPE[field].kind == 'U' else 0.0
+        elif LEDGER_DTYPE[field].kind == 'f':
+            ledger[field] = pd.to_numeric(ledger[field], errors='coerce').fillna(0.0)
+    return ledger[LEDGER_FIELDS]
+
+
+def export_ledger_to_excel(ledger_file, excel_file):
+    """Gera o Excel a partir do ledger CSV. Executado em um processo separado do bot."""
+    ledger = pd.read_csv(ledger_file, keep_default_na=False)
+    tmp_file = f"{excel_file}.tmp.xlsx"
+    format_ledger(ledger).to_excel(tmp_file, index=False)
+    os.replace(tmp_file, excel_file)
+    return len(ledger)
+
+
 class TransactionLogger:
+    """
+    Registra as transações em um ledger CSV append-only (gravação O(1) por flush). O Excel é gerado
+    sob demanda ou periodicamente por um processo separado, sem bloquear o loop de negociação.
+
+    Cada transação é um registro numérico tipado (LEDGER_DTYPE) gravado em um buffer pré-alocado;
+    a formatação de texto acontece apenas na exportação.
+    """
+
     def __init__(self, initial_balance, buffer_size=10):
         self.file_name = 'portfolio_history_detailed.xlsx'
+        self.ledger_file = 'portfolio_history_detailed.csv'
         self.initial_balance = initial_balance
         self.cumulative_profit_loss = 0  # Lucro/prejuízo acumulado
-        self.buffer_size = buffer_size  # Tamanho do buffer antes de salvar no Excel
-        self.transaction_buffer = []  # Buffer para armazenar transações antes de salvar
+        self.buffer_size = buffer_size  # Tamanho do buffer antes de gravar no ledger
+        self.records = np.zeros(buffer_size, dtype=LEDGER_DTYPE)  # Buffer pré-alocado de registros
+        self.buffered = 0  # Quantidade de registros ocupados no buffer
+        self.ledger_version = 0  # Incrementado a cada flush; indica se o Excel está desatualizado
+        self.exported_version = 0
+        # Executor da exportação (ExecutorRuntime, com os processos criados na partida); sem ele, a exportação
+        # roda na própria chamada. Um pool criado aqui faria fork com o loop e as threads já em execução.
+        self.export_executor = None
+        self.export_future = None
 
-        # Cria o arquivo se ele não existir
-        if not os.path.exists(self.file_name):
+        # Cria o ledger se ele não existir (ou converte um ledger no formato antigo)
+        if not os.path.exists(self.ledger_file):
             self.create_initial_file()
+        else:
+            self.migrate_ledger()
 
     def create_initial_file(self):
-        columns = [
-            'date_time', 'asset', 'transaction_type', 'quantity', 'price_per_asset',
-            'transaction_total', 'reason', 'profit_loss', 'total_balance', 'asset_balance',
-            'investment_usd', 'returned_to_cash_usd', 'cumulative_profit_loss',
-            'usdt_balance', 'roi_percentage', 'cumulative_profit_loss_percentage', 
-            'market_value', 'decision_quality', 'performance'
-        ]
-        df = pd.DataFrame(columns=columns)
-        df.to_excel(self.file_name, index=False)
-        logger.info("Arquivo Excel inicial criado com sucesso.")
-
-    def record_transaction(self, transaction, portfolio_manager, market_prices):
+        """Cria o ledger CSV, importando o histórico do Excel existente (se houver)."""
+        if os.path.exists(self.file_name):
+            ledger = legacy_to_ledger(pd.read_excel(self.file_name))
+            logger.info(f"{len(ledger)} transações importadas do Excel existente para o ledger.")
+        else:
+            ledger = pd.DataFrame(columns=LEDGER_FIELDS)
+        ledger.to_csv(self.ledger_file, index=False)
+        logger.info("Ledger CSV inicial criado com sucesso.")
+
+    def migrate_ledger(self):
+        """Converte um ledger gravado em formato anterior (colunas formatadas ou campos a menos) para o formato atual."""
+        with open(self.ledger_file, newline='') as file:
+            header = next(csv.reader(file), [])
+        if header == LEDGER_FIELDS:
+            return
+        ledger = pd.read_csv(self.ledger_file, keep_default_na=False)
+        if 'time' in header:
+            # Ledger tipado de uma versão anterior: apenas acrescenta os campos novos
+            for field in LEDGER_FIELDS:
+                if field not in ledger:
+                    ledger[field] = '' if LEDGER_DTYPE[field].kind == 'U' else 0.0
+            ledger = ledger[LEDGER_FIELDS]
+        else:
+            ledger = legacy_to_ledger(ledger)
+        tmp_file = f"{self.ledger_file}.tmp"
+        ledger.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, self.ledger_file)
+        logger.info(f"Ledger '{self.ledger_file}' convertido para registros tipados ({len(ledger)} linhas).")
+
+    def record_transaction(self, transaction, portfolio_manager, market_prices, average_cost=None):
+        """
+        Registra a transação no buffer do ledger. 'average_cost' é o custo médio do ativo antes da
+        execução: informado quando a execução já foi aplicada ao portfólio (uma venda total remove o ativo).
+        """
         # Obtém o nome do ativo principal (ex: de BTCUSDT extrai BTC)
         base_asset = transaction['asset'].replace('USDT', '')
 
         # Calcula lucro ou prejuízo com base na transação
-        profit_loss, investment, returned_to_cash = self.calculate_profit_loss(transaction, portfolio_manager, base_asset)
+        profit_loss, investment, returned_to_cash = self.calculate_profit_loss(transaction, portfolio_manager, base_asset, average_cost)
 
         # Atualiza o lucro/prejuízo acumulado
         self.cumulative_profit_loss += profit_loss
@@ -53,46 +182,33 @@ class TransactionLogger:
         roi_percentage = ((total_balance - self.initial_balance) / self.initial_balance) * 100
         cumulative_profit_loss_percentage = (self.cumulative_profit_loss / self.initial_balance) * 100
 
-        # Determina a qualidade da decisão com base no lucro/prejuízo
-        decision_quality = "Good" if profit_loss > 0 else "Bad" if profit_loss < 0 else "Neutral"
-        performance = f"Profit of {profit_loss:.2f}" if profit_loss > 0 else f"Loss of {profit_loss:.2f}"
-
-        # Constrói a linha de dados detalhada
-        data = {
-            'date_time': datetime.now(),
-            'asset': transaction['asset'],
-            'transaction_type': transaction['type'],
-            'quantity': f"{transaction['quantity']:.8f}",
-            'price_per_asset': f"{transaction['price']:.2f}",
-            'transaction_total': f"{transaction['quantity'] * transaction['price']:.2f}",
-            'reason': transaction['reason'],
-            'profit_loss': f"{profit_loss:.2f}",
-            'total_balance': f"{total_balance:.2f}",
-            'asset_balance': f"{asset_balance:.8f}",
-            'investment_usd': f"{investment:.2f}",
-            'returned_to_cash_usd': f"{returned_to_cash:.2f}",
-            'cumulative_profit_loss': f"{self.cumulative_profit_loss:.2f}",
-            'usdt_balance': f"{portfolio_manager.cash_balance:.2f}",
-            'roi_percentage': f"{roi_percentage:.2f}",
-            'cumulative_profit_loss_percentage': f"{cumulative_profit_loss_percentage:.2f}",
-            'market_value': f"{market_value:.2f}",
-            'decision_quality': decision_quality,
-            'performance': performance
-        }
-
-        # Adiciona a transação ao buffer
-        self.transaction_buffer.append(data)
-        logger.info(f"Transação adicionada ao buffer: {data}")
-
-        # Grava no Excel se o buffer atingir o tamanho especificado
-        if len(self.transaction_buffer) >= self.buffer_size:
-            self.flush_buffer_to_excel()
-
-    def calculate_profit_loss(self, transaction, portfolio_manager, base_asset):
-        """Calcula lucro/prejuízo, investimento e valor retornado ao caixa."""
+        # Métricas de risco já publicadas pelo PortfolioManager (sem recálculo)
+        risk = portfolio_manager.risk_snapshot
+
+        # Grava o registro tipado no buffer pré-alocado (sem formatação de texto)
+        self.records[self.buffered] = (
+            datetime.now().timestamp(), transaction['asset'], transaction['type'],
+            transaction['quantity'], transaction['price'], profit_loss, total_balance, asset_balance,
+            investment, returned_to_cash, self.cumulative_profit_loss, portfolio_manager.cash_balance,
+            roi_percentage, cumulative_profit_loss_percentage, market_value, transaction['reason'],
+            risk.drawdown, risk.max_drawdown
+        )
+        self.buffered += 1
+        logger.info(f"Transação adicionada ao buffer: {transaction['type']} {transaction['quantity']} {transaction['asset']} a {transaction['price']}")
+
+        # Grava no ledger se o buffer atingir o tamanho especificado
+        if self.buffered >= self.buffer_size:
+            self.flush_buffer()
+
+    def calculate_profit_loss(self, transaction, portfolio_manager, base_asset, average_cost=None):
+        """
+        Calcula lucro/prejuízo, investimento e valor retornado ao caixa. Sem custo médio conhecido
+        (ativo não acompanhado pelo portfólio), a venda não gera lucro/prejuízo.
+        """
         if transaction['type'] == 'sell':
-            avg_cost = portfolio_manager.assets[base_asset]['average_cost']
-            profit_loss = (transaction['price'] - avg_cost) * transaction['quantity']
+            if average_cost is None:
+                average_cost = portfolio_manager.assets.get(base_asset, {}).get('average_cost')
+            profit_loss = (transaction['price'] - average_cost) * transaction['quantity'] if average_cost is not None else 0
             returned_to_cash = transaction['quantity'] * transaction['price']
             investment = 0  # Nenhum investimento em uma venda
         else:
@@ -102,37 +218,58 @@ class TransactionLogger:
         return profit_loss, investment, returned_to_cash
 
     def calculate_total_balance(self, portfolio_manager, market_prices):
-        """Calcula o saldo total da carteira com preços de mercado atualizados."""
-        total_balance = portfolio_manager.cash_balance + sum(
-            asset['quantity'] * market_prices.get(asset_name, asset['average_cost'])
-            for asset_name, asset in portfolio_manager.assets.items()
-        )
-        return total_balance
+        """Calcula o saldo total da carteira com preços de mercado atualizados (ativo -> preço).
+        Ativos sem preço de mercado são marcados pelo custo médio."""
+        return value_portfolio(portfolio_manager.cash_balance, portfolio_manager.assets, market_prices).nav
 
-    def flush_buffer_to_excel(self):
-        """Grava as transações do buffer no arquivo Excel."""
-        if not self.transaction_buffer:
+    def flush_buffer(self):
+        """Anexa os registros do buffer ao ledger CSV (sem reler ou reescrever o arquivo)."""
+        if not self.buffered:
             return  # Nada para gravar
 
         try:
-            # Carrega o arquivo e verifica se existe a aba onde vamos escrever
-            with pd.ExcelWriter(self.file_name, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
-                df = pd.DataFrame(self.transaction_buffer)
-                workbook = writer.book
-                if 'Sheet1' not in workbook.sheetnames:
-                    self.create_initial_file()
-
-                sheet = writer.sheets.get('Sheet1')
-                start_row = sheet.max_row if sheet else 1
-                df.to_excel(writer, index=False, header=False, startrow=start_row)
-
-            # Limpa o buffer após salvar
-            self.transaction_buffer.clear()
-            logger.info(f"{len(df)} transações registradas no Excel.")
+            with open(self.ledger_file, 'a', newline='') as file:
+                csv.writer(file).writerows(self.records[:self.buffered].tolist())
+
+            count = self.buffered
+            self.buffered = 0
+            self.ledger_version += 1
+            logger.info(f"{count} transações registradas no ledger.")
         except Exception as e:
-            logger.error(f"Erro ao gravar transações no Excel: {e}")
+            logger.error(f"Erro ao gravar transações no ledger: {e}")
+
+    def request_excel_export(self):
+        """Agenda a geração do Excel no executor da exportação; retorna o Future da exportação."""
+        self.flush_buffer()
+        if self.export_future is not None and not self.export_future.done():
+            return self.export_future  # Exportação em andamento
+        if self.export_executor is None:
+            self.export_future = Future()
+            try:
+                self.export_future.set_result(export_ledger_to_excel(self.ledger_file, self.file_name))
+            except Exception as e:
+                self.export_future.set_exception(e)
+        else:
+            self.export_future = self.export_executor.submit(export_ledger_to_excel, self.ledger_file, self.file_name)
+        self.exported_version = self.ledger_version
+        return self.export_future
+
+    async def run_excel_exporter(self, interval=300):
+        """Task de background que regenera o Excel periodicamente quando o ledger mudou."""
+        while True:
+            await asyncio.sleep(interval)
+            self.flush_buffer()
+            if self.ledger_version != self.exported_version:
+                try:
+                    rows = await asyncio.wrap_future(self.request_excel_export())
+                    logger.info(f"Excel '{self.file_name}' atualizado com {rows} transações.")
+                except Exception as e:
+                    logger.error(f"Erro ao exportar o ledger para Excel: {e}")
 
     def export_to_excel(self):
-        """Exporta qualquer transação restante no buffer para o Excel."""
-        self.flush_buffer_to_excel()
-        logger.info(f"Transações registradas em tempo real no arquivo '{self.file_name}'.")
+        """Grava o buffer restante e gera o Excel final (aguarda a exportação)."""
+        try:
+            rows = self.request_excel_export().result()
+            logger.info(f"Transações registradas em tempo real no arquivo '{self.file_name}' ({rows} linhas).")
+        except Exception as e:
+            logger.error(f"Erro ao exportar o ledger para Excel: {e}")
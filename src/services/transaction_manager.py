@@ -3,11 +3,12 @@ import os
 from datetime import datetime
 
 TRANSACTION_FILE = 'transaction_history.json'
+BLOCK_COUNTS_FILE = 'block_counts.json'
 
-def load_transactions():
+def load_transactions(path=TRANSACTION_FILE):
     """Carrega o histórico de transações ou cria uma estrutura vazia com transações iniciais se o arquivo não existir."""
-    if os.path.exists(TRANSACTION_FILE):
-        with open(TRANSACTION_FILE, 'r') as file:
+    if os.path.exists(path):
+        with open(path, 'r') as file:
             return json.load(file)
     else:
         # Estrutura inicial com uma transação de compra e uma de venda com preços zerados e data atual
@@ -15,20 +16,27 @@ def load_transactions():
             "buys": [{"price": 0.0, "time": datetime.now().timestamp()}],
             "sells": [{"price": 0.0, "time": datetime.now().timestamp()}]
         }
-        save_transactions(transactions)  # Cria o arquivo com a estrutura inicial
+        save_transactions(transactions, path)  # Cria o arquivo com a estrutura inicial
         return transactions
 
-def save_transactions(transactions):
+def save_transactions(transactions, path=TRANSACTION_FILE):
     """Salva as transações no arquivo JSON."""
-    with open(TRANSACTION_FILE, 'w') as file:
+    with open(path, 'w') as file:
         json.dump(transactions, file)
 
-def add_transaction(transactions, transaction_type, price):
+def add_transaction(transactions, transaction_type, price, path=TRANSACTION_FILE):
     """Adiciona uma nova transação, mantendo somente as 5 mais recentes do tipo especificado.
     Substitui a transação mais antiga se estiver com o preço zerado.
     """
     transaction_data = {"price": price, "time": datetime.now().timestamp()}
-    
+    append_transaction(transactions, transaction_type, transaction_data)
+
+    # Salva as transações
+    save_transactions(transactions, path)
+
+
+def append_transaction(transactions, transaction_type, transaction_data):
+    """Aplica a nova transação apenas em memória (mesmas regras de add_transaction, sem salvar)."""
     # Verifica se o primeiro item está com preço zerado
     if transactions[transaction_type] and transactions[transaction_type][0]['price'] == 0:
         # Substitui o primeiro item
@@ -40,9 +48,6 @@ def add_transaction(transactions, transaction_type, price):
         # Garante que mantém apenas as 5 transações mais recentes
         if len(transactions[transaction_type]) > 6:
             transactions[transaction_type].pop(0)
-    
-    # Salva as transações
-    save_transactions(transactions)
 
 
 def get_average_price(transactions, transaction_type):
@@ -64,7 +69,7 @@ def get_last_transaction_time(transactions, transaction_type):
 
 from datetime import datetime
 
-def clean_transactions_outside_market_average(transactions, MARKET_AVERAGE, THRESHOLD_FACTOR, recent_sell, recent_buy, price):
+def clean_transactions_outside_market_average(transactions, MARKET_AVERAGE, THRESHOLD_FACTOR, recent_sell, recent_buy, price, path=TRANSACTION_FILE):
     """
     Remove transações do histórico se a média de preços de compra ou venda estiver muito
     abaixo ou muito acima da média do mercado.
@@ -102,7 +107,7 @@ def clean_transactions_outside_market_average(transactions, MARKET_AVERAGE, THRE
         print("Histórico de vendas desatualizado. Transações de venda foram limpas.")
     
     # Salva o JSON atualizado após a limpeza
-    save_transactions(transactions)
+    save_transactions(transactions, path)
 
 
 
@@ -110,30 +115,61 @@ def clean_transactions_outside_market_average(transactions, MARKET_AVERAGE, THRE
 
 
 
-def load_block_counts():
+def load_block_counts(path=BLOCK_COUNTS_FILE):
     """Carrega as contagens de bloqueios consecutivos de compra e venda a partir do arquivo JSON.
     Cria o arquivo com valores iniciais se ele não existir.
     """
-    if not os.path.exists("block_counts.json"):
+    if not os.path.exists(path):
         # Valores iniciais para os blocos de contagem
         counts = {"consecutive_sell_blocks": 0, "consecutive_buy_blocks": 0}
         
         # Cria o arquivo com os valores iniciais
-        with open("block_counts.json", "w") as file:
+        with open(path, "w") as file:
             json.dump(counts, file)
             
         return 0, 0
     
     # Carrega os valores existentes do arquivo
-    with open("block_counts.json", "r") as file:
+    with open(path, "r") as file:
         counts = json.load(file)
         return counts.get("consecutive_sell_blocks", 0), counts.get("consecutive_buy_blocks", 0)
 
-def save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks):
+def save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks, path=BLOCK_COUNTS_FILE):
     """Salva as contagens de bloqueios consecutivos de compra e venda no arquivo JSON."""
-    with open("block_counts.json", "w") as file:
-        json.dump({
-            "consecutive_sell_blocks": consecutive_sell_blocks,
-            "consecutive_buy_blocks": consecutive_buy_blocks
-        }, file)
+    write_json_atomic(path, {
+        "consecutive_sell_blocks": consecutive_sell_blocks,
+        "consecutive_buy_blocks": consecutive_buy_blocks
+    })
+
+
+def write_json_atomic(path, data):
+    """Grava o JSON em arquivo temporário, faz fsync e substitui o destino atomicamente.
+    Uma queda durante a escrita nunca deixa o arquivo de destino pela metade.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
 
+def apply_state_delta(delta, transactions, transaction_file=TRANSACTION_FILE, block_counts_file=BLOCK_COUNTS_FILE, block_counters=None):
+    """Aplica (persistindo em disco) as alterações de estado devolvidas pela estratégia pura.
+    Com 'block_counters' (BlockCounters), os contadores são atualizados em memória e gravados em write-behind.
+    """
+    for transaction_type in delta.reset_sides:
+        transactions[transaction_type] = [{"price": 0.0, "time": delta.time}]
+        print(f"Histórico de {transaction_type} desatualizado ou fora da média do mercado. Transações foram limpas.")
+
+    if delta.record is not None:
+        transaction_type, price = delta.record
+        add_transaction(transactions, transaction_type, price, transaction_file)  # Também salva as limpezas acima
+    elif delta.reset_sides:
+        save_transactions(transactions, transaction_file)
+
+    if delta.block_counts is not None:
+        if block_counters is not None:
+            block_counters.set(*delta.block_counts)
+        else:
+            save_block_counts(*delta.block_counts, path=block_counts_file)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+QUOTE_ASSET = 'USDT'
+
+
+@dataclass(frozen=True)
+class PortfolioValuation:
+    """Valor de mercado do portfólio em um instante (arrays alinhados por ativo)."""
+    cash: float
+    nav: float  # caixa + valor de mercado das posições
+    positions_value: float
+    cost_basis: float
+    unrealized_pnl: float
+    exposure: float  # fração do NAV alocada em posições
+    assets: tuple
+    quantities: np.ndarray
+    prices: np.ndarray  # preço usado na marcação (custo médio quando não há preço de mercado)
+    values: np.ndarray
+    unrealized: np.ndarray
+    missing_prices: tuple  # ativos marcados pelo custo por falta de preço
+
+    def to_dict(self):
+        return {
+            'cash': self.cash,
+            'nav': self.nav,
+            'positions_value': self.positions_value,
+            'cost_basis': self.cost_basis,
+            'unrealized_pnl': self.unrealized_pnl,
+            'exposure': self.exposure,
+            'positions': {
+                asset: {'quantity': float(quantity), 'price': float(price), 'value': float(value), 'unrealized_pnl': float(pnl)}
+                for asset, quantity, price, value, pnl in zip(self.assets, self.quantities, self.prices, self.values, self.unrealized)
+            },
+            'missing_prices': list(self.missing_prices)
+        }
+
+
+def value_portfolio(cash_balance, assets, asset_prices):
+    """
+    Marca todas as posições a mercado de uma vez (numpy). 'assets' é o dicionário do PortfolioManager
+    (ativo -> {'quantity', 'average_cost'}) e 'asset_prices' mapeia ativo -> preço na moeda de cotação.
+    """
+    names = tuple(assets)
+    count = len(names)
+    quantities = np.fromiter((assets[name]['quantity'] for name in names), dtype=float, count=count)
+    costs = np.fromiter((assets[name]['average_cost'] for name in names), dtype=float, count=count)
+    market = np.fromiter((asset_prices.get(name, np.nan) for name in names), dtype=float, count=count)
+
+    missing = np.isnan(market)
+    prices = np.where(missing, costs, market)
+    values = quantities * prices
+    cost_values = quantities * costs
+    unrealized = np.where(missing, 0.0, values - cost_values)
+
+    positions_value = float(values.sum())
+    nav = float(cash_balance) + positions_value
+    return PortfolioValuation(
+        cash=float(cash_balance),
+        nav=nav,
+        positions_value=positions_value,
+        cost_basis=float(cost_values.sum()),
+        unrealized_pnl=float(unrealized.sum()),
+        exposure=positions_value / nav if nav else 0.0,
+        assets=names,
+        quantities=quantities,
+        prices=prices,
+        values=values,
+        unrealized=unrealized,
+        missing_prices=tuple(name for name, is_missing in zip(names, missing) if is_missing)
+    )
+
+
+class ValuationService:
+    """
+    Avalia o portfólio a mercado usando o cache de preços em lote do MarketDataHub (uma única chamada
+    de ticker para todos os símbolos), sem requisições adicionais por ativo.
+    """
+
+    def __init__(self, portfolio_manager, market_data, quote_asset=QUOTE_ASSET):
+        self.portfolio_manager = portfolio_manager
+        self.market_data = market_data
+        self.quote_asset = quote_asset
+        self.latest = None
+
+    def asset_prices(self):
+        """Preço atual de cada ativo do portfólio (ativo -> preço), a partir do cache por símbolo."""
+        prices = self.market_data.prices
+        result = {self.quote_asset: 1.0}
+        for asset in self.portfolio_manager.assets:
+            price = prices.get(f"{asset}{self.quote_asset}")
+            if price is not None:
+                result[asset] = price
+        return result
+
+    def value(self):
+        """Calcula (e guarda em 'latest') a avaliação atual do portfólio e atualiza as métricas de risco."""
+        self.latest = value_portfolio(self.portfolio_manager.cash_balance, self.portfolio_manager.assets, self.asset_prices())
+        self.portfolio_manager.mark_to_market(self.latest)
+        return self.latest
+
+    async def refresh(self):
+        """Atualiza os preços em lote (se o cache expirou) e reavalia o portfólio."""
+        await self.market_data.refresh_prices()
+        return self.value()
+
+    def summary(self):
+        return (self.latest or self.value()).to_dict()
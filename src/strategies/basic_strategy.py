@@ -1,12 +1,18 @@
 import json
 import os
-from services.binance_client import get_consecutive_trades, get_recent_prices
+from services.order_history import OrderHistoryCache
+from strategies.risk_context import build_risk_context, determine_market_trend
 from strategies.risk_manager import RiskManager
-from services.transaction_manager import clean_transactions_outside_market_average, get_last_transaction_time, load_transactions, save_block_counts, save_transactions, add_transaction, get_average_price, get_last_transaction, load_block_counts
+from strategies.small_portfolio import decide_small_portfolio
+from strategies.snapshot import Indicators, MarketState, SideMemory, StrategySnapshot, TradeMemory
+from services.block_counters import BlockCounters
+from services.fixed_point import Fixed
+from services.trade_history import TradeHistory
+from services.transaction_manager import add_transaction, apply_state_delta, get_last_transaction_time, load_transactions, get_average_price, get_last_transaction, load_block_counts
 import pandas as pd
 import pandas_ta as ta
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,6 +26,12 @@ transactions = load_transactions()
 last_buy = get_last_transaction(transactions, 'buys')
 last_sell = get_last_transaction(transactions, 'sells')
 
+# Contadores de bloqueio do estado global (dono único, compartilhado com o RiskManager)
+block_counters = BlockCounters()
+
+# Resumo do histórico de ordens da corretora (uma consulta em cache por símbolo)
+order_history_cache = OrderHistoryCache()
+
 
 
 def calculate_indicators(df, short_ma_period=10, long_ma_period=150, rsi_period=12, volume_threshold=1.1):
@@ -51,9 +63,24 @@ def calculate_indicators(df, short_ma_period=10, long_ma_period=150, rsi_period=
 
     return short_ma, long_ma, rsi, volume_filter, ema_20, ema_50
 
+def _optional(value, cast):
+    return None if value is None or pd.isna(value) else cast(value)
+
+def compute_indicators(df):
+    """
+    Indicadores e tendência do tick a partir dos candles ('close' e 'volume' bastam). Função pura e de
+    CPU: roda no pool de processos, recebendo uma cópia dos candles, e retorna tipos nativos (leves de
+    serializar).
+    """
+    short_ma, long_ma, rsi, volume_filter, _, _ = calculate_indicators(df)
+    return Indicators(
+        short_ma=_optional(short_ma, float), long_ma=_optional(long_ma, float), rsi=_optional(rsi, float),
+        volume_filter=_optional(volume_filter, bool), market_trend=determine_market_trend(df)
+    )
+
 def format_quantity(quantity):
     """Formata a quantidade para 8 casas decimais, sem notação científica."""
-    return "{:.8f}".format(quantity)
+    return str(Fixed.from_float(quantity, 8))
 
 def log_transaction_details(transaction_type, asset, quantity, price, profit=None):
     if profit is not None:
@@ -65,201 +92,61 @@ def calculate_profit(last_price, current_price):
     return (current_price - last_price) / last_price
 
 
-def small_portfolio_strategy(asset, price, portfolio_manager, df, max_consecutive_sells=5, max_consecutive_buys=5):
-    global last_buy, last_sell
-    consecutive_sell_blocks, consecutive_buy_blocks = load_block_counts()
-    print(f"consecutive_sell_blocks = {consecutive_sell_blocks}")
-    print(f"consecutive_buy_blocks = {consecutive_buy_blocks}")
-
-    risk_manager = RiskManager(portfolio_manager)
-    cash_balance = float(portfolio_manager.get_cash_balance())
-    asset_quantity = float(portfolio_manager.get_balance(asset.replace('USDT', '')))
-    price = float(price)
-
-    market_trend = risk_manager.determine_market_trend(df)
-    max_consecutive_trades = risk_manager.adapt_max_consecutive_trades(market_trend)
-
-    consecutive_sells = get_consecutive_trades(asset, 'sell')
-    consecutive_buys = get_consecutive_trades(asset, 'buy')
-
-    MIN_PROFIT_PERCENTAGE = 0.0015  # 0,15% de lucro
-    STOP_LOSS_PERCENTAGE = 0.0018  # 0,18% de perda
-    THRESHOLD_FACTOR = 0.985
-
-    # Limite de tempo para vendas recentes
-    max_time_diff = timedelta(hours=4)
-    # Obtém o horário da última venda
-    last_sell_time = get_last_transaction_time(transactions, 'sells')
-    
-    recent_sell = False
-    if last_sell_time:
-        last_sell_time = datetime.fromtimestamp(int(last_sell_time))
-        recent_sell = (datetime.now() - last_sell_time) <= max_time_diff
-
-    # Verifica o horário da última compra
-    last_buy_time = get_last_transaction_time(transactions, 'buys')
-
-    recent_buy = False
-    if last_buy_time:
-        last_buy_time = datetime.fromtimestamp(int(last_buy_time))
-        recent_buy = (datetime.now() - last_buy_time) <= max_time_diff
-
-    print(f"recent_sell={recent_sell}, recent_buy={recent_buy}")
-
-    # Obter os indicadores e verificar a validade
-    short_ma, long_ma, rsi, volume_filter, _, _ = calculate_indicators(df)
-    clean_transactions_outside_market_average(transactions, short_ma, THRESHOLD_FACTOR, recent_sell, recent_buy, price)
-
-    # Calcular médias curtas de compra e venda
-    average_buy_price = get_average_price(transactions, "buys")
-    average_sell_price = get_average_price(transactions, "sells")
-
-    # Inicializando target_sell_price e target_buy_price
-    target_sell_price = 0
-    target_buy_price = 0
-
-
+def _side_memory(transactions, transaction_type):
+    """Resume as últimas transações de um lado no formato esperado pela estratégia pura.
+    Aceita o dicionário do transaction_history.json ou um TradeHistory (médias já mantidas em O(1)).
+    """
+    if isinstance(transactions, TradeHistory):
+        side = transactions.side(transaction_type)
+        return SideMemory(average_price=side.memory_average or 0.0, last_price=side.last_price, last_time=side.last_time)
+    return SideMemory(
+        average_price=get_average_price(transactions, transaction_type) or 0.0,
+        last_price=get_last_transaction(transactions, transaction_type),
+        last_time=get_last_transaction_time(transactions, transaction_type)
+    )
+
+
+def build_strategy_snapshot(asset, price, portfolio_manager, df, transactions, last_buy=0.0, last_sell=0.0, now=None, block_counts=None, order_history=None,
+                            indicators=None):
+    """
+    Coleta todo o estado necessário para a decisão (indicadores, portfólio, memória de transações,
+    contadores de bloqueio e dados da corretora). Toda a I/O da estratégia acontece aqui: os dados de
+    risco são montados uma vez no RiskContext, a partir do histórico de ordens em cache. Com
+    'indicators' (compute_indicators já executado no pool de processos) nenhum cálculo sobre os
+    candles é refeito aqui.
+    """
+    now = datetime.now().timestamp() if now is None else now
+    order_history = order_history_cache if order_history is None else order_history
+    block_counts = load_block_counts() if block_counts is None else block_counts
+    indicators = compute_indicators(df) if indicators is None else indicators
+
+    context = build_risk_context(asset, portfolio_manager, df, order_history.get(asset), block_counts, now=now,
+                                 market_trend=indicators.market_trend)
+
+    return StrategySnapshot(
+        market=MarketState(
+            asset=asset, price=float(price), time=now, short_ma=indicators.short_ma, long_ma=indicators.long_ma,
+            rsi=indicators.rsi, volume_filter=indicators.volume_filter, market_trend=context.market_trend
+        ),
+        portfolio=context.portfolio,
+        memory=TradeMemory(
+            buys=_side_memory(transactions, 'buys'),
+            sells=_side_memory(transactions, 'sells'),
+            last_buy=last_buy,
+            last_sell=last_sell
+        ),
+        risk=context.risk
+    )
 
-    # Lógica para determinar se a condição de broke cold está atendida
-    if ((not recent_sell or (last_buy == 0 and last_sell == 0)) and average_buy_price < price) or consecutive_buy_blocks >= 100 and last_sell <= 0 :
-        sell_broke_cold = True
-        buy_broke_cold = False
-        target_sell_price = 0
-        logger.info("Condição sell_broke_cold atendida: average_buy_price é menor que o preço atual. target_sell_price e target_buy_price definidos como 0.")
-    elif ((not recent_buy or (last_buy == 0 and last_sell == 0))  and average_sell_price > price) or consecutive_sell_blocks >= 100 and last_buy <= 0:
-        buy_broke_cold = True
-        sell_broke_cold = False
-        target_buy_price = 0
-        logger.info("Condição buy_broke_cold atendida: average_sell_price é maior que o preço atual. target_sell_price e target_buy_price definidos como 0.")
-    else:
-        # Condições para cálculo de target_sell_price
-        sell_broke_cold = False
-        buy_broke_cold = False
-        logger.info("Nenhuma condição 'broke cold' atendida. Calculando target_sell_price e target_buy_price.")
-
-        # Definindo target_sell_price
-        if average_buy_price > 0 and last_buy > 0:
-            target_sell_price = average_buy_price * (1 + MIN_PROFIT_PERCENTAGE)
-            logger.info(f"target_sell_price calculado com average_buy_price: {target_sell_price}")
-        elif last_buy > 0:
-            target_sell_price = last_buy * (1 + MIN_PROFIT_PERCENTAGE)
-            logger.info(f"target_sell_price calculado com last_buy: {target_sell_price}")
-        else:
-            target_sell_price = 0
-            logger.info("target_sell_price definido como 0, pois não há dados de compra suficientes.")
-
-        # Definindo target_buy_price
-        if average_sell_price > 0 and last_sell > 0:
-            target_buy_price = average_sell_price * (1 - 2 * STOP_LOSS_PERCENTAGE)
-            logger.info(f"target_buy_price calculado com average_sell_price: {target_buy_price}")
-        elif last_sell > 0:
-            target_buy_price = last_sell * (1 - 2 * STOP_LOSS_PERCENTAGE)
-            logger.info(f"target_buy_price calculado com last_sell: {target_buy_price}")
-        else:
-            target_buy_price = 0
-            logger.info("target_buy_price definido como 0, pois não há dados de venda suficientes.")
-
-    # Logs para verificar as condições finais de broke cold
-    logger.info(f"Condições finais - buy_broke_cold: {buy_broke_cold}, sell_broke_cold: {sell_broke_cold}")
-    logger.info(f"target_buy_price: {target_buy_price}, target_sell_price: {target_sell_price}")
-
-    # Integração com get_recent_prices para obter média de curto prazo caso não haja histórico suficiente
-    if (average_buy_price <= 0 or last_buy <= 0 or not last_buy_time) and not buy_broke_cold:
-        logger.info("Nenhum registro recente de compra disponível no JSON. Usando média de preços recentes para average_buy_price.")
-        average_buy_price = get_recent_prices(asset)
-
-    if (average_sell_price <= 0 or last_sell <= 0 or not last_sell_time) and not sell_broke_cold:
-        logger.info("Nenhum registro recente de venda disponível no JSON. Usando média de preços recentes para average_sell_price.")
-        average_sell_price = get_recent_prices(asset)
-
-
-
-    logger.info("Estratégia Small Portfolio ativada.")
-    logger.info(f"Condições de compra: target_buy_price={target_buy_price}, recent_sell={recent_sell}, consecutive_buys={consecutive_buys}")
-
-    
-    logger.info(f"Indicadores: short_ma={short_ma}, long_ma={long_ma}, rsi={rsi}, volume_filter={volume_filter}")
-
-    if None in (short_ma, long_ma, rsi, volume_filter):
-        logger.warning("Indicadores insuficientes para tomar decisão de compra/venda.")
-        return {
-            'asset': asset,
-            'quantity': 0,
-            'price': price,
-            'type': 'hold',
-            'reason': "Hold - Dados insuficientes para indicadores"
-        }
 
-    # Condições de compra aprimoradas
-    if consecutive_buys < max_consecutive_trades or consecutive_sell_blocks >= 100:
-        if (short_ma < long_ma * 0.995) or rsi < 50 or (recent_sell and price <= target_buy_price) or buy_broke_cold and not sell_broke_cold:
-            quantity_to_buy = min((cash_balance * portfolio_manager.get_investment_percentage()) / price, 
-                                  portfolio_manager.get_investment_percentage() * asset_quantity)
-            quantity_to_buy = format_quantity(max(quantity_to_buy, min_asset_quantity))
-
-            logger.info(f"Valores de compra: quantity_to_buy={quantity_to_buy}, price={price}, cash_balance={cash_balance}")
-            if float(quantity_to_buy) >= min_asset_quantity and risk_manager.can_trade(asset, 'buy', float(quantity_to_buy), price, df):
-                add_transaction(transactions, "buys", price)
-                consecutive_buy_blocks = 0
-                consecutive_sell_blocks = 0
-                save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-
-                logger.info("Condições de compra atendidas. Executando compra.")
-                log_transaction_details("compra", asset, quantity_to_buy, price)
-                return {
-                    'asset': asset,
-                    'quantity': float(quantity_to_buy),
-                    'price': price,
-                    'type': 'buy',
-                    'reason': "Compra em oportunidade de curto prazo com base em indicadores e limite de compras consecutivas"
-                }
-        else:
-            logger.info("Condições de compra não atendidas. Valores atuais: "
-                        f"short_ma={short_ma}, long_ma={long_ma}, rsi={rsi}, price={price}, target_buy_price={target_buy_price}")
-    else:
-        consecutive_buy_blocks += 1
-        consecutive_sell_blocks = 0
-        save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-        logger.info(f"Condição de vompra não atingida: Limite de quantidade de compras")
-
-    # Condições de venda
-    if consecutive_sells < max_consecutive_trades or consecutive_buy_blocks >= 100:
-        if price >= target_sell_price or not buy_broke_cold and sell_broke_cold:
-            quantity_to_sell = min(asset_quantity * portfolio_manager.get_investment_percentage(), asset_quantity - min_asset_quantity)
-            quantity_to_sell = format_quantity(max(quantity_to_sell, min_asset_quantity))
-
-            logger.info(f"Valores de venda: quantity_to_sell={quantity_to_sell}, price={price}, asset_quantity={asset_quantity}")
-            if float(quantity_to_sell) >= min_asset_quantity and risk_manager.can_trade(asset, 'sell', float(quantity_to_sell), price, df):
-                profit = calculate_profit(last_buy, price) if last_buy else 0
-                add_transaction(transactions, "sells", price)
-                consecutive_buy_blocks = 0
-                consecutive_sell_blocks = 0
-                save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-                logger.info(f"Venda realizada com lucro de {profit*100:.2f}%.")
-                log_transaction_details("venda", asset, quantity_to_sell, price, profit)
-                return {
-                    'asset': asset,
-                    'quantity': float(quantity_to_sell),
-                    'price': price,
-                    'type': 'sell',
-                    'reason': "Venda para lucro a curto prazo em carteira pequena com limite de vendas consecutivas"
-                }
-        else:
-            logger.info(f"Condição de venda não atingida: preço atual ({price}) >= preço-alvo ({target_sell_price}).")
-    else:
-        consecutive_sell_blocks += 1
-        consecutive_buy_blocks = 0
-        save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-        logger.info(f"Condição de venda não atingida: Limite de quantidade de vendas")
-
-    logger.info("Nenhuma transação realizada para carteira pequena.")
-    return {
-        'asset': asset,
-        'quantity': 0,
-        'price': price,
-        'type': 'hold',
-        'reason': "Hold - Estratégia de acúmulo em carteira pequena"
-    }
+def small_portfolio_strategy(asset, price, portfolio_manager, df, max_consecutive_sells=5, max_consecutive_buys=5):
+    """Executa a estratégia Small Portfolio sobre o estado global do módulo (coleta, decide e persiste)."""
+    snapshot = build_strategy_snapshot(asset, price, portfolio_manager, df, transactions, last_buy=last_buy,
+                                       last_sell=last_sell, block_counts=block_counters.get())
+    decision, delta = decide_small_portfolio(snapshot)
+    apply_state_delta(delta, transactions, block_counters=block_counters)
+    block_counters.flush()
+    return decision
 
 
 def mature_portfolio_strategy(asset, price, portfolio_manager, df, indicators):
@@ -267,7 +154,8 @@ def mature_portfolio_strategy(asset, price, portfolio_manager, df, indicators):
     logger.info("Estratégia Mature Portfolio - Sistema de Pontuação Ajustado.")
     
     # Instanciando o Gerenciador de Risco
-    risk_manager = RiskManager(portfolio_manager)
+    risk_manager = RiskManager(portfolio_manager, block_counters=block_counters, order_history=order_history_cache)
+    risk_context = risk_manager.build_context(asset, df)
 
     # Condições adicionais baseadas nas médias curtas
     average_buy_price = get_average_price(transactions, "buys")
@@ -336,7 +224,7 @@ def mature_portfolio_strategy(asset, price, portfolio_manager, df, indicators):
     quantity_to_sell = format_quantity(min(asset_quantity * portfolio_manager.get_investment_percentage(), asset_quantity - min_asset_quantity))
 
     # Decisão de compra
-    if buy_score >= buy_threshold and cash_balance >= price * float(quantity_to_buy) and risk_manager.can_trade(asset, 'buy', float(quantity_to_buy), price, df):
+    if buy_score >= buy_threshold and cash_balance >= price * float(quantity_to_buy) and risk_manager.check(risk_context, 'buy', float(quantity_to_buy), price):
         last_buy = price
         logger.info(f"Compra com pontuação de {buy_score}/{buy_threshold}")
         add_transaction(transactions, "buys", price)
@@ -350,7 +238,7 @@ def mature_portfolio_strategy(asset, price, portfolio_manager, df, indicators):
         }
 
     # Decisão de venda
-    if sell_score >= sell_threshold and asset_quantity >= min_asset_quantity and risk_manager.can_trade(asset, 'sell', float(quantity_to_sell), price, df):
+    if sell_score >= sell_threshold and asset_quantity >= min_asset_quantity and risk_manager.check(risk_context, 'sell', float(quantity_to_sell), price):
         profit = calculate_profit(last_buy, price) if last_buy else 0
         last_sell = price
         logger.info(f"Venda com pontuação de {sell_score}/{sell_threshold}. Lucro: {profit*100:.2f}%")
@@ -0,0 +1,154 @@
+import logging
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from strategies.risk_rules import max_consecutive_for_trend
+from strategies.snapshot import PortfolioState, RiskContext, RiskState
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+RECENT_LIMIT = 10  # Ordens mais recentes usadas na média em tendência de baixa
+
+
+@dataclass(frozen=True)
+class OrderStats:
+    """Resumo do histórico de ordens executadas de um símbolo, calculado a partir de uma única consulta."""
+    consecutive_buys: int = 0
+    consecutive_sells: int = 0
+    average_buy_price: float = 0.0
+    average_sell_price: float = 0.0
+    recent_average_buy_price: float = 0.0  # média das últimas RECENT_LIMIT compras
+    recent_average_sell_price: float = 0.0  # média das últimas RECENT_LIMIT vendas
+    fetched_at: float = 0.0
+
+    def average_price(self, transaction_type, recent_only=True):
+        if transaction_type == 'buy':
+            return self.recent_average_buy_price if recent_only else self.average_buy_price
+        return self.recent_average_sell_price if recent_only else self.average_sell_price
+
+
+def _average(prices):
+    return sum(prices) / len(prices) if prices else 0.0
+
+
+def summarize_orders(orders, recent_limit=RECENT_LIMIT, fetched_at=None):
+    """
+    Calcula, em uma passada sobre a resposta de get_all_orders, as transações consecutivas do último
+    lado executado e os preços médios (todos e recentes) de compras e vendas. Considera apenas
+    ordens 'FILLED', como get_consecutive_trades e calculate_average_price.
+    """
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    if not isinstance(orders, list):
+        logger.error(f"Histórico de ordens não é do tipo lista: {type(orders)}")
+        return OrderStats(fetched_at=fetched_at)
+
+    prices = {'buy': [], 'sell': []}
+    last_side = None
+    consecutive = 0
+    for order in orders:
+        if not isinstance(order, dict) or order.get('status') != 'FILLED':
+            continue
+        side = order.get('side', '').lower()
+        if side not in prices:
+            continue
+        consecutive = consecutive + 1 if side == last_side else 1
+        last_side = side
+        if 'price' in order:
+            prices[side].append(float(order['price']))
+
+    return OrderStats(
+        consecutive_buys=consecutive if last_side == 'buy' else 0,
+        consecutive_sells=consecutive if last_side == 'sell' else 0,
+        average_buy_price=_average(prices['buy']),
+        average_sell_price=_average(prices['sell']),
+        recent_average_buy_price=_average(prices['buy'][-recent_limit:]),
+        recent_average_sell_price=_average(prices['sell'][-recent_limit:]),
+        fetched_at=fetched_at
+    )
+
+
+def determine_market_trend(df):
+    """Tendência do mercado ('bullish', 'bearish' ou 'neutral') pelas médias móveis de 10 e 50 candles."""
+    try:
+        if not isinstance(df, pd.DataFrame):
+            logger.error(f"O objeto 'df' não é um DataFrame. Tipo recebido: {type(df)}. Valor: {df}")
+            return 'neutral'
+
+        if 'close' not in df.columns:
+            logger.error(f"Coluna 'close' ausente no DataFrame. Colunas disponíveis: {df.columns}")
+            return 'neutral'
+
+        # Verifica se o DataFrame tem dados suficientes para calcular as médias móveis
+        if len(df) < 50:
+            logger.warning("Dados insuficientes no DataFrame para calcular médias móveis. Retornando tendência 'neutral'.")
+            return 'neutral'
+
+        # Médias móveis apenas da janela necessária (último valor de cada média)
+        close = df['close'].to_numpy(dtype=float)
+        short_ma = close[-10:].mean()
+        long_ma = close[-50:].mean()
+        long_term_ma = close[-200:].mean() if len(close) >= 200 else None
+
+        if pd.isna(short_ma) or pd.isna(long_ma):
+            logger.error("As médias móveis calculadas contêm valores NaN. Verifique o DataFrame.")
+            return 'neutral'
+
+        # Identifica a tendência baseada em médias móveis
+        if short_ma > long_ma:
+            if long_term_ma and short_ma > long_term_ma:
+                logger.debug(f"Tendência de longo prazo bullish confirmada (short_ma={short_ma:.2f}, long_term_ma={long_term_ma:.2f})")
+            logger.debug(f"Tendência do mercado: bullish (short_ma={short_ma:.2f}, long_ma={long_ma:.2f})")
+            return 'bullish'
+        elif short_ma < long_ma:
+            if long_term_ma and short_ma < long_term_ma:
+                logger.debug(f"Tendência de longo prazo bearish confirmada (short_ma={short_ma:.2f}, long_term_ma={long_term_ma:.2f})")
+            logger.debug(f"Tendência do mercado: bearish (short_ma={short_ma:.2f}, long_ma={long_ma:.2f})")
+            return 'bearish'
+        else:
+            logger.debug("Tendência do mercado: neutral")
+            return 'neutral'
+    except Exception as e:
+        logger.error(f"Erro ao determinar tendência de mercado: {e}")
+        return 'neutral'
+
+
+def build_risk_context(asset, portfolio_manager, df, order_stats, block_counts=(0, 0), now=None, quote_asset='USDT', market_trend=None):
+    """
+    Monta o RiskContext do tick: uma leitura do portfólio, uma tendência, um status de stop e as
+    estatísticas de ordens já em cache. Nenhuma verificação posterior de ordem acessa rede ou arquivos.
+    A tendência já calculada fora do event loop pode ser informada em 'market_trend'.
+    """
+    now = time.time() if now is None else now
+    market_trend = determine_market_trend(df) if market_trend is None else market_trend
+    recent_only = market_trend == 'bearish'
+    risk_snapshot = portfolio_manager.risk_snapshot
+    consecutive_sell_blocks, consecutive_buy_blocks = block_counts
+
+    return RiskContext(
+        asset=asset,
+        time=now,
+        market_trend=market_trend,
+        max_consecutive_trades=max_consecutive_for_trend(market_trend),
+        portfolio=PortfolioState(
+            cash_balance=float(portfolio_manager.get_cash_balance()),
+            asset_quantity=float(portfolio_manager.get_balance(asset.replace(quote_asset, ''))),
+            investment_percentage=portfolio_manager.get_investment_percentage(),
+            reserve_cash=portfolio_manager.reserve_cash,
+            stop_status=portfolio_manager.check_stop_loss_take_profit(),
+            previous_close_price=portfolio_manager.get_previous_close_price(asset),
+            drawdown=risk_snapshot.drawdown,
+            volatility=risk_snapshot.volatility
+        ),
+        risk=RiskState(
+            consecutive_buys=order_stats.consecutive_buys,
+            consecutive_sells=order_stats.consecutive_sells,
+            average_buy_price=order_stats.average_price('buy', recent_only),
+            average_sell_price=order_stats.average_price('sell', recent_only),
+            consecutive_sell_blocks=consecutive_sell_blocks,
+            consecutive_buy_blocks=consecutive_buy_blocks
+        )
+    )
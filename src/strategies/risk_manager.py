@@ -1,199 +1,81 @@
-from services.binance_client import get_consecutive_trades, client
-from services.portfolio_manager import PortfolioManager
-import pandas as pd
+from services.order_history import OrderHistoryCache
 import logging
 
 from services.transaction_manager import load_block_counts, save_block_counts
+from strategies.risk_context import build_risk_context, determine_market_trend
+from strategies.risk_rules import check_order, evaluate_orders, max_consecutive_for_trend
 
 # Configuração do logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger()
 
 class RiskManager:
-    def __init__(self, portfolio_manager, min_quantity=0.0001, max_consecutive_trades=5, max_price_increase=0.05, max_price_drop=0.05):
+    def __init__(self, portfolio_manager, min_quantity=0.0001, max_consecutive_trades=5, max_price_increase=0.05, max_price_drop=0.05, block_counters=None, order_history=None):
         self.portfolio_manager = portfolio_manager
+        self.block_counters = block_counters  # BlockCounters opcional; sem ele os contadores vêm do arquivo
+        self.order_history = order_history or OrderHistoryCache()  # Uma consulta get_all_orders em cache por símbolo
         self.min_quantity = min_quantity
         self.max_consecutive_trades = max_consecutive_trades
         self.max_price_increase = max_price_increase
         self.max_price_drop = max_price_drop
 
-    def calculate_average_price(self, symbol, transaction_type, recent_only=True, recent_limit=10):
-        try:
-            orders = client.get_all_orders(symbol=symbol, limit=100)
-            relevant_orders = [
-                order for order in orders 
-                if isinstance(order, dict) and order.get('status') == 'FILLED' and order.get('side', '').lower() == transaction_type
-            ]
-
-            if recent_only and len(relevant_orders) > recent_limit:
-                relevant_orders = relevant_orders[-recent_limit:]
-
-            if relevant_orders:
-                prices = [float(order['price']) for order in relevant_orders if 'price' in order]
-                if not prices:
-                    logger.warning("Nenhuma ordem relevante contém 'price'.")
-                    return 0
-                average_price = sum(prices) / len(prices)
-                logger.debug(f"Preço médio calculado para {transaction_type} de {symbol}: {average_price:.2f}")
-                return average_price
-            else:
-                logger.debug(f"Nenhuma ordem relevante encontrada para {transaction_type} de {symbol}.")
-                return 0
-        except Exception as e:
-            logger.error(f"Erro ao calcular preço médio: {e}")
-            return 0
-
-
-    def calculate_average_price(self, symbol, transaction_type, recent_only=True, recent_limit=10):
-        try:
-            orders = client.get_all_orders(symbol=symbol, limit=100)
-            relevant_orders = [
-                order for order in orders 
-                if isinstance(order, dict) and order.get('status') == 'FILLED' and order.get('side', '').lower() == transaction_type
-            ]
-
-            if recent_only and len(relevant_orders) > recent_limit:
-                relevant_orders = relevant_orders[-recent_limit:]
-
-            if relevant_orders:
-                prices = [float(order['price']) for order in relevant_orders if 'price' in order]
-                if not prices:
-                    logger.warning("Nenhuma ordem relevante contém 'price'.")
-                    return 0
-                average_price = sum(prices) / len(prices)
-                logger.debug(f"Preço médio calculado para {transaction_type} de {symbol}: {average_price:.2f}")
-                return average_price
-            else:
-                logger.debug(f"Nenhuma ordem relevante encontrada para {transaction_type} de {symbol}.")
-                return 0
-        except Exception as e:
-            logger.error(f"Erro ao calcular preço médio: {e}")
-            return 0
+    def calculate_average_price(self, symbol, transaction_type, recent_only=True):
+        average_price = self.order_history.get(symbol).average_price(transaction_type, recent_only)
+        logger.debug(f"Preço médio calculado para {transaction_type} de {symbol}: {average_price:.2f}")
+        return average_price
 
     def determine_market_trend(self, df):
-        try:
-            if not isinstance(df, pd.DataFrame):
-                logger.error(f"O objeto 'df' não é um DataFrame. Tipo recebido: {type(df)}. Valor: {df}")
-                return 'neutral'
-
-            if 'close' not in df.columns:
-                logger.error(f"Coluna 'close' ausente no DataFrame. Colunas disponíveis: {df.columns}")
-                return 'neutral'
-
-            # Verifica se o DataFrame tem dados suficientes para calcular as médias móveis
-            if len(df) < 50:
-                logger.warning("Dados insuficientes no DataFrame para calcular médias móveis. Retornando tendência 'neutral'.")
-                return 'neutral'
-
-            # Calcula médias móveis
-            short_ma = df['close'].rolling(window=10).mean().iloc[-1]
-            long_ma = df['close'].rolling(window=50).mean().iloc[-1]
-            long_term_ma = df['close'].rolling(window=200).mean().iloc[-1] if len(df) >= 200 else None
-
-            if pd.isna(short_ma) or pd.isna(long_ma):
-                logger.error("As médias móveis calculadas contêm valores NaN. Verifique o DataFrame.")
-                return 'neutral'
-
-            # Identifica a tendência baseada em médias móveis
-            if short_ma > long_ma:
-                if long_term_ma and short_ma > long_term_ma:
-                    logger.debug(f"Tendência de longo prazo bullish confirmada (short_ma={short_ma:.2f}, long_term_ma={long_term_ma:.2f})")
-                logger.debug(f"Tendência do mercado: bullish (short_ma={short_ma:.2f}, long_ma={long_ma:.2f})")
-                return 'bullish'
-            elif short_ma < long_ma:
-                if long_term_ma and short_ma < long_term_ma:
-                    logger.debug(f"Tendência de longo prazo bearish confirmada (short_ma={short_ma:.2f}, long_term_ma={long_term_ma:.2f})")
-                logger.debug(f"Tendência do mercado: bearish (short_ma={short_ma:.2f}, long_ma={long_ma:.2f})")
-                return 'bearish'
-            else:
-                logger.debug("Tendência do mercado: neutral")
-                return 'neutral'
-        except Exception as e:
-            logger.error(f"Erro ao determinar tendência de mercado: {e}")
-            return 'neutral'
+        return determine_market_trend(df)
 
     def adapt_max_consecutive_trades(self, market_trend):
-        if market_trend == 'bearish':
-            self.max_consecutive_trades = 7
-        elif market_trend == 'bullish':
-            self.max_consecutive_trades = 5
-        else:
-            self.max_consecutive_trades = 3
+        self.max_consecutive_trades = max_consecutive_for_trend(market_trend)
 
         logger.debug(f"Max consecutive trades ajustado para {self.max_consecutive_trades} com base na tendência de mercado '{market_trend}'")
 
         return self.max_consecutive_trades
 
+    def _block_counts(self):
+        return self.block_counters.get() if self.block_counters is not None else load_block_counts()
 
-
-
-
-    def can_trade(self, symbol, transaction_type, quantity, price, df):
-        consecutive_sell_blocks, consecutive_buy_blocks = load_block_counts()
-
+    def _save_block_counts(self, block_counts):
+        if self.block_counters is not None:
+            self.block_counters.set(*block_counts)
+        else:
+            save_block_counts(*block_counts)
+
+    def build_context(self, symbol, df):
+        """Monta o RiskContext do tick (única etapa com I/O); reutilize-o em todas as verificações do tick."""
+        context = build_risk_context(symbol, self.portfolio_manager, df, self.order_history.get(symbol), self._block_counts())
+        self.max_consecutive_trades = context.max_consecutive_trades
+        return context
+
+    def check(self, context, transaction_type, quantity, price):
+        """Verificação em memória de uma ordem contra o contexto do tick; persiste os contadores se mudarem."""
+        allowed, new_block_counts = check_order(
+            context, transaction_type, quantity, price, self._block_counts(),
+            min_quantity=self.min_quantity, max_price_increase=self.max_price_increase, max_price_drop=self.max_price_drop
+        )
+        if new_block_counts is not None:
+            self._save_block_counts(new_block_counts)
+        if allowed:
+            logger.debug(f"Negociação permitida para {transaction_type} de {context.asset} com quantidade {quantity} a preço {price:.2f}")
+        return allowed
+
+    def check_many(self, context, candidates):
+        """Avalia várias ordens candidatas ((tipo, quantidade, preço), ...) de uma vez contra o contexto."""
+        block_counts = self._block_counts()
+        results, new_block_counts = evaluate_orders(
+            context, candidates, block_counts,
+            min_quantity=self.min_quantity, max_price_increase=self.max_price_increase, max_price_drop=self.max_price_drop
+        )
+        if new_block_counts != block_counts:
+            self._save_block_counts(new_block_counts)
+        return results
+
+    def can_trade(self, symbol, transaction_type, quantity, price, df, context=None):
         try:
-            stop_status = self.portfolio_manager.check_stop_loss_take_profit()
-            if stop_status != 'continue':
-                logger.info(f"Operação bloqueada devido ao status: {stop_status}")
-                return False
-
-            if transaction_type == 'sell' and (self.portfolio_manager.get_balance(symbol.replace('USDT', '')) - quantity) < self.min_quantity:
-                logger.info("Operação de venda cancelada: reserva mínima de ativo não atingida.")
-                return False
-
-            if transaction_type == 'buy' and self.portfolio_manager.get_cash_balance() < self.portfolio_manager.reserve_cash + (quantity * price):
-                logger.info("Operação de compra cancelada: saldo insuficiente para manter a reserva mínima de caixa.")
-                return False
-
-            market_trend = self.determine_market_trend(df)
-            self.adapt_max_consecutive_trades(market_trend)
-
-            consecutive_trades = get_consecutive_trades(symbol, transaction_type)
-            if not isinstance(consecutive_trades, int):
-                logger.error(f"consecutive_trades não é um inteiro: {consecutive_trades}")
-                return False
-
-            logger.debug(f"Transações consecutivas de tipo '{transaction_type}' para {symbol}: {consecutive_trades}")
-
-
-            if consecutive_trades >= self.max_consecutive_trades:
-                if transaction_type == 'sell':
-                    consecutive_sell_blocks += 1
-                    consecutive_buy_blocks = 0
-                    save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-
-                if transaction_type == 'buy':
-                    consecutive_buy_blocks += 1
-                    consecutive_sell_blocks = 0
-                    save_block_counts(consecutive_sell_blocks, consecutive_buy_blocks)
-
-                logger.info(f"Limite de {transaction_type}s consecutivas atingido. limite = {self.max_consecutive_trades} Operação ignorada.")
-                return False
-
-            average_price = self.calculate_average_price(symbol, transaction_type, recent_only=(market_trend == 'bearish'))
-
-            if transaction_type == 'buy':
-                if average_price > 0 and price > average_price:
-                    if market_trend != 'bullish':
-                        logger.info(f"Preço de compra acima da média de compras ({average_price:.2f}). Aguardando queda para melhores oportunidades.")
-                        return False
-
-                if average_price > 0 and (average_price - price) / average_price > self.max_price_increase:
-                    logger.info(f"Queda excessiva detectada. Evitando comprar para não 'catching a falling knife'.")
-                    return False
-
-            if transaction_type == 'sell':
-                if average_price > 0 and price < average_price and market_trend != 'bearish':
-                    logger.info(f"Preço atual abaixo da média de vendas ({average_price:.2f}). Esperando um valor melhor.")
-                    return False
-
-                previous_close_price = self.portfolio_manager.get_previous_close_price(symbol)
-                if previous_close_price > 0 and (previous_close_price - price) / previous_close_price > self.max_price_drop:
-                    logger.info(f"Queda rápida detectada. Evitando vender durante pânico.")
-                    return False
-
-            logger.debug(f"Negociação permitida para {transaction_type} de {symbol} com quantidade {quantity} a preço {price:.2f}")
-            return True
+            context = context or self.build_context(symbol, df)
+            return self.check(context, transaction_type, quantity, price)
         except Exception as e:
             logger.error(f"Erro ao determinar se a negociação pode ser feita: {e}")
             return False
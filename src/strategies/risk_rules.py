@@ -0,0 +1,120 @@
+import logging
+
+from services.fixed_point import Fixed
+from strategies.snapshot import RiskContext
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+MIN_QUANTITY = 0.0001
+MAX_PRICE_INCREASE = 0.05
+MAX_PRICE_DROP = 0.05
+
+
+def max_consecutive_for_trend(market_trend):
+    """Retorna o limite de transações consecutivas adequado à tendência do mercado."""
+    if market_trend == 'bearish':
+        return 7
+    elif market_trend == 'bullish':
+        return 5
+    return 3
+
+
+def _evaluate(context, transaction_type, quantity, price, block_counts, min_quantity, max_price_increase, max_price_drop):
+    """Núcleo das verificações: retorna (permitido, novos_block_counts, motivo da recusa) sem registrar logs."""
+    portfolio = context.portfolio
+    risk = context.risk
+    market_trend = context.market_trend
+
+    if portfolio.stop_status != 'continue':
+        return False, None, f"Operação bloqueada devido ao status: {portfolio.stop_status}"
+
+    # Comparações de saldo em ponto fixo: 0.0003 - 0.0002 em float fica abaixo de 0.0001
+    if transaction_type == 'sell' and Fixed.of(portfolio.asset_quantity) - Fixed.of(quantity) < Fixed.of(min_quantity):
+        return False, None, "Operação de venda cancelada: reserva mínima de ativo não atingida."
+
+    if transaction_type == 'buy' and Fixed.of(portfolio.cash_balance) < Fixed.of(portfolio.reserve_cash) + Fixed.of(quantity).mul(Fixed.of(price)):
+        return False, None, "Operação de compra cancelada: saldo insuficiente para manter a reserva mínima de caixa."
+
+    max_consecutive_trades = context.max_consecutive_trades
+    consecutive_trades = risk.consecutive_sells if transaction_type == 'sell' else risk.consecutive_buys
+
+    if consecutive_trades >= max_consecutive_trades:
+        consecutive_sell_blocks, consecutive_buy_blocks = block_counts
+        if transaction_type == 'sell':
+            block_counts = (consecutive_sell_blocks + 1, 0)
+        else:
+            block_counts = (0, consecutive_buy_blocks + 1)
+        return False, block_counts, f"Limite de {transaction_type}s consecutivas atingido. limite = {max_consecutive_trades} Operação ignorada."
+
+    if transaction_type == 'buy':
+        average_price = risk.average_buy_price
+        if average_price > 0 and price > average_price and market_trend != 'bullish':
+            return False, None, f"Preço de compra acima da média de compras ({average_price:.2f}). Aguardando queda para melhores oportunidades."
+
+        if average_price > 0 and (average_price - price) / average_price > max_price_increase:
+            return False, None, "Queda excessiva detectada. Evitando comprar para não 'catching a falling knife'."
+
+    if transaction_type == 'sell':
+        average_price = risk.average_sell_price
+        if average_price > 0 and price < average_price and market_trend != 'bearish':
+            return False, None, f"Preço atual abaixo da média de vendas ({average_price:.2f}). Esperando um valor melhor."
+
+        previous_close_price = portfolio.previous_close_price
+        if previous_close_price > 0 and (previous_close_price - price) / previous_close_price > max_price_drop:
+            return False, None, "Queda rápida detectada. Evitando vender durante pânico."
+
+    return True, None, None
+
+
+def check_order(context, transaction_type, quantity, price, block_counts=None,
+                min_quantity=MIN_QUANTITY, max_price_increase=MAX_PRICE_INCREASE, max_price_drop=MAX_PRICE_DROP):
+    """
+    Avalia uma ordem apenas com os dados do RiskContext (sem I/O).
+
+    'block_counts' é o par (consecutive_sell_blocks, consecutive_buy_blocks) atualmente persistido
+    (por padrão, o do contexto). Retorna (permitido, novos_block_counts), onde novos_block_counts é
+    None quando não há alteração.
+    """
+    block_counts = context.block_counts if block_counts is None else block_counts
+    allowed, block_counts, reason = _evaluate(context, transaction_type, quantity, price, block_counts,
+                                              min_quantity, max_price_increase, max_price_drop)
+    if reason:
+        logger.info(reason)
+    return allowed, block_counts
+
+
+def check_trade(snapshot, transaction_type, quantity, price, block_counts,
+                min_quantity=MIN_QUANTITY, max_price_increase=MAX_PRICE_INCREASE, max_price_drop=MAX_PRICE_DROP):
+    """
+    Versão pura de RiskManager.can_trade: avalia a ordem apenas com os dados do snapshot.
+
+    'block_counts' é o par (consecutive_sell_blocks, consecutive_buy_blocks) atualmente persistido.
+    Retorna (permitido, novos_block_counts), onde novos_block_counts é None quando não há alteração.
+    """
+    context = RiskContext.from_snapshot(snapshot, max_consecutive_for_trend(snapshot.market.market_trend))
+    return check_order(context, transaction_type, quantity, price, block_counts,
+                       min_quantity=min_quantity, max_price_increase=max_price_increase, max_price_drop=max_price_drop)
+
+
+def evaluate_orders(context, candidates, block_counts=None,
+                    min_quantity=MIN_QUANTITY, max_price_increase=MAX_PRICE_INCREASE, max_price_drop=MAX_PRICE_DROP):
+    """
+    Avalia em lote várias ordens candidatas ((tipo, quantidade, preço), ...) contra o mesmo contexto.
+
+    Os contadores de bloqueio evoluem na ordem das candidatas, como em chamadas sucessivas de
+    check_order. Retorna (lista de permitido por candidata, block_counts finais).
+    """
+    block_counts = context.block_counts if block_counts is None else block_counts
+    results = []
+    rejected = 0
+    for transaction_type, quantity, price in candidates:
+        allowed, new_block_counts, _ = _evaluate(context, transaction_type, quantity, price, block_counts,
+                                                 min_quantity, max_price_increase, max_price_drop)
+        if new_block_counts is not None:
+            block_counts = new_block_counts
+        rejected += not allowed
+        results.append(allowed)
+    logger.debug(f"{len(results)} ordens candidatas avaliadas para {context.asset}: {rejected} recusadas.")
+    return results, block_counts
@@ -0,0 +1,177 @@
+import logging
+
+from services.fixed_point import Fixed
+from strategies.risk_rules import check_trade, max_consecutive_for_trend
+from strategies.snapshot import SideMemory, StateDelta
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+MIN_ASSET_QUANTITY = 0.0001  # Valor mínimo da Binance para negociação de BTC
+MIN_PROFIT_PERCENTAGE = 0.0015  # 0,15% de lucro
+STOP_LOSS_PERCENTAGE = 0.0018  # 0,18% de perda
+THRESHOLD_FACTOR = 0.985
+RECENT_WINDOW_SECONDS = 4 * 60 * 60  # Limite de tempo para transações recentes (4 horas)
+
+
+def _is_recent(last_time, now):
+    return bool(last_time) and (now - int(last_time)) <= RECENT_WINDOW_SECONDS
+
+
+def _round_quantity(quantity):
+    """Arredonda a quantidade para 8 casas decimais, como a formatação enviada à corretora."""
+    return float(Fixed.from_float(quantity, 8))
+
+
+def _clean_side(side_memory, market_average, recent, now):
+    """Versão pura de clean_transactions_outside_market_average para um único lado."""
+    average_price = side_memory.average_price
+    out_of_range = bool(average_price) and (
+        average_price < market_average * THRESHOLD_FACTOR or average_price > market_average / THRESHOLD_FACTOR
+    )
+    if out_of_range or not recent:
+        return SideMemory(average_price=0.0, last_price=0.0, last_time=now), True
+    return side_memory, False
+
+
+def _hold(asset, price, reason, delta):
+    return {
+        'asset': asset,
+        'quantity': 0,
+        'price': price,
+        'type': 'hold',
+        'reason': reason
+    }, delta
+
+
+def decide_small_portfolio(snapshot):
+    """
+    Estratégia Small Portfolio como função pura do snapshot.
+
+    Não acessa arquivos, rede nem variáveis globais: retorna a decisão e um StateDelta com as
+    alterações (limpeza/registro de transações e contadores de bloqueio) que o runner deve aplicar.
+    """
+    market = snapshot.market
+    portfolio = snapshot.portfolio
+    memory = snapshot.memory
+    risk = snapshot.risk
+
+    asset = market.asset
+    price = float(market.price)
+    now = market.time
+    cash_balance = float(portfolio.cash_balance)
+    asset_quantity = float(portfolio.asset_quantity)
+    investment_percentage = portfolio.investment_percentage
+    last_buy = memory.last_buy
+    last_sell = memory.last_sell
+
+    consecutive_sell_blocks = risk.consecutive_sell_blocks
+    consecutive_buy_blocks = risk.consecutive_buy_blocks
+    persisted_blocks = (consecutive_sell_blocks, consecutive_buy_blocks)
+    blocks_changed = False
+
+    max_consecutive_trades = max_consecutive_for_trend(market.market_trend)
+    consecutive_sells = risk.consecutive_sells
+    consecutive_buys = risk.consecutive_buys
+
+    recent_sell = _is_recent(memory.sells.last_time, now)
+    recent_buy = _is_recent(memory.buys.last_time, now)
+
+    short_ma, long_ma, rsi, volume_filter = market.short_ma, market.long_ma, market.rsi, market.volume_filter
+    if None in (short_ma, long_ma, rsi, volume_filter):
+        logger.warning("Indicadores insuficientes para tomar decisão de compra/venda.")
+        return _hold(asset, price, "Hold - Dados insuficientes para indicadores", StateDelta(time=now))
+
+    # Limpa a memória de transações fora da média do mercado ou desatualizada
+    buys, reset_buys = _clean_side(memory.buys, short_ma, recent_buy, now)
+    sells, reset_sells = _clean_side(memory.sells, short_ma, recent_sell, now)
+    reset_sides = tuple(side for side, reset in (('buys', reset_buys), ('sells', reset_sells)) if reset)
+
+    average_buy_price = buys.average_price
+    average_sell_price = sells.average_price
+    target_sell_price = 0
+    target_buy_price = 0
+
+    # Lógica para determinar se a condição de broke cold está atendida
+    if ((not recent_sell or (last_buy == 0 and last_sell == 0)) and average_buy_price < price) or consecutive_buy_blocks >= 100 and last_sell <= 0:
+        sell_broke_cold = True
+        buy_broke_cold = False
+    elif ((not recent_buy or (last_buy == 0 and last_sell == 0)) and average_sell_price > price) or consecutive_sell_blocks >= 100 and last_buy <= 0:
+        buy_broke_cold = True
+        sell_broke_cold = False
+    else:
+        sell_broke_cold = False
+        buy_broke_cold = False
+
+        if average_buy_price > 0 and last_buy > 0:
+            target_sell_price = average_buy_price * (1 + MIN_PROFIT_PERCENTAGE)
+        elif last_buy > 0:
+            target_sell_price = last_buy * (1 + MIN_PROFIT_PERCENTAGE)
+
+        if average_sell_price > 0 and last_sell > 0:
+            target_buy_price = average_sell_price * (1 - 2 * STOP_LOSS_PERCENTAGE)
+        elif last_sell > 0:
+            target_buy_price = last_sell * (1 - 2 * STOP_LOSS_PERCENTAGE)
+
+    logger.info(f"Condições finais - buy_broke_cold: {buy_broke_cold}, sell_broke_cold: {sell_broke_cold}")
+    logger.info(f"target_buy_price: {target_buy_price}, target_sell_price: {target_sell_price}")
+
+    # Condições de compra
+    if consecutive_buys < max_consecutive_trades or consecutive_sell_blocks >= 100:
+        if (short_ma < long_ma * 0.995) or rsi < 50 or (recent_sell and price <= target_buy_price) or buy_broke_cold and not sell_broke_cold:
+            quantity_to_buy = min((cash_balance * investment_percentage) / price, investment_percentage * asset_quantity)
+            quantity_to_buy = _round_quantity(max(quantity_to_buy, MIN_ASSET_QUANTITY))
+
+            if quantity_to_buy >= MIN_ASSET_QUANTITY:
+                allowed, new_blocks = check_trade(snapshot, 'buy', quantity_to_buy, price, persisted_blocks)
+                if new_blocks is not None:
+                    persisted_blocks, blocks_changed = new_blocks, True
+                if allowed:
+                    logger.info(f"Condições de compra atendidas: quantidade={quantity_to_buy}, preço={price}")
+                    return {
+                        'asset': asset,
+                        'quantity': quantity_to_buy,
+                        'price': price,
+                        'type': 'buy',
+                        'reason': "Compra em oportunidade de curto prazo com base em indicadores e limite de compras consecutivas"
+                    }, StateDelta(time=now, reset_sides=reset_sides, record=('buys', price), block_counts=(0, 0))
+        else:
+            logger.info("Condições de compra não atendidas. Valores atuais: "
+                        f"short_ma={short_ma}, long_ma={long_ma}, rsi={rsi}, price={price}, target_buy_price={target_buy_price}")
+    else:
+        consecutive_buy_blocks += 1
+        consecutive_sell_blocks = 0
+        persisted_blocks, blocks_changed = (consecutive_sell_blocks, consecutive_buy_blocks), True
+        logger.info("Condição de compra não atingida: Limite de quantidade de compras")
+
+    # Condições de venda
+    if consecutive_sells < max_consecutive_trades or consecutive_buy_blocks >= 100:
+        if price >= target_sell_price or not buy_broke_cold and sell_broke_cold:
+            quantity_to_sell = min(asset_quantity * investment_percentage, asset_quantity - MIN_ASSET_QUANTITY)
+            quantity_to_sell = _round_quantity(max(quantity_to_sell, MIN_ASSET_QUANTITY))
+
+            if quantity_to_sell >= MIN_ASSET_QUANTITY:
+                allowed, new_blocks = check_trade(snapshot, 'sell', quantity_to_sell, price, persisted_blocks)
+                if new_blocks is not None:
+                    persisted_blocks, blocks_changed = new_blocks, True
+                if allowed:
+                    profit = (price - last_buy) / last_buy if last_buy else 0
+                    logger.info(f"Condições de venda atendidas: quantidade={quantity_to_sell}, preço={price}, lucro={profit*100:.2f}%")
+                    return {
+                        'asset': asset,
+                        'quantity': quantity_to_sell,
+                        'price': price,
+                        'type': 'sell',
+                        'reason': "Venda para lucro a curto prazo em carteira pequena com limite de vendas consecutivas"
+                    }, StateDelta(time=now, reset_sides=reset_sides, record=('sells', price), block_counts=(0, 0))
+        else:
+            logger.info(f"Condição de venda não atingida: preço atual ({price}) >= preço-alvo ({target_sell_price}).")
+    else:
+        consecutive_sell_blocks += 1
+        consecutive_buy_blocks = 0
+        persisted_blocks, blocks_changed = (consecutive_sell_blocks, consecutive_buy_blocks), True
+        logger.info("Condição de venda não atingida: Limite de quantidade de vendas")
+
+    delta = StateDelta(time=now, reset_sides=reset_sides, block_counts=persisted_blocks if blocks_changed else None)
+    return _hold(asset, price, "Hold - Estratégia de acúmulo em carteira pequena", delta)
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MarketState:
+    """Estado de mercado de um ativo no instante da decisão (preço e indicadores já calculados)."""
+    asset: str
+    price: float
+    time: float  # timestamp (segundos) do snapshot
+    short_ma: Optional[float] = None
+    long_ma: Optional[float] = None
+    rsi: Optional[float] = None
+    volume_filter: Optional[bool] = None
+    market_trend: str = 'neutral'
+
+
+@dataclass(frozen=True)
+class Indicators:
+    """Indicadores calculados a partir dos candles (etapa de CPU do tick, executada no pool de processos)."""
+    short_ma: Optional[float] = None
+    long_ma: Optional[float] = None
+    rsi: Optional[float] = None
+    volume_filter: Optional[bool] = None
+    market_trend: str = 'neutral'
+
+
+@dataclass(frozen=True)
+class PortfolioState:
+    """Visão do portfólio necessária para dimensionar e validar uma ordem."""
+    cash_balance: float  # saldo de caixa disponível (já descontada a reserva)
+    asset_quantity: float
+    investment_percentage: float
+    reserve_cash: float
+    stop_status: str = 'continue'
+    previous_close_price: float = 0.0
+    drawdown: float = 0.0  # queda atual do patrimônio em relação ao pico (RiskSnapshot)
+    volatility: float = 0.0  # volatilidade móvel dos retornos do patrimônio (RiskSnapshot)
+
+
+@dataclass(frozen=True)
+class SideMemory:
+    """Resumo das últimas transações de um lado (compras ou vendas) da estratégia."""
+    average_price: float = 0.0
+    last_price: float = 0.0
+    last_time: float = 0.0
+
+
+@dataclass(frozen=True)
+class TradeMemory:
+    """Memória curta de transações da estratégia (equivalente ao transaction_history.json)."""
+    buys: SideMemory = SideMemory()
+    sells: SideMemory = SideMemory()
+    last_buy: float = 0.0  # último preço de compra conhecido no início da sessão
+    last_sell: float = 0.0  # último preço de venda conhecido no início da sessão
+
+
+@dataclass(frozen=True)
+class RiskState:
+    """Dados de risco vindos da corretora e dos contadores de bloqueio."""
+    consecutive_buys: int = 0
+    consecutive_sells: int = 0
+    average_buy_price: float = 0.0  # média das compras executadas na corretora
+    average_sell_price: float = 0.0  # média das vendas executadas na corretora
+    consecutive_sell_blocks: int = 0
+    consecutive_buy_blocks: int = 0
+
+
+@dataclass(frozen=True)
+class StrategySnapshot:
+    """Tudo o que uma estratégia pura precisa para decidir, sem acessar arquivos ou rede."""
+    market: MarketState
+    portfolio: PortfolioState
+    memory: TradeMemory
+    risk: RiskState
+
+
+@dataclass(frozen=True)
+class StateDelta:
+    """Alterações de estado produzidas por uma decisão, aplicadas depois pelo executor (runner)."""
+    time: float
+    reset_sides: Tuple[str, ...] = ()  # lados ('buys'/'sells') cuja memória deve ser limpa
+    record: Optional[Tuple[str, float]] = None  # (lado, preço) da transação a registrar
+    block_counts: Optional[Tuple[int, int]] = None  # (consecutive_sell_blocks, consecutive_buy_blocks)
+
+    @property
+    def is_empty(self):
+        return not self.reset_sides and self.record is None and self.block_counts is None
+
+
+@dataclass(frozen=True)
+class RiskContext:
+    """
+    Dados de risco de um símbolo montados uma única vez por tick (tendência, limites, contagens da
+    corretora, preços médios e status de stop). As verificações de ordem passam a ser apenas leituras
+    em memória deste objeto.
+    """
+    asset: str
+    time: float
+    market_trend: str
+    max_consecutive_trades: int
+    portfolio: PortfolioState
+    risk: RiskState
+
+    @classmethod
+    def from_snapshot(cls, snapshot, max_consecutive_trades):
+        market = snapshot.market
+        return cls(asset=market.asset, time=market.time, market_trend=market.market_trend,
+                   max_consecutive_trades=max_consecutive_trades, portfolio=snapshot.portfolio, risk=snapshot.risk)
+
+    @property
+    def block_counts(self):
+        """(consecutive_sell_blocks, consecutive_buy_blocks) vigentes na montagem do contexto."""
+        return self.risk.consecutive_sell_blocks, self.risk.consecutive_buy_blocks
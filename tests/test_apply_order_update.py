@@ -0,0 +1,51 @@
+# tests/test_apply_order_update.py
+import sys
+import os
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import portfolio_manager as portfolio_manager_module
+from services.order_tracker import TrackedOrder
+from services.portfolio_manager import PortfolioManager
+from services.reconciliation import FillReconciler, OrderFill
+from services.state_store import StateStore
+from services.symbol_state import SymbolState
+from services.transaction_logger import TransactionLogger
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    """main com portfólio, reconciliador e ledger novos, sem rede e com os arquivos em tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(portfolio_manager_module, 'get_account_balance',
+                        lambda: pd.DataFrame([{'asset': 'USDT', 'free': 1000.0, 'locked': 0.0}]))
+    import main
+    portfolio = PortfolioManager()
+    monkeypatch.setattr(main, 'portfolio_manager', portfolio)
+    monkeypatch.setattr(main, 'reconciler', FillReconciler(portfolio))
+    monkeypatch.setattr(main, 'transaction_logger', TransactionLogger(initial_balance=portfolio.initial_balance))
+    return main
+
+
+def test_sell_closing_the_position_still_writes_a_ledger_row(runner, tmp_path):
+    """A venda que zera a posição pelo listener gera a linha do ledger com o resultado pelo custo anterior."""
+    store = StateStore(str(tmp_path / 'state.db'))
+    state = SymbolState('ETHUSDT', state_dir=str(tmp_path), store=store)
+    states = {'ETHUSDT': state}
+    triggers = {'ETHUSDT': SimpleNamespace(on_fill=lambda: None)}
+    market_data = SimpleNamespace(prices={'ETHUSDT': 2100.0})
+    valuation = SimpleNamespace(asset_prices=lambda: {'USDT': 1.0, 'ETH': 2100.0})
+    order_history = SimpleNamespace(invalidate=lambda symbol: None)
+
+    for side, price in (('buy', 2000.0), ('sell', 2100.0)):
+        tracked = TrackedOrder(f'bot-{side}', 'ETHUSDT', side, status='FILLED')
+        fill = OrderFill('ETHUSDT', side, 0.1, 0.1 * price)
+        runner.apply_order_update(states, triggers, market_data, valuation, order_history, tracked, fill, 'NEW')
+
+    logger = runner.transaction_logger
+    rows = logger.records[:logger.buffered]
+    assert list(rows['transaction_type']) == ['buy', 'sell'], "A compra e a venda devem ter uma linha cada no ledger"
+    assert abs(rows['profit_loss'][1] - 10.0) < 1e-9, "O resultado da venda deve usar o custo médio anterior à execução"
+    assert 'ETH' not in runner.portfolio_manager.assets, "A posição deve ter sido zerada"
+    store.close()
@@ -0,0 +1,72 @@
+# tests/test_block_counters.py
+import sys
+import os
+import asyncio
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import block_counters as block_counters_module
+from services.block_counters import BlockCounters
+from services.state_store import StateStore
+
+
+def read_counts(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def test_changes_are_written_behind_by_the_flusher(tmp_path):
+    """As alterações ficam em memória e chegam ao arquivo no flush periódico, uma vez por alteração."""
+    path = str(tmp_path / 'block_counts.json')
+    counters = BlockCounters(path, flush_interval=0.01)
+    counters.set(2, 1)
+    assert counters.get() == (2, 1), "A leitura deve refletir a alteração imediatamente"
+    assert read_counts(path)['consecutive_sell_blocks'] == 0, "A alteração não deve ser gravada no set"
+
+    async def scenario():
+        flusher = asyncio.create_task(counters.run_flusher())
+        await asyncio.sleep(0.05)
+        flusher.cancel()
+
+    asyncio.run(scenario())
+    assert read_counts(path) == {'consecutive_sell_blocks': 2, 'consecutive_buy_blocks': 1}, "O flusher deve gravar os contadores"
+    assert not counters.dirty, "Depois do flush não deve haver alteração pendente"
+    assert BlockCounters(path).get() == (2, 1), "Um novo dono deve ler os contadores gravados"
+
+
+def test_failed_flush_keeps_changes_pending(tmp_path, monkeypatch):
+    """Uma falha na gravação mantém a alteração pendente para o próximo flush."""
+    path = str(tmp_path / 'block_counts.json')
+    counters = BlockCounters(path)
+    counters.set(0, 3)
+
+    def fail(*args, **kwargs):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(block_counters_module, 'save_block_counts', fail)
+    try:
+        counters.flush()
+    except OSError:
+        pass
+    assert counters.dirty, "A alteração não gravada deve continuar pendente"
+
+    monkeypatch.undo()
+    counters.flush()
+    assert read_counts(path)['consecutive_buy_blocks'] == 3, "O próximo flush deve gravar a alteração"
+
+
+def test_missing_file_restores_the_counters_from_the_store(tmp_path):
+    """Sem o arquivo, os contadores são restaurados do StateStore e regravados no próximo flush."""
+    store = StateStore(str(tmp_path / 'state.db'))
+    path = str(tmp_path / 'block_counts.json')
+    counters = BlockCounters(path, store=store, symbol='ETHUSDT')
+    counters.set(4, 2)
+    counters.flush()
+
+    os.remove(path)
+    restored = BlockCounters(path, store=store, symbol='ETHUSDT')
+    assert restored.get() == (4, 2), "Os contadores devem vir do StateStore quando o arquivo não existe"
+    restored.flush()
+    assert read_counts(path)['consecutive_sell_blocks'] == 4, "O arquivo deve ser regravado com os contadores restaurados"
+    assert BlockCounters(str(tmp_path / 'other.json'), store=store, symbol='BTCUSDT').get() == (0, 0), \
+        "Um símbolo sem contadores gravados começa do zero"
+    store.close()
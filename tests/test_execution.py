@@ -0,0 +1,91 @@
+# tests/test_execution.py
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import execution as execution_module
+from services.execution import ExecutionEngine
+from services.fixed_point import Fixed, SymbolPrecision
+from services.order_book import OrderBookHub
+from services.rate_limiter import RateLimiter
+
+PRECISION = SymbolPrecision('ETHUSDT', quantity_decimals=4, price_decimals=2, step=Fixed.from_str('0.0001', 4),
+                            min_quantity=Fixed.from_str('0.0001', 4), tick=Fixed.from_str('0.01', 2), min_notional=5.0)
+
+
+class StaticMarketData:
+    """Dados de mercado sem rede: só o que o ExecutionEngine consulta."""
+    prices = {}
+
+    def subscribe(self, symbol, callback):
+        pass
+
+
+def new_engine(order_books=None):
+    engine = ExecutionEngine(StaticMarketData(), None, RateLimiter(), slippage_tolerance=0.005, order_books=order_books)
+    engine.restore_state({'precisions': {'ETHUSDT': PRECISION}})
+    context = engine.contexts['ETHUSDT']
+    context.on_book(2000.0, 2000.5)
+    return engine, context
+
+
+def test_slippage_guard_against_the_decision_price():
+    """A ordem é recusada quando o preço de referência se afasta da decisão além da tolerância, no sentido adverso."""
+    engine, context = new_engine()
+    assert engine.check(context, 'buy', 1.0, 2000.0) == ('1.0000', 2000.5), "A compra usa o ask como referência"
+    assert engine.check(context, 'buy', 1.0, 1980.0) == (None, 'slippage'), "Um ask 1% acima da decisão deve ser recusado"
+    assert engine.check(context, 'sell', 1.0, 2020.0) == (None, 'slippage'), "Um bid 1% abaixo da decisão deve ser recusado"
+    assert engine.check(context, 'sell', 1.0, 1950.0) == ('1.0000', 2000.0), "Um desvio favorável não deve ser recusado"
+
+
+def test_depth_weighted_reference_price():
+    """Com o book local sincronizado, a referência é o preço médio da quantidade inteira pela profundidade."""
+    hub = OrderBookHub(None, None, RateLimiter())
+    engine, context = new_engine(order_books=hub)
+    book = hub.books['ETHUSDT']
+    book.load_snapshot({'lastUpdateId': 1, 'bids': [['2000.0', '0.5'], ['1999.0', '0.5']],
+                        'asks': [['2000.5', '0.5'], ['2001.5', '0.5'], ['2030.0', '1.0']]})
+
+    assert engine.check(context, 'buy', 1.0, 2000.0) == ('1.0000', 2001.0), "A compra deve pagar a média dos dois níveis"
+    assert engine.check(context, 'sell', 1.0, 2000.0) == ('1.0000', 1999.5), "A venda deve receber a média dos dois níveis"
+    assert engine.check(context, 'buy', 1.7, 2000.0) == (None, 'slippage'), "Consumir o terceiro nível deve estourar a tolerância"
+    assert engine.check(context, 'buy', 5.0, 2000.0) == ('5.0000', 2000.5), "Sem profundidade suficiente vale o melhor ask"
+
+    book.updated_at = time.monotonic() - 10
+    assert engine.check(context, 'buy', 1.0, 2000.0) == ('1.0000', 2000.5), "Um book velho não deve ser usado"
+
+
+def test_stale_book_falls_back_to_last_price():
+    """Com o bid/ask velho, a referência é o último preço; sem nenhum preço, a ordem é recusada."""
+    engine, context = new_engine()
+    context.on_book(2000.0, 2000.5, now=time.monotonic() - 10)
+    context.on_price(1999.0)
+    assert engine.check(context, 'buy', 1.0, 2000.0) == ('1.0000', 1999.0), "O último preço deve substituir o book velho"
+
+    context.on_price(0.0)
+    assert engine.check(context, 'buy', 1.0, 2000.0) == (None, 'no_price'), "Sem preço de referência a ordem é recusada"
+
+
+def test_order_below_min_notional_is_rejected():
+    """Uma ordem cujo valor ajustado fica abaixo do mínimo da corretora é recusada."""
+    engine, context = new_engine()
+    assert engine.check(context, 'buy', 0.00249, 2000.0) == (None, 'min_notional'), "0,0024 ETH (4,80 USDT) está abaixo do mínimo"
+    assert engine.check(context, 'buy', 0.0025, 2000.0) == ('0.0025', 2000.5), "0,0025 ETH (5,00 USDT) atinge o mínimo"
+
+
+def test_rejections_are_counted_without_sending(monkeypatch):
+    """Cada recusa local é contada pelo motivo e nenhuma ordem chega à corretora."""
+    def submit_market_order(*args):
+        raise AssertionError("Nenhuma ordem deve ser enviada")
+
+    monkeypatch.setattr(execution_module, 'submit_market_order', submit_market_order)
+    engine, _ = new_engine()
+
+    async def scenario():
+        for quantity, price in ((1.0, 1900.0), (1.0, 1950.0), (0.001, 2000.0)):
+            assert await engine.submit({'asset': 'ETHUSDT', 'type': 'buy', 'quantity': quantity, 'price': price}) is None
+
+    asyncio.run(scenario())
+    assert engine.rejected == {'slippage': 2, 'no_price': 0, 'min_notional': 1}, "As recusas devem ser contadas por motivo"
+    assert engine.submitted == 0 and engine.failed == 0, "Recusas locais não contam como envio ou falha"
@@ -0,0 +1,69 @@
+# tests/test_executor_runtime.py
+import sys
+import os
+import time
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.executor_runtime import ExecutorRuntime
+
+
+def busy(seconds):
+    """Cálculo que segura o GIL durante 'seconds' e retorna o pid de quem executou."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return os.getpid()
+
+
+def test_compute_in_process_pool_does_not_block_event_loop():
+    """Cálculo no pool de processos não trava o event loop e a fila do pool é medida."""
+    runtime = ExecutorRuntime(io_workers=2, compute_workers=2)
+    runtime.start()
+
+    async def scenario():
+        lag = asyncio.create_task(runtime.watch_loop_lag(interval=0.01))
+        pids = await asyncio.gather(*(runtime.compute(busy, 0.2) for _ in range(4)))
+        lag.cancel()
+        return pids
+
+    try:
+        pids = asyncio.run(scenario())
+        summary = runtime.summary()
+    finally:
+        runtime.shutdown()
+    assert os.getpid() not in pids, "O cálculo deve rodar nos processos do pool"
+    assert summary['compute']['submitted'] == 5 and summary['compute']['max_queued'] == 2, "A fila do pool de cálculo deve ser medida"
+    assert summary['compute']['wait_p95_ms'] > 100, "As tarefas além dos processos disponíveis devem aparecer como espera"
+    assert summary['loop_lag_max_ms'] < 50, f"O event loop atrasou {summary['loop_lag_max_ms']:.0f} ms durante o cálculo"
+
+
+def test_io_pool_measures_queue_and_compute_falls_back_to_threads():
+    """O pool de I/O mede a fila e, sem pool de processos, o cálculo roda em uma thread."""
+    runtime = ExecutorRuntime(io_workers=2, compute_workers=0)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(runtime.io, time.sleep, 0.05) for _ in range(6)))
+        return await runtime.compute(busy, 0.0)
+
+    try:
+        pid = asyncio.run(scenario())
+        summary = runtime.summary()
+    finally:
+        runtime.shutdown()
+    assert summary['io']['max_queued'] == 4 and summary['io']['in_flight'] == 0, "A profundidade da fila de I/O deve ser medida"
+    assert summary['io']['wait_p95_ms'] > 40, "As chamadas na fila devem registrar a espera"
+    assert pid == os.getpid() and summary['compute_fallbacks'] == 1, "Sem pool de processos o cálculo deve rodar em uma thread"
+
+
+def test_submit_uses_the_processes_created_at_start():
+    """submit() leva o trabalho aos processos criados no start(), sem criar processos depois."""
+    runtime = ExecutorRuntime(io_workers=1, compute_workers=1)
+    runtime.start()
+    try:
+        started = {process.pid for process in runtime.compute_pool._processes.values()}
+        pid = runtime.submit(busy, 0.0).result(timeout=10)
+        processes = {process.pid for process in runtime.compute_pool._processes.values()}
+    finally:
+        runtime.shutdown()
+    assert pid in started and processes == started, "A tarefa deve rodar em um processo criado no start()"
@@ -0,0 +1,34 @@
+# tests/test_fetch_stage.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.fetch_stage import FetchStage
+
+
+async def delayed(value, delay):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def failing():
+    await asyncio.sleep(0.01)
+    raise ConnectionError('falha de rede')
+
+
+def test_parallel_fetch_with_deadlines_and_partial_failures():
+    """Coleta paralela: cada fonte tem o seu prazo e a falha de uma não derruba as demais."""
+    stage = FetchStage({'order_history': 0.05})
+    result = asyncio.run(stage.run({
+        'price': lambda: delayed(100.0, 0.1),
+        'historical': lambda: delayed('candles', 0.1),
+        'order_history': lambda: delayed('ordens', 1.0),
+        'balance': failing
+    }))
+    assert result.get('price') == 100.0 and result.get('historical') == 'candles', "As requisições bem-sucedidas devem ser entregues"
+    assert result.errors['order_history'] == 'timeout', "A requisição acima do prazo deve ser marcada como timeout"
+    assert 'falha de rede' in result.errors['balance'], "O erro de uma requisição deve ser informado"
+    assert not result.failed('price', 'historical') and result.failed('balance'), "Falhas devem ser identificadas por requisição"
+    # A etapa leva o tempo da requisição mais lenta, e não a soma das durações
+    assert result.elapsed_ms < 180, f"Etapa levou {result.elapsed_ms:.0f} ms; as requisições não rodaram em paralelo"
+    assert stage.summary()['timeouts'] == {'order_history': 1} and stage.summary()['mean_saved_ms'] > 50, "Métricas da etapa incorretas"
@@ -0,0 +1,87 @@
+# tests/test_fixed_point.py
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.fixed_point import _FAST_LIMIT, Fixed, SymbolPrecision, ROUND_DOWN, ROUND_FLOOR, floor_to_step, from_units, to_units
+
+BTCUSDT_INFO = {
+    'symbol': 'BTCUSDT',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000'},
+        {'filterType': 'LOT_SIZE', 'minQty': '0.00001000', 'stepSize': '0.00001000'}
+    ]
+}
+
+
+def test_exact_arithmetic():
+    assert Fixed.from_float(0.0003) - Fixed.from_float(0.0002) == Fixed.from_float(0.0001)
+    assert str(Fixed.from_float(0.1) + Fixed.from_float(0.2)) == '0.30000000'
+    assert str(Fixed.from_float(0.00123).mul(Fixed.from_float(101234.56))) == '124.51850880'
+    assert str(Fixed.from_float(2.0).div(3)) == '0.66666667'
+    assert str(Fixed.from_float(-2.0).div(3, rounding=ROUND_DOWN)) == '-0.66666666'
+
+
+def test_symbol_precision_quantizes_to_exchange_filters():
+    precision = SymbolPrecision.from_symbol_info(BTCUSDT_INFO)
+    assert precision.quantity_decimals == 5 and precision.price_decimals == 2
+    assert precision.format_quantity(0.000129999) == '0.00012'
+    assert precision.format_quantity(0.1 + 0.2) == '0.30000'
+    assert precision.format_quantity(0.000001) == '0.00001'  # Nunca abaixo do minQty
+    assert str(precision.price(101234.5678)) == '101234.57'
+    assert list(precision.quantity_units([0.3, 0.000129999, 1.5])) == [30000, 12, 150000]
+
+
+def test_from_float_fast_path_and_repr_fallback():
+    """O caminho rápido trata o ruído de float; empates e valores acima de _FAST_LIMIT usam o repr."""
+    assert Fixed.from_float(0.3).units == 30000000, "0.3 * 1e8 = 29999999.999999996 deve virar 30000000"
+    assert str(Fixed.from_float(-1.239, 2, ROUND_DOWN)) == '-1.23', "ROUND_DOWN trunca em direção a zero"
+    assert str(Fixed.from_float(-1.239, 2, ROUND_FLOOR)) == '-1.24', "ROUND_FLOOR arredonda para baixo"
+    assert str(Fixed.from_float(0.125, 2)) == '0.12' and str(Fixed.from_float(0.135, 2)) == '0.14', \
+        "Empates exatos no repr seguem o arredondamento bancário"
+    assert 123456789.123 * 1e8 > _FAST_LIMIT, "O valor do teste deve estar fora do caminho rápido"
+    assert Fixed.from_float(123456789.123).units == 12345678912300000, "Acima de _FAST_LIMIT o repr mantém o valor exato"
+    assert str(Fixed.from_float(1e-05, 8)) == '0.00001000', "Notação científica no repr deve ser convertida"
+
+
+def test_floor_to_step_truncates_towards_zero():
+    """floor_to trunca para o múltiplo do passo em módulo, inclusive com passo em outra escala."""
+    step = Fixed.from_str('0.001', 3)
+    assert str(Fixed.from_str('1.23456', 5).floor_to(step)) == '1.23400', "Deve truncar para o passo"
+    assert str(Fixed.from_str('-1.23456', 5).floor_to(step)) == '-1.23400', "Valores negativos truncam em direção a zero"
+    assert str(Fixed.from_str('1.234', 5).floor_to(step)) == '1.23400', "Um múltiplo do passo não muda"
+
+
+def test_vectorized_units():
+    """to_units/from_units/floor_to_step convertem arrays com os mesmos modos de arredondamento."""
+    assert list(to_units([0.3, 0.1 + 0.2, 1.239, -1.239], 2, ROUND_DOWN)) == [30, 30, 123, -123], \
+        "ROUND_DOWN trunca, mas o ruído de float não derruba uma unidade"
+    assert list(to_units([-1.239, 0.3], 2, ROUND_FLOOR)) == [-124, 30], "ROUND_FLOOR arredonda para baixo"
+    assert list(to_units([0.125, 1.005], 2)) == [12, 100], "O padrão arredonda o float escalado ao inteiro mais próximo"
+    assert to_units([1.0]).dtype == np.int64, "As unidades devem ser int64"
+    assert list(from_units([150000, -5], 5)) == [1.5, -0.00005], "from_units deve voltar para float"
+    assert list(floor_to_step([12345, 999, 100], 100)) == [12300, 900, 100], "Cada quantidade deve cair no múltiplo do passo"
+
+
+def test_symbol_precision_reads_notional_filters():
+    """O valor mínimo vem de NOTIONAL ou MIN_NOTIONAL; sem filtros valem 8 casas e nenhum mínimo."""
+    notional = dict(BTCUSDT_INFO, filters=BTCUSDT_INFO['filters'] + [{'filterType': 'NOTIONAL', 'minNotional': '5.00000000'}])
+    legacy = dict(BTCUSDT_INFO, filters=BTCUSDT_INFO['filters'] + [{'filterType': 'MIN_NOTIONAL', 'minNotional': '10.0'}])
+    assert SymbolPrecision.from_symbol_info(notional).min_notional == 5.0, "NOTIONAL deve ser lido"
+    assert SymbolPrecision.from_symbol_info(legacy).min_notional == 10.0, "MIN_NOTIONAL deve ser lido na falta de NOTIONAL"
+
+    precision = SymbolPrecision.from_symbol_info({'symbol': 'XYZUSDT'})
+    assert precision.quantity_decimals == 8 and precision.price_decimals == 8, "Sem filtros vale a precisão máxima"
+    assert precision.min_notional == 0.0 and not precision.min_quantity, "Sem filtros não há mínimos"
+    assert str(precision.step) == '0.00000001' and precision.min_quantity == 0, "O passo padrão é a menor unidade"
+
+
+def test_comparisons_do_not_round_the_other_operand():
+    """Comparações com int, float ou texto usam todas as casas do outro valor, na maior das escalas."""
+    price = Fixed.from_str('1.00', 2)
+    assert price != 1.004 and price < 1.004, "1.004 não deve ser arredondado para 1.00"
+    assert Fixed.from_str('0.0005', 4) > 0.00049, "0.00049 não deve ser arredondado para 0.0005"
+    assert Fixed.from_str('0.0005', 4) > '4.9e-4' and Fixed.from_str('0.0005', 4) == '5e-4', "Textos devem ser comparados exatamente"
+    assert price == 1 and price == '1.000' and price >= 1.0, "Valores iguais em escalas diferentes são iguais"
+    assert Fixed.from_str('1.00', 2) < Fixed.from_str('1.00000001', 8), "Fixed de escalas diferentes comparam na maior escala"
+    assert Fixed.from_str('-0.01', 2) < -0.009, "A comparação exata vale para negativos"
@@ -0,0 +1,104 @@
+# tests/test_maker_execution.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import execution as execution_module
+from services import maker_execution as maker_module
+from services.execution import ExecutionEngine
+from services.fixed_point import Fixed, SymbolPrecision
+from services.maker_execution import MakerExecution
+from services.order_submission import OrderStatusUnknown
+from services.rate_limiter import RateLimiter
+
+PRECISION = SymbolPrecision('ETHUSDT', quantity_decimals=4, price_decimals=2, step=Fixed.from_str('0.0001', 4),
+                            min_quantity=Fixed.from_str('0.0001', 4), tick=Fixed.from_str('0.01', 2), min_notional=5.0)
+
+
+class StaticMarketData:
+    """Dados de mercado sem rede: só o que o ExecutionEngine consulta."""
+    prices = {}
+
+    def subscribe(self, symbol, callback):
+        pass
+
+
+def new_maker(monkeypatch, cancel_status, lost_responses=0):
+    engine = ExecutionEngine(StaticMarketData(), None, RateLimiter(), retry_delay=0.0)
+    engine.restore_state({'precisions': {'ETHUSDT': PRECISION}})
+    engine.contexts['ETHUSDT'].on_book(2000.0, 2000.5)
+    calls = []
+    placed = {}  # clientOrderId -> ordem maker aceita pela corretora
+
+    def submit_limit_maker_order(symbol, side, quantity, price, client_order_id):
+        calls.append(('maker', quantity, price))
+        placed[client_order_id] = {'orderId': 11, 'clientOrderId': client_order_id, 'status': 'NEW'}
+        if len(calls) <= lost_responses:
+            raise OrderStatusUnknown('timeout')  # A ordem chegou ao book, mas a resposta se perdeu
+        return placed[client_order_id]
+
+    def submit_market_order(symbol, side, quantity, client_order_id):
+        calls.append(('market', quantity))
+        return {'orderId': 12, 'clientOrderId': client_order_id, 'status': 'FILLED', 'executedQty': quantity,
+                'cummulativeQuoteQty': str(float(quantity) * 2000.5),
+                'fills': [{'price': '2000.5', 'qty': quantity, 'commission': '0.0006', 'commissionAsset': 'ETH', 'tradeId': 2}]}
+
+    monkeypatch.setattr(maker_module, 'submit_limit_maker_order', submit_limit_maker_order)
+    monkeypatch.setattr(maker_module, 'get_order_status',
+                        lambda symbol, order_id: {'status': 'PARTIALLY_FILLED', 'executedQty': '0.4000', 'cummulativeQuoteQty': '800.004'})
+    monkeypatch.setattr(maker_module, 'cancel_order', lambda symbol, order_id: cancel_status)
+    monkeypatch.setattr(maker_module, 'get_order_trades', lambda symbol, order_id: [
+        {'price': '2000.01', 'qty': '0.4000', 'commission': '0.0004', 'commissionAsset': 'ETH', 'tradeId': 1}])
+    monkeypatch.setattr(execution_module, 'submit_market_order', submit_market_order)
+    monkeypatch.setattr(execution_module, 'find_order', lambda symbol, client_order_id: placed.get(client_order_id))
+    monkeypatch.setattr(execution_module, 'find_order_in_history', lambda symbol, client_order_id, start_time: placed.get(client_order_id))
+    return MakerExecution(engine, reprice_interval=0.01, deadline=0.05), calls
+
+
+def test_deadline_sends_the_unfilled_rest_to_market(monkeypatch):
+    """Ao fim do prazo, a ordem maker parcial é cancelada e só o restante vai a mercado."""
+    maker, calls = new_maker(monkeypatch, {'status': 'CANCELED', 'executedQty': '0.4000', 'cummulativeQuoteQty': '800.004'})
+    order = asyncio.run(maker.submit({'asset': 'ETHUSDT', 'type': 'buy', 'quantity': 1.0, 'price': 2000.5}))
+
+    assert calls[0] == ('maker', '1.0000', '2000.01'), "A ordem maker deve ficar um tick para dentro do spread"
+    assert calls[-1] == ('market', '0.6000'), "Só o restante não executado deve ir a mercado"
+    assert order['status'] == 'FILLED' and order['executedQty'] == '1.0000', "A decisão deve terminar inteira"
+    assert [fill['tradeId'] for fill in order['fills']] == [1, 2], "As execuções maker e a mercado devem vir juntas"
+    summary = maker.summary()
+    assert abs(summary['maker_fill_rate'] - 0.4) < 1e-9 and abs(summary['taker_fallback_rate'] - 0.6) < 1e-9, \
+        "As taxas maker e a mercado devem refletir a divisão da execução"
+
+
+def test_unconfirmed_cancel_does_not_send_to_market(monkeypatch):
+    """Sem confirmação do cancelamento, o restante não é enviado a mercado (evita posição duplicada)."""
+    maker, calls = new_maker(monkeypatch, None)
+    order = asyncio.run(maker.submit({'asset': 'ETHUSDT', 'type': 'buy', 'quantity': 1.0, 'price': 2000.5}))
+
+    assert all(call[0] == 'maker' for call in calls), "Nenhuma ordem a mercado deve ser enviada"
+    assert order['executedQty'] == '0.0000' and maker.resting, "A ordem maker sem confirmação continua acompanhada"
+
+
+def test_maker_timeout_resolves_the_order_instead_of_placing_another(monkeypatch):
+    """Envio maker sem resposta: a ordem é achada pelo clientOrderId e acompanhada, sem outra ordem filha."""
+    maker, calls = new_maker(monkeypatch, {'status': 'CANCELED', 'executedQty': '0.4000', 'cummulativeQuoteQty': '800.004'},
+                             lost_responses=1)
+    order = asyncio.run(maker.submit({'asset': 'ETHUSDT', 'type': 'buy', 'quantity': 1.0, 'price': 2000.5}))
+
+    assert [call[0] for call in calls] == ['maker', 'market'], "A ordem maker encontrada não deve ser enviada de novo"
+    assert calls[-1] == ('market', '0.6000'), "Só o que a ordem maker não executou deve ir a mercado"
+    assert maker.engine.recovered == 1, "A ordem deve contar como recuperada pela consulta"
+    assert order['executedQty'] == '1.0000', "A execução da ordem recuperada deve entrar no resultado"
+
+
+def test_unresolved_maker_send_stops_without_market_order(monkeypatch):
+    """Sem como confirmar o envio maker, nenhuma outra ordem é enviada (nem a mercado)."""
+    maker, calls = new_maker(monkeypatch, None, lost_responses=1)
+
+    def find_order(symbol, client_order_id):
+        raise OrderStatusUnknown('timeout')
+
+    monkeypatch.setattr(execution_module, 'find_order', find_order)
+    order = asyncio.run(maker.submit({'asset': 'ETHUSDT', 'type': 'buy', 'quantity': 1.0, 'price': 2000.5}))
+
+    assert calls == [('maker', '1.0000', '2000.01')], "Nenhuma outra ordem deve ser enviada"
+    assert order['executedQty'] == '0.0000' and len(maker.resting) == 1, "A ordem sem confirmação continua registrada"
@@ -0,0 +1,59 @@
+# tests/test_metrics.py
+import sys
+import os
+import asyncio
+import json
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.metrics import LatencyRecorder, start_metrics_server
+
+
+def test_span_records_the_duration_of_the_block():
+    """O span registra a duração do bloco, inclusive quando ele termina com exceção."""
+    recorder = LatencyRecorder()
+    with recorder.span('fetch'):
+        time.sleep(0.02)
+    try:
+        with recorder.span('fetch'):
+            raise ValueError('falha')
+    except ValueError:
+        pass
+    assert recorder.counts['fetch'] == 2, "As duas execuções do bloco devem ser medidas"
+    assert recorder.samples['fetch'][0] >= 15, "A duração deve ser registrada em milissegundos"
+
+
+def test_summary_reports_percentiles_over_the_window():
+    """O resumo traz p50/p95/p99 da janela móvel e a contagem desde o início."""
+    recorder = LatencyRecorder(window=100)
+    for duration in range(1, 201):
+        recorder.record('decide', float(duration))
+    stats = recorder.summary()['decide']
+    assert stats['count'] == 200 and stats['window'] == 100, "A janela deve manter só as últimas amostras"
+    assert stats['p50_ms'] == 150.5 and stats['max_ms'] == 200.0, "As estatísticas devem usar só a janela atual"
+    assert stats['p95_ms'] == 195.05 and stats['p99_ms'] == 199.01, "Os percentis devem ser os da janela"
+    assert stats['mean_ms'] == 150.5, "A média deve ser a da janela"
+
+
+def test_metrics_server_answers_with_every_provider():
+    """O endpoint responde um GET com o JSON de todos os providers."""
+    recorder = LatencyRecorder()
+    recorder.record('fetch', 5.0)
+
+    async def scenario():
+        server = await start_metrics_server({'latency': recorder.summary, 'orders': lambda: {'sent': 3}}, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5.0)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    response = asyncio.run(scenario())
+    head, body = response.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200 OK"), "A resposta deve ser 200"
+    assert json.loads(body) == {'latency': recorder.summary(), 'orders': {'sent': 3}}, "O corpo deve trazer todos os providers"
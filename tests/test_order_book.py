@@ -0,0 +1,87 @@
+# tests/test_order_book.py
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.order_book import OrderBook
+
+
+class SimulatedDepthFeed:
+    """Fonte local de profundidade: mantém o book 'verdadeiro' e gera snapshots e eventos 'depthUpdate'."""
+
+    def __init__(self, symbol='BTCUSDT', mid=100.0, levels=50, seed=7):
+        self.symbol = symbol
+        self.random = random.Random(seed)
+        self.update_id = 1000
+        self.bids = {round(mid - 0.01 * i, 2): 1.0 + i % 3 for i in range(1, levels + 1)}
+        self.asks = {round(mid + 0.01 * i, 2): 1.0 + i % 5 for i in range(1, levels + 1)}
+
+    def snapshot(self):
+        return {
+            'lastUpdateId': self.update_id,
+            'bids': [[f"{price:.2f}", f"{quantity:.8f}"] for price, quantity in sorted(self.bids.items(), reverse=True)],
+            'asks': [[f"{price:.2f}", f"{quantity:.8f}"] for price, quantity in sorted(self.asks.items())]
+        }
+
+    def next_event(self, changes=3):
+        first = self.update_id + 1
+        self.update_id += changes
+        bids, asks = [], []
+        for _ in range(changes):
+            side, updates = (self.bids, bids) if self.random.random() < 0.5 else (self.asks, asks)
+            price = self.random.choice(list(side))
+            quantity = 0.0 if self.random.random() < 0.3 and len(side) > 5 else round(self.random.uniform(0.1, 5.0), 4)
+            if quantity:
+                side[price] = quantity
+            else:
+                del side[price]
+            updates.append([f"{price:.2f}", f"{quantity:.8f}"])
+        return {'e': 'depthUpdate', 's': self.symbol, 'U': first, 'u': self.update_id, 'b': bids, 'a': asks}
+
+
+def test_book_syncs_from_snapshot_and_follows_stream():
+    """O book sincroniza a partir do snapshot tirado no meio do stream e acompanha os eventos seguintes."""
+    feed = SimulatedDepthFeed()
+    book = OrderBook('BTCUSDT')
+    early = [feed.next_event() for _ in range(5)]
+    snapshot = feed.snapshot()  # Snapshot tirado no meio do stream
+    late = [feed.next_event() for _ in range(5)]
+    for event in early + late:
+        book.apply_diff(event)
+    assert book.needs_snapshot and not book.synced, "Sem snapshot, os eventos devem ficar guardados"
+
+    book.load_snapshot(snapshot)
+    for _ in range(200):
+        assert book.apply_diff(feed.next_event()), "Eventos em sequência devem ser aplicados"
+    assert book.synced and book.gaps == 0, "O book deve continuar sincronizado"
+
+    best_bid, best_ask = max(feed.bids), min(feed.asks)
+    assert book.best_bid() == (best_bid, feed.bids[best_bid]), "Melhor bid incorreto"
+    assert book.best_ask() == (best_ask, feed.asks[best_ask]), "Melhor ask incorreto"
+    assert len(book.bids) == len(feed.bids) and len(book.asks) == len(feed.asks), "Níveis divergentes do book da fonte"
+
+    limit = best_ask + 0.1
+    expected = sum(quantity for price, quantity in feed.asks.items() if price <= limit)
+    assert abs(book.cumulative_depth('buy', limit) - expected) < 1e-9, "Profundidade acumulada incorreta"
+
+    # Preço médio de uma venda que consome os dois primeiros níveis do bid e metade do terceiro
+    levels = sorted(feed.bids.items(), reverse=True)[:3]
+    quantity = levels[0][1] + levels[1][1] + levels[2][1] / 2
+    quote = levels[0][0] * levels[0][1] + levels[1][0] * levels[1][1] + levels[2][0] * levels[2][1] / 2
+    assert abs(book.fill_price('sell', quantity) - quote / quantity) < 1e-9, "Preço médio pela profundidade incorreto"
+    assert book.fill_price('buy', sum(feed.asks.values()) + 1) is None, "Sem profundidade suficiente não há preço"
+
+
+def test_sequence_gap_requires_new_snapshot():
+    """Uma quebra na sequência dos eventos invalida o book até um novo snapshot."""
+    feed = SimulatedDepthFeed()
+    book = OrderBook('BTCUSDT')
+    book.load_snapshot(feed.snapshot())
+    assert book.apply_diff(feed.next_event()), "O primeiro evento após o snapshot deve ser aplicado"
+    feed.next_event()  # Evento perdido
+    assert not book.apply_diff(feed.next_event()), "Um evento fora de sequência não deve ser aplicado"
+    assert book.needs_snapshot and book.gaps == 1, "A quebra de sequência deve descartar o book"
+
+    book.load_snapshot(feed.snapshot())
+    assert book.apply_diff(feed.next_event()) and book.synced, "O book deve voltar a sincronizar após novo snapshot"
+    assert book.best_bid()[0] == max(feed.bids), "O book ressincronizado deve refletir a fonte"
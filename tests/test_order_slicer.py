@@ -0,0 +1,70 @@
+# tests/test_order_slicer.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.fixed_point import SymbolPrecision
+from services.order_slicer import OrderSlicer, min_child_units, twap_schedule
+
+BTCUSDT_INFO = {
+    'symbol': 'BTCUSDT',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000'},
+        {'filterType': 'LOT_SIZE', 'minQty': '0.00050000', 'stepSize': '0.00050000'},
+        {'filterType': 'NOTIONAL', 'minNotional': '5.00000000'}
+    ]
+}
+
+
+class FakeContext:
+    def __init__(self):
+        self.symbol = 'BTCUSDT'
+        self.precision = SymbolPrecision.from_symbol_info(BTCUSDT_INFO)
+        self.last_price = 100.0
+        self.ask_quantity = self.bid_quantity = 0.04
+
+    def reference_price(self, side, max_book_age=None):
+        return 100.05 if side == 'buy' else 99.95
+
+
+class FakeEngine:
+    max_book_age = 5.0
+
+    def __init__(self):
+        self.ctx = FakeContext()
+
+    async def context(self, symbol):
+        return self.ctx
+
+
+class FakeRouter:
+    """Executa cada filha a mercado com o preço subindo 0,01 a cada ordem."""
+    def __init__(self):
+        self.children = []
+
+    async def submit(self, decision):
+        self.children.append(decision)
+        price = 100.0 + 0.01 * len(self.children)
+        quantity = decision['quantity']
+        return {'executedQty': f"{quantity:.4f}", 'cummulativeQuoteQty': str(quantity * price), 'fills': []}
+
+
+def test_twap_schedule_follows_lot_size():
+    """Testa se as filhas do TWAP são múltiplas do passo, respeitam o mínimo e somam a quantidade-mãe."""
+    precision = SymbolPrecision.from_symbol_info(BTCUSDT_INFO)
+    minimum = min_child_units(precision, 100.0)
+    assert minimum == 500, "5 USDT a 100 exigem 0.0500 (minNotional acima do minQty)"
+    assert twap_schedule(1235, 5, precision.step.units, minimum) == [615, 620], "Só cabem duas filhas acima do mínimo, no passo de 0.0005"
+    assert twap_schedule(5000, 5, precision.step.units, minimum) == [1000] * 5
+
+
+def test_slicer_reports_shortfall_against_arrival():
+    """Testa se o slicer executa toda a ordem-mãe e mede o shortfall em relação ao preço de chegada."""
+    router = FakeRouter()
+    slicer = OrderSlicer(router, FakeEngine(), algorithm='iceberg', duration=0.05, min_interval=0.001)
+    order = asyncio.run(slicer.submit({'asset': 'BTCUSDT', 'type': 'buy', 'quantity': 0.2, 'price': 100.0}))
+    assert order['status'] == 'FILLED' and order['executedQty'] == '0.2000'
+    assert all(child['client_order_id'].startswith(order['clientOrderId']) for child in router.children)
+    report = slicer.reports[-1]
+    assert report.children == len(router.children) >= 2
+    assert 0 < report.shortfall_bps < report.immediate_cost_bps, "Fatiado ficou entre a chegada e o custo de cruzar o spread"
@@ -0,0 +1,103 @@
+# tests/test_order_submission.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.order_submission import OrderStatusUnknown, new_client_order_id, submit_idempotent
+
+NETWORK_LATENCY = 0.05  # Ida e volta (s) simulada de cada chamada
+TIMEOUT = 10.0  # Tempo (s) até o cliente desistir de uma resposta perdida
+
+
+class SimulatedExchange:
+    """Corretora mínima em memória, com relógio simulado e falhas injetadas."""
+
+    def __init__(self, lost_responses=0, failed_sends=0, closed_not_found=False):
+        self.clock = 0.0
+        self.orders = []  # ordens aceitas, na ordem de chegada
+        self.lost_responses = lost_responses  # ordens aceitas cuja resposta se perde (timeout)
+        self.failed_sends = failed_sends  # envios que caem antes de chegar à corretora
+        self.closed_not_found = closed_not_found  # a consulta responde -2013 para ordens já encerradas
+
+    async def sleep(self, seconds):
+        self.clock += seconds
+
+    async def submit(self, client_order_id):
+        if self.failed_sends:
+            self.failed_sends -= 1
+            self.clock += NETWORK_LATENCY
+            raise OrderStatusUnknown('conexão recusada')
+        # Ordens a mercado são executadas na hora: como na Binance, o mesmo clientOrderId só é recusado
+        # enquanto a ordem está aberta, então um reenvio cria outra ordem
+        order = {'orderId': len(self.orders) + 1, 'clientOrderId': client_order_id, 'status': 'FILLED', 'executedQty': '0.001'}
+        self.orders.append(order)
+        if self.lost_responses:
+            self.lost_responses -= 1
+            self.clock += TIMEOUT
+            raise OrderStatusUnknown('timeout')
+        self.clock += NETWORK_LATENCY
+        return order
+
+    async def lookup(self, client_order_id):
+        self.clock += NETWORK_LATENCY
+        if self.closed_not_found:
+            return None
+        return next((order for order in self.orders if order['clientOrderId'] == client_order_id), None)
+
+    async def history(self, client_order_id):
+        self.clock += NETWORK_LATENCY
+        return next((order for order in self.orders if order['clientOrderId'] == client_order_id), None)
+
+
+def submit(exchange, client_order_id, **kwargs):
+    return asyncio.run(submit_idempotent(exchange.submit, exchange.lookup, exchange.history, client_order_id,
+                                         retry_delay=0.25, sleep=exchange.sleep, **kwargs))
+
+
+def test_lost_response_does_not_duplicate_order():
+    """Resposta perdida de uma ordem aceita: a consulta recupera a ordem e nada é reenviado."""
+    exchange = SimulatedExchange(lost_responses=1)
+    client_order_id = new_client_order_id()
+    result = submit(exchange, client_order_id)
+    assert len(exchange.orders) == 1, "A ordem aceita não deve ser reenviada"
+    assert result.recovered and result.submits == 1 and result.lookups == 1, "A ordem deve ser recuperada pela consulta"
+    assert result.order['clientOrderId'] == client_order_id, "A resposta deve ser a da ordem original"
+    # Depois do timeout, a recuperação custa apenas a espera curta e uma consulta (sem backoff exponencial)
+    assert exchange.clock - TIMEOUT < 0.5, "A recuperação deve levar menos de meio segundo"
+
+
+def test_lost_send_is_resent_with_same_id():
+    """Envio que não chegou à corretora é reenviado com o mesmo clientOrderId; sem confirmação, fica não resolvido."""
+    exchange = SimulatedExchange(failed_sends=2)
+    result = submit(exchange, 'ex-teste')
+    assert result.resolved and not result.recovered, "A ordem deve ser enviada após confirmar que não existia"
+    assert result.submits == 3 and result.lookups == 4, "Cada reenvio deve ser precedido da consulta e do histórico"
+    assert [order['clientOrderId'] for order in exchange.orders] == ['ex-teste'], "Deve existir uma única ordem com o clientOrderId original"
+    assert exchange.clock < 1.0, "Três tentativas devem caber em menos de um segundo"
+
+    # Corretora indisponível: sem confirmação, a ordem fica em aberto em vez de ser reenviada às cegas
+    exchange = SimulatedExchange(failed_sends=5)
+    result = submit(exchange, 'ex-outro', attempts=2)
+    assert not result.resolved and result.order is None, "Sem confirmação, o envio deve ficar como não resolvido"
+    assert result.submits == 2, "O número de envios deve respeitar o limite de tentativas"
+
+
+def test_closed_order_reported_missing_is_found_in_history():
+    """Ordem executada e encerrada que a consulta dá como inexistente (-2013) é achada no histórico, sem reenvio."""
+    exchange = SimulatedExchange(lost_responses=1, closed_not_found=True)
+    result = submit(exchange, 'ex-encerrada')
+    assert len(exchange.orders) == 1, "A ordem encontrada no histórico não deve ser reenviada"
+    assert result.recovered and result.submits == 1 and result.lookups == 2, "A ordem deve ser recuperada pelo histórico"
+
+
+def test_inconclusive_history_does_not_resend():
+    """Se o histórico não puder ser consultado, a ordem fica não resolvida em vez de ser reenviada."""
+    exchange = SimulatedExchange(lost_responses=1, closed_not_found=True)
+
+    async def history(client_order_id):
+        raise OrderStatusUnknown('timeout')
+
+    exchange.history = history
+    result = submit(exchange, 'ex-sem-historico')
+    assert not result.resolved and result.submits == 1, "Sem confirmação no histórico a ordem não deve ser reenviada"
+    assert len(exchange.orders) == 1, "Não deve existir uma segunda ordem"
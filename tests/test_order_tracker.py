@@ -0,0 +1,120 @@
+# tests/test_order_tracker.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import order_tracker as order_tracker_module
+from services.order_tracker import OrderTracker
+
+
+class FreeRateLimiter:
+    """Limitador que nunca espera; conta os pesos pedidos."""
+
+    def __init__(self):
+        self.weights = []
+
+    async def acquire(self, weight=1):
+        self.weights.append(weight)
+
+
+def new_order(status='NEW', executed='0', quote='0', fills=None):
+    order = {'symbol': 'ETHUSDT', 'orderId': 7, 'clientOrderId': 'bot-1', 'side': 'BUY', 'origQty': '1.0',
+             'status': status, 'executedQty': executed, 'cummulativeQuoteQty': quote}
+    if fills is not None:
+        order['fills'] = fills
+    return order
+
+
+def trade_event(status, trade_id, last_qty, executed, quote, commission):
+    return {'e': 'executionReport', 's': 'ETHUSDT', 'c': 'bot-1', 'S': 'BUY', 'i': 7, 'q': '1.0', 'x': 'TRADE',
+            'X': status, 't': trade_id, 'l': str(last_qty), 'z': str(executed), 'Z': str(quote),
+            'n': str(commission), 'N': 'BNB'}
+
+
+def tracker_with_fills():
+    tracker = OrderTracker(min_poll_interval=0.01, max_poll_interval=0.01)
+    fills = []
+    tracker.add_listener(lambda tracked, fill, previous_status: fills.append(fill) if fill is not None else None)
+    return tracker, fills
+
+
+def test_partial_fill_then_fill_applies_each_increment_once():
+    """Parcial seguido de total pelo user data stream: cada incremento chega uma vez, com a sua comissão."""
+    tracker, fills = tracker_with_fills()
+    tracker.track(new_order())
+    tracker.on_execution_report(trade_event('PARTIALLY_FILLED', 1, 0.4, 0.4, 800.0, 0.001))
+    tracker.on_execution_report(trade_event('FILLED', 2, 0.6, 1.0, 2000.0, 0.002))
+
+    assert [fill.quantity for fill in fills] == [0.4, 0.6], "Cada execução deve gerar o seu incremento"
+    assert [fill.quote_quantity for fill in fills] == [800.0, 1200.0], "O valor do incremento deve ser a diferença acumulada"
+    assert [fill.commissions for fill in fills] == [{'BNB': 0.001}, {'BNB': 0.002}], "Cada incremento deve trazer a comissão do seu trade"
+    tracked = tracker.get('bot-1')
+    assert tracked.status == 'FILLED' and not tracker.open_orders, "A ordem executada deve sair das ordens abertas"
+
+
+def test_duplicate_and_late_events_apply_nothing():
+    """Eventos repetidos ou atrasados não aplicam a execução de novo nem reabrem a ordem."""
+    tracker, fills = tracker_with_fills()
+    tracker.track(new_order())
+    partial = trade_event('PARTIALLY_FILLED', 1, 0.4, 0.4, 800.0, 0.001)
+    tracker.on_execution_report(partial)
+    tracker.on_execution_report(trade_event('FILLED', 2, 0.6, 1.0, 2000.0, 0.002))
+
+    assert tracker.on_execution_report(partial) is False, "O evento repetido não deve mudar nada"
+    assert len(fills) == 2, "O evento repetido não deve gerar incremento"
+    assert tracker.get('bot-1').status == 'FILLED', "Um evento atrasado não deve reabrir a ordem"
+
+
+def run_tracker_until(tracker, condition):
+    async def scenario():
+        task = asyncio.create_task(tracker.run(None, FreeRateLimiter()))
+        try:
+            for _ in range(200):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_polled_fill_fetches_trades_and_later_event_adds_nothing(monkeypatch):
+    """A execução vista na consulta busca os trades (comissões); o evento do mesmo trade não duplica nada."""
+    tracker, fills = tracker_with_fills()
+    tracker.track(new_order())
+    trades_fetched = []
+    monkeypatch.setattr(order_tracker_module, 'get_order_status',
+                        lambda symbol, order_id: new_order('PARTIALLY_FILLED', '0.4', '800.0'))
+
+    def get_order_trades(symbol, order_id):
+        trades_fetched.append(order_id)
+        return [{'price': '2000.0', 'qty': '0.4', 'commission': '0.001', 'commissionAsset': 'BNB', 'tradeId': 1}]
+
+    monkeypatch.setattr(order_tracker_module, 'get_order_trades', get_order_trades)
+    run_tracker_until(tracker, lambda: fills)
+
+    assert trades_fetched == [7], "Os trades devem ser buscados uma vez, só quando a consulta traz execução nova"
+    assert fills[0].quantity == 0.4 and fills[0].commissions == {'BNB': 0.001}, "A execução da consulta deve trazer a comissão"
+    assert tracker.on_execution_report(trade_event('PARTIALLY_FILLED', 1, 0.4, 0.4, 800.0, 0.001)) is False, \
+        "O evento de um trade já contado pela consulta não deve mudar nada"
+    assert len(fills) == 1, "O evento de um trade já contado não deve gerar incremento"
+
+
+def test_event_after_poll_without_trades_applies_only_commission(monkeypatch):
+    """Se a busca dos trades falhou, o evento posterior do mesmo trade aplica só a comissão."""
+    tracker, fills = tracker_with_fills()
+    tracker.track(new_order())
+    monkeypatch.setattr(order_tracker_module, 'get_order_status',
+                        lambda symbol, order_id: new_order('PARTIALLY_FILLED', '0.4', '800.0'))
+
+    def get_order_trades(symbol, order_id):
+        raise ConnectionError('timeout')
+
+    monkeypatch.setattr(order_tracker_module, 'get_order_trades', get_order_trades)
+    run_tracker_until(tracker, lambda: fills)
+    tracker.on_execution_report(trade_event('PARTIALLY_FILLED', 1, 0.4, 0.4, 800.0, 0.001))
+
+    assert [fill.quantity for fill in fills] == [0.4, 0.0], "A quantidade já aplicada pela consulta não deve ser repetida"
+    assert fills[1].commissions == {'BNB': 0.001} and fills[1].quote_quantity == 0.0, "O evento deve aplicar só a comissão"
+    assert tracker.get('bot-1').traded == 0.4, "A quantidade coberta por trades conhecidos deve ser registrada"
@@ -0,0 +1,34 @@
+# tests/test_rate_limiter.py
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.rate_limiter import RateLimiter
+
+
+def test_requests_wait_for_refill_in_arrival_order():
+    """Sem peso disponível, as requisições esperam a reposição e são atendidas na ordem de chegada."""
+    limiter = RateLimiter(max_weight=10, period=0.1)  # 100 de peso por segundo
+    order = []
+
+    async def request(name, weight):
+        await limiter.acquire(weight)
+        order.append((name, time.monotonic()))
+
+    async def scenario():
+        start = time.monotonic()
+        await asyncio.gather(request('a', 10), request('b', 5), request('c', 5))
+        return start
+
+    start = asyncio.run(scenario())
+    assert [name for name, _ in order] == ['a', 'b', 'c'], "As requisições devem ser atendidas em ordem de chegada"
+    assert order[0][1] - start < 0.02, "A primeira requisição cabe no peso inicial"
+    assert order[-1][1] - start >= 0.09, "As seguintes devem esperar a reposição do peso"
+
+
+def test_weight_above_capacity_is_capped():
+    """Um peso maior que a capacidade não trava: é limitado à capacidade do bucket."""
+    limiter = RateLimiter(max_weight=5, period=0.05)
+    asyncio.run(asyncio.wait_for(limiter.acquire(50), timeout=1.0))
+    assert limiter.available < 1, "O peso consumido deve ser o da capacidade inteira"
@@ -0,0 +1,67 @@
+# tests/test_reconciliation.py
+import sys
+import os
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import portfolio_manager as portfolio_manager_module
+from services.portfolio_manager import PortfolioManager
+from services.reconciliation import FillReconciler, OrderFill
+
+
+def balances(**amounts):
+    return pd.DataFrame([{'asset': asset, 'free': amount, 'locked': 0.0} for asset, amount in amounts.items()])
+
+
+def new_portfolio(monkeypatch, **amounts):
+    monkeypatch.setattr(portfolio_manager_module, 'get_account_balance', lambda: balances(**amounts))
+    return PortfolioManager()
+
+
+def buy(quantity, quote, commissions=None):
+    return OrderFill('ETHUSDT', 'buy', quantity, quote, commissions or {})
+
+
+def test_fill_applied_during_balance_fetch_is_not_reverted(monkeypatch):
+    """Uma execução aplicada enquanto os saldos eram consultados não é desfeita pela reconciliação."""
+    portfolio = new_portfolio(monkeypatch, USDT=1000.0)
+    reconciler = FillReconciler(portfolio)
+    sequence = reconciler.fill_sequence  # Capturada antes da consulta, como em run()
+    reconciler.apply_fill(buy(0.1, 200.0, {'BNB': 0.001}), 'ETH')
+    drift = reconciler.reconcile(balances(USDT=1000.0), sequence)
+
+    assert drift == {}, "Os ativos alterados depois da consulta não devem ser corrigidos"
+    assert portfolio.get_balance('ETH') == 0.1 and portfolio.cash_balance == 800.0, "A execução deve continuar aplicada"
+    assert reconciler.skipped == 2, "O caixa e o ativo comprado devem ficar para a próxima comparação"
+
+    drift = reconciler.reconcile(balances(USDT=800.0, ETH=0.1), reconciler.fill_sequence)
+    assert drift == {} and reconciler.corrections == 0, "Com os saldos atualizados não deve haver desvio"
+
+
+def test_drift_without_new_fills_is_corrected(monkeypatch):
+    """Sem execuções depois da consulta, o desvio é corrigido com o saldo da corretora."""
+    portfolio = new_portfolio(monkeypatch, USDT=1000.0)
+    reconciler = FillReconciler(portfolio)
+    reconciler.apply_fill(buy(0.1, 200.0), 'ETH')
+    drift = reconciler.reconcile(balances(USDT=800.0, ETH=0.09), reconciler.fill_sequence)
+
+    assert drift == {'ETH': (0.1, 0.09)}, "O desvio do ativo deve ser informado"
+    assert portfolio.get_balance('ETH') == 0.09, "O saldo local deve passar a ser o da corretora"
+
+
+def test_sell_of_untracked_asset_books_no_realized_pnl(monkeypatch):
+    """A venda de um ativo sem posição acompanhada credita o caixa sem inventar resultado realizado."""
+    portfolio = new_portfolio(monkeypatch, USDT=1000.0)
+    portfolio.apply_fill('ETH', 'sell', 0.1, 200.0, {'USDT': 0.2})
+
+    assert portfolio.cash_balance == 1199.8, "O valor recebido deve entrar no caixa"
+    assert portfolio.profit_loss_cumulative == 0.0, "Sem custo conhecido não há resultado realizado"
+
+
+def test_sell_beyond_tracked_position_books_only_the_tracked_part(monkeypatch):
+    """Na venda maior que a posição acompanhada, só a parte com custo conhecido gera resultado."""
+    portfolio = new_portfolio(monkeypatch, USDT=1000.0)
+    portfolio.apply_fill('ETH', 'buy', 0.1, 150.0)
+    portfolio.apply_fill('ETH', 'sell', 0.2, 400.0)
+
+    assert portfolio.profit_loss_cumulative == 50.0, "Metade do valor recebido menos o custo da posição acompanhada"
+    assert 'ETH' not in portfolio.assets, "A posição acompanhada deve ser zerada"
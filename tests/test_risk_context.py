@@ -0,0 +1,51 @@
+# tests/test_risk_context.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from strategies.risk_context import summarize_orders
+from strategies.risk_rules import check_order, evaluate_orders
+from strategies.snapshot import PortfolioState, RiskContext, RiskState
+
+
+def order(side, price, status='FILLED'):
+    return {'side': side, 'price': str(price), 'status': status}
+
+
+def make_context(consecutive_buys=0, consecutive_sells=0, block_counts=(0, 0), stop_status='continue'):
+    return RiskContext(
+        asset='BTCUSDT', time=0.0, market_trend='bullish', max_consecutive_trades=5,
+        portfolio=PortfolioState(cash_balance=10_000.0, asset_quantity=1.0, investment_percentage=0.05,
+                                 reserve_cash=100.0, stop_status=stop_status),
+        risk=RiskState(consecutive_buys=consecutive_buys, consecutive_sells=consecutive_sells,
+                       consecutive_sell_blocks=block_counts[0], consecutive_buy_blocks=block_counts[1])
+    )
+
+
+def test_summarize_orders_single_pass():
+    """Testa se uma única consulta fornece as contagens consecutivas e as médias das ordens executadas."""
+    orders = [order('BUY', 90), order('SELL', 110), order('BUY', 100), order('BUY', 999, status='CANCELED'), order('BUY', 102)]
+    stats = summarize_orders(orders, recent_limit=2, fetched_at=1.0)
+    assert (stats.consecutive_buys, stats.consecutive_sells) == (2, 0), "Conta apenas as compras após a última venda"
+    assert stats.average_price('buy', recent_only=False) == 292 / 3, "Ordens canceladas não entram na média"
+    assert stats.average_price('buy', recent_only=True) == 101.0, "A média recente usa as últimas 'recent_limit' ordens"
+    assert stats.average_price('sell') == 110.0
+    assert summarize_orders(None).consecutive_buys == 0, "Resposta inválida resulta em estatísticas vazias"
+
+
+def test_batch_evaluation_matches_sequential_checks():
+    """Testa se a avaliação em lote equivale a verificações sucessivas com os contadores de bloqueio encadeados."""
+    context = make_context(consecutive_buys=5, block_counts=(3, 0))
+    candidates = [('buy', 0.01, 100.0), ('sell', 0.01, 100.0), ('buy', 0.01, 100.0), ('sell', 2.0, 100.0)]
+    results, block_counts = evaluate_orders(context, candidates)
+    assert results == [False, True, False, False], "Compras bloqueadas pelo limite e venda acima do saldo recusada"
+    assert block_counts == (0, 2), "Cada compra bloqueada incrementa o contador de compras"
+
+    blocks = context.block_counts
+    for (transaction_type, quantity, price), expected in zip(candidates, results):
+        allowed, new_blocks = check_order(context, transaction_type, quantity, price, blocks)
+        blocks = new_blocks or blocks
+        assert allowed == expected
+    assert blocks == block_counts
+
+    stopped = make_context(stop_status='stop_loss')
+    assert evaluate_orders(stopped, candidates)[0] == [False] * 4, "Status de stop bloqueia todas as ordens"
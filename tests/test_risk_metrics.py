@@ -0,0 +1,64 @@
+# tests/test_risk_metrics.py
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import portfolio_manager as portfolio_manager_module
+from services.portfolio_manager import PortfolioManager
+from services.risk_metrics import RiskMetrics
+
+
+def test_drawdown_tracks_the_peak_incrementally():
+    """O drawdown é medido contra o pico da curva e o máximo não diminui com a recuperação."""
+    metrics = RiskMetrics(initial_equity=1000.0)
+    for timestamp, equity in enumerate([1100.0, 990.0, 1050.0, 1200.0, 1140.0]):
+        snapshot = metrics.on_valuation(equity, 0.5, 0.0, 0.0, timestamp=float(timestamp))
+        if timestamp == 1:
+            assert abs(snapshot.drawdown - 0.1) < 1e-12, "A queda de 1100 para 990 é de 10%"
+    assert snapshot.peak_equity == 1200.0, "O pico deve acompanhar o maior patrimônio"
+    assert abs(snapshot.drawdown - 0.05) < 1e-12, "O drawdown atual é medido contra o pico atual"
+    assert abs(snapshot.max_drawdown - 0.1) < 1e-12, "O drawdown máximo deve ser mantido após a recuperação"
+    assert len(metrics.equity_curve) == 5, "Cada avaliação entra na curva de patrimônio"
+
+
+def test_volatility_from_running_sums_matches_the_window():
+    """A volatilidade pelas somas acumuladas é o desvio padrão amostral dos retornos da janela."""
+    metrics = RiskMetrics(initial_equity=100.0, volatility_window=4)
+    equities = [100.0, 101.0, 99.5, 102.0, 101.0, 103.5, 102.5]
+    for timestamp, equity in enumerate(equities):
+        metrics.on_valuation(equity, 0.0, 0.0, 0.0, timestamp=float(timestamp))
+
+    returns = np.array(equities[1:]) / np.array(equities[:-1]) - 1
+    assert len(metrics.returns) == 4, "Só os últimos retornos ficam na janela"
+    assert abs(metrics.volatility - returns[-4:].std(ddof=1)) < 1e-12, "Os retornos que saem da janela devem ser descontados"
+    assert metrics.snapshot.volatility == metrics.volatility, "O snapshot deve publicar a volatilidade atual"
+    assert RiskMetrics().volatility == 0.0, "Sem dois retornos a volatilidade é zero"
+
+
+def test_turnover_accumulates_fills():
+    """Cada execução soma o valor negociado ao giro, sem alterar o patrimônio publicado."""
+    metrics = RiskMetrics(initial_equity=1000.0)
+    metrics.on_valuation(1000.0, 0.0, 0.0, 0.0, timestamp=1.0)
+    metrics.on_fill(200.0)
+    metrics.on_fill(-300.0)
+    snapshot = metrics.snapshot
+    assert snapshot.turnover == 500.0 and snapshot.fills == 2, "O giro deve somar o valor absoluto das execuções"
+    assert snapshot.turnover_ratio == 0.5 and snapshot.equity == 1000.0, "O giro relativo usa o patrimônio atual"
+
+
+def test_max_drawdown_pauses_trading(monkeypatch):
+    """O PortfolioManager pausa as operações quando o drawdown atual atinge o limite configurado."""
+    monkeypatch.setattr(portfolio_manager_module, 'get_account_balance',
+                        lambda: pd.DataFrame([{'asset': 'USDT', 'free': 1000.0, 'locked': 0.0}]))
+    portfolio = PortfolioManager(max_drawdown=0.1)
+    portfolio.risk_metrics.on_valuation(950.0, 0.0, 0.0, 0.0)
+    assert portfolio.check_stop_loss_take_profit() == 'continue', "Uma queda abaixo do limite não pausa"
+    portfolio.risk_metrics.on_valuation(900.0, 0.0, 0.0, 0.0)
+    assert portfolio.check_stop_loss_take_profit() == 'max_drawdown', "A queda de 10% deve pausar as operações"
+    portfolio.risk_metrics.on_valuation(1000.0, 0.0, 0.0, 0.0)
+    assert portfolio.check_stop_loss_take_profit() == 'continue', "Recuperado o pico, as operações voltam"
+
+    unlimited = PortfolioManager()
+    unlimited.risk_metrics.on_valuation(850.0, 0.0, 0.0, 0.0)
+    assert unlimited.check_stop_loss_take_profit() == 'continue', "Sem limite configurado o drawdown não pausa"
@@ -0,0 +1,83 @@
+# tests/test_scheduler.py
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.scheduler import EvaluationTrigger
+
+
+def new_trigger(**kwargs):
+    """Gatilho no relógio do event loop (time.monotonic), sem espaçamento mínimo salvo quando informado."""
+    kwargs.setdefault('min_interval_seconds', 0.0)
+    return EvaluationTrigger('ETHUSDT', clock=time.monotonic, **kwargs)
+
+
+def test_candle_close_fires_an_evaluation():
+    """Sem eventos, a avaliação acontece no fechamento do candle."""
+    async def scenario():
+        trigger = new_trigger(candle_seconds=0.05, heartbeat_seconds=60.0)
+        trigger.mark_evaluated(2000.0)
+        return await asyncio.wait_for(trigger.wait(), timeout=1.0)
+
+    assert asyncio.run(scenario()) == 'candle_close', "O fechamento do candle deve disparar a avaliação"
+
+
+def test_heartbeat_fires_when_the_market_is_quiet():
+    """Sem eventos e longe do fechamento do candle, o heartbeat dispara a avaliação."""
+    async def scenario():
+        trigger = new_trigger(candle_seconds=1e9, heartbeat_seconds=0.05)
+        trigger.mark_evaluated(2000.0)
+        return await asyncio.wait_for(trigger.wait(), timeout=1.0)
+
+    assert asyncio.run(scenario()) == 'heartbeat', "O heartbeat deve disparar a avaliação com o mercado parado"
+
+
+def test_price_move_fires_only_above_the_threshold_in_bps():
+    """A variação de preço dispara a avaliação a partir do limite em bps sobre o preço da última avaliação."""
+    async def scenario():
+        trigger = new_trigger(move_threshold_bps=20.0)
+        trigger.on_price(3000.0)
+        assert not trigger._event.is_set(), "Sem avaliação anterior não há preço de referência"
+        trigger.mark_evaluated(2000.0)
+        trigger.on_price(2003.0)  # 15 bps
+        assert not trigger._event.is_set(), "Uma variação abaixo do limite não deve disparar"
+        trigger.on_price(1995.9)  # 20,5 bps para baixo
+        return await asyncio.wait_for(trigger.wait(), timeout=1.0)
+
+    assert asyncio.run(scenario()) == 'price_move', "A variação acima do limite deve disparar a avaliação"
+
+
+def test_fill_fires_and_keeps_the_first_reason():
+    """Uma execução dispara a avaliação; eventos seguintes antes dela não trocam o motivo."""
+    async def scenario():
+        trigger = new_trigger()
+        trigger.mark_evaluated(2000.0)
+        trigger.on_fill()
+        trigger.on_price(2100.0)
+        return await asyncio.wait_for(trigger.wait(), timeout=1.0)
+
+    assert asyncio.run(scenario()) == 'fill', "O motivo deve ser o do primeiro gatilho"
+
+
+def test_mark_evaluated_resets_the_trigger():
+    """Depois da avaliação o gatilho é rearmado: motivo limpo e nova referência de preço."""
+    async def scenario():
+        trigger = new_trigger(move_threshold_bps=20.0, min_interval_seconds=0.05)
+        trigger.mark_evaluated(2000.0)
+        trigger.on_price(2010.0)  # 50 bps
+        assert await asyncio.wait_for(trigger.wait(), timeout=1.0) == 'price_move'
+
+        trigger.mark_evaluated(2010.0)
+        assert trigger.reason is None and not trigger._event.is_set(), "A avaliação deve limpar o gatilho"
+        trigger.on_price(2012.0)  # 10 bps sobre a nova referência
+        assert not trigger._event.is_set(), "A variação deve ser medida a partir do novo preço de referência"
+
+        trigger.on_fill()
+        started = time.monotonic()
+        reason = await asyncio.wait_for(trigger.wait(), timeout=1.0)
+        return reason, time.monotonic() - started
+
+    reason, waited = asyncio.run(scenario())
+    assert reason == 'fill', "O gatilho rearmado deve disparar de novo"
+    assert waited >= 0.04, "Avaliações seguidas devem respeitar o espaçamento mínimo"
@@ -0,0 +1,65 @@
+# tests/test_shared_market_data.py
+import sys
+import os
+import multiprocessing
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.shared_market_data import SharedMarketData
+
+
+def candles(start, count, close=100.0):
+    """Candles de 1 minuto a partir do minuto 'start', com fechamento constante."""
+    return pd.DataFrame({
+        'timestamp': [(start + i) * 60_000 for i in range(count)],
+        'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0
+    })
+
+
+def test_ring_appends_overwrites_and_drops_oldest():
+    """O ring acrescenta candles novos, sobrescreve o candle em formação e descarta os mais antigos."""
+    shared = SharedMarketData(['BTCUSDT', 'ETHUSDT'], capacity=5)
+    try:
+        assert shared.read_candles('BTCUSDT') is None, "Sem escrita não deve haver candles"
+        shared.write_candles('BTCUSDT', candles(0, 3))
+        # Consulta incremental: repete o último candle (ainda em formação) com novo fechamento e traz 3 novos
+        shared.write_candles('BTCUSDT', candles(2, 4, close=101.0))
+        df = shared.read_candles('BTCUSDT')
+        assert list(df['timestamp'] // 60_000) == [1, 2, 3, 4, 5], "O ring deve manter os 5 candles mais recentes em ordem"
+        assert df['close'].iloc[1] == 101.0, "O candle repetido deve ser sobrescrito"
+        assert shared.write_candles('BTCUSDT', candles(0, 2)) == 0, "Candles mais antigos que o último não devem ser gravados"
+        assert shared.read_candles('ETHUSDT') is None, "Cada símbolo tem o seu ring"
+
+        shared.publish_prices({'BTCUSDT': 50_000.0, 'XRPUSDT': 1.0})
+        assert shared.read_prices() == {'BTCUSDT': 50_000.0}, "Somente os símbolos conhecidos com preço devem ser lidos"
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def read_while_writing(shared, rounds, inconsistent):
+    for _ in range(rounds):
+        df = shared.read_candles('BTCUSDT')
+        # Cada escrita substitui o ring inteiro por candles com o mesmo fechamento: uma leitura
+        # misturada teria fechamentos diferentes
+        if df is not None and df['close'].nunique() != 1:
+            inconsistent.value += 1
+
+
+def test_reader_in_other_process_never_sees_torn_write():
+    """Um leitor em outro processo nunca vê uma escrita pela metade (seqlock)."""
+    shared = SharedMarketData(['BTCUSDT'], capacity=200)
+    context = multiprocessing.get_context('fork')
+    inconsistent = context.Value('i', 0)
+    reader = context.Process(target=read_while_writing, args=(shared, 2000, inconsistent))
+    try:
+        reader.start()
+        step = 0
+        while reader.is_alive():
+            step += 1
+            shared.write_candles('BTCUSDT', candles(step * 200, 200, close=float(step)))
+        reader.join()
+        assert reader.exitcode == 0, "O processo leitor deve terminar sem erro"
+        assert inconsistent.value == 0, f"{inconsistent.value} leituras misturaram duas escritas"
+    finally:
+        shared.close()
+        shared.unlink()
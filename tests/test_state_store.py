@@ -0,0 +1,63 @@
+# tests/test_state_store.py
+import sys
+import os
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.state_store import StateStore
+
+
+def stored_trades(path):
+    """Quantidade de transações já gravadas, vista por outra conexão (o que sobreviveria a uma queda)."""
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_database_uses_wal(tmp_path):
+    """O banco é aberto em modo WAL com synchronous=NORMAL."""
+    store = StateStore(str(tmp_path / 'state.db'))
+    assert store.connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal', "O banco deve usar WAL"
+    assert store.connection.execute("PRAGMA synchronous").fetchone()[0] == 1, "synchronous deve ser NORMAL"
+    store.close()
+
+
+def test_writes_are_committed_in_batches(tmp_path):
+    """As transações ficam pendentes até 'commit_every' escritas e então são gravadas juntas."""
+    path = str(tmp_path / 'state.db')
+    store = StateStore(path, commit_every=3)
+    store.record_trade('ETHUSDT', 'buy', 2000.0, 0.1, timestamp=1.0)
+    store.record_trade('ETHUSDT', 'buy', 2010.0, 0.1, timestamp=2.0)
+    assert stored_trades(path) == 0 and len(store._pending_trades) == 2, "Abaixo do lote nada deve ser gravado"
+    store.record_trade('ETHUSDT', 'sell', 2100.0, 0.2, timestamp=3.0)
+    assert stored_trades(path) == 3 and not store._pending_trades, "O lote completo deve ser gravado de uma vez"
+    store.record_trade('ETHUSDT', 'buy', 2050.0, 0.1, timestamp=4.0)
+    store.close()
+    assert stored_trades(path) == 4, "O fechamento deve gravar as escritas pendentes"
+
+
+def test_reopen_reads_back_trades_counters_and_snapshot(tmp_path):
+    """Depois de reabrir o banco, transações, contadores e o último snapshot são lidos de volta."""
+    path = str(tmp_path / 'state.db')
+    store = StateStore(path)
+    store.record_trade('ETHUSDT', 'buy', 2000.0, 0.1, timestamp=1.0)
+    store.record_trade('ETHUSDT', 'buy', 1900.0, 0.3, timestamp=2.0)
+    store.record_trade('ETHUSDT', 'sell', 2100.0, 0.4, timestamp=3.0)
+    store.record_trade('BTCUSDT', 'buy', 60000.0, 0.01, timestamp=4.0)
+    store.set_counters('ETHUSDT', consecutive_sell_blocks=2, consecutive_buy_blocks=0)
+    store.save_portfolio_snapshot(500.0, 12.5, {'ETH': {'quantity': 0.0}}, timestamp=5.0)
+    store.save_portfolio_snapshot(480.0, 15.0, {'ETH': {'quantity': 0.1}}, timestamp=6.0)
+    store.close()
+
+    store = StateStore(path)
+    assert store.trades('ETHUSDT', 'buy') == [(1.0, 2000.0, 0.1), (2.0, 1900.0, 0.3)], "As compras devem voltar em ordem cronológica"
+    assert store.recent_trades('ETHUSDT', 'buy', limit=1) == [(2.0, 1900.0, 0.3)], "A consulta recente começa pela última"
+    assert store.get_counters('ETHUSDT') == {'consecutive_sell_blocks': 2, 'consecutive_buy_blocks': 0}, \
+        "Os contadores devem ser lidos de volta"
+    assert store.get_last_portfolio_snapshot() == {'time': 6.0, 'cash_balance': 480.0, 'profit_loss_cumulative': 15.0,
+                                                   'assets': {'ETH': {'quantity': 0.1}}}, "Deve voltar o snapshot mais recente"
+    assert store.average_price('ETHUSDT', 'buy', since_seconds=10, now=5.0) == 1950.0, "A média deve cobrir a janela"
+    assert abs(store.vwap('ETHUSDT', 'buy', since_seconds=10, now=5.0) - 1925.0) < 1e-9, "O VWAP deve ponderar pela quantidade"
+    assert store.average_price('ETHUSDT', 'buy', since_seconds=1, now=10.0) is None, "Sem transações na janela não há média"
+    store.close()
@@ -0,0 +1,62 @@
+# tests/test_strategy.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from strategies.snapshot import MarketState, PortfolioState, RiskState, SideMemory, StrategySnapshot, TradeMemory
+from strategies.small_portfolio import decide_small_portfolio
+
+NOW = 1_700_000_000.0
+
+
+def make_snapshot(price=100.0, rsi=60.0, buys=None, sells=None, risk=None, portfolio=None, last_buy=99.0, last_sell=101.0):
+    return StrategySnapshot(
+        market=MarketState(asset='BTCUSDT', price=price, time=NOW, short_ma=100.0, long_ma=100.0,
+                           rsi=rsi, volume_filter=True, market_trend='bullish'),
+        portfolio=portfolio or PortfolioState(cash_balance=10_000.0, asset_quantity=1.0,
+                                              investment_percentage=0.05, reserve_cash=100.0),
+        memory=TradeMemory(
+            buys=buys or SideMemory(average_price=99.0, last_price=99.0, last_time=NOW - 60),
+            sells=sells or SideMemory(average_price=101.0, last_price=101.0, last_time=NOW - 60),
+            last_buy=last_buy,
+            last_sell=last_sell
+        ),
+        risk=risk or RiskState()
+    )
+
+
+def test_buy_decision_returns_record_delta():
+    """Testa se uma compra gera o registro da transação e zera os contadores de bloqueio."""
+    decision, delta = decide_small_portfolio(make_snapshot(rsi=40.0))
+    assert decision['type'] == 'buy', "RSI baixo deve gerar uma compra"
+    assert decision['quantity'] == 0.05, "A quantidade deve respeitar o percentual de investimento"
+    assert delta.record == ('buys', 100.0), "A compra deve ser registrada no delta"
+    assert delta.block_counts == (0, 0), "Os contadores de bloqueio devem ser zerados"
+
+
+def test_stale_memory_is_reset_without_side_effects():
+    """Testa se a memória desatualizada é limpa apenas no delta, sem alterar o snapshot."""
+    stale = SideMemory(average_price=99.0, last_price=99.0, last_time=NOW - 5 * 60 * 60)
+    snapshot = make_snapshot(buys=stale)
+    decision, delta = decide_small_portfolio(snapshot)
+    assert 'buys' in delta.reset_sides, "Compras com mais de 4 horas devem ser limpas"
+    assert snapshot.memory.buys is stale, "O snapshot não deve ser modificado"
+
+
+def test_consecutive_limit_increments_block_counts():
+    """Testa se o limite de transações consecutivas incrementa os contadores no delta."""
+    risk = RiskState(consecutive_buys=5, consecutive_sells=5, consecutive_sell_blocks=2, consecutive_buy_blocks=0)
+    decision, delta = decide_small_portfolio(make_snapshot(rsi=40.0, risk=risk))
+    assert decision['type'] == 'hold', "Com os limites atingidos a decisão deve ser hold"
+    assert delta.block_counts == (1, 0), "O último bloqueio (venda) deve ser o persistido"
+
+
+def test_missing_indicators_hold():
+    """Testa se indicadores ausentes resultam em hold sem alterações de estado."""
+    snapshot = make_snapshot()
+    snapshot = StrategySnapshot(
+        market=MarketState(asset='BTCUSDT', price=100.0, time=NOW),
+        portfolio=snapshot.portfolio, memory=snapshot.memory, risk=snapshot.risk
+    )
+    decision, delta = decide_small_portfolio(snapshot)
+    assert decision['type'] == 'hold'
+    assert delta.is_empty, "Nenhuma alteração de estado deve ser produzida"
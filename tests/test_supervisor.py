@@ -0,0 +1,54 @@
+# tests/test_supervisor.py
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.supervisor import Supervisor, WarmStateStore
+
+
+class Counter:
+    """Componente mínimo com estado em memória exportável."""
+
+    def __init__(self):
+        self.value = 0
+
+    def export_state(self):
+        return {'value': self.value}
+
+    def restore_state(self, state):
+        self.value = state['value']
+
+
+def test_supervisor_restarts_session_without_recursion():
+    """O supervisor reinicia a sessão a cada falha, em laço, mantendo o estado em memória."""
+    counter = Counter()
+    sessions = []
+
+    async def session():
+        sessions.append(len(sessions))
+        counter.value += 1
+        if len(sessions) < 4:
+            raise RuntimeError('falha na sessão')
+
+    supervisor = Supervisor(session, restart_delay=0.001, max_restart_delay=0.004)
+    asyncio.run(supervisor.run())
+    assert supervisor.restarts == 3 and len(sessions) == 4, "A sessão deve ser reiniciada a cada falha"
+    assert counter.value == 4, "O estado em memória deve sobreviver aos reinícios"
+    assert 'falha na sessão' in supervisor.summary()['last_error'], "O último erro deve ser informado"
+
+
+def test_snapshot_restores_state_and_ignores_stale_snapshot(tmp_path):
+    """O snapshot restaura o estado dos componentes e é ignorado quando está velho demais."""
+    path = str(tmp_path / 'warm_state.pickle')
+    counter = Counter()
+    counter.value = 42
+    WarmStateStore(path).save({'counter': counter})
+
+    restored = Counter()
+    store = WarmStateStore(path)
+    assert 'counter' in store.restore({'counter': restored, 'ausente': Counter()}), "O componente deve ser restaurado"
+    assert restored.value == 42, "O valor restaurado deve ser o do snapshot"
+
+    stale = Counter()
+    WarmStateStore(path, max_age=-1).restore({'counter': stale})
+    assert stale.value == 0, "Um snapshot mais antigo que o limite deve ser ignorado"
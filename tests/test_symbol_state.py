@@ -0,0 +1,39 @@
+# tests/test_symbol_state.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.symbol_state import SymbolState
+from strategies.snapshot import StateDelta
+
+
+def journal_entries(state):
+    state.journal.sync()
+    with open(state.journal.journal_path) as file:
+        return [line for line in file if line.strip()]
+
+
+def test_single_buy_leaves_one_journal_entry(tmp_path):
+    """Testa se uma compra executada de uma vez fica uma única vez na memória curta da estratégia."""
+    state = SymbolState('ETHUSDT', state_dir=str(tmp_path))
+    try:
+        state.apply_delta(StateDelta(time=1.0, record=('buys', 100.0)))
+        state.record_trade('buys', 100.5, 1.0)
+        assert len(journal_entries(state)) == 1, "A execução não deve gerar uma segunda entrada no journal"
+        assert state.history.side('buys').memory_average == 100.0, "A média da memória deve contar a compra uma vez"
+        assert state.history.side('buys').count == 1, "O histórico completo deve registrar a execução"
+    finally:
+        state.close()
+
+
+def test_partially_filled_buy_leaves_one_journal_entry(tmp_path):
+    """Testa se as execuções parciais de uma compra não multiplicam a entrada da memória curta."""
+    state = SymbolState('ETHUSDT', state_dir=str(tmp_path))
+    try:
+        state.apply_delta(StateDelta(time=1.0, record=('buys', 100.0)))
+        for price in (100.1, 100.2, 100.3):
+            state.record_trade('buys', price, 0.1)
+        assert len(journal_entries(state)) == 1, "Cada execução parcial não deve gerar entradas no journal"
+        assert [entry['price'] for entry in state.transactions['buys']][-1] == 100.0, "A memória deve guardar o preço da decisão"
+        assert state.history.side('buys').count == 3, "Cada execução parcial entra no histórico completo"
+    finally:
+        state.close()
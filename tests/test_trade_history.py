@@ -0,0 +1,45 @@
+# tests/test_trade_history.py
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.trade_history import SideHistory, TradeHistory
+from services.transaction_manager import append_transaction, get_average_price
+
+
+def test_memory_matches_transaction_list_rules():
+    rng = random.Random(7)
+    history = TradeHistory()
+    transactions = {"buys": [{"price": 0.0, "time": 0.0}], "sells": [{"price": 0.0, "time": 0.0}]}
+    history.load_dict(transactions)
+
+    for step in range(500):
+        side = rng.choice(('buys', 'sells'))
+        if rng.random() < 0.1:
+            transactions[side] = [{"price": 0.0, "time": float(step)}]
+            history.side(side).reset(float(step))
+        else:
+            price = rng.uniform(90, 110)
+            append_transaction(transactions, side, {"price": price, "time": float(step)})
+            history.side(side).add(price, float(step))
+
+        assert history.to_dict() == transactions
+        for name in ('buys', 'sells'):
+            assert abs(history.side(name).memory_average - get_average_price(transactions, name)) < 1e-9
+
+
+def test_full_history_aggregates():
+    side = SideHistory(window_seconds=100)
+    for i in range(50):
+        side.record(price=100.0 + i, timestamp=i * 10.0, quantity=1.0 + i % 3)
+
+    assert side.count == 50
+    assert side.last_n_average(5) == sum(100.0 + i for i in range(45, 50)) / 5
+    expected_vwap = sum((100.0 + i) * (1.0 + i % 3) for i in range(50)) / sum(1.0 + i % 3 for i in range(50))
+    assert abs(side.vwap() - expected_vwap) < 1e-9
+    # Janela de 100s terminando em 490s: transações de 390s a 490s
+    assert side.window_count(now=490.0) == 11
+    assert side.window_average(now=490.0) == sum(100.0 + i for i in range(39, 50)) / 11
+    # Reset limpa apenas a memória curta
+    side.reset(500.0)
+    assert side.memory_average == 0.0 and side.count == 50
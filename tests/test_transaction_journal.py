@@ -0,0 +1,73 @@
+# tests/test_transaction_journal.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.transaction_journal import TransactionJournal
+from services.transaction_manager import write_json_atomic
+
+
+def crash(journal):
+    """Simula uma queda: fecha o arquivo sem compactar (as entradas já sincronizadas ficam no disco)."""
+    journal.sync()
+    journal._file.close()
+
+
+def add_trades(journal, start, count):
+    for step in range(start, start + count):
+        journal.add('buys' if step % 2 else 'sells', 100.0 + step, float(step))
+
+
+def test_torn_trailing_entry_is_dropped_and_journal_keeps_working(tmp_path):
+    """Uma linha cortada no meio da escrita é descartada e as entradas seguintes não se misturam a ela."""
+    path = str(tmp_path / 'transaction_history.json')
+    journal = TransactionJournal(path, compact_every=10_000)
+    add_trades(journal, 1, 6)
+    expected = journal.transactions
+    crash(journal)
+    with open(journal.journal_path, 'a') as file:
+        file.write('{"op": "add", "side": "bu')  # Queda no meio da escrita
+
+    journal = TransactionJournal(path, compact_every=10_000)
+    assert journal.transactions == expected, "O histórico deve ser reconstruído sem a entrada cortada"
+    assert journal.seq == 6, "A sequência deve continuar da última entrada completa"
+    add_trades(journal, 7, 2)
+    expected = journal.transactions
+    crash(journal)
+
+    journal = TransactionJournal(path, compact_every=10_000)
+    assert journal.transactions == expected, "As entradas gravadas depois da recuperação devem ser reaplicadas"
+    journal.close()
+
+
+def test_crash_during_compaction_rebuilds_history_without_duplicates(tmp_path):
+    """Queda com o journal rotacionado e o snapshot ainda não gravado: nada se perde."""
+    path = str(tmp_path / 'transaction_history.json')
+    journal = TransactionJournal(path, compact_every=10_000)
+    add_trades(journal, 1, 5)
+    journal._start_compaction()  # Journal rotacionado; a gravação do snapshot não chega a acontecer
+    add_trades(journal, 6, 3)
+    expected = journal.transactions
+    crash(journal)
+
+    journal = TransactionJournal(path, compact_every=10_000)
+    assert journal.transactions == expected, "As entradas do journal rotacionado e do novo devem ser reaplicadas"
+    assert journal.seq == 8, "Cada entrada deve ser aplicada uma única vez"
+    journal.close()
+    assert not os.path.exists(journal.compacting_path), "A compactação no encerramento deve descartar o journal antigo"
+
+
+def test_crash_after_compaction_snapshot_skips_covered_entries(tmp_path):
+    """Queda entre a gravação do snapshot e a remoção do journal antigo: as entradas cobertas não se repetem."""
+    path = str(tmp_path / 'transaction_history.json')
+    journal = TransactionJournal(path, compact_every=10_000)
+    add_trades(journal, 1, 5)
+    snapshot = journal._start_compaction()
+    write_json_atomic(path, snapshot)  # Snapshot gravado; o journal antigo ainda não foi removido
+    add_trades(journal, 6, 2)
+    expected = journal.transactions
+    crash(journal)
+
+    journal = TransactionJournal(path, compact_every=10_000)
+    assert journal.transactions == expected, "O snapshot mais o journal novo devem reconstruir o histórico"
+    assert journal.entries_since_compaction == 2, "Só as entradas posteriores ao snapshot devem ser reaplicadas"
+    journal.close()
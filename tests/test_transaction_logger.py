@@ -0,0 +1,122 @@
+# tests/test_transaction_logger.py
+import sys
+import os
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services.transaction_logger import COLUMNS, LEDGER_FIELDS, TransactionLogger, format_ledger, legacy_to_ledger
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """O ledger e o Excel usam arquivos do diretório atual: cada teste roda em um diretório próprio."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def portfolio(cash_balance, assets):
+    """O que o TransactionLogger consulta do PortfolioManager."""
+    return SimpleNamespace(cash_balance=cash_balance, assets=assets,
+                           risk_snapshot=SimpleNamespace(drawdown=0.01, max_drawdown=0.02))
+
+
+def test_transactions_are_appended_to_the_csv_and_read_back():
+    """O buffer é anexado ao ledger no flush e as linhas voltam com os valores numéricos brutos."""
+    transaction_logger = TransactionLogger(initial_balance=1000.0, buffer_size=2)
+    assert list(pd.read_csv(transaction_logger.ledger_file).columns) == LEDGER_FIELDS, "O ledger novo deve ter o cabeçalho tipado"
+
+    buy = {'asset': 'ETHUSDT', 'type': 'buy', 'quantity': 0.1, 'price': 2000.0, 'reason': 'entrada'}
+    transaction_logger.record_transaction(buy, portfolio(800.0, {'ETH': {'quantity': 0.1, 'average_cost': 2000.0}}), {'ETH': 2000.0})
+    assert len(pd.read_csv(transaction_logger.ledger_file)) == 0, "Com o buffer incompleto nada deve ser gravado"
+
+    sell = {'asset': 'ETHUSDT', 'type': 'sell', 'quantity': 0.1, 'price': 2100.0, 'reason': 'saída, com vírgula'}
+    transaction_logger.record_transaction(sell, portfolio(1010.0, {}), {'ETH': 2100.0}, average_cost=2000.0)
+    ledger = pd.read_csv(transaction_logger.ledger_file, keep_default_na=False)
+    assert list(ledger['transaction_type']) == ['buy', 'sell'], "O buffer cheio deve ser anexado ao ledger"
+    assert transaction_logger.buffered == 0 and transaction_logger.ledger_version == 1, "O flush deve esvaziar o buffer"
+    assert ledger['investment'][0] == 200.0 and ledger['returned_to_cash'][1] == 210.0, "Os valores devem ser gravados sem formatação"
+    assert abs(ledger['profit_loss'][1] - 10.0) < 1e-9 and abs(ledger['cumulative_profit_loss'][1] - 10.0) < 1e-9, \
+        "O resultado da venda deve usar o custo médio informado"
+    assert ledger['reason'][1] == 'saída, com vírgula', "Textos com vírgula devem ser preservados no CSV"
+
+    transaction_logger.record_transaction(buy, portfolio(800.0, {'ETH': {'quantity': 0.1, 'average_cost': 2000.0}}), {'ETH': 2000.0})
+    transaction_logger.flush_buffer()
+    assert len(pd.read_csv(transaction_logger.ledger_file)) == 3, "Um novo flush deve anexar sem reescrever as linhas anteriores"
+    TransactionLogger(initial_balance=1000.0)
+    assert len(pd.read_csv(transaction_logger.ledger_file)) == 3, "Reabrir o ledger deve manter as linhas gravadas"
+
+
+def test_excel_export_formats_the_ledger(workdir):
+    """A exportação gera o Excel a partir do ledger, com as colunas formatadas do relatório."""
+    transaction_logger = TransactionLogger(initial_balance=1000.0)
+    sell = {'asset': 'ETHUSDT', 'type': 'sell', 'quantity': 0.1, 'price': 2100.0, 'reason': 'saída'}
+    transaction_logger.record_transaction(sell, portfolio(1010.0, {}), {'ETH': 2100.0}, average_cost=2000.0)
+
+    assert transaction_logger.request_excel_export().result() == 1, "A exportação deve incluir a linha do buffer"
+    assert transaction_logger.exported_version == transaction_logger.ledger_version, "O Excel deve ficar em dia com o ledger"
+    report = pd.read_excel(workdir / transaction_logger.file_name, dtype=str)
+    assert report['profit_loss'][0] == '10.00' and report['transaction_total'][0] == '210.00', "Os valores devem sair formatados"
+    assert report['decision_quality'][0] == 'Good' and report['performance'][0] == 'Profit of 10.00', \
+        "A avaliação da decisão deve seguir o resultado"
+    assert report['drawdown_percentage'][0] == '1.00', "O drawdown deve sair em porcentagem"
+
+
+def legacy_report():
+    """Duas linhas no formato antigo do relatório: todas as colunas como texto já formatado."""
+    rows = [
+        ['2024-05-01 10:00:00', 'ETHUSDT', 'buy', '0.10000000', '3000.00', '300.00', 'entrada', '0.00', '1000.00',
+         '0.10000000', '300.00', '0.00', '0.00', '700.00', '0.00', '0.00', '300.00', 'Neutral', 'Loss of 0.00', '0.00', '0.00'],
+        ['2024-05-02 10:00:00', 'ETHUSDT', 'sell', '0.10000000', '3100.00', '310.00', 'saída', '10.00', '1010.00',
+         '0.00000000', '0.00', '310.00', '10.00', '1010.00', '1.00', '1.00', '0.00', 'Good', 'Profit of 10.00', '0.00', '0.00'],
+    ]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_legacy_rows_become_typed_ledger_records():
+    """As colunas formatadas do relatório antigo viram campos numéricos do ledger; os campos novos começam zerados."""
+    ledger = legacy_to_ledger(legacy_report())
+    assert list(ledger.columns) == LEDGER_FIELDS, "O ledger convertido deve ter os campos atuais"
+    assert ledger['price'].tolist() == [3000.0, 3100.0] and ledger['profit_loss'].tolist() == [0.0, 10.0], \
+        "Os textos formatados devem virar números"
+    assert ledger['time'][1] - ledger['time'][0] == 86400, "A data deve virar um timestamp"
+    assert ledger['max_drawdown'].tolist() == [0.0, 0.0], "Campos ausentes no formato antigo começam zerados"
+
+    report = format_ledger(ledger)
+    assert list(report.columns) == COLUMNS, "O relatório deve voltar às colunas do Excel"
+    assert report['price_per_asset'].tolist() == ['3000.00', '3100.00'] and report['decision_quality'].tolist() == ['Neutral', 'Good'], \
+        "O relatório gerado do ledger deve reproduzir o formato antigo"
+
+
+def test_legacy_csv_ledger_is_migrated_on_startup(workdir):
+    """Um ledger CSV no formato antigo é convertido para registros tipados ao iniciar o logger."""
+    legacy_report().to_csv(workdir / 'portfolio_history_detailed.csv', index=False)
+    transaction_logger = TransactionLogger(initial_balance=1000.0)
+
+    ledger = pd.read_csv(transaction_logger.ledger_file, keep_default_na=False)
+    assert list(ledger.columns) == LEDGER_FIELDS, "O ledger deve ser regravado no formato atual"
+    assert ledger['returned_to_cash'].tolist() == [0.0, 310.0] and ledger['reason'].tolist() == ['entrada', 'saída'], \
+        "As transações antigas devem ser preservadas"
+    assert not os.path.exists(transaction_logger.ledger_file + '.tmp'), "O arquivo temporário da conversão deve ser removido"
+
+
+def test_typed_ledger_from_a_previous_version_gets_the_new_fields(workdir):
+    """Um ledger tipado sem os campos de drawdown recebe os campos novos sem perder as linhas."""
+    ledger = legacy_to_ledger(legacy_report()).drop(columns=['drawdown', 'max_drawdown'])
+    ledger.to_csv(workdir / 'portfolio_history_detailed.csv', index=False)
+    TransactionLogger(initial_balance=1000.0)
+
+    migrated = pd.read_csv(workdir / 'portfolio_history_detailed.csv', keep_default_na=False)
+    assert list(migrated.columns) == LEDGER_FIELDS, "Os campos novos devem ser acrescentados"
+    assert migrated['time'].tolist() == ledger['time'].tolist(), "As linhas existentes devem ser mantidas"
+    assert migrated['drawdown'].tolist() == [0.0, 0.0], "Os campos novos começam zerados"
+
+
+def test_existing_excel_is_imported_into_a_new_ledger(workdir):
+    """Sem ledger CSV, o histórico do Excel existente é importado para o ledger novo."""
+    legacy_report().to_excel(workdir / 'portfolio_history_detailed.xlsx', index=False)
+    transaction_logger = TransactionLogger(initial_balance=1000.0)
+
+    ledger = pd.read_csv(transaction_logger.ledger_file, keep_default_na=False)
+    assert list(ledger.columns) == LEDGER_FIELDS and len(ledger) == 2, "O histórico do Excel deve ir para o ledger"
+    assert ledger['cumulative_profit_loss'].tolist() == [0.0, 10.0], "Os valores importados devem ser numéricos"
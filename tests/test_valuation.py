@@ -0,0 +1,66 @@
+# tests/test_valuation.py
+import sys
+import os
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from services import portfolio_manager as portfolio_manager_module
+from services.portfolio_manager import PortfolioManager
+from services.valuation import ValuationService, value_portfolio
+
+
+class StaticMarketData:
+    """Cache de preços por símbolo, sem rede."""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    async def refresh_prices(self):
+        pass
+
+
+def test_nav_exposure_and_unrealized_pnl():
+    """NAV, exposição e resultado não realizado são calculados sobre as posições marcadas a mercado."""
+    assets = {'ETH': {'quantity': 0.5, 'average_cost': 2000.0}, 'BTC': {'quantity': 0.01, 'average_cost': 60000.0}}
+    valuation = value_portfolio(400.0, assets, {'ETH': 2200.0, 'BTC': 50000.0})
+
+    assert valuation.positions_value == 1600.0 and valuation.nav == 2000.0, "O NAV deve ser o caixa mais as posições a mercado"
+    assert valuation.cost_basis == 1600.0, "O custo deve somar quantidade vezes custo médio"
+    assert abs(valuation.unrealized_pnl - 0.0) < 1e-9, "O ganho em ETH (+100) e a perda em BTC (-100) se anulam"
+    assert valuation.exposure == 0.8, "A exposição é a fração do NAV em posições"
+    positions = valuation.to_dict()['positions']
+    assert positions['ETH']['unrealized_pnl'] == 100.0 and positions['BTC']['unrealized_pnl'] == -100.0, \
+        "O resultado não realizado deve ser calculado por ativo"
+
+
+def test_asset_without_price_is_marked_at_average_cost():
+    """Um ativo sem preço de mercado é marcado pelo custo médio e não gera resultado não realizado."""
+    assets = {'ETH': {'quantity': 0.5, 'average_cost': 2000.0}, 'XYZ': {'quantity': 10.0, 'average_cost': 3.0}}
+    valuation = value_portfolio(100.0, assets, {'ETH': 2100.0})
+
+    assert valuation.missing_prices == ('XYZ',), "O ativo sem preço deve ser informado"
+    assert valuation.to_dict()['positions']['XYZ'] == {'quantity': 10.0, 'price': 3.0, 'value': 30.0, 'unrealized_pnl': 0.0}, \
+        "O ativo sem preço deve ser marcado pelo custo médio"
+    assert valuation.nav == 1180.0 and valuation.unrealized_pnl == 50.0, "Só o ativo com preço contribui para o resultado"
+
+
+def test_empty_portfolio_has_no_exposure():
+    """Sem posições, o NAV é o caixa e a exposição é zero (inclusive com caixa zerado)."""
+    assert value_portfolio(500.0, {}, {}).nav == 500.0, "Sem posições o NAV é o caixa"
+    assert value_portfolio(0.0, {}, {}).exposure == 0.0, "Com NAV zero a exposição deve ser zero"
+
+
+def test_service_values_from_the_price_cache_and_updates_risk(monkeypatch):
+    """O serviço usa o cache de preços por símbolo e publica a avaliação nas métricas de risco."""
+    monkeypatch.setattr(portfolio_manager_module, 'get_account_balance',
+                        lambda: pd.DataFrame([{'asset': 'USDT', 'free': 1000.0, 'locked': 0.0}]))
+    portfolio = PortfolioManager()
+    portfolio.apply_fill('ETH', 'buy', 0.1, 200.0)
+    portfolio.apply_fill('SOL', 'buy', 2.0, 300.0)
+    service = ValuationService(portfolio, StaticMarketData({'ETHUSDT': 2500.0, 'BTCUSDT': 60000.0}))
+
+    assert service.asset_prices() == {'USDT': 1.0, 'ETH': 2500.0}, "Só os ativos do portfólio com preço em cache entram"
+    valuation = service.value()
+    assert valuation.nav == 1050.0 and valuation.missing_prices == ('SOL',), "SOL sem preço deve ser marcado pelo custo"
+    assert portfolio.risk_snapshot.equity == 1050.0 and portfolio.risk_snapshot.unrealized_pnl == 50.0, \
+        "A avaliação deve ser publicada nas métricas de risco"
+    assert service.summary()['nav'] == 1050.0, "O resumo deve trazer a última avaliação"